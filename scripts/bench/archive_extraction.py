@@ -0,0 +1,227 @@
+# Import Statements
+# First party
+import os
+import sys
+import time
+import random
+import shutil
+import hashlib
+import tarfile
+import tempfile
+from typing import Final, Callable
+
+# Second party
+import common
+import utils.archive as archive
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || archive_extraction.py
+# ---------------------------------------
+# Measures the time to extract a synthetic kernel-like source
+# tarball (.tar.xz, a tree of C files under arch/, drivers/,
+# fs/ and so on, with a symlink and an executable) with
+# `tarfile.open().extractall` (how sources used to be extracted)
+# and with each `extractArchive` engine, whole and skipping the
+# architectures a build does not need. Every engine must
+# extract the same tree.
+#
+# Usage: python3 ./bench/archive_extraction.py [files per directory...]
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Enums
+
+# Interfaces
+
+# Constants
+DEFAULT_FILE_COUNTS: Final[tuple[int, ...]] = (100,)
+SOURCE_DIRECTORY_NAME: Final[str] = "linux-6.6.10"
+ARCHITECTURES: Final[tuple[str, ...]] = (
+    "arm64", "x86", "arm", "mips", "powerpc", "riscv", "s390", "sparc", "loongarch", "m68k",
+)
+# Directories of the tree, each holding the given number of files
+SOURCE_DIRECTORIES: Final[tuple[str, ...]] = (
+    *(f"arch/{architecture}/{subdirectory}" for architecture in ARCHITECTURES for subdirectory in ("kernel", "mm", "boot/dts", "include/asm")),
+    *(f"drivers/{driver}/{index}" for driver in ("net", "gpu", "usb", "scsi", "media", "staging", "tty", "i2c") for index in range(8)),
+    "fs/ext4", "fs/btrfs", "kernel", "mm", "net/ipv4", "net/core", "include/linux",
+    "scripts/kconfig", "Documentation/admin-guide", "tools/testing/selftests",
+)
+# Architectures skipped when building for arm64
+EXCLUDED_PATTERNS: Final[tuple[str, ...]] = tuple(
+    f"linux-*/arch/{architecture}" for architecture in ARCHITECTURES if architecture != "arm64"
+)
+RUN_COUNT: Final[int] = 3
+
+# Public Variables
+
+# Private Variables
+
+# main()
+def main(arguments: list[str]) -> None:
+    # Log the decoders found
+    print(f"{os.cpu_count()} CPUs, xz decoder: {' '.join(archive.getDecoderCommand('linux.tar.xz') or ('none',))}")
+
+    # Iterate through each tree size
+    for fileCount in common.getPackageCounts(arguments, DEFAULT_FILE_COUNTS):
+        with tempfile.TemporaryDirectory(prefix="alarm-bench-") as temporaryDirectory:
+            # Write the tarball
+            archivePath: str = _createArchive(temporaryDirectory, fileCount)
+            print(
+                f"{fileCount * len(SOURCE_DIRECTORIES)} files  {_getTreeSize(f'{temporaryDirectory}/source') / 1024**2:.1f} MiB  tarball {os.path.getsize(archivePath) / 1024**2:.1f} MiB"
+            )
+
+            # The tree every engine must extract
+            def extractAll(destinationDirectory: str) -> None:
+                with tarfile.open(archivePath) as tarFile:
+                    tarFile.extractall(destinationDirectory, filter="data")
+            expectedTree: dict[str, tuple] = _runExtraction(
+                "tarfile.open().extractall", extractAll, f"{temporaryDirectory}/output"
+            )
+            expectedFilteredTree: dict[str, tuple] = {
+                memberName: member
+                for memberName, member in expectedTree.items()
+                if not archive.isExcluded(memberName, EXCLUDED_PATTERNS)
+            }
+
+            # Iterate through each engine
+            for engine in ("python", "decoder", "tar"):
+                # Engine needs a decoder
+                if engine != "python" and archive.getDecoderCommand(archivePath) is None:
+                    print(f"extractArchive, {engine:<7} engine         skipped, no decoder installed")
+                    continue
+
+                # Use the engine, `extractArchive` reads it on every call
+                archive.EXTRACTION_ENGINE = engine
+
+                # Extract the whole tree
+                if _runExtraction(
+                    f"extractArchive, {engine} engine",
+                    lambda destinationDirectory: archive.extractArchive(archivePath, destinationDirectory),
+                    f"{temporaryDirectory}/output",
+                ) != expectedTree:
+                    raise Exception(f'The {engine} engine extracted a different tree')
+
+                # Skip the other architectures
+                if _runExtraction(
+                    f"extractArchive, {engine} engine, arm64",
+                    lambda destinationDirectory: archive.extractArchive(archivePath, destinationDirectory, EXCLUDED_PATTERNS),
+                    f"{temporaryDirectory}/output",
+                ) != expectedFilteredTree:
+                    raise Exception(f'The {engine} engine extracted a different arm64 tree')
+
+# Public Methods
+
+# Private Methods
+def _createArchive(directory: str, fileCount: int) -> str:
+    """
+    Writes a kernel-like source tree and packs it into a .tar.xz.
+
+    @param { str } directory - The directory to write `source` and the tarball to
+    @param { int } fileCount - The number of files per source directory
+    @return str - The path to the tarball
+    """
+    # Words the C files are made of, the same on every run
+    generator: Final[random.Random] = random.Random(1)
+    words: Final[list[str]] = [
+        "".join(generator.choice("abcdefghijklmnopqrstuvwxyz_") for _ in range(generator.randint(2, 12)))
+        for _ in range(5000)
+    ]
+
+    # Write the files
+    sourceDirectory: Final[str] = f"{directory}/source/{SOURCE_DIRECTORY_NAME}"
+    for sourceSubdirectory in SOURCE_DIRECTORIES:
+        os.makedirs(f"{sourceDirectory}/{sourceSubdirectory}", exist_ok=True)
+        for index in range(fileCount):
+            with open(f"{sourceDirectory}/{sourceSubdirectory}/file-{index}.c", "w") as sourceFile:
+                sourceFile.write(" ".join(generator.choices(words, k=generator.randint(200, 2500))))
+
+    # Add a symlink and an executable
+    os.symlink("../../../arm/boot/dts", f"{sourceDirectory}/arch/arm64/boot/dts/arm")
+    os.chmod(f"{sourceDirectory}/scripts/kconfig/file-0.c", 0o755)
+
+    # Pack the tree, with a light preset so the setup stays quick, decoding speed barely depends on it
+    archivePath: Final[str] = f"{directory}/{SOURCE_DIRECTORY_NAME}.tar.xz"
+    with tarfile.open(archivePath, "w:xz", preset=1) as tarFile:
+        tarFile.add(sourceDirectory, SOURCE_DIRECTORY_NAME)
+
+    # Return
+    return archivePath
+
+def _runExtraction(label: str, extract: Callable[[str], any], destinationDirectory: str) -> dict[str, tuple]:
+    """
+    Extracts a tarball several times, logging the fastest run.
+
+    @param { str } label - The name of the way of extracting
+    @param { Callable[[str], any] } extract - Extracts the tarball into a directory
+    @param { str } destinationDirectory - The directory to extract into
+    @return dict[str, tuple] - The extracted tree, see `_readTree`
+    """
+    # Time each run into an empty directory
+    elapsedTimes: list[float] = []
+    for _ in range(RUN_COUNT):
+        shutil.rmtree(destinationDirectory, ignore_errors=True)
+        os.makedirs(destinationDirectory)
+        startTime: float = time.perf_counter()
+        extract(destinationDirectory)
+        elapsedTimes.append(time.perf_counter() - startTime)
+
+    # Log
+    print(
+        f"{label:<40} best {min(elapsedTimes):6.2f} s  median {sorted(elapsedTimes)[len(elapsedTimes) // 2]:6.2f} s"
+    )
+
+    # Return
+    return _readTree(destinationDirectory)
+
+def _readTree(directory: str) -> dict[str, tuple]:
+    """
+    Returns the mode and content of every entry below a directory.
+
+    @param { str } directory - The directory
+    @return dict[str, tuple] - The mode and link target or content digest by relative path
+    """
+    # Output tree
+    tree: dict[str, tuple] = {}
+
+    # Iterate through every entry
+    for rootDirectory, directoryNames, fileNames in os.walk(directory):
+        for entryName in directoryNames + fileNames:
+            # Get the entry
+            entryPath: str = os.path.join(rootDirectory, entryName)
+            entryStat: os.stat_result = os.lstat(entryPath)
+
+            # Read its link target or content
+            if os.path.islink(entryPath):
+                content: str = os.readlink(entryPath)
+            elif os.path.isfile(entryPath):
+                with open(entryPath, "rb") as entryFile:
+                    content = hashlib.sha256(entryFile.read()).hexdigest()
+            else:
+                content = None
+
+            # Add it
+            tree[os.path.relpath(entryPath, directory)] = (entryStat.st_mode, content)
+
+    # Return
+    return tree
+
+def _getTreeSize(directory: str) -> int:
+    """
+    Returns the size of the files below a directory.
+
+    @param { str } directory - The directory
+    @return int - The size in bytes
+    """
+    return sum(
+        os.lstat(os.path.join(rootDirectory, fileName)).st_size
+        for rootDirectory, _, fileNames in os.walk(directory)
+        for fileName in fileNames
+    )
+
+# Run
+if __name__ == "__main__":
+    main(sys.argv[1:])
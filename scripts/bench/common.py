@@ -0,0 +1,136 @@
+# Import Statements
+# First party
+import os
+import sys
+import json
+import time
+from typing import Final, Callable
+
+# Second party
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || common.py
+# ---------------------------------------
+# Helpers shared by the benchmarks: synthetic package
+# databases of any size, the number of bytes a process wrote,
+# and timing a call a few times. Benchmarks are run from the
+# scripts directory, e.g. `python3 ./bench/database_writes.py`.
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Enums
+
+# Interfaces
+
+# Constants
+# The scripts directory, so benchmarks can import `utils`
+SCRIPTS_DIRECTORY: Final[str] = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Public Variables
+
+# Private Variables
+
+# Public Methods
+def createDatabase(packageCount: int) -> dict:
+    """
+    Returns a synthetic package database shaped like db.json. Every tenth
+    package is marked for build.
+
+    @param { int } packageCount - The number of packages
+    @return dict - The raw database
+    """
+    # Output database
+    rawDatabase: dict = {"packages": [], "package_info": {}}
+
+    # Iterate through each package
+    for packageIndex in range(packageCount):
+        # Get the package name
+        packageName: str = f"package-{packageIndex}"
+
+        # Add the package
+        rawDatabase["packages"].append(packageName)
+        rawDatabase["package_info"][packageName] = {
+            "version": f"1.0.{packageIndex}",
+            "urls": {
+                "type": "http",
+                "source_url": f"https://example.org/{packageName}/{packageName}-{{x}}.tar.xz",
+                "upstream_url": f"https://archlinux.org/packages/extra/x86_64/{packageName}/",
+            },
+            "paths": {
+                "repo": f"/packages/extra/os/aarch64/{packageName}",
+                "pkgbuild": f"/pkgbuild/{packageName}",
+            },
+            "buildInfo": {
+                "markedForBuild": packageIndex % 10 == 0,
+                "buildFunctionName": "build_pkg_synthetic",
+                "prepareFunctionName": "prepare_pkg_synthetic",
+            },
+        }
+
+    # Return
+    return rawDatabase
+
+def writeDatabase(databaseFilePath: str, packageCount: int) -> None:
+    """
+    Writes a synthetic package database, see `createDatabase`.
+
+    @param { str } databaseFilePath - The path to write the database to
+    @param { int } packageCount - The number of packages
+    @return None
+    """
+    with open(databaseFilePath, "w") as databaseFile:
+        json.dump(createDatabase(packageCount), databaseFile)
+
+def getWrittenBytes() -> int:
+    """
+    Returns the number of bytes this process passed to write calls so far.
+
+    @return int - The bytes written, from `/proc/self/io`
+    """
+    with open("/proc/self/io", "r") as ioFile:
+        return next(int(line.split()[1]) for line in ioFile if line.startswith("wchar:"))
+
+def measure(function: Callable[[], any], repeatCount: int = 3) -> float:
+    """
+    Runs a function several times and returns its fastest run.
+
+    @param { Callable[[], any] } function - The function to time
+    @param { int } repeatCount - The number of runs (Optional)
+    @return float - The fastest run in seconds
+    """
+    # Output time
+    fastestTime: float = None
+
+    # Time each run
+    for _ in range(repeatCount):
+        startTime: float = time.perf_counter()
+        function()
+        elapsedTime: float = time.perf_counter() - startTime
+        fastestTime = elapsedTime if fastestTime is None else min(fastestTime, elapsedTime)
+
+    # Return
+    return fastestTime
+
+def getPackageCounts(arguments: list[str], defaultPackageCounts: tuple[int, ...]) -> tuple[int, ...]:
+    """
+    Returns the package counts given on the command line, or the defaults.
+
+    @param { list[str] } arguments - The command line arguments
+    @param { tuple[int, ...] } defaultPackageCounts - The counts to use without arguments
+    @return tuple[int, ...] - The package counts
+    """
+    return tuple(int(argument) for argument in arguments) or defaultPackageCounts
+
+# Private Methods
+
+# Set up the import path of `utils`
+if SCRIPTS_DIRECTORY not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIRECTORY)
+
+# Run
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,129 @@
+# Import Statements
+# First party
+import ssl
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+from typing import Final
+from urllib import request
+
+# Second party
+import common
+import utils.network as network
+import tests.fixtures as fixtures
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || connection_pool.py
+# ---------------------------------------
+# Measures the connections opened and the time per request
+# to fetch a package page many times from a local keep-alive
+# server, with a new `urlopen` connection per request (how the
+# pages used to be fetched) and over the connection pool. HTTPS
+# is measured too if `openssl` can create a certificate.
+#
+# Usage: python3 ./bench/connection_pool.py [request count...]
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Enums
+
+# Interfaces
+
+# Constants
+DEFAULT_REQUEST_COUNTS: Final[tuple[int, ...]] = (500,)
+
+# Public Variables
+
+# Private Variables
+
+# main()
+def main(arguments: list[str]) -> None:
+    with tempfile.TemporaryDirectory(prefix="alarm-bench-") as temporaryDirectory:
+        # Get the servers to measure, plain and, if possible, TLS
+        servers: Final[list[tuple[str, fixtures.LocalServer, ssl.SSLContext]]] = [
+            ("http", fixtures.LocalServer(fixtures.PackagePageHandler), None)
+        ]
+        clientContext: Final[ssl.SSLContext] = _createCertificate(temporaryDirectory)
+        if clientContext is not None:
+            # Wrap the server's socket
+            tlsServer: fixtures.LocalServer = fixtures.LocalServer(fixtures.PackagePageHandler)
+            serverContext: ssl.SSLContext = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            serverContext.load_cert_chain(f"{temporaryDirectory}/cert.pem", f"{temporaryDirectory}/key.pem")
+            tlsServer.socket = serverContext.wrap_socket(tlsServer.socket, server_side=True)
+            servers.append(("https", tlsServer, clientContext))
+        else:
+            print("openssl not found, skipping HTTPS")
+
+        # Iterate through each request count
+        for requestCount in common.getPackageCounts(arguments, DEFAULT_REQUEST_COUNTS):
+            for scheme, server, sslContext in servers:
+                # Get the URL, by name so the certificate matches
+                url: str = server.getURL(fixtures.getPackagePagePath("linux")).replace(
+                    "http://127.0.0.1", f"{scheme}://localhost"
+                )
+
+                # A new connection per request
+                server.connectionCount = 0
+                startTime: float = time.perf_counter()
+                for _ in range(requestCount):
+                    with request.urlopen(url, context=sslContext) as response:
+                        response.read()
+                urlopenTime: float = (time.perf_counter() - startTime) / requestCount
+                urlopenConnectionCount: int = server.connectionCount
+
+                # Connections kept alive by the pool
+                server.connectionCount = 0
+                connectionPool: network.ConnectionPool = network.ConnectionPool(sslContext=sslContext)
+                startTime = time.perf_counter()
+                for _ in range(requestCount):
+                    with connectionPool.openURL(url) as response:
+                        response.read()
+                poolTime: float = (time.perf_counter() - startTime) / requestCount
+                connectionPool.close()
+
+                # Log
+                print(
+                    f"{requestCount:>6} requests  {scheme:<5}  urlopen {urlopenConnectionCount:>6} connections {urlopenTime * 1000:6.2f} ms/request  pool {server.connectionCount:>3} connections {poolTime * 1000:6.2f} ms/request"
+                )
+
+        # Stop the servers
+        for _, server, _ in servers:
+            server.close()
+
+# Public Methods
+
+# Private Methods
+def _createCertificate(directory: str) -> ssl.SSLContext:
+    """
+    Creates a self-signed certificate for localhost with `openssl`.
+
+    @param { str } directory - The directory to write cert.pem and key.pem to
+    @return ssl.SSLContext - A client context trusting the certificate, None if `openssl` is missing
+    """
+    # Nothing to create it with
+    if shutil.which("openssl") is None:
+        return None
+
+    # Create the certificate
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+            "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost",
+            "-keyout", f"{directory}/key.pem", "-out", f"{directory}/cert.pem",
+        ],
+        check=True,
+        capture_output=True,
+    )
+
+    # Return
+    return ssl.create_default_context(cafile=f"{directory}/cert.pem")
+
+# Run
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,103 @@
+# Import Statements
+# First party
+import os
+import sys
+import tempfile
+import subprocess
+from typing import Final
+
+# Second party
+import common
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || database_startup.py
+# ---------------------------------------
+# Measures how long a fresh process takes to open the
+# database and read a package, like a short-lived `cli.py`
+# call. Compared are decoding db.json (cold, no snapshot
+# cache), loading the binary snapshot cache (warm) and the
+# lazy engine. Each mode runs in new processes, the fastest
+# of a few runs is reported.
+#
+# Usage: python3 ./bench/database_startup.py [package count...]
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Enums
+
+# Interfaces
+
+# Constants
+DEFAULT_PACKAGE_COUNTS: Final[tuple[int, ...]] = (1000, 10000, 100000)
+RUN_COUNT: Final[int] = 5
+# Opens the database and reads a package, printing the seconds it took
+PROBE_SOURCE: Final[str] = """
+import sys, time
+startTime = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import utils.db as db
+database = db.Database(sys.argv[2], lazy=sys.argv[3] == "lazy")
+database.getPackage("package-7").getPackageVersion()
+print(time.perf_counter() - startTime)
+"""
+
+# Public Variables
+
+# Private Variables
+
+# main()
+def main(arguments: list[str]) -> None:
+    # Iterate through each database size
+    for packageCount in common.getPackageCounts(arguments, DEFAULT_PACKAGE_COUNTS):
+        with tempfile.TemporaryDirectory(prefix="alarm-bench-") as temporaryDirectory:
+            # Write the database
+            databaseFilePath: str = f"{temporaryDirectory}/db.json"
+            common.writeDatabase(databaseFilePath, packageCount)
+
+            # Decode db.json, dropping the snapshot cache before each run
+            coldTime: float = min(
+                _runProbe(databaseFilePath, "eager", dropCache=True) for _ in range(RUN_COUNT)
+            )
+
+            # Load the snapshot cache written by the previous runs
+            warmTime: float = min(_runProbe(databaseFilePath, "eager") for _ in range(RUN_COUNT))
+
+            # Only parse the package read
+            lazyTime: float = min(_runProbe(databaseFilePath, "lazy") for _ in range(RUN_COUNT))
+
+            # Log
+            print(
+                f"{packageCount:>7} packages  cold JSON {coldTime * 1000:8.1f} ms  warm snapshot {warmTime * 1000:8.1f} ms  lazy {lazyTime * 1000:7.1f} ms  db.json {os.path.getsize(databaseFilePath) / 1024**2:6.1f} MiB"
+            )
+
+# Public Methods
+
+# Private Methods
+def _runProbe(databaseFilePath: str, mode: str, dropCache: bool = False) -> float:
+    """
+    Opens the database in a new process and reads a package.
+
+    @param { str } databaseFilePath - The path to the database
+    @param { str } mode - `eager` or `lazy`
+    @param { bool } dropCache - Delete the snapshot cache first (Optional)
+    @return float - The seconds from the start of the process's imports to the package being read
+    """
+    # Delete the snapshot cache
+    cacheFilePath: Final[str] = f"{databaseFilePath}.cache"
+    if dropCache and os.path.exists(cacheFilePath):
+        os.remove(cacheFilePath)
+
+    # Run the probe
+    return float(
+        subprocess.check_output(
+            [sys.executable, "-c", PROBE_SOURCE, common.SCRIPTS_DIRECTORY, databaseFilePath, mode]
+        )
+    )
+
+# Run
+if __name__ == "__main__":
+    main(sys.argv[1:])
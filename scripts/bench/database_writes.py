@@ -0,0 +1,164 @@
+# Import Statements
+# First party
+import os
+import sys
+import json
+import time
+import tempfile
+import contextlib
+from typing import Final
+
+# Second party
+import common
+import utils.db as db
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || database_writes.py
+# ---------------------------------------
+# Measures the time and the bytes written to mark every
+# package for build and bump its version, the mutations a
+# sync makes. Compared are rewriting db.json per mutation
+# (how the database used to write), committing each mutation
+# on its own, and one transaction for all of them.
+#
+# Usage: python3 ./bench/database_writes.py [package count...]
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Enums
+
+# Interfaces
+
+# Constants
+DEFAULT_PACKAGE_COUNTS: Final[tuple[int, ...]] = (1000, 10000)
+# Mutations timed when rewriting db.json per mutation, the rest is extrapolated
+REWRITE_SAMPLE_SIZE: Final[int] = 100
+
+# Public Variables
+
+# Private Variables
+
+# main()
+def main(arguments: list[str]) -> None:
+    # Iterate through each database size
+    for packageCount in common.getPackageCounts(arguments, DEFAULT_PACKAGE_COUNTS):
+        with tempfile.TemporaryDirectory(prefix="alarm-bench-") as temporaryDirectory:
+            # Get the database file path
+            databaseFilePath: str = f"{temporaryDirectory}/db.json"
+
+            # Iterate through each way of writing
+            for label, writeMutations in (
+                ("rewrite per mutation", _rewritePerMutation),
+                ("commit per mutation", _commitPerMutation),
+                ("one transaction", _commitInTransaction),
+            ):
+                # Start from a fresh database
+                for fileName in os.listdir(temporaryDirectory):
+                    os.remove(f"{temporaryDirectory}/{fileName}")
+                common.writeDatabase(databaseFilePath, packageCount)
+
+                # Write the mutations
+                writtenBytes: int = common.getWrittenBytes()
+                startTime: float = time.perf_counter()
+                scale: float = writeMutations(databaseFilePath)
+                elapsedTime: float = (time.perf_counter() - startTime) * scale
+                writtenBytes = (common.getWrittenBytes() - writtenBytes) * scale
+
+                # Log
+                print(
+                    f"{packageCount:>6} packages  {label:<22} {elapsedTime:8.2f} s  {writtenBytes / 1024**2:10.1f} MiB written{'  (extrapolated)' if scale != 1 else ''}"
+                )
+
+# Public Methods
+
+# Private Methods
+def _getMutations(rawDatabase: dict) -> list[tuple[str, str, any]]:
+    """
+    Returns the mutations a sync of every package makes.
+
+    @param { dict } rawDatabase - The raw database
+    @return list[tuple[str, str, any]] - The package name, key path and new value of each mutation
+    """
+    return [
+        mutation
+        for packageName in rawDatabase["packages"]
+        for mutation in (
+            (packageName, "buildInfo/markedForBuild", True),
+            (packageName, "version", "2.0.0"),
+        )
+    ]
+
+def _rewritePerMutation(databaseFilePath: str) -> float:
+    """
+    Applies the mutations the way the database used to, dumping the whole
+    database after each one. Only a sample of them is written.
+
+    @param { str } databaseFilePath - The path to the database
+    @return float - The factor to scale the sample's cost by
+    """
+    # Load the database
+    with open(databaseFilePath, "r") as databaseFile:
+        rawDatabase: Final[dict] = json.load(databaseFile)
+
+    # Write a sample of the mutations
+    mutations: Final[list[tuple[str, str, any]]] = _getMutations(rawDatabase)
+    for packageName, keyPath, newValue in mutations[:REWRITE_SAMPLE_SIZE]:
+        # Set the value
+        splitKeyPath: list[str] = keyPath.split("/")
+        parent: dict = rawDatabase["package_info"][packageName]
+        for key in splitKeyPath[:-1]:
+            parent = parent[key]
+        parent[splitKeyPath[-1]] = newValue
+
+        # Rewrite the database
+        with open(databaseFilePath, "w") as databaseFile:
+            json.dump(rawDatabase, databaseFile)
+
+    # Return
+    return len(mutations) / min(len(mutations), REWRITE_SAMPLE_SIZE)
+
+def _commitPerMutation(databaseFilePath: str) -> float:
+    """
+    Applies the mutations outside of a transaction, each committed on its own.
+
+    @param { str } databaseFilePath - The path to the database
+    @return float - The factor to scale the cost by, always 1
+    """
+    _applyMutations(db.Database(databaseFilePath), False)
+    return 1
+
+def _commitInTransaction(databaseFilePath: str) -> float:
+    """
+    Applies the mutations in one transaction.
+
+    @param { str } databaseFilePath - The path to the database
+    @return float - The factor to scale the cost by, always 1
+    """
+    _applyMutations(db.Database(databaseFilePath), True)
+    return 1
+
+def _applyMutations(database: db.Database, inTransaction: bool) -> None:
+    """
+    Applies the mutations of a sync to a database.
+
+    @param { db.Database } database - The database
+    @param { bool } inTransaction - Are the mutations committed together
+    @return None
+    """
+    # Get the mutations
+    mutations: Final[list[tuple[str, str, any]]] = _getMutations(
+        {"packages": [package.getPackageName() for package in database.getAllPackages()]}
+    )
+
+    # Apply them
+    with database.transaction() if inTransaction else contextlib.nullcontext():
+        for packageName, keyPath, newValue in mutations:
+            database.modifyPackage(packageName, keyPath, newValue)
+
+# Run
+if __name__ == "__main__":
+    main(sys.argv[1:])
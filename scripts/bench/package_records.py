@@ -0,0 +1,175 @@
+# Import Statements
+# First party
+import gc
+import sys
+import json
+import time
+import tracemalloc
+from typing import Final, Callable
+
+# Second party
+import common
+import utils.db as db
+import utils.context as context
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || package_records.py
+# ---------------------------------------
+# Measures the memory held by the packages once loaded, as the
+# dict-of-dicts db.json decodes to and as package records,
+# traced by tracemalloc, and what reading every view of every
+# package costs, with the records' cached views and with a new
+# view per call (how the views used to be handed out).
+#
+# Usage: python3 ./bench/package_records.py [package count...]
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Class Definitions
+class UncachedPackageInfo:
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+    # Views created by every instance
+    viewCount: int = 0
+
+    # Private Variables
+    _rawPackageInfo: dict
+    _workspace: context.Workspace
+
+    # Constants
+
+    # Constructor
+    def __init__(self, rawPackageInfo: dict, workspace: context.Workspace) -> None:
+        # Keep the raw package information
+        self._rawPackageInfo = rawPackageInfo
+        self._workspace = workspace
+
+    # Public Methods
+    def getPackageURLs(self) -> db.PackageURLInfo:
+        UncachedPackageInfo.viewCount += 1
+        return db.PackageURLInfo(self._rawPackageInfo["urls"])
+
+    def getPackagePaths(self) -> db.PackagePathInfo:
+        UncachedPackageInfo.viewCount += 1
+        return db.PackagePathInfo(self._rawPackageInfo["paths"], self._workspace)
+
+    def getPackageBuildInfo(self) -> db.PackageBuildInfo:
+        UncachedPackageInfo.viewCount += 1
+        return db.PackageBuildInfo(self._rawPackageInfo["buildInfo"])
+
+    # Private Methods
+
+# Enums
+
+# Interfaces
+
+# Constants
+DEFAULT_PACKAGE_COUNTS: Final[tuple[int, ...]] = (100000,)
+# Times every view of a package is read
+VIEW_READ_COUNT: Final[int] = 10
+
+# Public Variables
+
+# Private Variables
+
+# main()
+def main(arguments: list[str]) -> None:
+    # Iterate through each database size
+    for packageCount in common.getPackageCounts(arguments, DEFAULT_PACKAGE_COUNTS):
+        # Get the encoded database
+        rawContent: str = json.dumps(common.createDatabase(packageCount))
+        workspace: context.Workspace = context.Workspace()
+
+        # Memory held by the decoded database
+        def loadDatabase() -> dict:
+            return json.loads(rawContent)
+        rawDatabase, heldSize, peakSize, elapsedTime = _trace(loadDatabase)
+        print(
+            f"{packageCount:>7} packages  dict-of-dicts        held {heldSize / 1024**2:7.1f} MiB  peak {peakSize / 1024**2:7.1f} MiB  {elapsedTime:6.2f} s"
+        )
+
+        # Memory held by the records, once the decoded database is dropped
+        def loadRecords() -> list[db.PackageInfo]:
+            rawRecords: Final[dict] = json.loads(rawContent)
+            return [
+                db.PackageInfo(rawRecords["package_info"][packageName], packageName, workspace)
+                for packageName in rawRecords["packages"]
+            ]
+        records, heldSize, peakSize, elapsedTime = _trace(loadRecords)
+        print(
+            f"{packageCount:>7} packages  package records      held {heldSize / 1024**2:7.1f} MiB  peak {peakSize / 1024**2:7.1f} MiB  {elapsedTime:6.2f} s"
+        )
+
+        # Records hand out the views they hold
+        _readViews(records)
+        cachedViewCount: Final[int] = sum(
+            package.getPackageURLs() is not package.getPackageURLs() for package in records
+        )
+        print(
+            f"{packageCount:>7} packages  cached views         reading every view {VIEW_READ_COUNT}x creates {cachedViewCount:>8} views  {common.measure(lambda: _readViews(records)):6.2f} s"
+        )
+
+        # Views created per call
+        uncachedRecords: Final[list[UncachedPackageInfo]] = [
+            UncachedPackageInfo(rawDatabase["package_info"][packageName], workspace)
+            for packageName in rawDatabase["packages"]
+        ]
+        UncachedPackageInfo.viewCount = 0
+        _readViews(uncachedRecords)
+        uncachedViewCount: Final[int] = UncachedPackageInfo.viewCount
+        print(
+            f"{packageCount:>7} packages  new view per call    reading every view {VIEW_READ_COUNT}x creates {uncachedViewCount:>8} views  {common.measure(lambda: _readViews(uncachedRecords)):6.2f} s"
+        )
+
+# Public Methods
+
+# Private Methods
+def _trace(function: Callable[[], any]) -> tuple[any, int, int, float]:
+    """
+    Runs a function under tracemalloc.
+
+    @param { Callable[[], any] } function - The function to run
+    @return tuple[any, int, int, float] - Its result, the bytes still held by it, the peak bytes and the time it took
+    """
+    # Start from a clean heap
+    gc.collect()
+    tracemalloc.start()
+
+    try:
+        # Run the function
+        startTime: Final[float] = time.perf_counter()
+        result: Final[any] = function()
+        elapsedTime: Final[float] = time.perf_counter() - startTime
+
+        # Drop the garbage left behind
+        gc.collect()
+        heldSize, peakSize = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # Return
+    return result, heldSize, peakSize, elapsedTime
+
+def _readViews(packages: list[any]) -> None:
+    """
+    Reads a field of every view of every package, like the drivers do.
+
+    @param { list[any] } packages - The packages
+    @return None
+    """
+    for package in packages:
+        for _ in range(VIEW_READ_COUNT):
+            package.getPackageURLs().getUpstreamURL()
+            package.getPackagePaths().getPackageBuildPath()
+            package.getPackageBuildInfo().isMarkedForBuild()
+
+# Run
+if __name__ == "__main__":
+    main(sys.argv[1:])
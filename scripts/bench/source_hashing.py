@@ -0,0 +1,127 @@
+# Import Statements
+# First party
+import os
+import sys
+import hashlib
+import tempfile
+from typing import Final, Callable
+
+# Second party
+import common
+import utils.checksum as checksum
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || source_hashing.py
+# ---------------------------------------
+# Measures the time to compute the sha256sums of synthetic
+# source sets: a kernel tarball with its config and patches,
+# a few large tarballs, and many small files. Compared are
+# reading each file whole into sha256 (how the checksums used
+# to be computed), `hashFile` one file after another, and
+# `hashFiles` with each number of workers. The files are read
+# once beforehand, so the page cache holds them.
+#
+# Usage: python3 ./bench/source_hashing.py [worker count...]
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Enums
+
+# Interfaces
+
+# Constants
+# File sizes of each source set
+SOURCE_SETS: Final[dict[str, list[int]]] = {
+    "kernel, config and 20 patches": [140 * 1024**2, 256 * 1024] + [40 * 1024] * 20,
+    "8 large tarballs": [64 * 1024**2] * 8,
+    "200 small files": [16 * 1024] * 200,
+}
+DEFAULT_WORKER_COUNTS: Final[tuple[int, ...]] = tuple(sorted({1, 2, 4, os.cpu_count() or 1}))
+WRITE_CHUNK_SIZE: Final[int] = 8 * 1024 * 1024
+
+# Public Variables
+
+# Private Variables
+
+# main()
+def main(arguments: list[str]) -> None:
+    # Get the worker counts
+    workerCounts: Final[tuple[int, ...]] = common.getPackageCounts(arguments, DEFAULT_WORKER_COUNTS)
+
+    # Log
+    print(f"{os.cpu_count()} CPUs")
+
+    # Iterate through each source set
+    for setName, fileSizes in SOURCE_SETS.items():
+        with tempfile.TemporaryDirectory(prefix="alarm-bench-") as temporaryDirectory:
+            # Write the files
+            filePaths: list[str] = [
+                _writeFile(f"{temporaryDirectory}/source-{index}", fileSize)
+                for index, fileSize in enumerate(fileSizes)
+            ]
+
+            # Get the ways of hashing them
+            hashers: list[tuple[str, Callable[[list[str]], list[str]]]] = [
+                ("read whole file, serial", _hashWholeFiles),
+                ("hashFile, serial", lambda filePaths: [checksum.hashFile(filePath)["sha256"] for filePath in filePaths]),
+            ] + [
+                (
+                    f"hashFiles, {workerCount} workers",
+                    lambda filePaths, workerCount=workerCount: [
+                        digests["sha256"] for digests in checksum.hashFiles(filePaths, maximumWorkers=workerCount)
+                    ],
+                )
+                for workerCount in workerCounts
+            ]
+
+            # Fill the page cache, getting the checksums every way must agree on
+            expectedChecksums: list[str] = _hashWholeFiles(filePaths)
+
+            # Iterate through each way
+            for label, hashSources in hashers:
+                # Check the checksums
+                if hashSources(filePaths) != expectedChecksums:
+                    raise Exception(f'"{label}" returned different checksums')
+
+                # Log
+                elapsedTime: float = common.measure(lambda: hashSources(filePaths))
+                print(
+                    f"{setName:<30} {sum(fileSizes) / 1024**2:6.1f} MiB  {label:<24} {elapsedTime * 1000:8.1f} ms  {sum(fileSizes) / 1024**2 / elapsedTime:7.1f} MiB/s"
+                )
+
+# Public Methods
+
+# Private Methods
+def _writeFile(filePath: str, fileSize: int) -> str:
+    """
+    Writes a file of random bytes.
+
+    @param { str } filePath - The path to the file
+    @param { int } fileSize - The size of the file in bytes
+    @return str - The path to the file
+    """
+    with open(filePath, "wb") as file:
+        for offset in range(0, fileSize, WRITE_CHUNK_SIZE):
+            file.write(os.urandom(min(WRITE_CHUNK_SIZE, fileSize - offset)))
+    return filePath
+
+def _hashWholeFiles(filePaths: list[str]) -> list[str]:
+    """
+    Returns the sha256sums of files, reading each whole into memory.
+
+    @param { list[str] } filePaths - The paths to the files
+    @return list[str] - The hex digests
+    """
+    checksums: list[str] = []
+    for filePath in filePaths:
+        with open(filePath, "rb") as file:
+            checksums.append(hashlib.sha256(file.read()).hexdigest())
+    return checksums
+
+# Run
+if __name__ == "__main__":
+    main(sys.argv[1:])
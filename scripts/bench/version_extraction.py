@@ -0,0 +1,81 @@
+# Import Statements
+# First party
+import io
+import os
+import sys
+import time
+from typing import Final
+
+# Second party
+import common
+import utils.sync as sync
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || version_extraction.py
+# ---------------------------------------
+# Measures the time to find the version on each package page
+# in `tests/pages`, parsing the whole page with BeautifulSoup
+# (how versions used to be extracted) and streaming the page
+# up to the version entry, along with the bytes each reads.
+#
+# Usage: python3 ./bench/version_extraction.py [repeat count]
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Enums
+
+# Interfaces
+
+# Constants
+PAGES_DIRECTORY: Final[str] = f"{common.SCRIPTS_DIRECTORY}/tests/pages"
+DEFAULT_REPEAT_COUNTS: Final[tuple[int, ...]] = (50,)
+
+# Public Variables
+
+# Private Variables
+
+# main()
+def main(arguments: list[str]) -> None:
+    # Get how often each page is parsed
+    repeatCount: Final[int] = common.getPackageCounts(arguments, DEFAULT_REPEAT_COUNTS)[0]
+
+    # Iterate through the pages which list a version
+    for pageFileName in sorted(os.listdir(PAGES_DIRECTORY)):
+        # Skip the page without a version
+        if pageFileName == "missing-version.html":
+            continue
+
+        # Read the page
+        with open(f"{PAGES_DIRECTORY}/{pageFileName}", "rb") as pageFile:
+            rawPage: bytes = pageFile.read()
+
+        # Parse the whole page
+        fullTime: float = common.measure(
+            lambda: [sync.extractUpstreamVersion(rawPage.decode("utf-8")) for _ in range(repeatCount)]
+        ) / repeatCount
+
+        # Stream the page up to the version
+        streamTime: float = common.measure(
+            lambda: [sync.extractUpstreamVersionFromStream(io.BytesIO(rawPage)) for _ in range(repeatCount)]
+        ) / repeatCount
+
+        # Get the bytes streamed
+        stream: io.BytesIO = io.BytesIO(rawPage)
+        upstreamVersion: str = sync.extractUpstreamVersionFromStream(stream)
+
+        # Log
+        print(
+            f"{pageFileName:<16} {len(rawPage) / 1024:7.1f} KiB  BeautifulSoup {fullTime * 1000:7.2f} ms  streamed {stream.tell() / 1024:5.1f} KiB {streamTime * 1000:6.2f} ms  {fullTime / streamTime:6.1f}x  v{upstreamVersion}"
+        )
+
+# Public Methods
+
+# Private Methods
+
+# Run
+if __name__ == "__main__":
+    main(sys.argv[1:])
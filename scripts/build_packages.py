@@ -5,6 +5,7 @@ from typing import Final
 # Second party
 import utils.db as db
 import utils.build as build
+import utils.context as context
 import utils.logging as logging
 
 # Third party
@@ -12,8 +13,8 @@ import utils.logging as logging
 # File Docstring
 # @LinuxOnARM || build_packages.py
 # ---------------------------------------
-# Builds packages that are marked "for build". Must be called
-# AFTER prepare_packages.py
+# Builds packages that are marked "for build" and changed since
+# the last complete run. Must be called AFTER prepare_packages.py
 #
 # Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
 #          @LinuxOnARM       <https://github.com/LinuxOnARM>
@@ -24,6 +25,7 @@ import utils.logging as logging
 # Interfaces
 
 # Constants
+STAGE_NAME: Final[str] = "build"
 
 # Public Variables
 
@@ -31,19 +33,33 @@ import utils.logging as logging
 
 # main()
 def main() -> None:
+    # Instance a new Workspace
+    workspace: Final[context.Workspace] = context.Workspace()
+
     # Instance a new Database
-    database: db.Database = db.Database()
+    database: db.Database = db.Database(workspace=workspace)
 
     # Instance a new Build system
-    buildSystem: build.Build = build.Build()
+    buildSystem: build.Build = build.Build(workspace)
+
+    # Get the database generation this run covers, and the one the last complete run covered
+    currentGeneration: Final[int] = database.getGeneration()
+    lastGeneration: Final[int] = database.getStageGeneration(STAGE_NAME)
 
-    # Get a list of all packages
-    allPackages: Final[list[db.PackageInfo]] = database.getAllPackages()
+    # Get a list of the packages changed since the last run, or all packages marked for build
+    allPackages: Final[list[db.PackageInfo]] = (
+        database.getChangedSince(lastGeneration)
+        if lastGeneration is not None
+        else database.getPackagesMarkedForBuild()
+    )
 
     # Setup logging
     maximumLogCount: Final[int] = len(allPackages) + 1
     currentLogCount: int = 1
 
+    # Packages which have to be retried by the next run
+    failedPackageCount: int = 0
+
     # Iterate through all packages
     for package in allPackages:
         # Log
@@ -91,6 +107,16 @@ def main() -> None:
                 f"Error while preparing package! || {error}",
             )
 
+            # Retry the package next run
+            failedPackageCount += 1
+
+    # Remember the generation every change was built up to, unless a package has to be retried
+    if failedPackageCount == 0:
+        database.setStageGeneration(STAGE_NAME, currentGeneration)
+
+    # Fold the journal into db.json, the copy committed to the repository
+    database.compact()
+
 # Public Methods
 
 # Private Methods
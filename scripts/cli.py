@@ -1,9 +1,13 @@
 # Import Statements
 # First party
+import time
 from typing import Final
 
 # Second party
 import utils.db as db
+import utils.cache as cache
+import utils.backup as backup
+import utils.context as context
 
 # Third party
 
@@ -25,7 +29,7 @@ class Functions:
     # Public Variables
 
     # Private Variables
-    _db: Final[db.Database] = db.Database()
+    _db: Final[db.Database] = db.Database(lazy=True)
 
     # Constants
 
@@ -101,7 +105,6 @@ class Functions:
         @return str - New package info
         """
         # Import Statements
-        import os
         from subprocess import call
 
         # Check if inputs are passed
@@ -119,11 +122,11 @@ class Functions:
         packagePKGBUILDPath: Final[str] = f"/pkgbuild/{packageName}"
 
         # Generate directory paths
-        repositoryPath: Final[str] = os.getcwd().replace(
-            "/scripts", f"/packages/{inputs[5]}/os/aarch64/{packageName}"
+        repositoryPath: Final[str] = context.Workspace().resolvePath(
+            f"/packages/{inputs[5]}/os/aarch64/{packageName}"
         )
-        pkgbuildPath: Final[str] = os.getcwd().replace(
-            "/scripts", f"/pkgbuild/{packageName}"
+        pkgbuildPath: Final[str] = context.Workspace().resolvePath(
+            f"/pkgbuild/{packageName}"
         )
 
         # Create folders
@@ -144,15 +147,19 @@ class Functions:
         # Try to create a new entry
         try:
             # Create a new entry
-            self._db.addPackage(
-                packageName,
-                packageVersion,
-                packageURLType,
-                packageSourceURL,
-                packageUpstreamURL,
-                packageRepositoryPath,
-                packagePKGBUILDPath,
-            )
+            with self._db.transaction():
+                self._db.addPackage(
+                    packageName,
+                    packageVersion,
+                    packageURLType,
+                    packageSourceURL,
+                    packageUpstreamURL,
+                    packageRepositoryPath,
+                    packagePKGBUILDPath,
+                )
+
+            # Fold the journal into db.json, the copy committed to the repository
+            self._db.compact()
         except Exception:
             # Handle exception
             return "Function error: Database error"
@@ -211,7 +218,11 @@ class Functions:
         )
 
         # Delete the package from the database
-        self._db.deletePackage(packageName)
+        with self._db.transaction():
+            self._db.deletePackage(packageName)
+
+        # Fold the journal into db.json, the copy committed to the repository
+        self._db.compact()
 
         # Log
         print(f'Package "{packageName}" was deleted!')
@@ -219,6 +230,116 @@ class Functions:
         # Return
         return ""
 
+    def backups(self, inputs: list[str]) -> str:
+        """
+        Lists the kept backups of the package database, oldest first.
+
+        @return str - The backups
+        """
+        # Get the backups
+        backupManager: Final[backup.BackupManager] = backup.BackupManager(
+            context.Workspace().getDatabaseFilePath(), context.Workspace().getDatabaseBackupDirectory()
+        )
+
+        # Print each backup
+        for databaseBackup in backupManager.listBackups():
+            print(
+                "Backup {a}: {b} || {c} || {d} bytes".format(
+                    a=databaseBackup["id"],
+                    b=time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(databaseBackup["createdAt"])),
+                    c=databaseBackup["label"] or "manual",
+                    d=sum(backupFile["size"] for backupFile in databaseBackup["files"].values()),
+                )
+            )
+
+        # Return
+        return ""
+
+    def backup(self, inputs: list[str]) -> str:
+        """
+        Backs up the package database.
+
+        @param { str } label - What the backup is for (Optional)
+        @return str - The backup id
+        """
+        # Back up the database
+        databaseBackup: Final[dict] = backup.BackupManager(
+            context.Workspace().getDatabaseFilePath(), context.Workspace().getDatabaseBackupDirectory()
+        ).createBackup(inputs[0] if len(inputs) > 0 else "")
+
+        # Return
+        return f"Backup {databaseBackup['id']} holds the current database"
+
+    def restore(self, inputs: list[str]) -> str:
+        """
+        Restores a backup of the package database. The current database is
+        backed up first, restore it to undo.
+
+        @param { int } backupId - The id of the backup
+        @return str - The id of the backup of the replaced database
+        """
+        # Check if inputs are passed
+        if len(inputs) == 0 or inputs[0] == "":
+            # Handle case
+            return "Missing parameters: { int } backupId - The id of the backup"
+
+        # Restore the backup
+        try:
+            replacedBackup: Final[dict] = backup.BackupManager(
+                context.Workspace().getDatabaseFilePath(), context.Workspace().getDatabaseBackupDirectory()
+            ).restoreBackup(int(inputs[0]))
+        except Exception as error:
+            # Handle exception
+            return f"Function error: {error}"
+
+        # Return
+        return f"Backup {inputs[0]} was restored, the replaced database is backup {replacedBackup['id']}. Restart the CLI to see it."
+
+    def cache(self, inputs: list[str]) -> str:
+        """
+        Shows the statistics of the downloaded source cache, or evicts the least
+        recently used sources until it fits its size budget.
+
+        @param { str } operation - `stats` or `gc`
+        @param { int } maximumSize - The size budget for `gc` in bytes, 0 empties the cache (Optional)
+        @return str - The statistics or what was evicted
+        """
+        # Check if inputs are passed
+        if len(inputs) == 0 or inputs[0] not in ("stats", "gc"):
+            # Handle case
+            return "Missing parameters: { str } operation - `stats` or `gc`"
+
+        # Get the source cache
+        sourceCache: Final[cache.SourceCache] = cache.SourceCache(
+            context.Workspace().getSourceCacheDirectory()
+        )
+
+        # Print the statistics
+        if inputs[0] == "stats":
+            statistics: Final[dict[str, int]] = sourceCache.getStatistics()
+            print("URLs: {a}\nFiles: {b}".format(a=statistics["entries"], b=statistics["objects"]))
+            print("Size: {a} of {b} bytes".format(a=statistics["size"], b=statistics["maximumSize"]))
+            print(
+                "Hits: {a}\nMisses: {b}\nEvictions: {c}".format(
+                    a=statistics["hits"], b=statistics["misses"], c=statistics["evictions"]
+                )
+            )
+
+            # Return
+            return ""
+
+        # Collect garbage
+        try:
+            result: Final[dict[str, int]] = sourceCache.collectGarbage(
+                int(inputs[1]) if len(inputs) > 1 else None
+            )
+        except Exception as error:
+            # Handle exception
+            return f"Function error: {error}"
+
+        # Return
+        return f"Evicted {result['evictions']} sources, freed {result['freedBytes']} bytes"
+
     # Private Methods
 
 # Enums
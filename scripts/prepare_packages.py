@@ -1,9 +1,11 @@
 # Import Statements
 # First party
+import sys
 from typing import Final
 
 # Second party
 import utils.db as db
+import utils.context as context
 import utils.prepare as prepare
 import utils.logging as logging
 
@@ -15,7 +17,9 @@ import utils.logging as logging
 # Prepares packages marked for "build". Due
 # to each package having a separate build process,
 # it is recommended to have a separate prepare method for each
-# package.
+# package. Only packages changed since the last complete run
+# are prepared. Package names may be passed as arguments to only
+# prepare those packages.
 #
 # Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
 #          @LinuxOnARM       <https://github.com/LinuxOnARM>
@@ -26,77 +30,106 @@ import utils.logging as logging
 # Interfaces
 
 # Constants
+STAGE_NAME: Final[str] = "prepare"
 
 # Public Variables
 
 # Private Variables
 
 # main()
-def main() -> None:
-    # Instance a new Database
-    database: db.Database = db.Database()
+def main(packageNames: list[str] = None) -> None:
+    # Instance a new Workspace
+    workspace: Final[context.Workspace] = context.Workspace()
+
+    # Instance a new Database, only parsing the requested packages if any
+    database: db.Database = db.Database(lazy=bool(packageNames), workspace=workspace)
 
     # Instance a new Prepare system
-    prepareSystem: prepare.PrepareBuild = prepare.PrepareBuild()
+    prepareSystem: prepare.PrepareBuild = prepare.PrepareBuild(workspace)
+
+    # Get the database generation this run covers, and the one the last complete run covered
+    currentGeneration: Final[int] = database.getGeneration()
+    lastGeneration: Final[int] = database.getStageGeneration(STAGE_NAME)
 
-    # Get a list of all packages
-    allPackages: Final[list[db.PackageInfo]] = database.getAllPackages()
+    # Get a list of the requested packages, the packages changed since the last run, or all packages marked for build
+    allPackages: list[db.PackageInfo]
+    if packageNames:
+        allPackages = [database.getPackage(packageName) for packageName in packageNames]
+    elif lastGeneration is not None:
+        allPackages = database.getChangedSince(lastGeneration)
+    else:
+        allPackages = database.getPackagesMarkedForBuild()
 
     # Setup logging
     maximumLogCount: Final[int] = len(allPackages) + 1
     currentLogCount: int = 1
 
-    # Iterate through all packages
-    for package in allPackages:
-        # Log
-        currentLogCount = logging.log(
-            "PACKAGE PREPARATION",
-            package.getPackageName(),
-            currentLogCount,
-            maximumLogCount,
-            "Checking build info...",
-        )
-
-        # Check if package is marked for build
-        if not package.getPackageBuildInfo().isMarkedForBuild():
+    # Packages which have to be retried by the next run
+    failedPackageCount: int = 0
+
+    # Batch any database mutation made while preparing into a single write
+    with database.transaction():
+        # Iterate through all packages
+        for package in allPackages:
             # Log
             currentLogCount = logging.log(
                 "PACKAGE PREPARATION",
                 package.getPackageName(),
                 currentLogCount,
                 maximumLogCount,
-                "Skipping package || Not marked for build!...",
+                "Checking build info...",
             )
 
-            # Continue to the next package
-            continue
-
-        # Log
-        currentLogCount = logging.log(
-            "PACKAGE PREPARATION",
-            package.getPackageName(),
-            currentLogCount,
-            maximumLogCount,
-            "Executing prepare function...",
-        )
-
-        try:
-            # Execute
-            prepareSystem.preparePackage(package)
-        except Exception as error:
+            # Check if package is marked for build
+            if not package.getPackageBuildInfo().isMarkedForBuild():
+                # Log
+                currentLogCount = logging.log(
+                    "PACKAGE PREPARATION",
+                    package.getPackageName(),
+                    currentLogCount,
+                    maximumLogCount,
+                    "Skipping package || Not marked for build!...",
+                )
+
+                # Continue to the next package
+                continue
+
             # Log
             currentLogCount = logging.log(
                 "PACKAGE PREPARATION",
                 package.getPackageName(),
                 currentLogCount,
                 maximumLogCount,
-                f"Error while preparing package! || {error}",
+                "Executing prepare function...",
             )
 
+            try:
+                # Execute
+                prepareSystem.preparePackage(package)
+            except Exception as error:
+                # Log
+                currentLogCount = logging.log(
+                    "PACKAGE PREPARATION",
+                    package.getPackageName(),
+                    currentLogCount,
+                    maximumLogCount,
+                    f"Error while preparing package! || {error}",
+                )
+
+                # Retry the package next run
+                failedPackageCount += 1
+
+        # Remember the generation every change was prepared up to, unless a package has to be retried
+        if not packageNames and failedPackageCount == 0:
+            database.setStageGeneration(STAGE_NAME, currentGeneration)
+
+    # Fold the journal into db.json, the copy committed to the repository
+    database.compact()
+
 # Public Methods
 
 # Private Methods
 
 # Run
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
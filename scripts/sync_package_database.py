@@ -1,23 +1,38 @@
 # Import Statements
 # First party
-import re
+import os
+import sys
+import time
 from typing import Final
-from urllib import request
-from subprocess import call
 
 # Second party
 import utils.db as db
+import utils.sync as sync
+import utils.backup as backup
+import utils.context as context
 import utils.logging as logging
 
 # Third party
-from bs4 import BeautifulSoup
 
 # File Docstring
 # @LinuxOnARM || sync_package_database.py
 # ---------------------------------------
 # Makes a series of HTTP(S) calls to the Arch Linux
 # package search database and pulls the latest version
-# info of available packages.
+# info of available packages. The calls run concurrently,
+# the results are written to the database in one batch.
+# Packages whose lookup failed are left as they are and
+# retried by a later sync. Versions are compared the way
+# pacman compares them, only upgrades are marked for build.
+#
+# The check can be split across runners. Each runs
+# `sync_package_database.py shard <index> <count> <file>` and
+# writes the results of its share of the packages to a file,
+# then `sync_package_database.py merge <file>...` writes every
+# shard's results to the database, the same as a single run.
+#
+# Only packages the sync schedule says are due are checked.
+# Set `ALARM_SYNC_FORCE_ALL=1` to check every package anyway.
 #
 # Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
 #          @LinuxOnARM       <https://github.com/LinuxOnARM>
@@ -28,27 +43,134 @@ from bs4 import BeautifulSoup
 # Interfaces
 
 # Constants
-FILTERED_WORDS: Final[list[str]] = [".arch1-1"]
-FIND_VERSION_ENTRY_REGEX_PATTERN: Final[str] = r'content="[^"]*"'
+FORCE_ALL: Final[bool] = os.environ.get("ALARM_SYNC_FORCE_ALL", "0") not in ("", "0")
+MAXIMUM_PACKAGES_PER_RUN: Final[int] = int(os.environ.get("ALARM_SYNC_MAXIMUM_PACKAGES", 0)) or None
 
 # Public Variables
 
 # Private Variables
 
 # main()
-def main() -> None:
+def main(arguments: list[str]) -> None:
+    # Instance a new Workspace
+    workspace: Final[context.Workspace] = context.Workspace()
+
     # Instance a new Database
-    database: db.Database = db.Database()
+    database: db.Database = db.Database(workspace=workspace)
+
+    # Check every package and write the results
+    if len(arguments) == 0:
+        _applyResults(workspace, database, _checkUpstreamVersions(workspace, database))
+
+    # Check a shard of the packages and write its result file
+    elif arguments[0] == "shard" and len(arguments) == 4:
+        # Get the shard
+        shardIndex: Final[int] = int(arguments[1])
+        shardCount: Final[int] = int(arguments[2])
+        shardFilePath: Final[str] = arguments[3]
+
+        # Check the shard, keeping its upstream cache and schedule next to its results
+        results: Final[list[dict]] = _checkUpstreamVersions(
+            workspace,
+            database,
+            shardIndex,
+            shardCount,
+            _getShardCacheFilePath(shardFilePath),
+            _getShardScheduleFilePath(shardFilePath),
+        )
+
+        # Write the results
+        sync.writeShardResults(shardFilePath, shardIndex, shardCount, results)
+
+    # Merge the result files of every shard and write them
+    elif arguments[0] == "merge" and len(arguments) >= 2:
+        # Read the results, nothing is written if the shards conflict
+        mergedResults: Final[dict[str, dict]] = sync.readShardResults(arguments[1:])
+
+        # Merge the upstream caches of the shards
+        upstreamCache: Final[sync.UpstreamCache] = sync.UpstreamCache(
+            workspace.getUpstreamCacheFilePath()
+        )
+        for shardFilePath in arguments[1:]:
+            upstreamCache.merge(_getShardCacheFilePath(shardFilePath))
+        upstreamCache.save()
+
+        # Merge the sync schedules of the shards
+        syncSchedule: Final[sync.SyncSchedule] = sync.SyncSchedule(
+            workspace.getSyncScheduleFilePath()
+        )
+        for shardFilePath in arguments[1:]:
+            syncSchedule.merge(_getShardScheduleFilePath(shardFilePath))
+        syncSchedule.save()
+
+        # Get the results in database order
+        orderedResults: Final[list[dict]] = [
+            mergedResults.pop(package.getPackageName())
+            for package in database.getAllPackages()
+            if package.getPackageName() in mergedResults
+        ]
+
+        # Package was removed since it was checked
+        for packageName in mergedResults:
+            raise sync.ShardConflictException(
+                f'Package "{packageName}" was removed since it was checked', packageName
+            )
+
+        # Write the results
+        _applyResults(workspace, database, orderedResults)
+
+    # Invalid arguments
+    else:
+        print("Usage: python3 ./sync_package_database.py [shard <index> <count> <result file> | merge <result file>...]")
+        sys.exit(1)
 
-    # Get a list of all packages
-    allPackages: Final[list[db.PackageInfo]] = database.getAllPackages()
+# Public Methods
+
+# Private Methods
+def _checkUpstreamVersions(workspace: context.Workspace, database: db.Database, shardIndex: int = 0, shardCount: int = 1, upstreamCacheFilePath: str = None, syncScheduleFilePath: str = None) -> list[dict]:
+    """
+    Looks up the upstream version of every due package of a shard and
+    compares it to the current version.
+
+    @param { context.Workspace } workspace - The workspace
+    @param { db.Database } database - The package database
+    @param { int } shardIndex - The index of the shard to check (Optional)
+    @param { int } shardCount - The number of shards (Optional)
+    @param { str } upstreamCacheFilePath - The path to save the upstream cache to instead of its own (Optional)
+    @param { str } syncScheduleFilePath - The path to save the sync schedule to instead of its own (Optional)
+    @return list[dict] - A result per package looked up, see `sync.writeShardResults`
+    """
+    # Get the time of the sync
+    syncTime: Final[float] = time.time()
+
+    # Instance a new upstream cache
+    upstreamCache: Final[sync.UpstreamCache] = sync.UpstreamCache(
+        workspace.getUpstreamCacheFilePath()
+    )
+
+    # Instance a new sync schedule
+    syncSchedule: Final[sync.SyncSchedule] = sync.SyncSchedule(
+        workspace.getSyncScheduleFilePath()
+    )
+
+    # Instance a new upstream version checker
+    upstreamVersionChecker: Final[sync.UpstreamVersionChecker] = sync.UpstreamVersionChecker(
+        upstreamCache=upstreamCache
+    )
+
+    # Get a list of the packages of the shard
+    allPackages: Final[list[db.PackageInfo]] = [
+        package
+        for package in database.getAllPackages()
+        if sync.getShardIndex(package.getPackageName(), shardCount) == shardIndex
+    ]
 
     # Setup logging
     maximumLogCount: Final[int] = len(allPackages) + 1
     currentLogCount: int = 1
 
-    # Create a backup of the current database file
-    call(["cp", "./db/db.json", "./db/db.old.json"])
+    # Packages to look up
+    syncedPackages: list[db.PackageInfo] = []
 
     # Iterate through all packages
     for package in allPackages:
@@ -66,40 +188,40 @@ def main() -> None:
             # Skip the example package
             continue
 
-        # Log
-        currentLogCount = logging.log(
-            "PACKAGE SYNC",
-            package.getPackageName(),
-            currentLogCount,
-            maximumLogCount,
-            "Pulling package info...",
-        )
+        # Look the package up
+        syncedPackages.append(package)
 
-        # Get the upstream URL
-        upstreamURL: str = package.getPackageURLs().getUpstreamURL()
-
-        # Download the HTML
-        pkgDataRaw = request.urlopen(upstreamURL).read().decode("utf-8")
-
-        # Parse the HTML
-        pkgDataClean = BeautifulSoup(pkgDataRaw, "html.parser")
-
-        # Find the package version
-        pkgVersionRaw = (
-            pkgDataClean.find(id="pkgdetails")
-            .find(itemprop="version")
-            .decode(None, "utf-8")
-        )
+    # Only look up the packages which are due
+    duePackages: Final[list[db.PackageInfo]] = syncSchedule.getDuePackages(
+        syncedPackages, FORCE_ALL, MAXIMUM_PACKAGES_PER_RUN, syncTime
+    )
 
-        # Clean the version data
-        pkgVersionClean: str = _cleanVersionString(pkgVersionRaw)
+    # Log
+    currentLogCount = logging.log(
+        "PACKAGE SYNC",
+        "sync-schedule",
+        currentLogCount,
+        maximumLogCount,
+        f"Checking {len(duePackages)} of {len(syncedPackages)} packages || {'Forced' if FORCE_ALL else 'Others are not due yet'}",
+    )
 
-        # Compare the version numbers
-        if package.getPackageVersion() == pkgVersionClean:
-            # Mark for "Do Not Build"
-            database.modifyPackage(
-                package.getPackageName(), "buildInfo/markedForBuild", False
-            )
+    try:
+        # Look up every upstream version
+        upstreamVersions: dict[str, str] = {}
+        for package, upstreamVersion, upstreamError in upstreamVersionChecker.checkPackages(duePackages):
+            # Lookup failed
+            if upstreamError is not None:
+                # Log
+                currentLogCount = logging.log(
+                    "PACKAGE SYNC",
+                    package.getPackageName(),
+                    currentLogCount,
+                    maximumLogCount,
+                    f"Skipping package || Lookup failed: {upstreamError}",
+                )
+
+                # Leave the package as it is
+                continue
 
             # Log
             currentLogCount = logging.log(
@@ -107,59 +229,137 @@ def main() -> None:
                 package.getPackageName(),
                 currentLogCount,
                 maximumLogCount,
-                f'Marked for "Do not Build" || Current Version: v{package.getPackageVersion()}',
+                f"Pulled package info || Upstream Version: v{upstreamVersion}",
             )
-        else:
-            # Store the old version for logging
-            oldPackageVersion: str = package.getPackageVersion()
 
-            # Mark for "Do Build"
-            database.modifyPackage(
-                package.getPackageName(), "buildInfo/markedForBuild", True
-            )
+            # Remember the upstream version and schedule the next check
+            upstreamVersions[package.getPackageName()] = upstreamVersion
+            syncSchedule.recordCheck(package.getPackageName(), upstreamVersion, syncTime)
+    finally:
+        # Save the upstream cache and sync schedule for the next sync, even if this one is interrupted
+        upstreamCache.save(upstreamCacheFilePath)
+        syncSchedule.save(syncScheduleFilePath)
+
+    # Log
+    upstreamCacheStatistics: Final[dict[str, int]] = upstreamCache.getStatistics()
+    currentLogCount = logging.log(
+        "PACKAGE SYNC",
+        "upstream-cache",
+        currentLogCount,
+        maximumLogCount,
+        f"Cache hits: {upstreamCacheStatistics['hits']} || Fresh: {upstreamCacheStatistics['fresh']} || Misses: {upstreamCacheStatistics['misses']} || Failed: {upstreamCacheStatistics['failures']} || Deferred: {upstreamCacheStatistics['deferred']} || Evicted: {upstreamCacheStatistics['evictions']}",
+    )
 
-            # Update the package version
-            database.modifyPackage(package.getPackageName(), "version", pkgVersionClean)
+    # Compare every upstream version to the current one in one batch
+    return sync.compareUpstreamVersions(duePackages, upstreamVersions)
 
-            # Log
-            currentLogCount = logging.log(
-                "PACKAGE SYNC",
+def _applyResults(workspace: context.Workspace, database: db.Database, results: list[dict]) -> None:
+    """
+    Writes the results of a sync to the database in a single batch, then folds
+    the journal into db.json. Raises `sync.ShardConflictException`, writing
+    nothing, if a package changed since it was checked.
+
+    @param { context.Workspace } workspace - The workspace
+    @param { db.Database } database - The package database
+    @param { list[dict] } results - The results, see `sync.writeShardResults`
+    @return None
+    """
+    # Get the packages of the results
+    packages: Final[list[db.PackageInfo]] = [database.getPackage(result["name"]) for result in results]
+
+    # Check every package is still at the version it was checked at
+    for package, result in zip(packages, results):
+        if package.getPackageVersion() != result["oldVersion"]:
+            raise sync.ShardConflictException(
+                f'Package "{package.getPackageName()}" changed from v{result["oldVersion"]} to v{package.getPackageVersion()} since it was checked',
                 package.getPackageName(),
-                currentLogCount,
-                maximumLogCount,
-                f'Marked for "Build" || v{oldPackageVersion} -> v{package.getPackageVersion()}',
             )
 
-# Public Methods
+    # Setup logging
+    maximumLogCount: Final[int] = len(results)
+    currentLogCount: int = 1
 
-# Private Methods
-def _cleanVersionString(rawVersionString: str) -> str:
+    # Back up the current database, a no-op if it did not change since the last backup
+    backup.BackupManager(
+        workspace.getDatabaseFilePath(), workspace.getDatabaseBackupDirectory()
+    ).createBackup("sync")
+
+    # Batch every result into a single database write
+    with database.transaction():
+        # Iterate through the results
+        for package, result in zip(packages, results):
+            # Get the upstream version
+            pkgVersionClean: str = result["newVersion"]
+
+            # Upstream is older, leave the package as it is
+            if result["markedForBuild"] is None:
+                # Log
+                currentLogCount = logging.log(
+                    "PACKAGE SYNC",
+                    package.getPackageName(),
+                    currentLogCount,
+                    maximumLogCount,
+                    f"Skipping package || Upstream downgraded: v{package.getPackageVersion()} -> v{pkgVersionClean}",
+                )
+
+            # Compare the version numbers
+            elif not result["markedForBuild"]:
+                # Mark for "Do Not Build", leaving packages which already are untouched
+                if package.getPackageBuildInfo().isMarkedForBuild():
+                    database.modifyPackage(
+                        package.getPackageName(), "buildInfo/markedForBuild", False
+                    )
+
+                # Log
+                currentLogCount = logging.log(
+                    "PACKAGE SYNC",
+                    package.getPackageName(),
+                    currentLogCount,
+                    maximumLogCount,
+                    f'Marked for "Do not Build" || Current Version: v{package.getPackageVersion()}',
+                )
+            else:
+                # Store the old version for logging
+                oldPackageVersion: str = package.getPackageVersion()
+
+                # Mark for "Do Build"
+                database.modifyPackage(
+                    package.getPackageName(), "buildInfo/markedForBuild", True
+                )
+
+                # Update the package version
+                database.modifyPackage(package.getPackageName(), "version", pkgVersionClean)
+
+                # Log
+                currentLogCount = logging.log(
+                    "PACKAGE SYNC",
+                    package.getPackageName(),
+                    currentLogCount,
+                    maximumLogCount,
+                    f'Marked for "Build" || v{oldPackageVersion} -> v{package.getPackageVersion()}',
+                )
+
+    # Fold the journal into db.json, the copy committed to the repository
+    database.compact()
+
+def _getShardCacheFilePath(shardFilePath: str) -> str:
     """
-    Returns a clean version string.
+    Returns the path a shard saves its upstream cache to, next to its result file.
 
-    @param { str } rawVersionString - The raw version string
-    @return str - A clean version string
+    @param { str } shardFilePath - The path to the shard result file
+    @return str - The path to the shard's upstream cache
     """
-    # Output
-    outCleanVersionString: str = ""
-
-    # Parse with RegEx
-    compiledPattern: re.Pattern = re.compile(
-        FIND_VERSION_ENTRY_REGEX_PATTERN, re.IGNORECASE
-    )
-    outCleanVersionString = (
-        compiledPattern.findall(rawVersionString)[0]
-        .replace('content="', "")
-        .replace('"', "")
-    )
+    return f"{os.path.splitext(shardFilePath)[0]}.upstream_cache.json"
 
-    # Remove filtered words
-    for word in FILTERED_WORDS:
-        outCleanVersionString = outCleanVersionString.replace(word, "")
+def _getShardScheduleFilePath(shardFilePath: str) -> str:
+    """
+    Returns the path a shard saves its sync schedule to, next to its result file.
 
-    # Return
-    return outCleanVersionString
+    @param { str } shardFilePath - The path to the shard result file
+    @return str - The path to the shard's sync schedule
+    """
+    return f"{os.path.splitext(shardFilePath)[0]}.sync_schedule.json"
 
 # Run
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
@@ -0,0 +1,729 @@
+# Import Statements
+# First party
+import io
+import os
+import re
+import json
+import time
+import socket
+import struct
+import base64
+import hashlib
+import tarfile
+import threading
+import http.server
+import socketserver
+from typing import Final
+
+# Second party
+import utils.db as db
+import utils.context as context
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || fixtures.py
+# ---------------------------------------
+# Local HTTP servers and packages the tests run against, so no
+# test touches the network. Each server runs on a free port of
+# 127.0.0.1 in a background thread and counts the connections
+# and requests it sees. The file server can refuse ranges, cut
+# responses off, stall and go down, like a flaky mirror. Tests are run from the scripts
+# directory, with `python3 -m unittest discover tests` or
+# `python3 -m pytest tests`.
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Class Definitions
+class LocalServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+    # Seconds every request waits before it is answered
+    latency: float
+    # Versions of the package pages by package name
+    versions: dict[str, str]
+    # Package names whose page is missing
+    missingPackageNames: set[str]
+    # Validators sent along with the pages, `etag` or `lastModified`
+    validatorType: str
+    # Static files by path
+    files: dict[str, bytes]
+    # Does the file server answer range requests
+    acceptsRanges: bool
+    # Sizes the next file responses are cut off after, in order
+    dropSizes: list[int]
+    # Connections are reset, once `downAfterSize` bytes were sent if set
+    isDown: bool
+    downAfterSize: int
+    # Responses stall for `stallTime` seconds once, after `stallAfterSize` bytes were sent
+    stallAfterSize: int
+    stallTime: float
+    connectionCount: int
+    requestCount: int
+    notModifiedCount: int
+    droppedCount: int
+    resetCount: int
+    sentSize: int
+    activeRequestCount: int
+    maximumActiveRequestCount: int
+    daemon_threads: bool = True
+    request_queue_size: int = 1024
+
+    # Private Variables
+    _lock: threading.Lock
+    _thread: threading.Thread
+
+    # Constants
+
+    # Constructor
+    def __init__(self, handlerClass: type, latency: float = 0.0) -> None:
+        # Class base class constructor, on a free port
+        super().__init__(("127.0.0.1", 0), handlerClass)
+
+        # Set the behaviour
+        self.latency = latency
+        self.versions = {}
+        self.missingPackageNames = set()
+        self.validatorType = "etag"
+        self.files = {}
+        self.acceptsRanges = True
+        self.dropSizes = []
+        self.isDown = False
+        self.downAfterSize = None
+        self.stallAfterSize = None
+        self.stallTime = 0.0
+
+        # Nothing seen yet
+        self.connectionCount = 0
+        self.requestCount = 0
+        self.notModifiedCount = 0
+        self.droppedCount = 0
+        self.resetCount = 0
+        self.sentSize = 0
+        self.activeRequestCount = 0
+        self.maximumActiveRequestCount = 0
+        self._lock = threading.Lock()
+
+        # Serve in the background
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    # Public Methods
+    def getURL(self, path: str) -> str:
+        """
+        Returns the URL of a path on the server.
+
+        @param { str } path - The path, e.g. `/packages/core/x86_64/linux/`
+        @return str - The URL
+        """
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+    def close(self) -> None:
+        """
+        Stops the server and closes its socket.
+
+        @return None
+        """
+        self.shutdown()
+        self.server_close()
+
+    def recordConnection(self) -> None:
+        """
+        Counts a new connection.
+
+        @return None
+        """
+        with self._lock:
+            self.connectionCount += 1
+
+    def startRequest(self) -> None:
+        """
+        Counts a request being answered.
+
+        @return None
+        """
+        with self._lock:
+            self.requestCount += 1
+            self.activeRequestCount += 1
+            self.maximumActiveRequestCount = max(self.maximumActiveRequestCount, self.activeRequestCount)
+
+    def recordNotModified(self) -> None:
+        """
+        Counts a request answered with 304 Not Modified.
+
+        @return None
+        """
+        with self._lock:
+            self.notModifiedCount += 1
+
+    def takeDropSize(self) -> int:
+        """
+        Returns the size the next file response is cut off after.
+
+        @return int - The size in bytes, None to send the whole response
+        """
+        with self._lock:
+            return self.dropSizes.pop(0) if len(self.dropSizes) > 0 else None
+
+    def recordSent(self, size: int) -> float:
+        """
+        Counts bytes of a file sent, taking the server down or stalling it
+        once enough were sent.
+
+        @param { int } size - The number of bytes
+        @return float - The seconds to stall before sending more
+        """
+        with self._lock:
+            # Count the bytes
+            self.sentSize += size
+
+            # Go down
+            if self.downAfterSize is not None and self.sentSize >= self.downAfterSize:
+                self.downAfterSize = None
+                self.isDown = True
+
+            # Stall once
+            if self.stallAfterSize is not None and self.sentSize >= self.stallAfterSize:
+                self.stallAfterSize = None
+                return self.stallTime
+
+        # Return
+        return 0.0
+
+    def recordDropped(self, isReset: bool) -> None:
+        """
+        Counts a response cut off, or a connection reset.
+
+        @param { bool } isReset - Was the connection reset
+        @return None
+        """
+        with self._lock:
+            if isReset:
+                self.resetCount += 1
+            else:
+                self.droppedCount += 1
+
+    def finishRequest(self) -> None:
+        """
+        Counts a request as answered.
+
+        @return None
+        """
+        with self._lock:
+            self.activeRequestCount -= 1
+
+    # Private Methods
+
+class LocalRequestHandler(http.server.BaseHTTPRequestHandler):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+    server: LocalServer
+    protocol_version: str = "HTTP/1.1"
+    disable_nagle_algorithm: bool = True
+
+    # Private Variables
+
+    # Constants
+
+    # Constructor
+
+    # Public Methods
+    def setup(self) -> None:
+        # Count the connection
+        super().setup()
+        self.server.recordConnection()
+
+    def log_message(self, format: str, *args: any) -> None:
+        # Keep the test output clean
+        return
+
+    def sendBody(self, status: int, body: bytes, headers: dict[str, str] = None) -> None:
+        """
+        Sends a response with a body.
+
+        @param { int } status - The status code
+        @param { bytes } body - The body, not sent for HEAD requests
+        @param { dict[str, str] } headers - Additional headers (Optional)
+        @return None
+        """
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    # Private Methods
+
+class PackagePageHandler(LocalRequestHandler):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+
+    # Constants
+
+    # Constructor
+
+    # Public Methods
+    def do_GET(self) -> None:
+        # Count the request while it is answered
+        self.server.startRequest()
+        try:
+            # Wait like a distant server
+            time.sleep(self.server.latency)
+
+            # Get the package name, the last part of `/packages/<repository>/<architecture>/<name>/`
+            packageName: Final[str] = self.path.strip("/").split("/")[-1]
+
+            # Page is missing
+            if packageName in self.server.missingPackageNames:
+                self.sendBody(404, b"Not Found")
+                return
+
+            # Send the page
+            self.sendPage(packageName, self.server.versions.get(packageName, DEFAULT_VERSION))
+        finally:
+            self.server.finishRequest()
+
+    def sendPage(self, packageName: str, packageVersion: str) -> None:
+        """
+        Sends the page of a package.
+
+        @param { str } packageName - The name of the package
+        @param { str } packageVersion - The version the page lists
+        @return None
+        """
+        self.sendBody(
+            200,
+            createPackagePage(packageName, packageVersion),
+            {"Content-Type": "text/html; charset=utf-8"},
+        )
+
+    # Private Methods
+
+class ValidatingPackagePageHandler(PackagePageHandler):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+
+    # Constants
+
+    # Constructor
+
+    # Public Methods
+    def sendPage(self, packageName: str, packageVersion: str) -> None:
+        # Get the validators of the page, which change along with the version
+        validators: Final[dict[str, str]] = (
+            {"ETag": f'"{hashlib.sha256(packageVersion.encode("utf-8")).hexdigest()[:16]}"'}
+            if self.server.validatorType == "etag"
+            else {"Last-Modified": getLastModified(packageVersion)}
+        )
+
+        # Page did not change since the client's copy
+        if (
+            self.headers.get("If-None-Match") == validators.get("ETag", "")
+            or self.headers.get("If-Modified-Since") == validators.get("Last-Modified", "")
+        ):
+            self.server.recordNotModified()
+            self.sendBody(304, b"", validators)
+            return
+
+        # Send the page along with its validators
+        self.sendBody(
+            200,
+            createPackagePage(packageName, packageVersion),
+            {"Content-Type": "text/html; charset=utf-8", **validators},
+        )
+
+    # Private Methods
+
+class StaticFileHandler(LocalRequestHandler):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+
+    # Constants
+
+    # Constructor
+
+    # Public Methods
+    def do_GET(self) -> None:
+        # Count the request while it is answered
+        self.server.startRequest()
+        try:
+            # Wait like a distant server
+            time.sleep(self.server.latency)
+
+            # File is missing
+            if self.path not in self.server.files:
+                self.sendBody(404, b"Not Found")
+                return
+
+            # Send the file
+            self.sendBody(200, self.server.files[self.path], {"Content-Type": "application/octet-stream"})
+        finally:
+            self.server.finishRequest()
+
+    def do_HEAD(self) -> None:
+        self.do_GET()
+
+    # Private Methods
+
+class RangeFileHandler(StaticFileHandler):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+
+    # Constants
+    SEND_CHUNK_SIZE: Final[int] = 64 * 1024
+
+    # Constructor
+
+    # Public Methods
+    def do_GET(self) -> None:
+        # Count the request while it is answered
+        self.server.startRequest()
+        try:
+            # Wait like a distant server
+            time.sleep(self.server.latency)
+
+            # Server is down
+            if self.server.isDown:
+                self.resetConnection()
+                return
+
+            # File is missing
+            if self.path not in self.server.files:
+                self.sendBody(404, b"Not Found")
+                return
+
+            # Get the file and its headers, the ETag changes along with the content
+            content: Final[bytes] = self.server.files[self.path]
+            headers: Final[dict[str, str]] = {
+                "Content-Type": "application/octet-stream",
+                "ETag": f'"{hashlib.sha256(content).hexdigest()[:16]}"',
+            }
+            if self.server.acceptsRanges:
+                headers["Accept-Ranges"] = "bytes"
+
+            # Send the range asked for, unless ranges are refused or the file changed since `If-Range`
+            start: int = 0
+            end: int = len(content)
+            rangeMatch: Final[re.Match] = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+            if (
+                rangeMatch is not None
+                and self.server.acceptsRanges
+                and self.headers.get("If-Range", headers["ETag"]) == headers["ETag"]
+            ):
+                start = int(rangeMatch[1])
+                end = min(end, int(rangeMatch[2]) + 1) if rangeMatch[2] else end
+                headers["Content-Range"] = f"bytes {start}-{end - 1}/{len(content)}"
+            self.send_response(206 if "Content-Range" in headers else 200)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(end - start))
+            self.end_headers()
+            if self.command == "HEAD":
+                return
+
+            # Send the body, cut off if asked to
+            dropSize: Final[int] = self.server.takeDropSize()
+            if not self.sendContent(memoryview(content)[start:end if dropSize is None else min(end, start + dropSize)]):
+                return
+
+            # Close the connection after the bytes sent, like a dropped download
+            if dropSize is not None and dropSize < end - start:
+                self.server.recordDropped(False)
+                self.close_connection = True
+                self.connection.shutdown(socket.SHUT_RDWR)
+        finally:
+            self.server.finishRequest()
+
+    def sendContent(self, content: memoryview) -> bool:
+        """
+        Sends the body of a file response in chunks, stalling or going down
+        along the way if the server is set to.
+
+        @param { memoryview } content - The bytes to send
+        @return bool - Was every byte sent, False if the connection was reset or the client hung up
+        """
+        # Send every chunk
+        sentSize: int = 0
+        try:
+            while sentSize < len(content):
+                # Server went down meanwhile
+                if self.server.isDown:
+                    self.resetConnection()
+                    return False
+
+                # Send the next chunk
+                chunk: memoryview = content[sentSize:sentSize + self.SEND_CHUNK_SIZE]
+                self.wfile.write(chunk)
+                sentSize += len(chunk)
+                time.sleep(self.server.recordSent(len(chunk)))
+        except OSError:
+            # Client hung up
+            self.close_connection = True
+            return False
+
+        # Return
+        return True
+
+    def resetConnection(self) -> None:
+        """
+        Resets the connection, discarding anything not yet sent.
+
+        @return None
+        """
+        self.server.recordDropped(True)
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        self.connection.close()
+        self.close_connection = True
+
+    # Private Methods
+
+# Enums
+
+# Interfaces
+
+# Constants
+DEFAULT_VERSION: Final[str] = "1.0.0-1"
+# A package page like archlinux.org's, with the details after the navigation and before the long listings
+PACKAGE_PAGE_TEMPLATE: Final[str] = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="utf-8" />
+    <title>Arch Linux - {name} {version} (x86_64)</title>
+</head>
+<body>
+    <div id="archnavbar"><div id="archnavbarlogo"><h1><a href="/">Arch Linux</a></h1></div></div>
+    <div id="content">
+        <div id="pkgdetails" class="box">
+            <h2>{name} {version}</h2>
+            <meta itemprop="name" content="{name}" />
+            <meta itemprop="version" content="{version}" />
+            <table id="pkginfo">
+{rows}
+            </table>
+        </div>
+    </div>
+</body>
+</html>
+"""
+SYNC_DATABASE_ENTRY_TEMPLATE: Final[str] = """%FILENAME%
+{name}-{version}-x86_64.pkg.tar.zst
+
+%NAME%
+{name}
+
+%BASE%
+{name}
+
+%VERSION%
+{version}
+
+%DESC%
+The {name} package
+
+%CSIZE%
+123456
+
+%ISIZE%
+654321
+
+%SHA256SUM%
+{checksum}
+
+%PGPSIG%
+{signature}
+
+%URL%
+https://example.org/{name}
+
+%LICENSE%
+GPL-2.0-only
+
+%ARCH%
+x86_64
+
+%BUILDDATE%
+1700000000
+
+%PACKAGER%
+Arch Linux ARM Build System <builder@example.org>
+
+%DEPENDS%
+glibc
+zlib
+
+"""
+PACKAGE_PAGE_ROW: Final[str] = '                <tr><th>Field {index}:</th><td><a href="/packages/?q=value-{index}">value-{index}</a></td></tr>'
+
+# Public Variables
+
+# Private Variables
+
+# Public Methods
+def createPackagePage(packageName: str, packageVersion: str, rowCount: int = 60) -> bytes:
+    """
+    Returns an Arch Linux package page listing a version.
+
+    @param { str } packageName - The name of the package
+    @param { str } packageVersion - The version, e.g. `6.6.10.arch1-1`
+    @param { int } rowCount - The rows of the details table, making the page larger (Optional)
+    @return bytes - The HTML
+    """
+    return PACKAGE_PAGE_TEMPLATE.format(
+        name=packageName,
+        version=packageVersion,
+        rows="\n".join(PACKAGE_PAGE_ROW.format(index=index) for index in range(rowCount)),
+    ).encode("utf-8")
+
+def createPackage(packageName: str, packageVersion: str, upstreamURL: str, upstreamType: str = None, upstreamName: str = None) -> db.PackageInfo:
+    """
+    Returns a package record like the database hands out.
+
+    @param { str } packageName - The name of the package
+    @param { str } packageVersion - The current version
+    @param { str } upstreamURL - The upstream page or sync database
+    @param { str } upstreamType - `html` or `syncdb` (Optional)
+    @param { str } upstreamName - The name upstream lists the package under (Optional)
+    @return db.PackageInfo - The package
+    """
+    # Get the URLs
+    rawPackageURLInfo: Final[dict] = {"type": "http", "source_url": "", "upstream_url": upstreamURL}
+    if upstreamType is not None:
+        rawPackageURLInfo["upstream_type"] = upstreamType
+    if upstreamName is not None:
+        rawPackageURLInfo["upstream_name"] = upstreamName
+
+    # Return
+    return db.PackageInfo(
+        {"version": packageVersion, "urls": rawPackageURLInfo, "paths": {}, "buildInfo": {}},
+        packageName,
+        context.Workspace(),
+    )
+
+def createSyncDatabase(packageVersions: dict[str, str], compression: str = "gz") -> bytes:
+    """
+    Returns a pacman sync database listing packages, a tarball with a
+    `<name>-<version>/desc` entry per package like `core.db`.
+
+    @param { dict[str, str] } packageVersions - The raw version of each package by name
+    @param { str } compression - `gz`, `xz`, `bz2` or an empty string (Optional)
+    @return bytes - The sync database
+    """
+    # Output tarball
+    rawSyncDatabase: Final[io.BytesIO] = io.BytesIO()
+
+    with tarfile.open(fileobj=rawSyncDatabase, mode=f"w:{compression}") as syncDatabase:
+        for packageName, packageVersion in packageVersions.items():
+            # Add the package directory
+            directoryInfo: tarfile.TarInfo = tarfile.TarInfo(f"{packageName}-{packageVersion}")
+            directoryInfo.type = tarfile.DIRTYPE
+            directoryInfo.mode = 0o755
+            syncDatabase.addfile(directoryInfo)
+
+            # Add its entry, with the fields pacman writes around the name and version
+            rawEntry: bytes = SYNC_DATABASE_ENTRY_TEMPLATE.format(
+                name=packageName,
+                version=packageVersion,
+                checksum=hashlib.sha256(packageName.encode("utf-8")).hexdigest(),
+                signature=base64.b64encode(hashlib.sha512(packageName.encode("utf-8")).digest() * 4).decode("ascii"),
+            ).encode("utf-8")
+            entryInfo: tarfile.TarInfo = tarfile.TarInfo(f"{packageName}-{packageVersion}/desc")
+            entryInfo.size = len(rawEntry)
+            entryInfo.mode = 0o644
+            syncDatabase.addfile(entryInfo, io.BytesIO(rawEntry))
+
+    # Return
+    return rawSyncDatabase.getvalue()
+
+def createWorkspace(rootDirectory: str, packageUpstreams: dict[str, tuple[str, str]]) -> context.Workspace:
+    """
+    Writes a package database into a new repository root.
+
+    @param { str } rootDirectory - The repository root
+    @param { dict[str, tuple[str, str]] } packageUpstreams - The version and upstream URL of each package by name
+    @return context.Workspace - The workspace of the repository
+    """
+    # Instance a new Workspace
+    workspace: Final[context.Workspace] = context.Workspace(rootDirectory)
+
+    # Write the database
+    os.makedirs(os.path.dirname(workspace.getDatabaseFilePath()), exist_ok=True)
+    with open(workspace.getDatabaseFilePath(), "w") as databaseFile:
+        json.dump(
+            {
+                "packages": list(packageUpstreams),
+                "package_info": {
+                    packageName: {
+                        "version": packageVersion,
+                        "urls": {"type": "http", "source_url": "", "upstream_url": upstreamURL},
+                        "paths": {"repo": f"/packages/{packageName}", "pkgbuild": f"/pkgbuild/{packageName}"},
+                        "buildInfo": {
+                            "markedForBuild": False,
+                            "buildFunctionName": f"build_pkg_{packageName}".replace("-", "_"),
+                            "prepareFunctionName": f"prepare_pkg_{packageName}".replace("-", "_"),
+                        },
+                    }
+                    for packageName, (packageVersion, upstreamURL) in packageUpstreams.items()
+                },
+            },
+            databaseFile,
+        )
+
+    # Return
+    return workspace
+
+def getLastModified(packageVersion: str) -> str:
+    """
+    Returns the Last-Modified date of a package page, a day picked by the version.
+
+    @param { str } packageVersion - The version the page lists
+    @return str - The HTTP date
+    """
+    return time.strftime(
+        "%a, %d %b %Y %H:%M:%S GMT",
+        time.gmtime(1704067200 + int(hashlib.sha256(packageVersion.encode("utf-8")).hexdigest(), 16) % 3650 * 86400),
+    )
+
+def getPackagePagePath(packageName: str) -> str:
+    """
+    Returns the path of a package page on archlinux.org.
+
+    @param { str } packageName - The name of the package
+    @return str - The path, e.g. `/packages/extra/x86_64/vim/`
+    """
+    return f"/packages/extra/x86_64/{packageName}/"
+
+# Private Methods
+
+# Run
+if __name__ == "__main__":
+    pass
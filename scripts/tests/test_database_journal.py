@@ -0,0 +1,141 @@
+# Import Statements
+# First party
+import os
+import tempfile
+import unittest
+from unittest import mock
+from typing import Final
+
+# Second party
+import utils.db as db
+import utils.storage as storage
+import utils.context as context
+import tests.fixtures as fixtures
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || test_database_journal.py
+# ---------------------------------------
+# Checks every compaction archives the journal it folds into
+# db.json under the sequences it holds, next to the database
+# where it is committed along with it, and only the most
+# recent archives are kept.
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Class Definitions
+class JournalArchiveTest(unittest.TestCase):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+    workspace: context.Workspace
+
+    # Private Variables
+
+    # Constants
+
+    # Constructor
+
+    # Public Methods
+    def setUp(self) -> None:
+        # Write a database into a temporary repository
+        temporaryDirectory: Final[tempfile.TemporaryDirectory] = tempfile.TemporaryDirectory(prefix="alarm-test-")
+        self.addCleanup(temporaryDirectory.cleanup)
+        self.workspace = fixtures.createWorkspace(
+            temporaryDirectory.name, {"package": ("1.0.0", "http://127.0.0.1/package/")}
+        )
+
+    def test_archivesEveryCompaction(self) -> None:
+        """
+        Checks each compaction keeps its journal, named after its first and last sequence.
+
+        @return None
+        """
+        # Compact after two and after one change
+        database: Final[db.Database] = db.Database(workspace=self.workspace)
+        self._modify(database, "1.1.0", "1.2.0")
+        self._modify(database, "1.3.0")
+
+        # Both journals are kept, oldest first
+        journal: Final[storage.DatabaseJournal] = self._getJournal()
+        self.assertEqual(
+            [os.path.basename(archiveFilePath) for archiveFilePath in journal.getArchiveFilePaths()],
+            ["db.json.journal.1-2", "db.json.journal.3-3"],
+        )
+        self.assertEqual([entry["sequence"] for entry in self._readArchive(journal.getArchiveFilePaths()[0])], [1, 2])
+        self.assertFalse(os.path.exists(f"{self.workspace.getDatabaseFilePath()}{storage.JOURNAL_FILE_SUFFIX}"))
+
+        # Nothing to fold in, nothing archived
+        database.compact()
+        self.assertEqual(len(journal.getArchiveFilePaths()), 2)
+
+    def test_keepsRecentArchives(self) -> None:
+        """
+        Checks only the most recent archives are kept.
+
+        @return None
+        """
+        # Compact more often than archives are kept
+        database: Final[db.Database] = db.Database(workspace=self.workspace)
+        with mock.patch.object(storage, "JOURNAL_ARCHIVE_COUNT", 3):
+            for index in range(12):
+                self._modify(database, f"1.{index}.0")
+
+        # The last three are left, numbers ordered past 9
+        self.assertEqual(
+            [os.path.basename(archiveFilePath) for archiveFilePath in self._getJournal().getArchiveFilePaths()],
+            ["db.json.journal.10-10", "db.json.journal.11-11", "db.json.journal.12-12"],
+        )
+
+    # Private Methods
+    def _modify(self, database: db.Database, *packageVersions: str) -> None:
+        """
+        Sets the package version once per change, then folds the journal into db.json.
+
+        @param { db.Database } database - The database
+        @param { str } packageVersions - The versions to set, one commit each
+        @return None
+        """
+        for packageVersion in packageVersions:
+            database.modifyPackage("package", "version", packageVersion)
+        database.compact()
+
+    def _getJournal(self) -> storage.DatabaseJournal:
+        """
+        Returns the journal of the database.
+
+        @return storage.DatabaseJournal - The journal
+        """
+        return storage.DatabaseJournal(f"{self.workspace.getDatabaseFilePath()}{storage.JOURNAL_FILE_SUFFIX}")
+
+    def _readArchive(self, archiveFilePath: str) -> list[dict]:
+        """
+        Reads the entries of an archived journal.
+
+        @param { str } archiveFilePath - The path to the archived journal
+        @return list[dict] - The journal entries
+        """
+        return storage.DatabaseJournal(archiveFilePath).read()
+
+# Enums
+
+# Interfaces
+
+# Constants
+
+# Public Variables
+
+# Private Variables
+
+# Public Methods
+
+# Private Methods
+
+# Run
+if __name__ == "__main__":
+    unittest.main()
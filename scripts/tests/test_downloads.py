@@ -0,0 +1,347 @@
+# Import Statements
+# First party
+import os
+import json
+import hashlib
+import tempfile
+import unittest
+import http.client
+from unittest import mock
+from typing import Final
+
+# Second party
+import utils.cache as cache
+import utils.network as network
+import utils.storage as storage
+import utils.checksum as checksum
+import tests.fixtures as fixtures
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || test_downloads.py
+# ---------------------------------------
+# Checks `ConnectionPool.downloadFile` against a local file
+# server which cuts responses off, stalls, goes down, refuses
+# ranges and changes the file mid-download. Every download must
+# end with the served file, resumed rather than sent again
+# where the server allows it, and a source cache must check the
+# checksums it is given and leave no download locks behind.
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Class Definitions
+class DownloadTest(unittest.TestCase):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+    server: fixtures.LocalServer
+    temporaryDirectory: str
+    url: str
+
+    # Private Variables
+
+    # Constants
+
+    # Constructor
+
+    # Public Methods
+    def setUp(self) -> None:
+        # Serve the file
+        self.server = fixtures.LocalServer(fixtures.RangeFileHandler)
+        self.addCleanup(self.server.close)
+        self.server.files[FILE_PATH] = FILE_CONTENT
+        self.url = self.server.getURL(FILE_PATH)
+
+        # Split a few MiB into ranges read in small chunks and back off briefly, so every test stays quick
+        for name, value in (
+            ("DOWNLOAD_MINIMUM_RANGE_SIZE", MINIMUM_RANGE_SIZE),
+            ("DOWNLOAD_CHUNK_SIZE", CHUNK_SIZE),
+            ("BACKOFF_BASE_DELAY", BACKOFF_BASE_DELAY),
+        ):
+            patcher: mock._patch = mock.patch.object(network, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        # Write every download into a temporary directory
+        temporaryDirectory: Final[tempfile.TemporaryDirectory] = tempfile.TemporaryDirectory(prefix="alarm-test-")
+        self.addCleanup(temporaryDirectory.cleanup)
+        self.temporaryDirectory = temporaryDirectory.name
+
+    def test_downloadsWholeAndInRanges(self) -> None:
+        """
+        Checks a file is downloaded in one piece or in concurrent ranges, each byte sent once.
+
+        @return None
+        """
+        for maximumRanges, expectedRequestCount in ((1, 2), (4, 5)):
+            with self.subTest(maximumRanges):
+                # Download, a HEAD and a GET per range
+                self.server.requestCount = self.server.sentSize = 0
+                filePath: str = self._download(f"file-{maximumRanges}", maximumRanges=maximumRanges)
+
+                # Whole file sent once, no progress left behind
+                self.assertEqual(self.server.requestCount, expectedRequestCount)
+                self.assertEqual(self.server.sentSize, len(FILE_CONTENT))
+                self.assertFalse(os.path.exists(f"{filePath}{network.DOWNLOAD_STATE_SUFFIX}"))
+
+    def test_resumesDroppedConnections(self) -> None:
+        """
+        Checks a range whose connection is cut off resumes from its last byte.
+
+        @return None
+        """
+        for maximumRanges in (1, 4):
+            with self.subTest(maximumRanges):
+                # Cut every response off after 300 KiB
+                self.server.sentSize = self.server.droppedCount = 0
+                self.server.dropSizes = [300 * 1024] * 40
+                self._download(f"file-{maximumRanges}", maximumRanges=maximumRanges)
+
+                # Dropped, still every byte sent once
+                self.assertGreater(self.server.droppedCount, 0)
+                self.assertEqual(self.server.sentSize, len(FILE_CONTENT))
+
+    def test_resumesOnNextCall(self) -> None:
+        """
+        Checks a download which failed when the server went down resumes on the next call.
+
+        @return None
+        """
+        # Server goes down half way, the download fails
+        filePath: Final[str] = f"{self.temporaryDirectory}/file"
+        self._failDownload(filePath)
+        firstSentSize: Final[int] = self.server.sentSize
+        self.assertGreater(self.server.resetCount, 0)
+        self.assertTrue(os.path.exists(f"{filePath}{network.DOWNLOAD_STATE_SUFFIX}"))
+
+        # Server is back, the next call fetches only the rest
+        self.server.isDown = False
+        self._download("file")
+        self.assertLess(self.server.sentSize - firstSentSize, len(FILE_CONTENT) * 3 // 4)
+
+    def test_restartsChangedFile(self) -> None:
+        """
+        Checks a download is not resumed once the file changed, and the next call gets the new file.
+
+        @return None
+        """
+        # Download fails half way
+        filePath: Final[str] = f"{self.temporaryDirectory}/file"
+        self._failDownload(filePath)
+
+        # File changes meanwhile, `If-Range` makes the server send all of it
+        changedContent: Final[bytes] = FILE_CONTENT[::-1]
+        self.server.files[FILE_PATH] = changedContent
+        self.server.isDown = False
+
+        # Resume is refused, dropping the partial file
+        with self.assertRaisesRegex(Exception, "changed while it was downloaded"):
+            network.ConnectionPool(timeout=REQUEST_TIMEOUT).downloadFile(self.url, filePath)
+        self.assertFalse(os.path.exists(filePath))
+        self.assertFalse(os.path.exists(f"{filePath}{network.DOWNLOAD_STATE_SUFFIX}"))
+
+        # Next call gets the new file
+        self._download("file", changedContent)
+
+    def test_restartsWithoutRanges(self) -> None:
+        """
+        Checks a server without ranges has a dropped download start over, until it gets further.
+
+        @return None
+        """
+        # Refuse ranges, cut the first responses off
+        self.server.acceptsRanges = False
+        self.server.dropSizes = [len(FILE_CONTENT) // 2, len(FILE_CONTENT) // 3]
+
+        # Download, the whole file sent by the third GET
+        self._download("file", maximumAttempts=3)
+        self.assertEqual(self.server.requestCount, 4)
+        self.assertEqual(self.server.droppedCount, 2)
+
+    def test_givesUpWithoutProgress(self) -> None:
+        """
+        Checks a download without ranges gives up once it keeps failing without getting further.
+
+        @return None
+        """
+        # Refuse ranges, cut every response off half way
+        self.server.acceptsRanges = False
+        self.server.dropSizes = [len(FILE_CONTENT) // 2] * 10
+
+        # Gives up after the attempts, the first one made progress
+        with self.assertRaises(http.client.IncompleteRead):
+            network.ConnectionPool(timeout=REQUEST_TIMEOUT, maximumAttempts=3).downloadFile(
+                self.url, f"{self.temporaryDirectory}/file"
+            )
+        self.assertEqual(self.server.droppedCount, 3)
+
+    def test_resumesStalledConnection(self) -> None:
+        """
+        Checks a connection which stalls times out and resumes from its last byte.
+
+        @return None
+        """
+        # Stall for longer than the timeout
+        self.server.stallAfterSize = 512 * 1024
+        self.server.stallTime = REQUEST_TIMEOUT * 3
+
+        # Download, resumed by a second GET
+        self._download("file", maximumRanges=1)
+        self.assertEqual(self.server.requestCount, 3)
+
+    def test_checksSize(self) -> None:
+        """
+        Checks a download which ends up shorter than the file is dropped.
+
+        @return None
+        """
+        # Download fails half way
+        filePath: Final[str] = f"{self.temporaryDirectory}/file"
+        self._failDownload(filePath)
+        self.server.isDown = False
+
+        # The progress is saved as complete, but the file lost its end
+        stateFilePath: Final[str] = f"{filePath}{network.DOWNLOAD_STATE_SUFFIX}"
+        with open(stateFilePath, "r") as stateFile:
+            state: dict = json.load(stateFile)
+        for downloadRange in state["ranges"]:
+            downloadRange[2] = downloadRange[1]
+        with open(stateFilePath, "w") as stateFile:
+            json.dump(state, stateFile)
+        os.truncate(filePath, 1000)
+
+        # Size check fails, dropping the download
+        with self.assertRaisesRegex(Exception, f"Downloaded 1000 of {len(FILE_CONTENT)} bytes"):
+            network.ConnectionPool(timeout=REQUEST_TIMEOUT).downloadFile(self.url, filePath)
+        self.assertFalse(os.path.exists(filePath))
+        self.assertFalse(os.path.exists(stateFilePath))
+
+        # Next call downloads it again
+        self._download("file")
+
+    def test_sourceCacheChecksDigests(self) -> None:
+        """
+        Checks the source cache keeps a download with the expected checksum, and drops a mismatch.
+
+        @return None
+        """
+        # Cache in the temporary directory
+        connectionPool: Final[network.ConnectionPool] = network.ConnectionPool(timeout=REQUEST_TIMEOUT)
+        sourceCache: Final[cache.SourceCache] = cache.SourceCache(f"{self.temporaryDirectory}/cache")
+
+        # Checksum mismatch raises, caching nothing
+        with self.assertRaisesRegex(Exception, "Checksum mismatch"):
+            sourceCache.fetchFile(
+                self.url, f"{self.temporaryDirectory}/wrong", connectionPool=connectionPool, expectedDigests={"sha256": "0" * 64}
+            )
+        self.assertEqual(sourceCache.getStatistics()["entries"], 0)
+
+        # Expected checksum is stored
+        self.assertEqual(
+            sourceCache.fetchFile(
+                self.url, f"{self.temporaryDirectory}/first", connectionPool=connectionPool, expectedDigests={"sha256": FILE_HASH}
+            ),
+            {"sha256": FILE_HASH},
+        )
+
+        # Next fetch is served from the cache, without a request
+        self.server.requestCount = 0
+        sourceCache.fetchFile(
+            self.url, f"{self.temporaryDirectory}/second", connectionPool=connectionPool, expectedDigests={"sha256": FILE_HASH}
+        )
+        self.assertEqual(self.server.requestCount, 0)
+        self.assertEqual(checksum.hashFile(f"{self.temporaryDirectory}/second")["sha256"], FILE_HASH)
+
+    def test_sourceCacheRemovesDownloadLocks(self) -> None:
+        """
+        Checks no download lock is left behind by a fetch, and garbage collection deletes the unused ones.
+
+        @return None
+        """
+        # Cache in the temporary directory
+        sourceCache: Final[cache.SourceCache] = cache.SourceCache(f"{self.temporaryDirectory}/cache")
+        objectDirectory: Final[str] = f"{self.temporaryDirectory}/cache/{cache.SourceCache.OBJECT_DIRECTORY_NAME}"
+
+        # Fetched file leaves only its content
+        sourceCache.fetchFile(
+            self.url, f"{self.temporaryDirectory}/file", connectionPool=network.ConnectionPool(timeout=REQUEST_TIMEOUT)
+        )
+        self.assertEqual(os.listdir(objectDirectory), [FILE_HASH])
+
+        # Leave a lock from an older run, and hold another
+        open(f"{objectDirectory}/.stale.partial.lock", "w").close()
+        heldLock: Final[storage.DatabaseLock] = storage.DatabaseLock(f"{objectDirectory}/.held.partial")
+        self.addCleanup(heldLock.close)
+        with heldLock.exclusive():
+            sourceCache.collectGarbage()
+
+            # Only the held lock is kept
+            self.assertEqual(sorted(os.listdir(objectDirectory)), [".held.partial.lock", FILE_HASH])
+
+    # Private Methods
+    def _download(self, fileName: str, expectedContent: bytes = None, maximumRanges: int = None, maximumAttempts: int = None) -> str:
+        """
+        Downloads the served file, checking the digest fed along the way and the file written.
+
+        @param { str } fileName - The name of the file in the temporary directory
+        @param { bytes } expectedContent - The content the file must have, the served file by default (Optional)
+        @param { int } maximumRanges - The most concurrent ranges (Optional)
+        @param { int } maximumAttempts - The failures without progress before giving up (Optional)
+        @return str - The path to the file
+        """
+        # Download
+        filePath: Final[str] = f"{self.temporaryDirectory}/{fileName}"
+        digest: Final[checksum.MultiDigest] = checksum.MultiDigest(("sha256",))
+        network.ConnectionPool(timeout=REQUEST_TIMEOUT, maximumAttempts=maximumAttempts).downloadFile(
+            self.url, filePath, digest, maximumRanges
+        )
+
+        # Check the digest and the file
+        expectedHash: Final[str] = hashlib.sha256(expectedContent or FILE_CONTENT).hexdigest()
+        self.assertEqual(digest.hexdigests()["sha256"], expectedHash)
+        self.assertEqual(checksum.hashFile(filePath)["sha256"], expectedHash)
+
+        # Return
+        return filePath
+
+    def _failDownload(self, filePath: str) -> None:
+        """
+        Downloads the served file in ranges while the server goes down half way, which must fail.
+
+        @param { str } filePath - The file to write
+        @return None
+        """
+        self.server.downAfterSize = len(FILE_CONTENT) // 2
+        with self.assertRaises(OSError):
+            network.ConnectionPool(timeout=REQUEST_TIMEOUT, maximumAttempts=2).downloadFile(self.url, filePath)
+
+# Enums
+
+# Interfaces
+
+# Constants
+FILE_PATH: Final[str] = "/sources/linux-6.6.10.tar.xz"
+FILE_CONTENT: Final[bytes] = os.urandom(4 * 1024 * 1024)
+FILE_HASH: Final[str] = hashlib.sha256(FILE_CONTENT).hexdigest()
+# Splits the file into 4 ranges
+MINIMUM_RANGE_SIZE: Final[int] = 1024 * 1024
+CHUNK_SIZE: Final[int] = 64 * 1024
+BACKOFF_BASE_DELAY: Final[float] = 0.01
+REQUEST_TIMEOUT: Final[float] = 0.5
+
+# Public Variables
+
+# Private Variables
+
+# Public Methods
+
+# Private Methods
+
+# Run
+if __name__ == "__main__":
+    unittest.main()
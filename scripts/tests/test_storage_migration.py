@@ -0,0 +1,149 @@
+# Import Statements
+# First party
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from typing import Final
+
+# Second party
+import utils.db as db
+import utils.storage as storage
+import utils.context as context
+import tests.fixtures as fixtures
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || test_storage_migration.py
+# ---------------------------------------
+# Checks `migrateDatabase` converts a db.json into SQLite and
+# back without changing a single value, with or without a
+# journal sequence, and refuses to migrate a database onto
+# itself, which would delete it before it is read.
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Class Definitions
+class MigrationTest(unittest.TestCase):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+    temporaryDirectory: str
+
+    # Private Variables
+
+    # Constants
+
+    # Constructor
+
+    # Public Methods
+    def setUp(self) -> None:
+        # Migrate in a temporary directory
+        temporaryDirectory: Final[tempfile.TemporaryDirectory] = tempfile.TemporaryDirectory(prefix="alarm-test-")
+        self.addCleanup(temporaryDirectory.cleanup)
+        self.temporaryDirectory = temporaryDirectory.name
+
+    def test_roundTripsRepositoryDatabase(self) -> None:
+        """
+        Checks the committed db.json, which has no journal sequence, comes back from SQLite unchanged.
+
+        @return None
+        """
+        # Copy the committed database
+        databaseFilePath: Final[str] = f"{self.temporaryDirectory}/db.json"
+        shutil.copyfile(context.Workspace().getDatabaseFilePath(), databaseFilePath)
+
+        # Round trip, no sequence is added
+        self.assertEqual(self._roundTrip(databaseFilePath), readJSON(databaseFilePath))
+        self.assertNotIn("sequence", readJSON(f"{self.temporaryDirectory}/db.migrated.json"))
+
+    def test_roundTripsJournaledDatabase(self) -> None:
+        """
+        Checks a database written through the journal keeps its sequence and package generations.
+
+        @return None
+        """
+        # Write a database and change it through the journal
+        workspace: Final[context.Workspace] = fixtures.createWorkspace(
+            self.temporaryDirectory,
+            {f"package-{index}": ("1.0.0", f"http://127.0.0.1/package-{index}/") for index in range(PACKAGE_COUNT)},
+        )
+        database: Final[db.Database] = db.Database(workspace=workspace)
+        with database.transaction():
+            database.modifyPackage("package-1", "version", "1.1.0")
+            database.modifyPackage("package-1", "buildInfo/markedForBuild", True)
+        database.compact()
+
+        # Round trip
+        rawDatabase: Final[dict] = readJSON(workspace.getDatabaseFilePath())
+        self.assertEqual(rawDatabase["sequence"], 2)
+        self.assertEqual(self._roundTrip(workspace.getDatabaseFilePath()), rawDatabase)
+
+    def test_refusesOwnPath(self) -> None:
+        """
+        Checks a database is not migrated onto itself, however the path is spelled.
+
+        @return None
+        """
+        # Copy the committed database, and link to it
+        databaseFilePath: Final[str] = f"{self.temporaryDirectory}/db.json"
+        shutil.copyfile(context.Workspace().getDatabaseFilePath(), databaseFilePath)
+        os.symlink(databaseFilePath, f"{self.temporaryDirectory}/linked.json")
+        rawDatabase: Final[dict] = readJSON(databaseFilePath)
+
+        # Every spelling is refused, leaving the database as it was
+        for destinationFilePath in (
+            databaseFilePath,
+            f"{self.temporaryDirectory}/./../{os.path.basename(self.temporaryDirectory)}/db.json",
+            f"{self.temporaryDirectory}/linked.json",
+        ):
+            with self.subTest(destinationFilePath):
+                with self.assertRaisesRegex(Exception, "onto itself"):
+                    storage.migrateDatabase(databaseFilePath, destinationFilePath)
+                self.assertEqual(readJSON(databaseFilePath), rawDatabase)
+
+    # Private Methods
+    def _roundTrip(self, databaseFilePath: str) -> dict:
+        """
+        Migrates a database into SQLite and back into JSON.
+
+        @param { str } databaseFilePath - The path to the JSON database
+        @return dict - The raw database migrated back
+        """
+        storage.migrateDatabase(databaseFilePath, f"{self.temporaryDirectory}/db.sqlite")
+        storage.migrateDatabase(f"{self.temporaryDirectory}/db.sqlite", f"{self.temporaryDirectory}/db.migrated.json")
+        return readJSON(f"{self.temporaryDirectory}/db.migrated.json")
+
+# Enums
+
+# Interfaces
+
+# Constants
+PACKAGE_COUNT: Final[int] = 8
+
+# Public Variables
+
+# Private Variables
+
+# Public Methods
+def readJSON(filePath: str) -> dict:
+    """
+    Reads a JSON file.
+
+    @param { str } filePath - The path to the file
+    @return dict - The decoded content
+    """
+    with open(filePath, "r") as jsonFile:
+        return json.load(jsonFile)
+
+# Private Methods
+
+# Run
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,263 @@
+# Import Statements
+# First party
+import io
+import tempfile
+import unittest
+from typing import Final
+
+# Second party
+import utils.db as db
+import utils.sync as sync
+import utils.network as network
+import tests.fixtures as fixtures
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || test_sync_database.py
+# ---------------------------------------
+# Checks versions are read from pacman sync databases,
+# generated tarballs served by a local server. A sync database
+# must be downloaded once for all the packages it lists, under
+# their own name or their `upstream_name`, and a package it
+# does not list must fail on its own.
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Class Definitions
+class SyncDatabaseTest(unittest.TestCase):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+    # Sync databases by path, generated once for every test
+    syncDatabaseFiles: dict[str, bytes]
+    server: fixtures.LocalServer
+    connectionPool: network.ConnectionPool
+
+    # Private Variables
+
+    # Constants
+
+    # Constructor
+
+    # Public Methods
+    @classmethod
+    def setUpClass(cls) -> None:
+        # Create the sync database in each compression
+        cls.syncDatabaseFiles = {
+            getSyncDatabasePath(compression): fixtures.createSyncDatabase(SYNC_DATABASE_VERSIONS, compression)
+            for compression in ("gz", "xz", "bz2", "")
+        }
+
+    def setUp(self) -> None:
+        # Serve the sync databases
+        self.server = fixtures.LocalServer(fixtures.StaticFileHandler)
+        self.addCleanup(self.server.close)
+        self.server.files.update(self.syncDatabaseFiles)
+
+        # Instance a new connection pool, not shared with other tests
+        self.connectionPool = network.ConnectionPool()
+        self.addCleanup(self.connectionPool.close)
+
+    def test_readsEveryCompression(self) -> None:
+        """
+        Checks every package of a sync database is read, however it is compressed.
+
+        @return None
+        """
+        for compression in ("gz", "xz", "bz2", ""):
+            with self.subTest(compression or "none"):
+                self.assertEqual(
+                    sync.readSyncDatabaseVersions(io.BytesIO(self.server.files[getSyncDatabasePath(compression)])),
+                    SYNC_DATABASE_VERSIONS,
+                )
+
+    def test_downloadsOncePerSyncDatabase(self) -> None:
+        """
+        Checks the packages of a sync database get their versions from a single download.
+
+        @return None
+        """
+        # Look up every package of the sync database
+        syncDatabaseURL: Final[str] = self.server.getURL(getSyncDatabasePath("gz"))
+        results: Final[list[tuple[db.PackageInfo, str, str]]] = list(
+            sync.UpstreamVersionChecker(connectionPool=self.connectionPool).checkPackages(
+                [
+                    fixtures.createPackage(packageName, "0.1.0", syncDatabaseURL, sync.UPSTREAM_TYPE_SYNC_DATABASE)
+                    for packageName in SYNC_DATABASE_VERSIONS
+                ]
+            )
+        )
+
+        # Downloaded once, every version normalized like a package page's
+        self.assertEqual(self.server.requestCount, 1)
+        self.assertEqual(
+            {package.getPackageName(): (upstreamVersion, upstreamError) for package, upstreamVersion, upstreamError in results},
+            {
+                "linux": ("6.6.7", None),
+                "vim": ("2:9.0.2167", None),
+                "glibc": ("2.38", None),
+                **{f"package-{index}": (f"1.{index}.0", None) for index in range(PACKAGE_COUNT)},
+            },
+        )
+
+    def test_looksUpUpstreamName(self) -> None:
+        """
+        Checks a package is looked up under its `upstream_name`, next to a package page.
+
+        @return None
+        """
+        # Serve the page of the same package
+        pageServer: Final[fixtures.LocalServer] = fixtures.LocalServer(fixtures.PackagePageHandler)
+        self.addCleanup(pageServer.close)
+        pageServer.versions["linux"] = "6.6.7.arch1-1"
+
+        # Look up the ARM package under the name of the x86_64 one, from the sync database and the page
+        results: Final[dict[str, str]] = {
+            package.getPackageName(): upstreamVersion
+            for package, upstreamVersion, _ in sync.UpstreamVersionChecker(connectionPool=self.connectionPool).checkPackages(
+                [
+                    fixtures.createPackage(
+                        "linux-aarch64",
+                        "6.6.6",
+                        self.server.getURL(getSyncDatabasePath("xz")),
+                        sync.UPSTREAM_TYPE_SYNC_DATABASE,
+                        "linux",
+                    ),
+                    fixtures.createPackage(
+                        "linux-aarch64-page", "6.6.6", pageServer.getURL(fixtures.getPackagePagePath("linux"))
+                    ),
+                ]
+            )
+        }
+
+        # Both sources agree
+        self.assertEqual(results, {"linux-aarch64": "6.6.7", "linux-aarch64-page": "6.6.7"})
+
+    def test_reportsMissingPackage(self) -> None:
+        """
+        Checks a package the sync database does not list fails, without failing the others.
+
+        @return None
+        """
+        # Look up a listed and an unlisted package
+        syncDatabaseURL: Final[str] = self.server.getURL(getSyncDatabasePath("gz"))
+        results: Final[dict[str, tuple[str, str]]] = {
+            package.getPackageName(): (upstreamVersion, upstreamError)
+            for package, upstreamVersion, upstreamError in sync.UpstreamVersionChecker(
+                connectionPool=self.connectionPool
+            ).checkPackages(
+                [
+                    fixtures.createPackage("glibc", "2.37", syncDatabaseURL, sync.UPSTREAM_TYPE_SYNC_DATABASE),
+                    fixtures.createPackage("missing", "1.0.0", syncDatabaseURL, sync.UPSTREAM_TYPE_SYNC_DATABASE),
+                ]
+            )
+        }
+
+        # Only the unlisted package fails
+        self.assertEqual(results["glibc"], ("2.38", None))
+        self.assertIsNone(results["missing"][0])
+        self.assertIn('"missing" was not found', results["missing"][1])
+
+        # Raised by the provider as its own exception
+        with self.assertRaises(sync.UpstreamPackageNotFoundException):
+            sync.SyncDatabaseVersionProvider(self.connectionPool).getVersion(syncDatabaseURL, "missing")
+
+    def test_failsDownloadOnce(self) -> None:
+        """
+        Checks a sync database which cannot be downloaded is requested once, failing every package it lists.
+
+        @return None
+        """
+        # Look up packages of a missing sync database
+        syncDatabaseURL: Final[str] = self.server.getURL("/missing/os/x86_64/missing.db")
+        results: Final[list[tuple[db.PackageInfo, str, str]]] = list(
+            sync.UpstreamVersionChecker(connectionPool=self.connectionPool).checkPackages(
+                [
+                    fixtures.createPackage(packageName, "0.1.0", syncDatabaseURL, sync.UPSTREAM_TYPE_SYNC_DATABASE)
+                    for packageName in SYNC_DATABASE_VERSIONS
+                ]
+            )
+        )
+
+        # Requested once, every package failed
+        self.assertEqual(self.server.requestCount, 1)
+        self.assertEqual(len(results), len(SYNC_DATABASE_VERSIONS))
+        for _, upstreamVersion, upstreamError in results:
+            self.assertIsNone(upstreamVersion)
+            self.assertIn("404", upstreamError)
+
+    def test_cachesByUpstreamName(self) -> None:
+        """
+        Checks sync database versions are cached per package, and reused while fresh.
+
+        @return None
+        """
+        with tempfile.TemporaryDirectory(prefix="alarm-test-") as temporaryDirectory:
+            # Get the packages, two listed under the same upstream name
+            syncDatabaseURL: str = self.server.getURL(getSyncDatabasePath("gz"))
+            packages: list[db.PackageInfo] = [
+                fixtures.createPackage("linux-aarch64", "6.6.6", syncDatabaseURL, sync.UPSTREAM_TYPE_SYNC_DATABASE, "linux"),
+                fixtures.createPackage("linux-rpi", "6.6.6", syncDatabaseURL, sync.UPSTREAM_TYPE_SYNC_DATABASE, "linux"),
+                fixtures.createPackage("vim", "9.0.0", syncDatabaseURL, sync.UPSTREAM_TYPE_SYNC_DATABASE),
+            ]
+
+            # Look them up twice, with the cache the first run saved
+            for runIndex in range(2):
+                upstreamCache: sync.UpstreamCache = sync.UpstreamCache(
+                    f"{temporaryDirectory}/upstream_cache.json", timeToLive=60 * 60
+                )
+                results: dict[str, str] = {
+                    package.getPackageName(): upstreamVersion
+                    for package, upstreamVersion, _ in sync.UpstreamVersionChecker(
+                        connectionPool=self.connectionPool, upstreamCache=upstreamCache
+                    ).checkPackages(packages)
+                }
+                upstreamCache.save()
+
+                # Same versions both times
+                self.assertEqual(results, {"linux-aarch64": "6.6.7", "linux-rpi": "6.6.7", "vim": "2:9.0.2167"})
+
+            # Second run was served from the cache, keyed by upstream name
+            self.assertEqual(self.server.requestCount, 1)
+            self.assertEqual(upstreamCache.getStatistics()["fresh"], 3)
+            self.assertEqual(upstreamCache.getStatistics()["entries"], 2)
+
+    # Private Methods
+
+# Enums
+
+# Interfaces
+
+# Constants
+PACKAGE_COUNT: Final[int] = 200
+SYNC_DATABASE_VERSIONS: Final[dict[str, str]] = {
+    "linux": "6.6.7.arch1-1",
+    "vim": "2:9.0.2167-1",
+    "glibc": "2.38-7",
+    **{f"package-{index}": f"1.{index}.0-{index % 3 + 1}" for index in range(PACKAGE_COUNT)},
+}
+
+# Public Variables
+
+# Private Variables
+
+# Public Methods
+def getSyncDatabasePath(compression: str) -> str:
+    """
+    Returns the path a sync database is served at.
+
+    @param { str } compression - The compression of the sync database
+    @return str - The path, e.g. `/extra/os/x86_64/extra.db` for `gz`
+    """
+    return f"/extra/os/x86_64/extra{'-' + compression if compression != 'gz' else ''}.db"
+
+# Private Methods
+
+# Run
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,302 @@
+# Import Statements
+# First party
+import os
+import sys
+import json
+import tempfile
+import unittest
+import subprocess
+from typing import Final
+
+# Second party
+import utils.db as db
+import utils.context as context
+import tests.fixtures as fixtures
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || test_sync_shards.py
+# ---------------------------------------
+# Checks a sync split into shards, each run as its own
+# `sync_package_database.py shard` process like a CI runner,
+# then merged, writes the same database as a single run
+# against the same local package page server. Merging must
+# write nothing if the shards conflict with each other or
+# with the database.
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Class Definitions
+class SyncShardTest(unittest.TestCase):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+    server: fixtures.LocalServer
+    temporaryDirectory: str
+
+    # Private Variables
+
+    # Constants
+
+    # Constructor
+
+    # Public Methods
+    def setUp(self) -> None:
+        # Start a package page server, with upgrades (with and without an epoch), current versions,
+        # downgrades and missing pages
+        self.server = fixtures.LocalServer(fixtures.PackagePageHandler)
+        self.addCleanup(self.server.close)
+        for index in range(PACKAGE_COUNT):
+            self.server.versions[f"package-{index}"] = ("1.1.0-1", "1.0.0-1", "0.9.0-1", "2:0.1.0-1")[index % 4]
+        self.server.missingPackageNames.update(f"package-{index}" for index in range(0, PACKAGE_COUNT, 9))
+
+        # Keep every repository in a temporary directory
+        temporaryDirectory: Final[tempfile.TemporaryDirectory] = tempfile.TemporaryDirectory(prefix="alarm-test-")
+        self.addCleanup(temporaryDirectory.cleanup)
+        self.temporaryDirectory = temporaryDirectory.name
+
+    def test_mergeEqualsSingleRun(self) -> None:
+        """
+        Checks merging the shards writes the same database, upstream cache and
+        sync schedule as checking every package in one run.
+
+        @return None
+        """
+        # Sync in a single run
+        singleWorkspace: Final[context.Workspace] = self._createWorkspace("single")
+        self._runSync(singleWorkspace)
+
+        # Sync in shards, each in its own process at the same time, then merge
+        shardedWorkspace: Final[context.Workspace] = self._createWorkspace("sharded")
+        shardFilePaths: Final[list[str]] = self._runShards(shardedWorkspace, SHARD_COUNT)
+        self._runSync(shardedWorkspace, "merge", *shardFilePaths)
+
+        # Every shard checked some packages
+        for shardFilePath in shardFilePaths:
+            with open(shardFilePath, "r") as shardFile:
+                self.assertGreater(len(json.load(shardFile)["results"]), 0)
+
+        # Same packages and versions
+        singleDatabase: Final[dict] = readJSON(singleWorkspace.getDatabaseFilePath())
+        shardedDatabase: Final[dict] = readJSON(shardedWorkspace.getDatabaseFilePath())
+        self.assertEqual(shardedDatabase["packages"], singleDatabase["packages"])
+        self.assertEqual(shardedDatabase["package_info"], singleDatabase["package_info"])
+
+        # Upgrades are marked for build, current versions, downgrades and failed lookups are left as they are
+        for packageName, expectedVersion, expectedMarkedForBuild in (
+            ("package-4", "1.1.0", True),
+            ("package-3", "2:0.1.0", True),
+            ("package-1", "1.0.0", False),
+            ("package-2", "1.0.0", False),
+            ("package-0", "1.0.0", False),
+        ):
+            self.assertEqual(singleDatabase["package_info"][packageName]["version"], expectedVersion)
+            self.assertEqual(
+                singleDatabase["package_info"][packageName]["buildInfo"]["markedForBuild"], expectedMarkedForBuild
+            )
+
+        # Same upstream cache and sync schedule entries
+        self.assertEqual(
+            getEntryVersions(readJSON(shardedWorkspace.getUpstreamCacheFilePath())["entries"]),
+            getEntryVersions(readJSON(singleWorkspace.getUpstreamCacheFilePath())["entries"]),
+        )
+        self.assertEqual(
+            set(readJSON(shardedWorkspace.getSyncScheduleFilePath())["entries"]),
+            set(readJSON(singleWorkspace.getSyncScheduleFilePath())["entries"]),
+        )
+
+    def test_rejectsChangedPackages(self) -> None:
+        """
+        Checks nothing is written if a package changed since its shard checked it.
+
+        @return None
+        """
+        # Check the shards
+        workspace: Final[context.Workspace] = self._createWorkspace("changed")
+        shardFilePaths: Final[list[str]] = self._runShards(workspace, SHARD_COUNT)
+
+        # Change a package meanwhile
+        database: Final[db.Database] = db.Database(workspace=workspace)
+        database.modifyPackage("package-1", "version", "1.0.5")
+        database.compact()
+        databaseContent: Final[dict] = readJSON(workspace.getDatabaseFilePath())
+
+        # Merge fails, leaving the database as it is
+        self.assertIn(
+            'Package "package-1" changed from v1.0.0 to v1.0.5',
+            self._runSync(workspace, "merge", *shardFilePaths, expectFailure=True),
+        )
+        self.assertEqual(readJSON(workspace.getDatabaseFilePath()), databaseContent)
+
+    def test_rejectsIncompleteShards(self) -> None:
+        """
+        Checks nothing is written if a shard is missing, repeated or split differently.
+
+        @return None
+        """
+        # Check the shards, and one shard of another split
+        workspace: Final[context.Workspace] = self._createWorkspace("incomplete")
+        shardFilePaths: Final[list[str]] = self._runShards(workspace, SHARD_COUNT)
+        otherShardFilePath: Final[str] = f"{self.temporaryDirectory}/other-shard.json"
+        self._runSync(workspace, "shard", "0", str(SHARD_COUNT + 1), otherShardFilePath)
+        databaseContent: Final[dict] = readJSON(workspace.getDatabaseFilePath())
+
+        # Every merge fails, leaving the database as it is
+        for shardFilePathsToMerge, expectedError in (
+            (shardFilePaths[1:], "Shards [0] are missing"),
+            (shardFilePaths + shardFilePaths[:1], "Shard 0 is given more than once"),
+            (shardFilePaths[1:] + [otherShardFilePath], f"is one of {SHARD_COUNT + 1} shards"),
+        ):
+            with self.subTest(expectedError):
+                self.assertIn(
+                    expectedError, self._runSync(workspace, "merge", *shardFilePathsToMerge, expectFailure=True)
+                )
+                self.assertEqual(readJSON(workspace.getDatabaseFilePath()), databaseContent)
+
+    # Private Methods
+    def _createWorkspace(self, name: str) -> context.Workspace:
+        """
+        Writes the package database into a new repository.
+
+        @param { str } name - The name of the repository directory
+        @return context.Workspace - The workspace of the repository
+        """
+        return fixtures.createWorkspace(
+            f"{self.temporaryDirectory}/{name}",
+            {
+                f"package-{index}": ("1.0.0", self.server.getURL(fixtures.getPackagePagePath(f"package-{index}")))
+                for index in range(PACKAGE_COUNT)
+            },
+        )
+
+    def _runShards(self, workspace: context.Workspace, shardCount: int) -> list[str]:
+        """
+        Checks every shard in its own process, all at the same time.
+
+        @param { context.Workspace } workspace - The workspace of the repository
+        @param { int } shardCount - The number of shards
+        @return list[str] - The paths to the shard result files
+        """
+        # Start every shard
+        shardFilePaths: Final[list[str]] = [
+            f"{self.temporaryDirectory}/{os.path.basename(workspace.getRootDirectory())}-shard-{shardIndex}.json"
+            for shardIndex in range(shardCount)
+        ]
+        processes: Final[list[subprocess.Popen]] = [
+            subprocess.Popen(
+                getSyncCommand("shard", str(shardIndex), str(shardCount), shardFilePath),
+                cwd=SCRIPTS_DIRECTORY,
+                env=getSyncEnvironment(workspace),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+            )
+            for shardIndex, shardFilePath in enumerate(shardFilePaths)
+        ]
+
+        # Wait for all of them
+        for process in processes:
+            _, rawError = process.communicate(timeout=PROCESS_TIMEOUT)
+            self.assertEqual(process.returncode, 0, rawError.decode("utf-8"))
+
+        # Return
+        return shardFilePaths
+
+    def _runSync(self, workspace: context.Workspace, *arguments: str, expectFailure: bool = False) -> str:
+        """
+        Runs `sync_package_database.py` on a repository.
+
+        @param { context.Workspace } workspace - The workspace of the repository
+        @param { str } arguments - The arguments of the script
+        @param { bool } expectFailure - Must the script fail (Optional)
+        @return str - The error output of the script
+        """
+        # Run the script
+        process: Final[subprocess.CompletedProcess] = subprocess.run(
+            getSyncCommand(*arguments),
+            cwd=SCRIPTS_DIRECTORY,
+            env=getSyncEnvironment(workspace),
+            capture_output=True,
+            timeout=PROCESS_TIMEOUT,
+        )
+
+        # Check how it exited
+        if expectFailure:
+            self.assertNotEqual(process.returncode, 0)
+        else:
+            self.assertEqual(process.returncode, 0, process.stderr.decode("utf-8"))
+
+        # Return
+        return process.stderr.decode("utf-8")
+
+# Enums
+
+# Interfaces
+
+# Constants
+SCRIPTS_DIRECTORY: Final[str] = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE_COUNT: Final[int] = 60
+SHARD_COUNT: Final[int] = 3
+PROCESS_TIMEOUT: Final[float] = 120.0
+
+# Public Variables
+
+# Private Variables
+
+# Public Methods
+def getSyncCommand(*arguments: str) -> list[str]:
+    """
+    Returns the command running `sync_package_database.py`.
+
+    @param { str } arguments - The arguments of the script
+    @return list[str] - The command
+    """
+    return [sys.executable, f"{SCRIPTS_DIRECTORY}/sync_package_database.py", *arguments]
+
+def getSyncEnvironment(workspace: context.Workspace) -> dict[str, str]:
+    """
+    Returns the environment a sync of a repository runs in, checking every package.
+
+    @param { context.Workspace } workspace - The workspace of the repository
+    @return dict[str, str] - The environment variables
+    """
+    return {
+        **{name: value for name, value in os.environ.items() if not name.startswith("ALARM_")},
+        "ALARM_DATABASE_FILE": workspace.getDatabaseFilePath(),
+        "ALARM_UPSTREAM_CACHE_FILE": workspace.getUpstreamCacheFilePath(),
+        "ALARM_SYNC_SCHEDULE_FILE": workspace.getSyncScheduleFilePath(),
+        "ALARM_REPOSITORY_ROOT": workspace.getRootDirectory(),
+        "ALARM_SYNC_FORCE_ALL": "1",
+    }
+
+def readJSON(filePath: str) -> dict:
+    """
+    Reads a JSON file.
+
+    @param { str } filePath - The path to the file
+    @return dict - The decoded content
+    """
+    with open(filePath, "r") as jsonFile:
+        return json.load(jsonFile)
+
+def getEntryVersions(entries: dict[str, dict]) -> dict[str, tuple[str, str]]:
+    """
+    Returns the version and error of each upstream cache entry, leaving out when they were recorded.
+
+    @param { dict[str, dict] } entries - The upstream cache entries by key
+    @return dict[str, tuple[str, str]] - The version and error by key, with the server's port dropped
+    """
+    return {
+        key.split("/", 3)[-1]: (entry.get("version"), entry.get("error"))
+        for key, entry in entries.items()
+    }
+
+# Private Methods
+
+# Run
+if __name__ == "__main__":
+    unittest.main()
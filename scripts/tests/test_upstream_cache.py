@@ -0,0 +1,238 @@
+# Import Statements
+# First party
+import os
+import json
+import tempfile
+import unittest
+from typing import Final
+
+# Second party
+import utils.db as db
+import utils.sync as sync
+import utils.network as network
+import tests.fixtures as fixtures
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || test_upstream_cache.py
+# ---------------------------------------
+# Checks the upstream cache against a local server which
+# validates package pages by ETag or Last-Modified. Unchanged
+# pages must be answered 304 and take their version from the
+# cache, changed pages are downloaded again, and the cache file
+# stays within its size budget.
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Class Definitions
+class UpstreamCacheTest(unittest.TestCase):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+    server: fixtures.LocalServer
+    cacheFilePath: str
+    packages: list[db.PackageInfo]
+
+    # Private Variables
+
+    # Constants
+
+    # Constructor
+
+    # Public Methods
+    def setUp(self) -> None:
+        # Start a validating package page server
+        self.server = fixtures.LocalServer(fixtures.ValidatingPackagePageHandler)
+        self.addCleanup(self.server.close)
+
+        # Keep the cache in a temporary directory
+        temporaryDirectory: Final[tempfile.TemporaryDirectory] = tempfile.TemporaryDirectory(prefix="alarm-test-")
+        self.addCleanup(temporaryDirectory.cleanup)
+        self.cacheFilePath = f"{temporaryDirectory.name}/upstream_cache.json"
+
+        # Get the packages
+        self.packages = [
+            fixtures.createPackage(
+                f"package-{index}", "0.9.0", self.server.getURL(fixtures.getPackagePagePath(f"package-{index}"))
+            )
+            for index in range(PACKAGE_COUNT)
+        ]
+
+    def test_revalidatesByETag(self) -> None:
+        """
+        Checks unchanged pages are revalidated by ETag instead of downloaded.
+
+        @return None
+        """
+        self._checkRevalidation("etag")
+
+    def test_revalidatesByLastModified(self) -> None:
+        """
+        Checks unchanged pages are revalidated by Last-Modified instead of downloaded.
+
+        @return None
+        """
+        self._checkRevalidation("lastModified")
+
+    def test_downloadsChangedPages(self) -> None:
+        """
+        Checks pages which changed since they were cached are downloaded and parsed again.
+
+        @return None
+        """
+        # Fill the cache
+        self._runSync()
+
+        # Change some pages
+        changedPackageNames: Final[set[str]] = {package.getPackageName() for package in self.packages[::10]}
+        for packageName in changedPackageNames:
+            self.server.versions[packageName] = "2.0.0-1"
+
+        # Revalidate
+        upstreamVersions, statistics = self._runSync()
+
+        # Only the changed pages are downloaded, with their new version
+        self.assertEqual(statistics["misses"], len(changedPackageNames))
+        self.assertEqual(statistics["hits"], PACKAGE_COUNT - len(changedPackageNames))
+        for packageName, upstreamVersion in upstreamVersions.items():
+            self.assertEqual(upstreamVersion, "2.0.0" if packageName in changedPackageNames else "1.0.0")
+
+    def test_skipsFreshVersions(self) -> None:
+        """
+        Checks versions checked within the time to live are used without a request.
+
+        @return None
+        """
+        # Fill the cache
+        self._runSync()
+        requestCount: Final[int] = self.server.requestCount
+
+        # Check again within the time to live
+        upstreamVersions, statistics = self._runSync(timeToLive=60 * 60)
+
+        # Nothing is requested
+        self.assertEqual(self.server.requestCount, requestCount)
+        self.assertEqual(statistics["fresh"], PACKAGE_COUNT)
+        self.assertEqual(set(upstreamVersions.values()), {"1.0.0"})
+
+    def test_defersFailedLookups(self) -> None:
+        """
+        Checks a failed lookup is not retried until its delay passes.
+
+        @return None
+        """
+        # Remove a page
+        missingPackageName: Final[str] = self.packages[0].getPackageName()
+        self.server.missingPackageNames.add(missingPackageName)
+
+        # Fail the lookup, then check again
+        self._runSync()
+        requestCount: Final[int] = self.server.requestCount
+        upstreamVersions, statistics = self._runSync()
+
+        # Page is not requested again
+        self.assertNotIn(missingPackageName, upstreamVersions)
+        self.assertEqual(statistics["deferred"], 1)
+        self.assertEqual(self.server.requestCount - requestCount, PACKAGE_COUNT - 1)
+
+    def test_evictsLeastRecentlyUsed(self) -> None:
+        """
+        Checks the cache file stays within its size budget, dropping the least recently used entries.
+
+        @return None
+        """
+        # Fill the cache, then use half of the pages again
+        self._runSync()
+        self._runSync(packages=self.packages[PACKAGE_COUNT // 2:])
+
+        # Save within a budget of about a quarter of the entries
+        maximumSize: Final[int] = os.path.getsize(self.cacheFilePath) // 4
+        upstreamCache: Final[sync.UpstreamCache] = sync.UpstreamCache(self.cacheFilePath, maximumSize=maximumSize)
+        upstreamCache.save()
+
+        # File fits, and only recently used entries are left
+        self.assertLessEqual(os.path.getsize(self.cacheFilePath), maximumSize)
+        self.assertGreater(upstreamCache.getStatistics()["evictions"], PACKAGE_COUNT // 2)
+        with open(self.cacheFilePath, "r") as cacheFile:
+            cachedURLs: Final[set[str]] = set(json.load(cacheFile)["entries"])
+        self.assertGreater(len(cachedURLs), 0)
+        self.assertTrue(
+            cachedURLs <= {package.getPackageURLs().getUpstreamURL() for package in self.packages[PACKAGE_COUNT // 2:]}
+        )
+
+    # Private Methods
+    def _checkRevalidation(self, validatorType: str) -> None:
+        """
+        Fills the cache and checks a second sync only revalidates.
+
+        @param { str } validatorType - The validators the server sends, `etag` or `lastModified`
+        @return None
+        """
+        # Send the validators
+        self.server.validatorType = validatorType
+
+        # Fill the cache
+        upstreamVersions, statistics = self._runSync()
+        self.assertEqual(statistics["misses"], PACKAGE_COUNT)
+        self.assertEqual(self.server.notModifiedCount, 0)
+
+        # Revalidate every page
+        cachedVersions, statistics = self._runSync()
+
+        # Every page is answered 304 and keeps its version
+        self.assertEqual(cachedVersions, upstreamVersions)
+        self.assertEqual(statistics["hits"], PACKAGE_COUNT)
+        self.assertEqual(statistics["misses"], 0)
+        self.assertEqual(self.server.notModifiedCount, PACKAGE_COUNT)
+
+    def _runSync(self, timeToLive: float = 0.0, packages: list[db.PackageInfo] = None) -> tuple[dict[str, str], dict[str, int]]:
+        """
+        Looks the packages up with the cache saved by the last run, like a new sync.
+
+        @param { float } timeToLive - How long checked versions stay fresh (Optional)
+        @param { list[db.PackageInfo] } packages - The packages to look up instead of all of them (Optional)
+        @return tuple[dict[str, str], dict[str, int]] - The upstream versions found and the cache statistics
+        """
+        # Load the cache
+        upstreamCache: Final[sync.UpstreamCache] = sync.UpstreamCache(self.cacheFilePath, timeToLive=timeToLive)
+
+        # Look the packages up
+        connectionPool: Final[network.ConnectionPool] = network.ConnectionPool()
+        upstreamVersions: Final[dict[str, str]] = {
+            package.getPackageName(): upstreamVersion
+            for package, upstreamVersion, upstreamError in sync.UpstreamVersionChecker(
+                connectionPool=connectionPool, upstreamCache=upstreamCache
+            ).checkPackages(packages or self.packages)
+            if upstreamError is None
+        }
+        connectionPool.close()
+
+        # Save the cache for the next run
+        upstreamCache.save()
+
+        # Return
+        return upstreamVersions, upstreamCache.getStatistics()
+
+# Enums
+
+# Interfaces
+
+# Constants
+PACKAGE_COUNT: Final[int] = 50
+
+# Public Variables
+
+# Private Variables
+
+# Public Methods
+
+# Private Methods
+
+# Run
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,276 @@
+# Import Statements
+# First party
+import time
+import tempfile
+import unittest
+from typing import Final
+from unittest import mock
+
+# Second party
+import utils.db as db
+import utils.sync as sync
+import utils.storage as storage
+import utils.network as network
+import utils.context as context
+import tests.fixtures as fixtures
+import sync_package_database
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || test_upstream_checks.py
+# ---------------------------------------
+# Checks the upstream versions are looked up concurrently,
+# within the global and per-host limits, against local package
+# page servers which answer after an artificial latency.
+# Failed lookups must not abort the others, and the results
+# are written to the database in one batch.
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Class Definitions
+class UpstreamVersionCheckerTest(unittest.TestCase):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+    server: fixtures.LocalServer
+    connectionPool: network.ConnectionPool
+
+    # Private Variables
+
+    # Constants
+
+    # Constructor
+
+    # Public Methods
+    def setUp(self) -> None:
+        # Start a package page server answering like a distant one
+        self.server = fixtures.LocalServer(fixtures.PackagePageHandler, LATENCY)
+        self.addCleanup(self.server.close)
+
+        # Instance a new connection pool, not shared with other tests
+        self.connectionPool = network.ConnectionPool(maximumConnectionsPerHost=MAXIMUM_CONNECTIONS_PER_HOST)
+        self.addCleanup(self.connectionPool.close)
+
+    def test_looksUpEveryVersion(self) -> None:
+        """
+        Checks every package gets the version of its own page.
+
+        @return None
+        """
+        # Give each package its own version
+        packages: Final[list[db.PackageInfo]] = self._createPackages(self.server, PACKAGE_COUNT)
+        for index, package in enumerate(packages):
+            self.server.versions[package.getPackageName()] = f"1.{index}.0-1"
+
+        # Look them up
+        upstreamVersions: Final[dict[str, str]] = self._checkPackages(
+            sync.UpstreamVersionChecker(MAXIMUM_CONCURRENCY, self.connectionPool), packages
+        )
+
+        # Every version is found, without its pkgrel
+        self.assertEqual(
+            upstreamVersions, {package.getPackageName(): f"1.{index}.0" for index, package in enumerate(packages)}
+        )
+
+    def test_looksUpConcurrently(self) -> None:
+        """
+        Checks the lookups overlap, up to the global limit.
+
+        @return None
+        """
+        # Look the packages up
+        startTime: Final[float] = time.perf_counter()
+        self._checkPackages(
+            sync.UpstreamVersionChecker(MAXIMUM_CONCURRENCY, self.connectionPool),
+            self._createPackages(self.server, PACKAGE_COUNT),
+        )
+        elapsedTime: Final[float] = time.perf_counter() - startTime
+
+        # Far faster than one after another
+        self.assertLess(elapsedTime, PACKAGE_COUNT * LATENCY / 2)
+        self.assertGreater(self.server.maximumActiveRequestCount, 1)
+        self.assertLessEqual(self.server.maximumActiveRequestCount, MAXIMUM_CONNECTIONS_PER_HOST)
+
+    def test_limitsGlobalConcurrency(self) -> None:
+        """
+        Checks no more lookups run at once than the checker allows.
+
+        @return None
+        """
+        # Allow fewer lookups than connections
+        self._checkPackages(
+            sync.UpstreamVersionChecker(2, self.connectionPool),
+            self._createPackages(self.server, PACKAGE_COUNT),
+        )
+
+        # Never more than two at once
+        self.assertEqual(self.server.maximumActiveRequestCount, 2)
+
+    def test_limitsConcurrencyPerHost(self) -> None:
+        """
+        Checks no host sees more requests at once than the pool allows,
+        while other hosts are looked up next to it.
+
+        @return None
+        """
+        # Start another host, a server on another port
+        otherServer: Final[fixtures.LocalServer] = fixtures.LocalServer(fixtures.PackagePageHandler, LATENCY)
+        self.addCleanup(otherServer.close)
+
+        # Look the packages of both hosts up, with a lower limit per host
+        connectionPool: Final[network.ConnectionPool] = network.ConnectionPool(maximumConnectionsPerHost=2)
+        self.addCleanup(connectionPool.close)
+        self._checkPackages(
+            sync.UpstreamVersionChecker(MAXIMUM_CONCURRENCY, connectionPool),
+            self._createPackages(self.server, PACKAGE_COUNT // 2)
+            + self._createPackages(otherServer, PACKAGE_COUNT // 2, "other"),
+        )
+
+        # Each host is limited on its own
+        self.assertEqual(self.server.maximumActiveRequestCount, 2)
+        self.assertEqual(otherServer.maximumActiveRequestCount, 2)
+        self.assertLessEqual(self.server.connectionCount, 2)
+        self.assertLessEqual(otherServer.connectionCount, 2)
+
+    def test_reportsFailedLookups(self) -> None:
+        """
+        Checks failed lookups yield their error and the others still complete.
+
+        @return None
+        """
+        # Remove some pages
+        packages: Final[list[db.PackageInfo]] = self._createPackages(self.server, PACKAGE_COUNT)
+        missingPackageNames: Final[set[str]] = {package.getPackageName() for package in packages[::5]}
+        self.server.missingPackageNames.update(missingPackageNames)
+
+        # Look them up
+        results: Final[list[tuple[db.PackageInfo, str, str]]] = list(
+            sync.UpstreamVersionChecker(MAXIMUM_CONCURRENCY, self.connectionPool).checkPackages(packages)
+        )
+
+        # Every package has a result, an error for the missing pages only
+        self.assertEqual(len(results), len(packages))
+        for package, upstreamVersion, upstreamError in results:
+            if package.getPackageName() in missingPackageNames:
+                self.assertIsNone(upstreamVersion)
+                self.assertIn("404", upstreamError)
+            else:
+                self.assertEqual(upstreamVersion, "1.0.0")
+                self.assertIsNone(upstreamError)
+
+    # Private Methods
+    def _createPackages(self, server: fixtures.LocalServer, packageCount: int, prefix: str = "package") -> list[db.PackageInfo]:
+        """
+        Returns packages whose upstream page is on a server.
+
+        @param { fixtures.LocalServer } server - The package page server
+        @param { int } packageCount - The number of packages
+        @param { str } prefix - The start of the package names (Optional)
+        @return list[db.PackageInfo] - The packages
+        """
+        return [
+            fixtures.createPackage(
+                f"{prefix}-{index}", "0.9.0", server.getURL(fixtures.getPackagePagePath(f"{prefix}-{index}"))
+            )
+            for index in range(packageCount)
+        ]
+
+    def _checkPackages(self, upstreamVersionChecker: sync.UpstreamVersionChecker, packages: list[db.PackageInfo]) -> dict[str, str]:
+        """
+        Looks up packages which must all succeed.
+
+        @param { sync.UpstreamVersionChecker } upstreamVersionChecker - The checker
+        @param { list[db.PackageInfo] } packages - The packages
+        @return dict[str, str] - The upstream versions by package name
+        """
+        # Look them up
+        upstreamVersions: Final[dict[str, str]] = {}
+        for package, upstreamVersion, upstreamError in upstreamVersionChecker.checkPackages(packages):
+            self.assertIsNone(upstreamError)
+            upstreamVersions[package.getPackageName()] = upstreamVersion
+
+        # Return
+        return upstreamVersions
+
+class ApplyResultsTest(unittest.TestCase):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+
+    # Constants
+
+    # Constructor
+
+    # Public Methods
+    def test_writesResultsInOneBatch(self) -> None:
+        """
+        Checks the results of a sync are committed once, and only upgrades are marked for build.
+
+        @return None
+        """
+        with tempfile.TemporaryDirectory(prefix="alarm-test-") as temporaryDirectory:
+            # Write a database
+            workspace: Final[context.Workspace] = fixtures.createWorkspace(
+                temporaryDirectory,
+                {
+                    "upgraded": ("1.0.0", "http://127.0.0.1/upgraded/"),
+                    "current": ("2.0.0", "http://127.0.0.1/current/"),
+                    "downgraded": ("3.0.0", "http://127.0.0.1/downgraded/"),
+                },
+            )
+            database: Final[db.Database] = db.Database(workspace=workspace)
+
+            # Compare the upstream versions
+            results: Final[list[dict]] = sync.compareUpstreamVersions(
+                database.getAllPackages(), {"upgraded": "1.1.0", "current": "2.0.0", "downgraded": "2.9.0"}
+            )
+
+            # Write the results, counting the writes to the journal
+            with mock.patch.object(
+                storage.DatabaseJournal, "append", autospec=True, side_effect=storage.DatabaseJournal.append
+            ) as append:
+                sync_package_database._applyResults(workspace, database, results)
+            self.assertEqual(append.call_count, 1)
+
+            # Read the database back
+            database = db.Database(workspace=workspace)
+            self.assertEqual(database.getPackage("upgraded").getPackageVersion(), "1.1.0")
+            self.assertTrue(database.getPackage("upgraded").getPackageBuildInfo().isMarkedForBuild())
+            self.assertEqual(database.getPackage("current").getPackageVersion(), "2.0.0")
+            self.assertFalse(database.getPackage("current").getPackageBuildInfo().isMarkedForBuild())
+            self.assertEqual(database.getPackage("downgraded").getPackageVersion(), "3.0.0")
+            self.assertFalse(database.getPackage("downgraded").getPackageBuildInfo().isMarkedForBuild())
+
+    # Private Methods
+
+# Enums
+
+# Interfaces
+
+# Constants
+# Seconds each package page takes to answer
+LATENCY: Final[float] = 0.05
+PACKAGE_COUNT: Final[int] = 64
+MAXIMUM_CONCURRENCY: Final[int] = 16
+MAXIMUM_CONNECTIONS_PER_HOST: Final[int] = 8
+
+# Public Variables
+
+# Private Variables
+
+# Public Methods
+
+# Private Methods
+
+# Run
+if __name__ == "__main__":
+    unittest.main()
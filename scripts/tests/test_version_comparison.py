@@ -0,0 +1,257 @@
+# Import Statements
+# First party
+import unittest
+from unittest import mock
+from typing import Final
+
+# Second party
+import utils.sync as sync
+import utils.version as version
+import tests.fixtures as fixtures
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || test_version_comparison.py
+# ---------------------------------------
+# Checks the `vercmp` port against pacman's own test vectors,
+# in both directions and in batches, the normalization applied
+# to upstream versions by default, and which upstream versions
+# mark a package for build.
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Class Definitions
+class VersionComparisonTest(unittest.TestCase):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+
+    # Constants
+
+    # Constructor
+
+    # Public Methods
+    def test_matchesVercmp(self) -> None:
+        """
+        Checks every pair is ordered like pacman's `vercmp`, both ways round.
+
+        @return None
+        """
+        for versionA, versionB, expectedResult in VERCMP_CASES:
+            with self.subTest(f"{versionA} {versionB}"):
+                self.assertEqual(version.compareVersions(versionA, versionB), expectedResult)
+                self.assertEqual(version.compareVersions(versionB, versionA), -expectedResult)
+
+    def test_matchesVercmpInBatch(self) -> None:
+        """
+        Checks a batch gives the same results as comparing each pair on its own.
+
+        @return None
+        """
+        self.assertEqual(
+            version.compareVersionsBatch(
+                [(versionA, versionB) for versionA, versionB, _ in VERCMP_CASES]
+                + [(versionB, versionA) for versionA, versionB, _ in VERCMP_CASES]
+            ),
+            [expectedResult for _, _, expectedResult in VERCMP_CASES]
+            + [-expectedResult for _, _, expectedResult in VERCMP_CASES],
+        )
+
+    def test_skipsIdenticalStrings(self) -> None:
+        """
+        Checks identical strings are equal without being split.
+
+        @return None
+        """
+        with mock.patch.object(version, "_parseVersion", wraps=version._parseVersion) as parseVersion:
+            self.assertEqual(version.compareVersions("1:6.6.10-1", "1:6.6.10-1"), 0)
+            self.assertEqual(version.compareVersionsBatch([("2.38-7", "2.38-7"), ("1.0", "1.0")]), [0, 0])
+        parseVersion.assert_not_called()
+
+    def test_normalizesUpstreamVersions(self) -> None:
+        """
+        Checks the default rules drop the pkgrel and Arch Linux's `.archN` suffix, and nothing else.
+
+        @return None
+        """
+        versionNormalizer: Final[version.VersionNormalizer] = version.VersionNormalizer()
+        for rawVersion, expectedVersion in NORMALIZATION_CASES:
+            with self.subTest(rawVersion):
+                self.assertEqual(versionNormalizer.normalize(rawVersion), expectedVersion)
+
+    def test_appliesGivenRules(self) -> None:
+        """
+        Checks rules given instead of the defaults are applied in order.
+
+        @return None
+        """
+        self.assertEqual(version.VersionNormalizer([]).normalize("6.6.10.arch1-1"), "6.6.10.arch1-1")
+        self.assertEqual(
+            version.VersionNormalizer([(r"\.zen[0-9]+", ""), (r"-[0-9]+$", "")]).normalize("6.6.7.zen1-1"), "6.6.7"
+        )
+
+    # Private Methods
+
+class CompareUpstreamVersionsTest(unittest.TestCase):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+
+    # Constants
+
+    # Constructor
+
+    # Public Methods
+    def test_marksUpgradesForBuild(self) -> None:
+        """
+        Checks upgrades are marked for build, equal versions are not, and downgrades are left alone.
+
+        @return None
+        """
+        # Compare each package's upstream version, one package fails its lookup
+        results: Final[dict[str, dict]] = {
+            result["name"]: result
+            for result in sync.compareUpstreamVersions(
+                [
+                    fixtures.createPackage(packageName, packageVersion, f"http://127.0.0.1/{packageName}/")
+                    for packageName, (packageVersion, _, _) in UPSTREAM_CASES.items()
+                ]
+                + [fixtures.createPackage("failed", "1.0.0", "http://127.0.0.1/failed/")],
+                {packageName: upstreamVersion for packageName, (_, upstreamVersion, _) in UPSTREAM_CASES.items()},
+            )
+        }
+
+        # Failed lookups are left out
+        self.assertNotIn("failed", results)
+
+        # Each package is marked by its comparison, None being left as it is
+        for packageName, (packageVersion, upstreamVersion, expectedMarkedForBuild) in UPSTREAM_CASES.items():
+            with self.subTest(packageName):
+                self.assertEqual(
+                    results[packageName],
+                    {
+                        "name": packageName,
+                        "oldVersion": packageVersion,
+                        "newVersion": upstreamVersion,
+                        "markedForBuild": expectedMarkedForBuild,
+                    },
+                )
+
+    # Private Methods
+
+# Enums
+
+# Interfaces
+
+# Constants
+# Pairs from pacman's `test/util/vercmptest.sh` and the vercmp manual, with the result of comparing the first to the second
+VERCMP_CASES: Final[list[tuple[str, str, int]]] = [
+    # Similar length, no pkgrel
+    ("1.5.0", "1.5.0", 0),
+    ("1.5.1", "1.5.0", 1),
+    # Mixed length
+    ("1.5.1", "1.5", 1),
+    ("1.0", "1.0.0", -1),
+    # With pkgrel
+    ("1.5.0-1", "1.5.0-1", 0),
+    ("1.5.0-1", "1.5.0-2", -1),
+    ("1.5.0-1", "1.5.1-1", -1),
+    ("1.5.0-2", "1.5.1-1", -1),
+    # With pkgrel, mixed lengths
+    ("1.5-1", "1.5.1-1", -1),
+    ("1.5-2", "1.5.1-1", -1),
+    ("1.5-2", "1.5.1-2", -1),
+    # Pkgrel on one side only is ignored
+    ("1.5", "1.5-1", 0),
+    ("1.5-1", "1.5", 0),
+    ("1.1-1", "1.1", 0),
+    ("1.0-1", "1.1", -1),
+    ("1.1-1", "1.0", 1),
+    # Alphanumeric versions
+    ("1.5b-1", "1.5-1", -1),
+    ("1.5b", "1.5", -1),
+    ("1.5b-1", "1.5", -1),
+    ("1.5b", "1.5.1", -1),
+    # From the vercmp manual, 1.0a < 1.0alpha < 1.0b < 1.0beta < 1.0p < 1.0pre < 1.0rc < 1.0 < 1.0.a < 1.0.1
+    ("1.0a", "1.0alpha", -1),
+    ("1.0alpha", "1.0b", -1),
+    ("1.0b", "1.0beta", -1),
+    ("1.0beta", "1.0p", -1),
+    ("1.0p", "1.0pre", -1),
+    ("1.0pre", "1.0rc", -1),
+    ("1.0rc", "1.0", -1),
+    ("1.0", "1.0.a", -1),
+    ("1.0.a", "1.0.1", -1),
+    ("1.0a", "1.0", -1),
+    ("1.0alpha", "1.0", -1),
+    # Mixed alpha and numeric segments
+    ("1.5.a", "1.5", 1),
+    ("1.5.b", "1.5.a", 1),
+    ("1.5.1", "1.5.b", 1),
+    ("1.5.b-1", "1.5.b", 0),
+    ("1.5-1", "1.5.b", -1),
+    ("2.0", "2_0", 0),
+    ("2.0_a", "2_0.a", 0),
+    ("2.0a", "2.0.a", -1),
+    ("2___a", "2_a", 1),
+    ("1.0rc1", "1.0rc2", -1),
+    ("1.0rc10", "1.0rc9", 1),
+    # Epochs
+    ("0:1.0", "0:1.0", 0),
+    ("0:1.0", "0:1.1", -1),
+    ("1:1.0", "0:1.0", 1),
+    ("1:1.0", "0:1.1", 1),
+    ("1:1.0", "2:1.1", -1),
+    ("1:1.0", "0:1.0-1", 1),
+    ("1:1.0-1", "0:1.1-1", 1),
+    # Epoch on one side only, a missing epoch being 0
+    ("0:1.0", "1.0", 0),
+    ("0:1.1", "1.0", 1),
+    ("0:1.1", "1.1", 0),
+    ("1:1.1", "1.1", 1),
+    ("1:0.1", "9.9", 1),
+]
+# Upstream versions and what the default rules make of them
+NORMALIZATION_CASES: Final[list[tuple[str, str]]] = [
+    ("6.6.10.arch1-1", "6.6.10"),
+    ("6.6.10.arch2-3", "6.6.10"),
+    ("2:9.0.2167-1", "2:9.0.2167"),
+    ("2.38-7", "2.38"),
+    ("1.2.3-2.1", "1.2.3"),
+    ("3.11.6", "3.11.6"),
+    ("1.0-rc1", "1.0-rc1"),
+    ("6.6.7.zen1-1.arch1-1", "6.6.7.zen1-1"),
+]
+# Current version, upstream version and the expected `markedForBuild` by package name
+UPSTREAM_CASES: Final[dict[str, tuple[str, str, bool]]] = {
+    "upgraded": ("1.0.0", "1.0.1", True),
+    "current": ("1.0.0", "1.0.0", False),
+    "downgraded": ("1.0.1", "1.0.0", None),
+    "prerelease": ("1.0", "1.0rc1", None),
+    "epoch": ("6.6.10", "1:6.6.9", True),
+    "epochDowngraded": ("1:6.6.10", "6.6.11", None),
+    "zeroEpoch": ("0:2.38", "2.38", False),
+}
+
+# Public Variables
+
+# Private Variables
+
+# Public Methods
+
+# Private Methods
+
+# Run
+if __name__ == "__main__":
+    unittest.main()
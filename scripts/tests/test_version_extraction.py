@@ -0,0 +1,180 @@
+# Import Statements
+# First party
+import io
+import os
+import unittest
+from typing import Final
+from unittest import mock
+
+# Second party
+import utils.sync as sync
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || test_version_extraction.py
+# ---------------------------------------
+# Checks the streaming version extraction returns the same
+# version as the BeautifulSoup extractor for the package pages
+# in `tests/pages`, while reading less of the larger pages, and
+# that a page it cannot read falls back to the BeautifulSoup
+# extractor.
+#
+# The pages follow the layout of archlinux.org package pages:
+# a script mentioning `pkgdetails` in the head (linux), a
+# version decoy outside the details (linux-lts), long
+# dependency listings (python, glibc), unclosed meta tags and
+# an epoch (vim), Arch Linux version suffixes (linux-zen) and
+# no version entry at all (missing-version).
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Class Definitions
+class CountingStream(io.BytesIO):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+    readSize: int
+
+    # Private Variables
+
+    # Constants
+
+    # Constructor
+    def __init__(self, rawContent: bytes) -> None:
+        # Class base class constructor
+        super().__init__(rawContent)
+
+        # Nothing read yet
+        self.readSize = 0
+
+    # Public Methods
+    def read(self, size: int = -1) -> bytes:
+        # Count the bytes read
+        rawChunk: Final[bytes] = super().read(size)
+        self.readSize += len(rawChunk)
+        return rawChunk
+
+    # Private Methods
+
+class VersionExtractionTest(unittest.TestCase):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+
+    # Constants
+
+    # Constructor
+
+    # Public Methods
+    def test_matchesBeautifulSoup(self) -> None:
+        """
+        Checks both extractors return the expected version of every page.
+
+        @return None
+        """
+        for pageName, expectedVersion in EXPECTED_VERSIONS.items():
+            with self.subTest(pageName):
+                # Read the page
+                rawPage: bytes = readPage(pageName)
+
+                # Both agree
+                self.assertEqual(sync.extractUpstreamVersion(rawPage.decode("utf-8")), expectedVersion)
+                self.assertEqual(sync.extractUpstreamVersionFromStream(io.BytesIO(rawPage)), expectedVersion)
+
+    def test_matchesAcrossChunkBoundaries(self) -> None:
+        """
+        Checks the version is found however the page is split into chunks.
+
+        @return None
+        """
+        for chunkSize in (1, 7, 64):
+            with self.subTest(chunkSize), mock.patch.object(sync, "STREAM_CHUNK_SIZE", chunkSize):
+                for pageName, expectedVersion in EXPECTED_VERSIONS.items():
+                    self.assertEqual(
+                        sync.extractUpstreamVersionFromStream(io.BytesIO(readPage(pageName))), expectedVersion
+                    )
+
+    def test_stopsReadingAtVersion(self) -> None:
+        """
+        Checks the larger pages are only read up to the version entry.
+
+        @return None
+        """
+        for pageName in ("python", "glibc"):
+            with self.subTest(pageName):
+                # Read the page
+                rawPage: bytes = readPage(pageName)
+                stream: CountingStream = CountingStream(rawPage)
+
+                # Far less than the page is read
+                sync.extractUpstreamVersionFromStream(stream)
+                self.assertLess(stream.readSize, len(rawPage) // 4)
+
+    def test_fallsBackToBeautifulSoup(self) -> None:
+        """
+        Checks a page without the expected version entry is read in full and
+        handed to the BeautifulSoup extractor, failing the same way.
+
+        @return None
+        """
+        # Read the page
+        rawPage: Final[bytes] = readPage("missing-version")
+        stream: Final[CountingStream] = CountingStream(rawPage)
+
+        # Both fail alike
+        with self.assertRaises(AttributeError):
+            sync.extractUpstreamVersion(rawPage.decode("utf-8"))
+        with mock.patch.object(sync, "extractUpstreamVersion", wraps=sync.extractUpstreamVersion) as extractUpstreamVersion:
+            with self.assertRaises(AttributeError):
+                sync.extractUpstreamVersionFromStream(stream)
+
+        # The whole page went to the fallback
+        extractUpstreamVersion.assert_called_once_with(rawPage.decode("utf-8"))
+        self.assertEqual(stream.readSize, len(rawPage))
+
+    # Private Methods
+
+# Enums
+
+# Interfaces
+
+# Constants
+PAGES_DIRECTORY: Final[str] = f"{os.path.dirname(os.path.abspath(__file__))}/pages"
+EXPECTED_VERSIONS: Final[dict[str, str]] = {
+    "linux": "6.6.7",
+    "linux-lts": "6.1.68",
+    "python": "3.11.6",
+    "glibc": "2.38",
+    "vim": "2:9.0.2167",
+    "linux-zen": "6.6.7.zen1-1",
+}
+
+# Public Variables
+
+# Private Variables
+
+# Public Methods
+def readPage(pageName: str) -> bytes:
+    """
+    Returns a saved package page.
+
+    @param { str } pageName - The name of the page in `tests/pages`, without `.html`
+    @return bytes - The HTML
+    """
+    with open(f"{PAGES_DIRECTORY}/{pageName}.html", "rb") as pageFile:
+        return pageFile.read()
+
+# Private Methods
+
+# Run
+if __name__ == "__main__":
+    unittest.main()
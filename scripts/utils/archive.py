@@ -0,0 +1,242 @@
+# Import Statements
+# First party
+import os
+import shutil
+import fnmatch
+import tarfile
+import subprocess
+from typing import Final, Iterator
+from contextlib import contextmanager
+
+# Second party
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || archive.py
+# ---------------------------------------
+# Extracts source tarballs. Decompression is streamed through
+# a multi-threaded decoder such as `pixz` or `xz -T0` when one
+# is installed, and GNU tar unpacks the members when it is, so
+# a kernel tarball is not decoded and written one member at a
+# time in Python. Members can be filtered out so trees which
+# are not needed are skipped.
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Class Definitions
+
+# Enums
+
+# Interfaces
+
+# Constants
+# Multi-threaded decoders by compression, in order of preference
+DECODERS: Final[dict[str, tuple[tuple[str, ...], ...]]] = {
+    "xz": (("pixz", "-d"), ("xz", "--decompress", "--stdout", "--threads=0")),
+    "gz": (("pigz", "--decompress", "--stdout"), ("gzip", "--decompress", "--stdout")),
+    "bz2": (("lbzip2", "--decompress", "--stdout"), ("bzip2", "--decompress", "--stdout")),
+    "zst": (("zstd", "--decompress", "--stdout", "--quiet"),),
+}
+# Compression by file extension
+COMPRESSION_EXTENSIONS: Final[dict[str, str]] = {
+    ".tar.xz": "xz",
+    ".txz": "xz",
+    ".tar.gz": "gz",
+    ".tgz": "gz",
+    ".tar.bz2": "bz2",
+    ".tbz2": "bz2",
+    ".tar.zst": "zst",
+}
+READ_CHUNK_SIZE: Final[int] = 1024 * 1024
+# Extraction engine, `auto`, `tar`, `decoder` or `python`
+EXTRACTION_ENGINE: Final[str] = os.environ.get("ALARM_EXTRACTION_ENGINE", "auto")
+
+# Public Variables
+
+# Private Variables
+
+# Public Methods
+def extractArchive(archivePath: str, destinationDirectory: str, excludedPatterns: tuple[str, ...] = ()) -> str:
+    """
+    Extracts a tarball, decompressing it with a multi-threaded decoder if one
+    is installed. The fastest available engine is used:
+    `tar`, GNU tar reading from the decoder,
+    `decoder`, Python's tarfile in stream mode reading from the decoder,
+    `python`, Python's tarfile in stream mode decompressing by itself.
+
+    @param { str } archivePath - The path to the tarball, e.g. `linux-6.6.10.tar.xz`
+    @param { str } destinationDirectory - The directory to extract into
+    @param { tuple[str, ...] } excludedPatterns - Shell patterns of members skipped along with everything below them, e.g. `linux-*/Documentation` (Optional)
+    @return str - The engine which extracted the tarball
+    """
+    # Get the decoder and the engine
+    decoderCommand: Final[tuple[str, ...]] = getDecoderCommand(archivePath)
+    engine: str = EXTRACTION_ENGINE
+    if engine == "auto":
+        if decoderCommand is not None and shutil.which("tar") is not None:
+            engine = "tar"
+        elif decoderCommand is not None:
+            engine = "decoder"
+        else:
+            engine = "python"
+
+    # Create the destination directory
+    os.makedirs(destinationDirectory, exist_ok=True)
+
+    # GNU tar or Python reading from the decoder
+    if engine in ("tar", "decoder"):
+        with _openDecoder(archivePath, decoderCommand) as decodedStream:
+            if engine == "tar":
+                _extractWithTar(decodedStream, destinationDirectory, excludedPatterns)
+            else:
+                with tarfile.open(fileobj=decodedStream, mode="r|") as tarFile:
+                    _extractWithPython(tarFile, destinationDirectory, excludedPatterns)
+
+    # Python decompressing by itself
+    elif engine == "python":
+        with tarfile.open(archivePath, mode=f"r|{getCompression(archivePath) or ''}") as tarFile:
+            _extractWithPython(tarFile, destinationDirectory, excludedPatterns)
+
+    # Invalid engine
+    else:
+        raise Exception(f'Unknown extraction engine "{engine}"')
+
+    # Return
+    return engine
+
+def getCompression(archivePath: str) -> str:
+    """
+    Returns the compression of a tarball, by its file extension.
+
+    @param { str } archivePath - The path to the tarball
+    @return str - The compression, e.g. `xz`, None if unknown or uncompressed
+    """
+    return next(
+        (
+            compression
+            for extension, compression in COMPRESSION_EXTENSIONS.items()
+            if archivePath.endswith(extension)
+        ),
+        None,
+    )
+
+def getDecoderCommand(archivePath: str) -> tuple[str, ...]:
+    """
+    Returns the command of the preferred installed decoder of a tarball.
+
+    @param { str } archivePath - The path to the tarball
+    @return tuple[str, ...] - The decoder command reading stdin and writing stdout, None if none is installed
+    """
+    return next(
+        (
+            decoderCommand
+            for decoderCommand in DECODERS.get(getCompression(archivePath), ())
+            if shutil.which(decoderCommand[0]) is not None
+        ),
+        None,
+    )
+
+def isExcluded(memberName: str, excludedPatterns: tuple[str, ...]) -> bool:
+    """
+    Checks if a member, or a directory above it, matches an excluded pattern.
+    Patterns match whole paths like GNU tar's `--anchored --exclude`.
+
+    @param { str } memberName - The member name, e.g. `linux-6.6.10/arch/x86/Kconfig`
+    @param { tuple[str, ...] } excludedPatterns - Shell patterns, e.g. `linux-*/arch/x86`
+    @return bool - Is the member excluded
+    """
+    # Nothing is excluded
+    if len(excludedPatterns) == 0:
+        return False
+
+    # Get the path and every directory above it
+    pathParts: Final[list[str]] = memberName.strip("/").split("/")
+    for partCount in range(1, len(pathParts) + 1):
+        path: str = "/".join(pathParts[:partCount])
+        if any(fnmatch.fnmatchcase(path, pattern) for pattern in excludedPatterns):
+            return True
+
+    # Return
+    return False
+
+# Private Methods
+@contextmanager
+def _openDecoder(archivePath: str, decoderCommand: tuple[str, ...]) -> Iterator[any]:
+    """
+    Runs a decoder on a tarball and holds its output stream.
+
+    @param { str } archivePath - The path to the tarball
+    @param { tuple[str, ...] } decoderCommand - The decoder command
+    @return any - The decompressed stream, the decoder's stdout
+    """
+    # Start the decoder
+    with open(archivePath, "rb") as archiveFile:
+        decoder: Final[subprocess.Popen] = subprocess.Popen(
+            decoderCommand, stdin=archiveFile, stdout=subprocess.PIPE
+        )
+
+    try:
+        # Hand out its output
+        yield decoder.stdout
+
+        # Read the rest, e.g. the padding after the end of the tarball, so the decoder can finish
+        while decoder.stdout.read(READ_CHUNK_SIZE):
+            pass
+    finally:
+        # Stop a decoder which is still writing, e.g. after a failed extraction
+        decoder.stdout.close()
+        decoder.wait()
+
+    # Raise a failed decoder, e.g. on a corrupt tarball
+    if decoder.returncode != 0:
+        raise Exception(f'Decoder "{decoderCommand[0]}" failed with exit code {decoder.returncode}')
+
+def _extractWithTar(decodedStream: any, destinationDirectory: str, excludedPatterns: tuple[str, ...]) -> None:
+    """
+    Extracts a decompressed tarball stream with GNU tar.
+
+    @param { any } decodedStream - The decompressed tarball
+    @param { str } destinationDirectory - The directory to extract into
+    @param { tuple[str, ...] } excludedPatterns - Shell patterns of skipped members
+    @return None
+    """
+    subprocess.run(
+        [
+            "tar",
+            "--extract",
+            "--file=-",
+            f"--directory={destinationDirectory}",
+            "--no-same-owner",
+            "--no-same-permissions",
+            "--anchored",
+            "--wildcards",
+            *(f"--exclude={pattern}" for pattern in excludedPatterns),
+        ],
+        stdin=decodedStream,
+        check=True,
+    )
+
+def _extractWithPython(tarFile: tarfile.TarFile, destinationDirectory: str, excludedPatterns: tuple[str, ...]) -> None:
+    """
+    Extracts a tarball opened in stream mode with Python's tarfile.
+
+    @param { tarfile.TarFile } tarFile - The tarball
+    @param { str } destinationDirectory - The directory to extract into
+    @param { tuple[str, ...] } excludedPatterns - Shell patterns of skipped members
+    @return None
+    """
+    # Members which are not excluded, read in order as the stream goes
+    def getMembers() -> Iterator[tarfile.TarInfo]:
+        for member in tarFile:
+            if not isExcluded(member.name, excludedPatterns):
+                yield member
+
+    # Extract, refusing members which would end up outside the directory
+    tarFile.extractall(destinationDirectory, members=getMembers(), filter="data")
+
+# Run
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,266 @@
+# Import Statements
+# First party
+import os
+import json
+import time
+from typing import Final
+
+# Second party
+import utils.storage as storage
+import utils.checksum as checksum
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || backup.py
+# ---------------------------------------
+# Keeps rotating backups of the package database. Each file is
+# stored once per distinct content, named by its SHA-256 hash,
+# and shared by every backup it appears in. A backup of files
+# unchanged since the last one costs a stat call and nothing is
+# copied, and any backup can be restored in place.
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Class Definitions
+class BackupManager:
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+    _databaseFilePath: str
+    _backupDirectory: str
+    _maximumBackups: int
+    _lock: storage.DatabaseLock
+
+    # Constants
+    BACKUP_FORMAT_VERSION: Final[int] = 1
+    MANIFEST_FILE_NAME: Final[str] = "backups.json"
+    OBJECT_DIRECTORY_NAME: Final[str] = "objects"
+
+    # Constructor
+    def __init__(self, databaseFilePath: str, backupDirectory: str = None, maximumBackups: int = None) -> None:
+        # Set the database and where its backups are kept
+        self._databaseFilePath = databaseFilePath
+        self._backupDirectory = backupDirectory or f"{os.path.dirname(os.path.abspath(databaseFilePath))}/backups"
+        self._maximumBackups = maximumBackups or MAXIMUM_BACKUPS
+
+        # Writers to the database are held off while backing up or restoring
+        self._lock = storage.DatabaseLock(databaseFilePath)
+
+    # Public Methods
+    def createBackup(self, label: str = "") -> dict:
+        """
+        Backs up the database files, dropping the oldest backups beyond the
+        maximum. Nothing is added if the files match a kept backup.
+
+        @param { str } label - What the backup was taken before, e.g. `sync` (Optional)
+        @return dict - The backup, with its `id`, `createdAt`, `label` and `files`
+        """
+        with self._lock.exclusive():
+            # Read the backups
+            backups: Final[list[dict]] = self._readManifest()
+            latestFiles: Final[dict[str, dict]] = backups[-1]["files"] if len(backups) > 0 else {}
+
+            # Store each database file
+            files: dict[str, dict] = {}
+            for filePath, isReplacedAtomically in self._getDatabaseFiles():
+                # File does not exist, e.g. an empty journal
+                fileIdentity: list[int] = storage.getFileIdentity(filePath)
+                if fileIdentity is None:
+                    continue
+
+                # File is unchanged since the latest backup, reuse its hash without reading it
+                fileName: str = os.path.basename(filePath)
+                latestFile: dict = latestFiles.get(fileName)
+                if latestFile is not None and latestFile["identity"] == fileIdentity:
+                    files[fileName] = latestFile
+                    continue
+
+                # Store the file's content once
+                fileHash: str = checksum.hashFile(filePath)["sha256"]
+                self._storeObject(filePath, fileHash, isReplacedAtomically)
+                files[fileName] = {"hash": fileHash, "size": fileIdentity[2], "identity": fileIdentity}
+
+            # Files match a kept backup, e.g. nothing changed since the latest one
+            fileHashes: Final[dict[str, str]] = _getFileHashes(files)
+            for keptBackup in reversed(backups):
+                if _getFileHashes(keptBackup["files"]) == fileHashes:
+                    return keptBackup
+
+            # Add the backup, dropping the oldest ones
+            backup: Final[dict] = {
+                "id": backups[-1]["id"] + 1 if len(backups) > 0 else 1,
+                "createdAt": time.time(),
+                "label": label,
+                "files": files,
+            }
+            backups.append(backup)
+            self._writeManifest(backups[-self._maximumBackups:])
+
+        # Return
+        return backup
+
+    def listBackups(self) -> list[dict]:
+        """
+        Returns every kept backup, oldest first.
+
+        @return list[dict] - The backups, see `createBackup`
+        """
+        return self._readManifest()
+
+    def restoreBackup(self, backupId: int) -> dict:
+        """
+        Puts the database files of a backup back in place. The current files
+        are backed up first, so a restore can be undone.
+
+        @param { int } backupId - The id of the backup
+        @return dict - The backup of the files which were replaced
+        """
+        with self._lock.exclusive():
+            # Find the backup
+            backup: Final[dict] = next(
+                (backup for backup in self._readManifest() if backup["id"] == backupId), None
+            )
+            if backup is None:
+                raise Exception(f"Backup {backupId} does not exist")
+
+            # Back up the current files
+            replacedBackup: Final[dict] = self.createBackup(f"before restoring backup {backupId}")
+
+            # Iterate through each database file
+            for filePath, isReplacedAtomically in self._getDatabaseFiles():
+                # File was not part of the backup
+                backupFile: dict = backup["files"].get(os.path.basename(filePath))
+                if backupFile is None:
+                    if os.path.exists(filePath):
+                        os.remove(filePath)
+                    continue
+
+                # Put the file back
+                storage.cloneFile(self._getObjectPath(backupFile["hash"]), filePath, isReplacedAtomically)
+
+        # Return
+        return replacedBackup
+
+    # Private Methods
+    def _getDatabaseFiles(self) -> list[tuple[str, bool]]:
+        """
+        Returns the files the database consists of.
+
+        @return list[tuple[str, bool]] - Each file path, and if the storage engine only ever replaces it as a whole
+        """
+        # SQLite database, written in place
+        if self._databaseFilePath.endswith(storage.SQLITE_FILE_EXTENSIONS):
+            return [(self._databaseFilePath, False)]
+
+        # JSON snapshot, replaced on compaction, and its journal, appended to
+        return [
+            (self._databaseFilePath, True),
+            (f"{self._databaseFilePath}{storage.JOURNAL_FILE_SUFFIX}", False),
+        ]
+
+    def _storeObject(self, filePath: str, fileHash: str, isReplacedAtomically: bool) -> None:
+        """
+        Stores a file's content under its hash, unless it is stored already.
+
+        @param { str } filePath - The path to the file
+        @param { str } fileHash - The SHA-256 hash of its content
+        @param { bool } isReplacedAtomically - Is the file only ever replaced as a whole, so it can be hard linked
+        @return None
+        """
+        # Content is stored already
+        objectPath: Final[str] = self._getObjectPath(fileHash)
+        if os.path.exists(objectPath):
+            return
+
+        # Store it
+        os.makedirs(os.path.dirname(objectPath), exist_ok=True)
+        storage.cloneFile(filePath, objectPath, isReplacedAtomically)
+
+    def _getObjectPath(self, fileHash: str) -> str:
+        """
+        Returns the path content with the given hash is stored at.
+
+        @param { str } fileHash - The SHA-256 hash of the content
+        @return str - The path to the stored content
+        """
+        return f"{self._backupDirectory}/{self.OBJECT_DIRECTORY_NAME}/{fileHash}"
+
+    def _readManifest(self) -> list[dict]:
+        """
+        Reads the kept backups, starting empty if there are none.
+
+        @return list[dict] - The backups, oldest first
+        """
+        try:
+            # Read the manifest
+            with open(f"{self._backupDirectory}/{self.MANIFEST_FILE_NAME}", "rb") as manifestFile:
+                rawManifest: Final[dict] = json.load(manifestFile)
+        except FileNotFoundError:
+            return []
+
+        # Check the format
+        if rawManifest.get("version") != self.BACKUP_FORMAT_VERSION:
+            raise Exception(f'Unsupported backup format in "{self._backupDirectory}"')
+
+        # Return
+        return rawManifest["backups"]
+
+    def _writeManifest(self, backups: list[dict]) -> None:
+        """
+        Writes the kept backups and deletes the content no backup refers to anymore.
+
+        @param { list[dict] } backups - The backups to keep, oldest first
+        @return None
+        """
+        # Write the manifest
+        storage.writeFileAtomically(
+            f"{self._backupDirectory}/{self.MANIFEST_FILE_NAME}",
+            json.dumps(
+                {"version": self.BACKUP_FORMAT_VERSION, "backups": backups}, indent=4
+            ).encode("utf-8"),
+        )
+
+        # Get the content still referred to
+        referencedHashes: Final[set[str]] = {
+            backupFile["hash"] for backup in backups for backupFile in backup["files"].values()
+        }
+
+        # Delete the rest
+        objectDirectory: Final[str] = f"{self._backupDirectory}/{self.OBJECT_DIRECTORY_NAME}"
+        for fileHash in os.listdir(objectDirectory) if os.path.isdir(objectDirectory) else []:
+            if fileHash not in referencedHashes:
+                os.remove(f"{objectDirectory}/{fileHash}")
+
+# Enums
+
+# Interfaces
+
+# Constants
+MAXIMUM_BACKUPS: Final[int] = int(os.environ.get("ALARM_DATABASE_BACKUPS", 5))
+
+# Public Variables
+
+# Private Variables
+
+# Public Methods
+
+# Private Methods
+def _getFileHashes(files: dict[str, dict]) -> dict[str, str]:
+    """
+    Returns the content hash of each file of a backup.
+
+    @param { dict[str, dict] } files - The files of a backup
+    @return dict[str, str] - The hashes by file name
+    """
+    return {fileName: backupFile["hash"] for fileName, backupFile in files.items()}
+
+# Run
+if __name__ == "__main__":
+    pass
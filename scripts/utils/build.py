@@ -4,6 +4,7 @@ from typing import Final
 
 # Second party
 import utils.db as db
+import utils.context as context
 import utils.logging as logging
 
 # Third party
@@ -46,12 +47,14 @@ class BuildFunctions:
     # Public Variables
 
     # Private Variables
+    _workspace: context.Workspace
 
     # Constants
 
     # Constructor
-    def __init__(self) -> None:
-        return
+    def __init__(self, workspace: context.Workspace) -> None:
+        # Set the workspace packages are built in
+        self._workspace = workspace
 
     # Public Methods
     def build_pkg_example_package(self, package: db.PackageInfo) -> None:
@@ -62,7 +65,6 @@ class BuildFunctions:
         @return
         """
         # Import statements
-        import os
         import subprocess
 
         # Setup logging
@@ -78,17 +80,10 @@ class BuildFunctions:
             "Building package...",
         )
 
-        # Save current directory path
-        rootDirectory: str = os.getcwd()
-
-        # Switch directories
-        os.chdir(package.getPackagePaths().getPackageBuildPath())
-
-        # Run makepkg
-        subprocess.call(["makepkg", "--sign"])
-
-        # Switch directories
-        os.chdir(rootDirectory)
+        # Run makepkg in the PKGBUILD directory
+        subprocess.call(
+            ["makepkg", "--sign"], cwd=package.getPackagePaths().getPackageBuildPath()
+        )
 
         # Log
         currentLogCount = logging.log(
@@ -157,12 +152,14 @@ class Build:
     # Public Variables
 
     # Private Variables
+    _workspace: context.Workspace
 
     # Constants
 
     # Constructor
-    def __init__(self) -> None:
-        return
+    def __init__(self, workspace: context.Workspace = None) -> None:
+        # Set the workspace packages are built in
+        self._workspace = workspace or context.Workspace()
 
     # Public Methods
     def buildPackage(self, package: db.PackageInfo) -> None:
@@ -182,7 +179,7 @@ class Build:
 
         # Get build function
         buildFunction = getattr(
-            BuildFunctions(),
+            BuildFunctions(self._workspace),
             package.getPackageBuildInfo().getPackageBuildFunctionName(),
         )
 
@@ -0,0 +1,427 @@
+# Import Statements
+# First party
+import os
+import json
+import time
+import hashlib
+from typing import Final
+
+# Second party
+import utils.storage as storage
+import utils.network as network
+import utils.checksum as checksum
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || cache.py
+# ---------------------------------------
+# Keeps downloaded source files between runs. Each URL maps
+# to the SHA-256 hash of its content, which is stored once
+# and hard linked into the workspace along with its checksums,
+# so preparing the same version again downloads nothing. The least recently used
+# files are evicted once the cache outgrows its size budget.
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Class Definitions
+class SourceCache:
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+    _cacheDirectory: str
+    _maximumSize: int
+    _lock: storage.DatabaseLock
+
+    # Constants
+    CACHE_FORMAT_VERSION: Final[int] = 2
+    INDEX_FILE_NAME: Final[str] = "index.json"
+    OBJECT_DIRECTORY_NAME: Final[str] = "objects"
+
+    # Constructor
+    def __init__(self, cacheDirectory: str, maximumSize: int = None) -> None:
+        # Set the cache directory and its size budget
+        self._cacheDirectory = cacheDirectory
+        self._maximumSize = maximumSize if maximumSize is not None else MAXIMUM_CACHE_SIZE
+
+        # Processes sharing the cache take turns updating the index
+        self._lock = storage.DatabaseLock(f"{cacheDirectory}/{self.INDEX_FILE_NAME}")
+
+    # Public Methods
+    def fetchFile(self, url: str, filePath: str, algorithms: tuple[str, ...] = ("sha256",), connectionPool: network.ConnectionPool = None, expectedDigests: dict[str, str] = None) -> dict[str, str]:
+        """
+        Puts the content of a URL at a file path, hard linked from the cache if
+        it holds the URL and downloaded into the cache otherwise. Checksums are
+        computed while downloading and kept along with the file. A download
+        which fails is resumed by the next call.
+
+        @param { str } url - The HTTP(S) URL
+        @param { str } filePath - The file to write
+        @param { tuple[str, ...] } algorithms - The checksum algorithms, see `checksum.ALGORITHMS` (Optional)
+        @param { ConnectionPool } connectionPool - The pool to download with (Optional)
+        @param { dict[str, str] } expectedDigests - The checksums the file must have by algorithm (Optional)
+        @return dict[str, str] - The checksums of the file by algorithm
+        """
+        # Create the cache directory
+        objectDirectory: Final[str] = f"{self._cacheDirectory}/{self.OBJECT_DIRECTORY_NAME}"
+        os.makedirs(objectDirectory, exist_ok=True)
+
+        # Compute the expected checksums as well
+        requestedAlgorithms: Final[tuple[str, ...]] = tuple(
+            dict.fromkeys((*algorithms, *(expectedDigests or {})))
+        )
+
+        # Cached
+        cachedDigests: dict[str, str] = self._linkCachedFile(url, filePath, requestedAlgorithms, expectedDigests)
+        if cachedDigests is not None:
+            return {algorithm: cachedDigests[algorithm] for algorithm in algorithms}
+
+        # Download next to the stored files under a name kept between runs, so a failed
+        # download is resumed and storing a finished one is a rename
+        partialFilePath: Final[str] = f"{objectDirectory}/.{hashlib.sha256(url.encode('utf-8')).hexdigest()}.partial"
+
+        # Only one process downloads a URL at a time
+        downloadLock: Final[storage.DatabaseLock] = storage.DatabaseLock(partialFilePath)
+        try:
+            with downloadLock.exclusive():
+                # Another process downloaded it meanwhile
+                cachedDigests = self._linkCachedFile(url, filePath, requestedAlgorithms, expectedDigests)
+                if cachedDigests is not None:
+                    return {algorithm: cachedDigests[algorithm] for algorithm in algorithms}
+
+                # Download the file, hashing it on the way, SHA-256 names the stored file
+                digest: Final[checksum.MultiDigest] = checksum.MultiDigest(
+                    tuple(dict.fromkeys(("sha256", *requestedAlgorithms)))
+                )
+                (connectionPool or network.getSharedConnectionPool()).downloadFile(
+                    url, partialFilePath, digest
+                )
+                digests: Final[dict[str, str]] = digest.hexdigests()
+                fileHash: Final[str] = digests["sha256"]
+
+                # Check the expected checksums, a mismatch is downloaded again next time
+                mismatchedAlgorithms: Final[list[str]] = [
+                    algorithm
+                    for algorithm, expectedDigest in (expectedDigests or {}).items()
+                    if digests[algorithm] != expectedDigest
+                ]
+                if len(mismatchedAlgorithms) > 0:
+                    os.remove(partialFilePath)
+                    raise Exception(
+                        f'Checksum mismatch ({", ".join(mismatchedAlgorithms)}) for "{url}"'
+                    )
+
+                self._storeDownload(url, partialFilePath, filePath, digests)
+        finally:
+            # Delete the lock file unless a download is left to resume, then close it
+            if not os.path.exists(partialFilePath):
+                downloadLock.remove(wait=False)
+            downloadLock.close()
+
+        # Return
+        return {algorithm: digests[algorithm] for algorithm in algorithms}
+
+    def getStatistics(self) -> dict[str, int]:
+        """
+        Returns what the cache holds and how often it was used.
+
+        @return dict[str, int] - `entries`, `objects`, `size`, `maximumSize`, `hits`, `misses` and `evictions`
+        """
+        # Read the index
+        with self._lock.shared():
+            index: Final[dict] = self._readIndex()
+
+        # Return
+        return {
+            "entries": len(index["entries"]),
+            "objects": len(index["objects"]),
+            "size": sum(cachedObject["size"] for cachedObject in index["objects"].values()),
+            "maximumSize": self._maximumSize,
+            **index["statistics"],
+        }
+
+    def collectGarbage(self, maximumSize: int = None) -> dict[str, int]:
+        """
+        Evicts the least recently used files until the cache fits the size
+        budget, and deletes files the index does not know of, e.g. the
+        leftovers of an interrupted download.
+
+        @param { int } maximumSize - The size budget in bytes, 0 empties the cache (Optional)
+        @return dict[str, int] - The `evictions` and the `freedBytes`
+        """
+        # Create the cache directory
+        objectDirectory: Final[str] = f"{self._cacheDirectory}/{self.OBJECT_DIRECTORY_NAME}"
+        os.makedirs(objectDirectory, exist_ok=True)
+
+        with self._lock.exclusive():
+            # Read the index
+            index: Final[dict] = self._readIndex()
+
+            # Forget files deleted from outside
+            for fileHash in list(index["objects"]):
+                if not os.path.exists(self._getObjectPath(fileHash)):
+                    self._removeObject(index, fileHash)
+
+            # Delete files the index does not know of, except downloads which may still be resumed
+            freedBytes: int = 0
+            for fileName in os.listdir(objectDirectory):
+                filePath: str = f"{objectDirectory}/{fileName}"
+                if fileName not in index["objects"] and (
+                    not fileName.startswith(".")
+                    or (
+                        not fileName.endswith(storage.DatabaseLock.LOCK_FILE_SUFFIX)
+                        and os.path.getmtime(filePath) < time.time() - ABANDONED_DOWNLOAD_AGE
+                    )
+                ):
+                    freedBytes += os.path.getsize(filePath)
+                    os.remove(filePath)
+
+            # Delete the locks of downloads which are gone, unless a download holds them
+            for fileName in os.listdir(objectDirectory):
+                downloadFilePath: str = f"{objectDirectory}/{fileName.removesuffix(storage.DatabaseLock.LOCK_FILE_SUFFIX)}"
+                if fileName.endswith(storage.DatabaseLock.LOCK_FILE_SUFFIX) and not os.path.exists(downloadFilePath):
+                    downloadLock: storage.DatabaseLock = storage.DatabaseLock(downloadFilePath)
+                    downloadLock.remove(wait=False)
+                    downloadLock.close()
+
+            # Evict down to the budget
+            evictionCount, evictedBytes = self._evict(
+                index, maximumSize if maximumSize is not None else self._maximumSize
+            )
+            self._writeIndex(index)
+
+        # Return
+        return {"evictions": evictionCount, "freedBytes": freedBytes + evictedBytes}
+
+    # Private Methods
+    def _storeDownload(self, url: str, downloadFilePath: str, filePath: str, digests: dict[str, str]) -> None:
+        """
+        Stores a finished download, maps its URL to it and hands it over.
+
+        @param { str } url - The URL
+        @param { str } downloadFilePath - The downloaded file, in the object directory
+        @param { str } filePath - The file to write
+        @param { dict[str, str] } digests - The checksums of the download by algorithm, with `sha256`
+        @return None
+        """
+        with self._lock.exclusive():
+            # Read the index
+            index: Final[dict] = self._readIndex()
+
+            # Store the content, unless another URL stored it already
+            fileHash: Final[str] = digests["sha256"]
+            objectPath: Final[str] = self._getObjectPath(fileHash)
+            if fileHash not in index["objects"] or not os.path.exists(objectPath):
+                # Stored files are read-only, so a hard linked copy cannot be written to by accident
+                os.chmod(downloadFilePath, 0o444)
+                os.replace(downloadFilePath, objectPath)
+                index["objects"][fileHash] = {
+                    "size": os.path.getsize(objectPath),
+                    "identity": storage.getFileIdentity(objectPath),
+                    "digests": {},
+                }
+            else:
+                # Drop the duplicate
+                os.remove(downloadFilePath)
+
+            # Map the URL to the content
+            index["entries"][url] = fileHash
+            index["objects"][fileHash]["digests"].update(digests)
+            index["objects"][fileHash]["lastUsed"] = time.time()
+            index["statistics"]["misses"] += 1
+
+            # Hand the file over before evicting, the workspace keeps it even if it is evicted
+            storage.cloneFile(objectPath, filePath)
+            self._evict(index, self._maximumSize)
+            self._writeIndex(index)
+
+    def _linkCachedFile(self, url: str, filePath: str, algorithms: tuple[str, ...], expectedDigests: dict[str, str] = None) -> dict[str, str]:
+        """
+        Hard links the cached content of a URL to a file path. Content changed
+        since it was stored is checked against its hash and dropped if corrupt.
+        Content without the expected checksums is not used, e.g. a file which
+        was replaced upstream.
+
+        @param { str } url - The URL
+        @param { str } filePath - The file to write
+        @param { tuple[str, ...] } algorithms - The checksum algorithms
+        @param { dict[str, str] } expectedDigests - The checksums the file must have by algorithm (Optional)
+        @return dict[str, str] - The checksums of the file by algorithm, None if the URL was not cached
+        """
+        with self._lock.exclusive():
+            # Read the index
+            index: Final[dict] = self._readIndex()
+
+            # URL is not cached
+            fileHash: Final[str] = index["entries"].get(url)
+            cachedObject: Final[dict] = index["objects"].get(fileHash)
+            if cachedObject is None:
+                return None
+
+            # Stored file changed since it was stored, e.g. written to through a hard link
+            objectPath: Final[str] = self._getObjectPath(fileHash)
+            objectIdentity: Final[list[int]] = storage.getFileIdentity(objectPath)
+            if objectIdentity != cachedObject["identity"]:
+                # Drop the file unless its content still matches its hash
+                digests: dict[str, str] = None
+                if objectIdentity is not None:
+                    digests = checksum.hashFile(
+                        objectPath, tuple(dict.fromkeys(("sha256", *algorithms)))
+                    )
+                if digests is None or digests["sha256"] != fileHash:
+                    self._removeObject(index, fileHash)
+                    self._writeIndex(index)
+                    return None
+
+                # Replace the checksums with the ones just computed
+                cachedObject["identity"] = objectIdentity
+                cachedObject["digests"] = digests
+
+            # Compute the checksums of algorithms not asked for before
+            missingAlgorithms: Final[tuple[str, ...]] = tuple(
+                algorithm for algorithm in algorithms if algorithm not in cachedObject["digests"]
+            )
+            if len(missingAlgorithms) > 0:
+                cachedObject["digests"].update(checksum.hashFile(objectPath, missingAlgorithms))
+
+            # Content does not have the expected checksums, download the URL again
+            if any(
+                cachedObject["digests"][algorithm] != expectedDigest
+                for algorithm, expectedDigest in (expectedDigests or {}).items()
+            ):
+                self._writeIndex(index)
+                return None
+
+            # Hand the file over
+            storage.cloneFile(objectPath, filePath)
+
+            # Count the hit
+            cachedObject["lastUsed"] = time.time()
+            index["statistics"]["hits"] += 1
+            self._writeIndex(index)
+
+            # Return
+            return {algorithm: cachedObject["digests"][algorithm] for algorithm in algorithms}
+
+    def _evict(self, index: dict, maximumSize: int) -> tuple[int, int]:
+        """
+        Evicts the least recently used files from an index until it fits a size budget.
+
+        @param { dict } index - The index, updated in place
+        @param { int } maximumSize - The size budget in bytes
+        @return tuple[int, int] - The number of evicted files and their size in bytes
+        """
+        # Get the cache size
+        cacheSize: int = sum(cachedObject["size"] for cachedObject in index["objects"].values())
+
+        # Evict the least recently used files first
+        evictionCount: int = 0
+        evictedBytes: int = 0
+        for fileHash in sorted(index["objects"], key=lambda fileHash: index["objects"][fileHash]["lastUsed"]):
+            # Cache fits the budget
+            if cacheSize <= maximumSize:
+                break
+
+            # Evict the file
+            objectSize: int = index["objects"][fileHash]["size"]
+            self._removeObject(index, fileHash)
+            cacheSize -= objectSize
+            evictedBytes += objectSize
+            evictionCount += 1
+
+        # Count the evictions
+        index["statistics"]["evictions"] += evictionCount
+
+        # Return
+        return evictionCount, evictedBytes
+
+    def _removeObject(self, index: dict, fileHash: str) -> None:
+        """
+        Deletes a stored file and every URL mapped to it.
+
+        @param { dict } index - The index, updated in place
+        @param { str } fileHash - The SHA-256 hash of the file
+        @return None
+        """
+        # Forget the file and its URLs
+        index["objects"].pop(fileHash, None)
+        for url in [url for url, entryHash in index["entries"].items() if entryHash == fileHash]:
+            del index["entries"][url]
+
+        # Delete the file
+        if os.path.exists(self._getObjectPath(fileHash)):
+            os.remove(self._getObjectPath(fileHash))
+
+    def _getObjectPath(self, fileHash: str) -> str:
+        """
+        Returns the path content with the given hash is stored at.
+
+        @param { str } fileHash - The SHA-256 hash of the content
+        @return str - The path to the stored content
+        """
+        return f"{self._cacheDirectory}/{self.OBJECT_DIRECTORY_NAME}/{fileHash}"
+
+    def _readIndex(self) -> dict:
+        """
+        Reads the index, starting empty if there is none or it has another format.
+
+        @return dict - The `entries`, `objects` and `statistics`
+        """
+        try:
+            # Read the index
+            with open(f"{self._cacheDirectory}/{self.INDEX_FILE_NAME}", "rb") as indexFile:
+                rawIndex: Final[dict] = json.load(indexFile)
+
+            # Use it if it has the current format
+            if rawIndex.get("version") == self.CACHE_FORMAT_VERSION:
+                return rawIndex
+        except (OSError, ValueError):
+            # Unreadable, start over
+            pass
+
+        # Return an empty index, files left behind are deleted by the next garbage collection
+        return {
+            "version": self.CACHE_FORMAT_VERSION,
+            "entries": {},
+            "objects": {},
+            "statistics": {"hits": 0, "misses": 0, "evictions": 0},
+        }
+
+    def _writeIndex(self, index: dict) -> None:
+        """
+        Writes the index.
+
+        @param { dict } index - The index
+        @return None
+        """
+        storage.writeFileAtomically(
+            f"{self._cacheDirectory}/{self.INDEX_FILE_NAME}",
+            json.dumps(index, indent=4).encode("utf-8"),
+        )
+
+# Enums
+
+# Interfaces
+
+# Constants
+MAXIMUM_CACHE_SIZE: Final[int] = int(os.environ.get("ALARM_SOURCE_CACHE_SIZE", 4 * 1024**3))
+# Age after which an unfinished download is no longer resumed, in seconds
+ABANDONED_DOWNLOAD_AGE: Final[float] = 24 * 60 * 60
+
+# Public Variables
+
+# Private Variables
+
+# Public Methods
+
+# Private Methods
+
+# Run
+if __name__ == "__main__":
+    pass
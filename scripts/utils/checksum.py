@@ -0,0 +1,142 @@
+# Import Statements
+# First party
+import os
+import hashlib
+from typing import Final
+from concurrent.futures import ThreadPoolExecutor
+
+# Second party
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || checksum.py
+# ---------------------------------------
+# Computes the checksums PKGBUILDs list for their sources.
+# Several algorithms are fed from a single pass over the
+# data, either while it is downloaded or in fixed-size chunks
+# from a file, so memory use does not grow with the file.
+# hashlib releases the GIL on large chunks, so several files
+# are hashed on as many cores at once.
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Class Definitions
+class MultiDigest:
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+    _hashes: dict[str, any]
+
+    # Constants
+
+    # Constructor
+    def __init__(self, algorithms: tuple[str, ...] = ("sha256",)) -> None:
+        # Check the algorithms
+        for algorithm in algorithms:
+            if algorithm not in ALGORITHMS:
+                raise ValueError(f'Unsupported checksum algorithm "{algorithm}"')
+
+        # Start a hash per algorithm
+        self._hashes = {algorithm: ALGORITHMS[algorithm]() for algorithm in algorithms}
+
+    # Public Methods
+    def update(self, chunk: bytes) -> None:
+        """
+        Feeds the next chunk of data to every algorithm.
+
+        @param { bytes } chunk - The data, any bytes-like object
+        @return None
+        """
+        for fileHash in self._hashes.values():
+            fileHash.update(chunk)
+
+    def hexdigests(self) -> dict[str, str]:
+        """
+        Returns the checksum of the data fed so far for every algorithm.
+
+        @return dict[str, str] - The hex digests by algorithm
+        """
+        return {algorithm: fileHash.hexdigest() for algorithm, fileHash in self._hashes.items()}
+
+    # Private Methods
+
+# Enums
+
+# Interfaces
+
+# Constants
+# Algorithms by the name makepkg gives them, e.g. `b2` for `b2sums`
+ALGORITHMS: Final[dict[str, any]] = {
+    "md5": hashlib.md5,
+    "sha1": hashlib.sha1,
+    "sha224": hashlib.sha224,
+    "sha256": hashlib.sha256,
+    "sha384": hashlib.sha384,
+    "sha512": hashlib.sha512,
+    "b2": hashlib.blake2b,
+}
+CHUNK_SIZE: Final[int] = int(os.environ.get("ALARM_CHECKSUM_CHUNK_SIZE", 1024 * 1024))
+MAXIMUM_WORKERS: Final[int] = int(os.environ.get("ALARM_CHECKSUM_WORKERS", os.cpu_count() or 1))
+
+# Public Variables
+
+# Private Variables
+
+# Public Methods
+def hashFile(filePath: str, algorithms: tuple[str, ...] = ("sha256",)) -> dict[str, str]:
+    """
+    Returns the checksums of a file, read once in fixed-size chunks into
+    a reused buffer.
+
+    @param { str } filePath - The path to the file
+    @param { tuple[str, ...] } algorithms - The algorithms, e.g. `("sha256", "b2")` (Optional)
+    @return dict[str, str] - The hex digests by algorithm
+    """
+    # Output hashes
+    digest: Final[MultiDigest] = MultiDigest(algorithms)
+
+    with open(filePath, "rb", buffering=0) as file:
+        # Read buffer, no larger than the file, so small files are not slowed down by a large allocation
+        buffer: Final[bytearray] = bytearray(max(1, min(CHUNK_SIZE, os.fstat(file.fileno()).st_size + 1)))
+        bufferView: Final[memoryview] = memoryview(buffer)
+
+        # Hash the file
+        while readSize := file.readinto(buffer):
+            digest.update(bufferView[:readSize])
+
+    # Return
+    return digest.hexdigests()
+
+def hashFiles(filePaths: list[str], algorithms: tuple[str, ...] = ("sha256",), maximumWorkers: int = None) -> list[dict[str, str]]:
+    """
+    Returns the checksums of several files like `hashFile`, hashing them
+    concurrently on a thread pool.
+
+    @param { list[str] } filePaths - The paths to the files
+    @param { tuple[str, ...] } algorithms - The algorithms, e.g. `("sha256", "b2")` (Optional)
+    @param { int } maximumWorkers - The most files hashed at once (Optional)
+    @return list[dict[str, str]] - The hex digests by algorithm of each file, in the order of the paths
+    """
+    # Get the number of threads, no more than there are files
+    workerCount: Final[int] = min(len(filePaths), maximumWorkers or MAXIMUM_WORKERS)
+
+    # Not worth a thread pool
+    if workerCount <= 1:
+        return [hashFile(filePath, algorithms) for filePath in filePaths]
+
+    # Hash the files concurrently, `map` keeps the results in order
+    with ThreadPoolExecutor(max_workers=workerCount, thread_name_prefix="checksum") as executor:
+        return list(executor.map(lambda filePath: hashFile(filePath, algorithms), filePaths))
+
+# Private Methods
+
+# Run
+if __name__ == "__main__":
+    pass
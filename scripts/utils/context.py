@@ -0,0 +1,163 @@
+# Import Statements
+# First party
+import os
+import tempfile
+from typing import Final
+
+# Second party
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || context.py
+# ---------------------------------------
+# Holds the directories the scripts work in. Paths are
+# resolved against the repository root instead of the
+# current directory, so nothing has to call os.chdir and
+# several packages can be processed at the same time.
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Class Definitions
+class Workspace:
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+    _rootDirectory: str
+
+    # Constants
+    # The repository root, two levels above this file (scripts/utils/context.py)
+    ROOT_DIRECTORY: Final[str] = os.environ.get(
+        "ALARM_REPOSITORY_ROOT",
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    )
+
+    # Constructor
+    def __init__(self, rootDirectory: str = None) -> None:
+        # Set the repository root
+        self._rootDirectory = os.path.abspath(rootDirectory or self.ROOT_DIRECTORY)
+
+    # Public Methods
+    def getRootDirectory(self) -> str:
+        """
+        Returns the absolute path to the repository root.
+
+        @return str - The absolute path to the repository root
+        """
+        return self._rootDirectory
+
+    def getScriptsDirectory(self) -> str:
+        """
+        Returns the absolute path to the scripts directory.
+
+        @return str - The absolute path to the scripts directory
+        """
+        return f"{self._rootDirectory}/scripts"
+
+    def getDatabaseFilePath(self) -> str:
+        """
+        Returns the path to the package database, `ALARM_DATABASE_FILE` if set.
+
+        @return str - The path to the package database
+        """
+        return os.environ.get(
+            "ALARM_DATABASE_FILE", f"{self.getScriptsDirectory()}/db/db.json"
+        )
+
+    def getUpstreamCacheFilePath(self) -> str:
+        """
+        Returns the path to the upstream cache, `ALARM_UPSTREAM_CACHE_FILE` if set.
+        It sits next to the package database so it is committed along with it.
+
+        @return str - The path to the upstream cache
+        """
+        return os.environ.get(
+            "ALARM_UPSTREAM_CACHE_FILE", f"{self.getScriptsDirectory()}/db/upstream_cache.json"
+        )
+
+    def getSyncScheduleFilePath(self) -> str:
+        """
+        Returns the path to the sync schedule, `ALARM_SYNC_SCHEDULE_FILE` if set.
+        It sits next to the package database so it is committed along with it.
+
+        @return str - The path to the sync schedule
+        """
+        return os.environ.get(
+            "ALARM_SYNC_SCHEDULE_FILE", f"{self.getScriptsDirectory()}/db/sync_schedule.json"
+        )
+
+    def getDatabaseBackupDirectory(self) -> str:
+        """
+        Returns the directory package database backups are kept in, `ALARM_DATABASE_BACKUP_DIRECTORY`
+        if set. It is not committed, so CI points it at a volume which outlives the checkout.
+
+        @return str - The path to the database backup directory
+        """
+        return os.environ.get(
+            "ALARM_DATABASE_BACKUP_DIRECTORY", f"{self.getScriptsDirectory()}/db/backups"
+        )
+
+    def getSourceCacheDirectory(self) -> str:
+        """
+        Returns the directory downloaded sources are cached in, `ALARM_SOURCE_CACHE_DIRECTORY`
+        if set. It is not committed, so CI points it at a volume which outlives the checkout.
+        Cached files are hard linked into the temporary directories when both share a
+        file system, and reflinked or copied otherwise.
+
+        @return str - The path to the source cache directory
+        """
+        return os.environ.get(
+            "ALARM_SOURCE_CACHE_DIRECTORY", f"{self.getScriptsDirectory()}/cache/sources"
+        )
+
+    def resolvePath(self, repositoryPath: str) -> str:
+        """
+        Returns the absolute path of a path stored relative to the repository root.
+
+        @param { str } repositoryPath - The stored path, e.g. `/pkgbuild/linux-aarch64`
+        @return str - The absolute path
+        """
+        return f"{self._rootDirectory}{repositoryPath}"
+
+    def createTemporaryDirectory(self, packageName: str) -> str:
+        """
+        Creates a new, temporary directory for a package. Every call gets its
+        own directory so packages processed side by side do not collide.
+
+        @param { str } packageName - The name of the package
+        @return str - The absolute path to the temporary directory
+        """
+        # Get the parent of the temporary directories
+        temporaryParentDirectory: Final[str] = f"{self.getScriptsDirectory()}/temp"
+
+        # Create the parent directory
+        os.makedirs(temporaryParentDirectory, exist_ok=True)
+
+        # Create the temporary directory
+        return tempfile.mkdtemp(prefix=f"{packageName}-", dir=temporaryParentDirectory)
+
+    # Private Methods
+
+# Enums
+
+# Interfaces
+
+# Constants
+
+# Public Variables
+
+# Private Variables
+
+# Public Methods
+
+# Private Methods
+
+# Run
+if __name__ == "__main__":
+    pass
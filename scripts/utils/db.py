@@ -1,18 +1,21 @@
 # Import Statements
 # First party
 import os
-import json
-from typing import Final
+from contextlib import contextmanager
+from typing import Iterator
 
 # Second party
+import utils.context as context
+import utils.storage as storage
 
 # Third party
 
 # File Docstring
 # @LinuxOnARM || db.py
 # ---------------------------------------
-# Loads the db.json file into memory and provides
-# methods to modify and read data.
+# Opens the package database through a storage engine
+# (see storage.py) and provides methods to modify and
+# read data.
 #
 # Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
 #          @LinuxOnARM       <https://github.com/LinuxOnARM>
@@ -27,14 +30,19 @@ class PackageURLInfo:
     # Public Variables
 
     # Private Variables
-    _rawPackageURLInformation: dict
+    __slots__ = ("_sourceURL", "_sourceType", "_upstreamURL", "_upstreamType", "_upstreamName")
+    _sourceURL: str
+    _sourceType: str
+    _upstreamURL: str
+    _upstreamType: str
+    _upstreamName: str
 
     # Constants
 
     # Constructor
     def __init__(self, rawPackageURLInfo: dict) -> None:
         # Set the package information
-        self._rawPackageURLInformation = rawPackageURLInfo
+        self._load(rawPackageURLInfo)
 
     # Public Methods
     def getSourceURL(self, replacementList: list[str] = None) -> str:
@@ -46,10 +54,10 @@ class PackageURLInfo:
         """
         # No replacement list provided, return raw source url
         if not replacementList:
-            return self._rawPackageURLInformation["source_url"]
+            return self._sourceURL
 
         # Output URL
-        formattedURL: str = self._rawPackageURLInformation["source_url"]
+        formattedURL: str = self._sourceURL
 
         # Iterate through each word in replacement list
         for word in replacementList:
@@ -64,7 +72,7 @@ class PackageURLInfo:
 
         @return str - The source type
         """
-        return self._rawPackageURLInformation["type"]
+        return self._sourceType
 
     def getUpstreamURL(self) -> str:
         """
@@ -72,9 +80,38 @@ class PackageURLInfo:
 
         @return str - The upstream URL
         """
-        return self._rawPackageURLInformation["upstream_url"]
+        return self._upstreamURL
+
+    def getUpstreamType(self) -> str:
+        """
+        Returns how the upstream version is looked up, `html` for an Arch Linux
+        package page or `syncdb` for a pacman sync database.
+
+        @return str - The upstream type
+        """
+        return self._upstreamType
+
+    def getUpstreamName(self) -> str:
+        """
+        Returns the name the package is listed under upstream.
+
+        @return str - The upstream name, None if it matches the package name
+        """
+        return self._upstreamName
 
     # Private Methods
+    def _load(self, rawPackageURLInfo: dict) -> None:
+        """
+        Copies the URL fields out of the raw package information.
+
+        @param { dict } rawPackageURLInfo - The raw `urls` entry
+        @return None
+        """
+        self._sourceURL = rawPackageURLInfo.get("source_url")
+        self._sourceType = rawPackageURLInfo.get("type")
+        self._upstreamURL = rawPackageURLInfo.get("upstream_url")
+        self._upstreamType = rawPackageURLInfo.get("upstream_type", "html")
+        self._upstreamName = rawPackageURLInfo.get("upstream_name")
 
 class PackagePathInfo:
     # Enums
@@ -84,14 +121,20 @@ class PackagePathInfo:
     # Public Variables
 
     # Private Variables
-    _rawPackagePathInformation: dict
+    __slots__ = ("_workspace", "_packageBuildPath", "_internalRepositoryPath")
+    _workspace: context.Workspace
+    _packageBuildPath: str
+    _internalRepositoryPath: str
 
     # Constants
 
     # Constructor
-    def __init__(self, rawPackagePathInfo: dict) -> None:
+    def __init__(self, rawPackagePathInfo: dict, workspace: context.Workspace) -> None:
+        # Set the workspace the paths are resolved in
+        self._workspace = workspace
+
         # Set the package information
-        self._rawPackagePathInformation = rawPackagePathInfo
+        self._load(rawPackagePathInfo)
 
     # Public Methods
     def getPackageBuildPath(self) -> str:
@@ -100,9 +143,7 @@ class PackagePathInfo:
 
         @return str - The absolute path to the package's PKGBUILD directory
         """
-        return os.getcwd().replace(
-            "/scripts", self._rawPackagePathInformation["pkgbuild"]
-        )
+        return self._packageBuildPath
 
     def getInternalRepositoryPath(self) -> str:
         """
@@ -110,9 +151,23 @@ class PackagePathInfo:
 
         @return str - The absolute path to the package's repository directory
         """
-        return os.getcwd().replace("/scripts", self._rawPackagePathInformation["repo"])
+        return self._internalRepositoryPath
 
     # Private Methods
+    def _load(self, rawPackagePathInfo: dict) -> None:
+        """
+        Resolves the absolute paths of the raw package information.
+
+        @param { dict } rawPackagePathInfo - The raw `paths` entry
+        @return None
+        """
+        # Resolve the paths against the repository root
+        self._packageBuildPath = self._workspace.resolvePath(
+            rawPackagePathInfo.get("pkgbuild", "")
+        )
+        self._internalRepositoryPath = self._workspace.resolvePath(
+            rawPackagePathInfo.get("repo", "")
+        )
 
 class PackageBuildInfo:
     # Enums
@@ -122,14 +177,17 @@ class PackageBuildInfo:
     # Public Variables
 
     # Private Variables
-    _rawPackageBuildInformation: dict
+    __slots__ = ("_markedForBuild", "_buildFunctionName", "_prepareFunctionName")
+    _markedForBuild: bool
+    _buildFunctionName: str
+    _prepareFunctionName: str
 
     # Constants
 
     # Constructor
     def __init__(self, rawPackageBuildInfo: dict) -> None:
         # Set the package information
-        self._rawPackageBuildInformation = rawPackageBuildInfo
+        self._load(rawPackageBuildInfo)
 
     # Public Methods
     def isMarkedForBuild(self) -> bool:
@@ -138,7 +196,7 @@ class PackageBuildInfo:
 
         @return bool - Build status
         """
-        return self._rawPackageBuildInformation["markedForBuild"]
+        return self._markedForBuild
 
     def getPackageBuildFunctionName(self) -> str:
         """
@@ -146,7 +204,7 @@ class PackageBuildInfo:
 
         @return str - Build function name
         """
-        return self._rawPackageBuildInformation["buildFunctionName"]
+        return self._buildFunctionName
 
     def getPackagePrepareFunctionName(self) -> str:
         """
@@ -154,9 +212,19 @@ class PackageBuildInfo:
 
         @return str - Prepare function name
         """
-        return self._rawPackageBuildInformation["prepareFunctionName"]
+        return self._prepareFunctionName
 
     # Private Methods
+    def _load(self, rawPackageBuildInfo: dict) -> None:
+        """
+        Copies the build fields out of the raw package information.
+
+        @param { dict } rawPackageBuildInfo - The raw `buildInfo` entry
+        @return None
+        """
+        self._markedForBuild = rawPackageBuildInfo.get("markedForBuild")
+        self._buildFunctionName = rawPackageBuildInfo.get("buildFunctionName")
+        self._prepareFunctionName = rawPackageBuildInfo.get("prepareFunctionName")
 
 class PackageInfo:
     # Enums
@@ -166,16 +234,34 @@ class PackageInfo:
     # Public Variables
 
     # Private Variables
-    _rawPackageInformation: dict
+    __slots__ = (
+        "_packageName",
+        "_packageVersion",
+        "_packageURLInfo",
+        "_packagePathInfo",
+        "_packageBuildInfo",
+        "_packageGeneration",
+    )
     _packageName: str
+    _packageVersion: str
+    _packageURLInfo: PackageURLInfo
+    _packagePathInfo: PackagePathInfo
+    _packageBuildInfo: PackageBuildInfo
+    _packageGeneration: int
 
     # Constants
 
     # Constructor
-    def __init__(self, rawPackageInfo: dict, packageName: str) -> None:
+    def __init__(self, rawPackageInfo: dict, packageName: str, workspace: context.Workspace = None) -> None:
         # Set the package information
-        self._rawPackageInformation = rawPackageInfo
         self._packageName = packageName
+        self._packageURLInfo = PackageURLInfo(rawPackageInfo.get("urls", {}))
+        self._packagePathInfo = PackagePathInfo(
+            rawPackageInfo.get("paths", {}), workspace or context.Workspace()
+        )
+        self._packageBuildInfo = PackageBuildInfo(rawPackageInfo.get("buildInfo", {}))
+        self._packageVersion = rawPackageInfo.get("version")
+        self._packageGeneration = storage.getPackageGeneration(rawPackageInfo)
 
     # Public Methods
     def getPackageVersion(self) -> str:
@@ -184,7 +270,7 @@ class PackageInfo:
 
         @return str - Package's version number
         """
-        return self._rawPackageInformation["version"]
+        return self._packageVersion
 
     def getPackageURLs(self) -> PackageURLInfo:
         """
@@ -192,7 +278,7 @@ class PackageInfo:
 
         @return PackageURLInfo - See PackageURLInfo
         """
-        return PackageURLInfo(self._rawPackageInformation["urls"])
+        return self._packageURLInfo
 
     def getPackagePaths(self) -> PackagePathInfo:
         """
@@ -200,7 +286,7 @@ class PackageInfo:
 
         @return PackagePathInfo - See PackagePathInfo
         """
-        return PackagePathInfo(self._rawPackageInformation["paths"])
+        return self._packagePathInfo
 
     def getPackageBuildInfo(self) -> PackageBuildInfo:
         """
@@ -208,7 +294,7 @@ class PackageInfo:
 
         @return PackageBuildInfo - See PackageBuildInfo
         """
-        return PackageBuildInfo(self._rawPackageInformation["buildInfo"])
+        return self._packageBuildInfo
 
     def getPackageName(self) -> str:
         """
@@ -218,7 +304,30 @@ class PackageInfo:
         """
         return self._packageName
 
+    def getPackageGeneration(self) -> int:
+        """
+        Returns the generation of the package, the database generation it was
+        last added or modified at. Pass it to `Database.modifyPackage` to only
+        apply a change if nobody modified the package since it was read.
+
+        @return int - Generation of the package
+        """
+        return self._packageGeneration
+
     # Private Methods
+    def _load(self, rawPackageInfo: dict) -> None:
+        """
+        Refreshes the record and its cached views in place, so
+        references handed out earlier see the new values.
+
+        @param { dict } rawPackageInfo - The raw package information
+        @return None
+        """
+        self._packageVersion = rawPackageInfo.get("version")
+        self._packageURLInfo._load(rawPackageInfo.get("urls", {}))
+        self._packagePathInfo._load(rawPackageInfo.get("paths", {}))
+        self._packageBuildInfo._load(rawPackageInfo.get("buildInfo", {}))
+        self._packageGeneration = storage.getPackageGeneration(rawPackageInfo)
 
 class PackageNotFoundException(Exception):
     # Enums
@@ -252,21 +361,74 @@ class Database:
     # Public Variables
 
     # Private Variables
-    _storedJSONDatabase: any
+    _workspace: context.Workspace
+    _backend: storage.StorageBackend
+    _packageRecords: dict[str, PackageInfo]
+    _transactionDepth: int
 
     # Constants
-    DATABASE_FILE_PATH: Final[str] = f"{os.getcwd()}/db/db.json"
 
     # Constructor
-    def __init__(self) -> None:
-        # Open the database in "read-binary" mode
-        with open(self.DATABASE_FILE_PATH, "rb") as databaseFile:
-            # Load the database into memory
-            self._storedJSONDatabase = json.loads(databaseFile.read())
-            # Close the database file
-            databaseFile.close()
+    def __init__(self, databaseFilePath: str = None, lazy: bool = False, workspace: context.Workspace = None) -> None:
+        # No transaction is open yet
+        self._transactionDepth = 0
+        self._packageRecords = {}
+
+        # Set the workspace package paths are resolved in
+        self._workspace = workspace or context.Workspace()
+
+        # Open the storage engine matching the database file
+        self._backend = storage.openStorageBackend(
+            databaseFilePath or self._workspace.getDatabaseFilePath(), lazy
+        )
 
     # Public Methods
+    @contextmanager
+    def transaction(self) -> Iterator["Database"]:
+        """
+        Groups any number of mutations into a single atomic write of the database.
+        Transactions may be nested, only the outermost one writes to disk. If an
+        exception escapes the transaction all of its mutations are discarded.
+
+        @return Database - The database the transaction belongs to
+        """
+        # Open the transaction
+        self._transactionDepth += 1
+
+        try:
+            # Run the transaction body
+            yield self
+        except BaseException:
+            # Close the transaction
+            self._transactionDepth -= 1
+
+            # Discard the pending mutations
+            if self._transactionDepth == 0:
+                self._backend.rollback()
+                self._reloadPackageRecords()
+
+            # Re-raise the exception
+            raise
+
+        # Close the transaction
+        self._transactionDepth -= 1
+
+        # Commit the pending mutations
+        self._commit()
+
+    def compact(self) -> None:
+        """
+        Folds the change journal into the database snapshot.
+
+        @return None
+        """
+        # Write any pending mutations first
+        self._commit()
+
+        # Rewrite the snapshot, picking up what other processes committed
+        if self._transactionDepth == 0 and self._backend.compact():
+            self._reloadPackageRecords()
+
     def getPackage(self, packageName: str) -> PackageInfo:
         """
         Retrieves the given package information from the database.
@@ -274,19 +436,14 @@ class Database:
         @param { str } packageName - The name of the package
         @return PackageInfo - See PackageInfo
         """
-        # Get the list of available packages
-        packageList: list[str] = self._storedJSONDatabase["packages"]
-
         # Check if package exists
-        if packageName not in packageList:
+        if not self._backend.hasPackage(packageName):
             raise PackageNotFoundException(
                 f'Package "{packageName}" was not found', packageName
             )
 
         # Package exists
-        return PackageInfo(
-            self._storedJSONDatabase["package_info"][packageName], packageName
-        )
+        return self._getPackageRecord(packageName)
 
     def getAllPackages(self) -> list[PackageInfo]:
         """
@@ -295,7 +452,7 @@ class Database:
         @return list[Package] - A list of all available packages
         """
         # Get the list of available packages
-        packageList: list[str] = self._storedJSONDatabase["packages"]
+        packageList: list[str] = self._backend.getPackageNames()
 
         # Output list
         out: list[PackageInfo] = []
@@ -303,49 +460,138 @@ class Database:
         # Iterate through each package
         for package in packageList:
             # Append the package info to the output list
-            out.append(
-                PackageInfo(self._storedJSONDatabase["package_info"][package], package)
-            )
+            out.append(self._getPackageRecord(package))
 
         # Return the output
         return out
 
-    def modifyPackage(self, packageName: str, keyPath: str, newValue: str) -> None:
+    def getPackagesMarkedForBuild(self) -> list[PackageInfo]:
+        """
+        Returns every package marked for build.
+
+        @return list[PackageInfo] - The packages marked for build
+        """
+        return self._findPackages("buildInfo/markedForBuild", True)
+
+    def getPackagesByRepositoryPath(self, repositoryPath: str) -> list[PackageInfo]:
+        """
+        Returns every package stored under the given repository path.
+
+        @param { str } repositoryPath - The repository path as stored, e.g. `/packages/core/os/aarch64/linux-aarch64`
+        @return list[PackageInfo] - The matching packages
+        """
+        return self._findPackages("paths/repo", repositoryPath)
+
+    def getPackagesBySourceType(self, sourceType: str) -> list[PackageInfo]:
         """
-        Modifies a given package's information on the database.
+        Returns every package whose source URL has the given type.
+
+        @param { str } sourceType - The source type, e.g. `http`
+        @return list[PackageInfo] - The matching packages
+        """
+        return self._findPackages("urls/type", sourceType)
+
+    def getPackagesByBuildFunctionName(self, functionName: str) -> list[PackageInfo]:
+        """
+        Returns every package built by the given build function.
+
+        @param { str } functionName - The build function name
+        @return list[PackageInfo] - The matching packages
+        """
+        return self._findPackages("buildInfo/buildFunctionName", functionName)
+
+    def getPackagesByPrepareFunctionName(self, functionName: str) -> list[PackageInfo]:
+        """
+        Returns every package prepared by the given prepare function.
+
+        @param { str } functionName - The prepare function name
+        @return list[PackageInfo] - The matching packages
+        """
+        return self._findPackages("buildInfo/prepareFunctionName", functionName)
+
+    def getGeneration(self) -> int:
+        """
+        Returns the generation of the database. It grows with every mutation,
+        and every added or modified package is stamped with the new generation.
+
+        @return int - The generation of the database
+        """
+        return self._backend.getGeneration()
+
+    def getChangedSince(self, generation: int) -> list[PackageInfo]:
+        """
+        Returns every package added or modified after the given database generation.
+
+        @param { int } generation - A value returned by `getGeneration`
+        @return list[PackageInfo] - The changed packages, least recently changed first
+        """
+        return [
+            self._getPackageRecord(packageName)
+            for packageName in self._backend.findChangedPackageNames(generation)
+        ]
+
+    def getStageGeneration(self, stageName: str) -> int:
+        """
+        Returns the database generation a stage last processed every change up to.
+
+        @param { str } stageName - The name of the stage, e.g. `prepare`
+        @return int - The generation, None if the stage never completed
+        """
+        return self._backend.readMetadata(f"{stageName}_generation")
+
+    def setStageGeneration(self, stageName: str, generation: int) -> None:
+        """
+        Records the database generation a stage processed every change up to.
+
+        @param { str } stageName - The name of the stage, e.g. `prepare`
+        @param { int } generation - A value returned by `getGeneration`
+        @return None
+        """
+        # Store the generation next to the packages
+        self._backend.writeMetadata(f"{stageName}_generation", generation)
+
+        # Write to database
+        self._commit()
+
+    def modifyPackage(self, packageName: str, keyPath: str, newValue: str, expectedGeneration: int = None) -> None:
+        """
+        Modifies a given package's information on the database. With an expected
+        generation the change is only applied if the package is still at it when
+        the change is committed, otherwise `storage.ConcurrentModificationException`
+        is raised and the pending mutations are discarded.
 
         @param { str } packageName - The name of the package
         @param { str } keyPath - The key to modify
         @param { str } newValue - The new value of the key
+        @param { int } expectedGeneration - See PackageInfo.getPackageGeneration (Optional)
         @return None
         """
-        # Get the list of available packages
-        packageList: list[str] = self._storedJSONDatabase["packages"]
-
         # Check if package exists
-        if packageName not in packageList:
+        if not self._backend.hasPackage(packageName):
             raise PackageNotFoundException(
                 f'Package "{packageName}" was not found', packageName
             )
 
-        # Get the package info
-        rawPackageInfo: dict = self._storedJSONDatabase["package_info"][packageName]
-
-        # Split the key value
-        splitKeyPath: list[str] = keyPath.split("/")
-
-        # Check the depth
-        if len(splitKeyPath) == 1:
-            rawPackageInfo[splitKeyPath[0]] = newValue
-        else:
-            rawPackageInfo[splitKeyPath[0]][splitKeyPath[1]] = newValue
+        try:
+            # Modify the stored package
+            self._backend.modifyPackage(packageName, keyPath, newValue, expectedGeneration)
+        except storage.ConcurrentModificationException:
+            # Discard the pending mutations unless an open transaction decides
+            if self._transactionDepth == 0:
+                self._backend.rollback()
+
+            # Hand out the current state for a retry
+            self._reloadPackageRecords()
+            raise
+
+        # Keep handed out package records up to date
+        if packageName in self._packageRecords:
+            self._packageRecords[packageName]._load(
+                self._backend.readPackage(packageName)
+            )
 
         # Write to database
-        with open(self.DATABASE_FILE_PATH, "w") as databaseFile:
-            # Write the database to file
-            json.dump(self._storedJSONDatabase, databaseFile)
-            # Close the database file
-            databaseFile.close()
+        self._commit()
 
     def addPackage(self, packageName: str, packageVersion: str, packageURLType: str, packageSourceURL: str, packageUpstreamURL: str, packageRepo: str, packagePackageBuild: str) -> None:
         """
@@ -361,41 +607,34 @@ class Database:
         @return None
         """
 
-        # Get the list of available packages
-        packageList: list[str] = self._storedJSONDatabase["packages"]
-
         # Check if duplicate entry
-        if packageName in packageList:
+        if self._backend.hasPackage(packageName):
             raise Exception("Duplicate package entry")
 
         # Create function templates
         buildPackageTemplate: str = f"build_pkg_{packageName}".replace("-", "_")
         preparePackageTemplate: str = f"prepare_pkg_{packageName}".replace("-", "_")
 
-        # Add new entry to packages array
-        self._storedJSONDatabase["packages"].append(packageName)
-
         # Populate package_info dict
-        self._storedJSONDatabase["package_info"][packageName] = {}
-        self._storedJSONDatabase["package_info"][packageName]["version"] = packageVersion
-        self._storedJSONDatabase["package_info"][packageName]["urls"] = {}
-        self._storedJSONDatabase["package_info"][packageName]["urls"]["type"] = packageURLType
-        self._storedJSONDatabase["package_info"][packageName]["urls"]["source_url"] = packageSourceURL
-        self._storedJSONDatabase["package_info"][packageName]["urls"]["upstream_url"] = packageUpstreamURL
-        self._storedJSONDatabase["package_info"][packageName]["paths"] = {}
-        self._storedJSONDatabase["package_info"][packageName]["paths"]["repo"] = packageRepo
-        self._storedJSONDatabase["package_info"][packageName]["paths"]["pkgbuild"] = packagePackageBuild
-        self._storedJSONDatabase["package_info"][packageName]["buildInfo"] = {}
-        self._storedJSONDatabase["package_info"][packageName]["buildInfo"]["markedForBuild"] = True
-        self._storedJSONDatabase["package_info"][packageName]["buildInfo"]["buildFunctionName"] = buildPackageTemplate
-        self._storedJSONDatabase["package_info"][packageName]["buildInfo"]["prepareFunctionName"] = preparePackageTemplate
+        rawPackageInfo: dict = {}
+        rawPackageInfo["version"] = packageVersion
+        rawPackageInfo["urls"] = {}
+        rawPackageInfo["urls"]["type"] = packageURLType
+        rawPackageInfo["urls"]["source_url"] = packageSourceURL
+        rawPackageInfo["urls"]["upstream_url"] = packageUpstreamURL
+        rawPackageInfo["paths"] = {}
+        rawPackageInfo["paths"]["repo"] = packageRepo
+        rawPackageInfo["paths"]["pkgbuild"] = packagePackageBuild
+        rawPackageInfo["buildInfo"] = {}
+        rawPackageInfo["buildInfo"]["markedForBuild"] = True
+        rawPackageInfo["buildInfo"]["buildFunctionName"] = buildPackageTemplate
+        rawPackageInfo["buildInfo"]["prepareFunctionName"] = preparePackageTemplate
+
+        # Add new entry to the database
+        self._backend.addPackage(packageName, rawPackageInfo)
 
         # Write to database
-        with open(self.DATABASE_FILE_PATH, "w") as databaseFile:
-            # Write the database to file
-            json.dump(self._storedJSONDatabase, databaseFile)
-            # Close the database file
-            databaseFile.close()
+        self._commit()
 
     def deletePackage(self, packageName: str) -> None:
         """
@@ -404,29 +643,90 @@ class Database:
         @param { str } packageName - The name of the package
         @return None
         """
-        # Get the list of available packages
-        packageList: list[str] = self._storedJSONDatabase["packages"]
-
         # Check if package exists
-        if packageName not in packageList:
+        if not self._backend.hasPackage(packageName):
             raise PackageNotFoundException(
                 f'Package "{packageName}" was not found', packageName
             )
 
-        # Remove from package array
-        self._storedJSONDatabase["packages"].remove(packageName)
-
-        # Remove from package_info dict
-        self._storedJSONDatabase["package_info"].pop(packageName)
+        # Remove the package from the database
+        self._backend.deletePackage(packageName)
+        self._packageRecords.pop(packageName, None)
 
         # Write to database
-        with open(self.DATABASE_FILE_PATH, "w") as databaseFile:
-            # Write the database to file
-            json.dump(self._storedJSONDatabase, databaseFile)
-            # Close the database file
-            databaseFile.close()
+        self._commit()
 
     # Private Methods
+    def _getPackageRecord(self, packageName: str) -> PackageInfo:
+        """
+        Returns the package record, building it from storage once.
+
+        @param { str } packageName - The name of the package
+        @return PackageInfo - See PackageInfo
+        """
+        # Build the record from storage
+        if packageName not in self._packageRecords:
+            self._packageRecords[packageName] = PackageInfo(
+                self._backend.readPackage(packageName), packageName, self._workspace
+            )
+
+        # Return
+        return self._packageRecords[packageName]
+
+    def _findPackages(self, keyPath: str, value: any) -> list[PackageInfo]:
+        """
+        Returns the packages found by the storage engine's secondary index.
+
+        @param { str } keyPath - The indexed key path
+        @param { any } value - The value to look for
+        @return list[PackageInfo] - The matching packages
+        """
+        return [
+            self._getPackageRecord(packageName)
+            for packageName in self._backend.findPackageNames(keyPath, value)
+        ]
+
+    def _reloadPackageRecords(self) -> None:
+        """
+        Refreshes every built record from storage, dropping the ones
+        which are no longer stored.
+
+        @return None
+        """
+        # Iterate through each built record
+        for packageName, record in list(self._packageRecords.items()):
+            # Package is gone
+            if not self._backend.hasPackage(packageName):
+                self._packageRecords.pop(packageName)
+                continue
+
+            # Refresh the record in place
+            record._load(self._backend.readPackage(packageName))
+
+    def _commit(self) -> None:
+        """
+        Writes pending mutations to disk unless a transaction is still open.
+        Mutations other processes committed meanwhile are merged in, a
+        conflicting mutation discards every pending one.
+
+        @return None
+        """
+        # Defer the write until the outermost transaction closes
+        if self._transactionDepth > 0:
+            return
+
+        try:
+            # Write to database
+            synchronized: bool = self._backend.commit()
+        except storage.ConcurrentModificationException:
+            # Discard the pending mutations
+            self._backend.rollback()
+            self._reloadPackageRecords()
+            raise
+
+        # Pick up what other processes committed
+        if synchronized:
+            self._reloadPackageRecords()
 
 # Run
 if __name__ == "__main__":
@@ -0,0 +1,847 @@
+# Import Statements
+# First party
+import io
+import os
+import ssl
+import sys
+import json
+import time
+import random
+import threading
+import http.client
+import email.utils
+from typing import Final, Iterator
+from urllib import parse
+from urllib.error import HTTPError
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+# Second party
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || network.py
+# ---------------------------------------
+# Keeps HTTP(S) connections open between requests. Almost
+# every upstream page and source lives on a handful of hosts,
+# so the sync and prepare scripts reuse one connection pool
+# instead of a new TCP and TLS handshake per request. Hosts
+# which fail or ask to slow down are backed off from. Large
+# downloads are split into ranges and resume where they stopped.
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Class Definitions
+class HostUnavailableException(Exception):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+    requestedHost: str
+    retryAfter: float
+
+    # Private Variables
+
+    # Constants
+
+    # Constructor
+    def __init__(self, message: str, host: str, retryAfter: float) -> None:
+        # Class base class constructor
+        super().__init__(message)
+
+        # Set the host and how long it asked to be left alone
+        self.requestedHost = host
+        self.retryAfter = retryAfter
+
+    # Public Methods
+
+    # Private Methods
+
+class HostBackoff:
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+    _failureCounts: dict[tuple[str, str, int], int]
+    _retryTimes: dict[tuple[str, str, int], float]
+    _lock: threading.Lock
+
+    # Constants
+
+    # Constructor
+    def __init__(self) -> None:
+        # No host failed yet
+        self._failureCounts = {}
+        self._retryTimes = {}
+        self._lock = threading.Lock()
+
+    # Public Methods
+    def wait(self, origin: tuple[str, str, int]) -> None:
+        """
+        Sleeps until a backed off host may be contacted again. A host which
+        asked to be left alone for longer than BACKOFF_MAXIMUM_DELAY raises
+        `HostUnavailableException` right away instead.
+
+        @param { tuple[str, str, int] } origin - The scheme, host and port
+        @return None
+        """
+        # Get the time the host may be contacted again
+        with self._lock:
+            retryTime: Final[float] = self._retryTimes.get(origin, 0.0)
+
+        # Get the delay
+        delay: Final[float] = retryTime - time.monotonic()
+
+        # Not worth waiting for
+        if delay > BACKOFF_MAXIMUM_DELAY:
+            raise HostUnavailableException(
+                f"{origin[1]} asked to retry after {delay:.0f} seconds", origin[1], delay
+            )
+
+        # Sleep until then
+        if delay > 0:
+            time.sleep(delay)
+
+    def recordFailure(self, origin: tuple[str, str, int], retryAfter: float = None) -> float:
+        """
+        Backs off from a host after a failed request, exponentially with
+        jitter, or as long as the host asked to with `Retry-After`.
+
+        @param { tuple[str, str, int] } origin - The scheme, host and port
+        @param { float } retryAfter - The delay the host asked for in seconds (Optional)
+        @return float - The delay before the host may be contacted again
+        """
+        with self._lock:
+            # Count the consecutive failure
+            failureCount: Final[int] = self._failureCounts.get(origin, 0) + 1
+            self._failureCounts[origin] = failureCount
+
+            # Get the delay
+            delay: float = getBackoffDelay(failureCount, BACKOFF_BASE_DELAY, BACKOFF_MAXIMUM_DELAY)
+            if retryAfter is not None:
+                delay = max(delay, retryAfter)
+
+            # Hold back every request to the host until then
+            self._retryTimes[origin] = max(
+                self._retryTimes.get(origin, 0.0), time.monotonic() + delay
+            )
+
+        # Return
+        return delay
+
+    def recordSuccess(self, origin: tuple[str, str, int]) -> None:
+        """
+        Forgets the failures of a host which answered again.
+
+        @param { tuple[str, str, int] } origin - The scheme, host and port
+        @return None
+        """
+        with self._lock:
+            self._failureCounts.pop(origin, None)
+
+    # Private Methods
+
+class ConnectionPool:
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+    _maximumConnectionsPerHost: int
+    _maximumAttempts: int
+    _timeout: float
+    _sslContext: ssl.SSLContext
+    _hostBackoff: HostBackoff
+    _idleConnections: dict[tuple[str, str, int], list[http.client.HTTPConnection]]
+    _hostSemaphores: dict[tuple[str, str, int], threading.BoundedSemaphore]
+    _lock: threading.Lock
+    _openedConnectionCount: int
+    _requestCount: int
+
+    # Constants
+    REDIRECT_STATUSES: Final[tuple[int, ...]] = (301, 302, 303, 307, 308)
+    # Statuses of a host which is overloaded or briefly unavailable
+    RETRY_STATUSES: Final[tuple[int, ...]] = (429, 502, 503, 504)
+    MAXIMUM_REDIRECTS: Final[int] = 10
+    # Unread bodies up to this size are drained so their connection can be reused
+    MAXIMUM_DRAIN_SIZE: Final[int] = 64 * 1024
+    # Errors of a kept alive connection the server closed in the meantime
+    STALE_CONNECTION_ERRORS: Final[tuple[type, ...]] = (
+        http.client.RemoteDisconnected,
+        ConnectionResetError,
+        ConnectionAbortedError,
+        BrokenPipeError,
+    )
+
+    # Constructor
+    def __init__(self, maximumConnectionsPerHost: int = None, timeout: float = None, sslContext: ssl.SSLContext = None, maximumAttempts: int = None) -> None:
+        # Set the limits
+        self._maximumConnectionsPerHost = maximumConnectionsPerHost or MAXIMUM_CONNECTIONS_PER_HOST
+        self._maximumAttempts = maximumAttempts or MAXIMUM_ATTEMPTS
+        self._timeout = timeout or REQUEST_TIMEOUT
+        self._sslContext = sslContext or ssl.create_default_context()
+        self._hostBackoff = HostBackoff()
+
+        # No connections yet
+        self._idleConnections = {}
+        self._hostSemaphores = {}
+        self._lock = threading.Lock()
+        self._openedConnectionCount = 0
+        self._requestCount = 0
+
+    # Public Methods
+    @contextmanager
+    def openURL(self, url: str, headers: dict[str, str] = None, method: str = "GET") -> Iterator[http.client.HTTPResponse]:
+        """
+        Sends a request over a pooled connection and holds the response, following
+        redirects. Like `urllib.request.urlopen` a status of 400 and above raises
+        `urllib.error.HTTPError`. The connection returns to the pool once the
+        response is read to the end. Connection errors and overloaded hosts are
+        retried with backoff, unless the host asks for a longer pause than
+        BACKOFF_MAXIMUM_DELAY.
+
+        @param { str } url - The HTTP(S) URL
+        @param { dict[str, str] } headers - Additional request headers (Optional)
+        @param { str } method - The request method (Optional)
+        @return http.client.HTTPResponse - The response
+        """
+        # Redirects followed and attempts made so far
+        redirectCount: int = 0
+        attemptCount: int = 0
+
+        # Send requests until one is answered
+        while True:
+            # Get the host of the URL
+            origin: tuple[str, str, int] = _getOrigin(url)
+
+            # Wait for a backed off host, or give up on one which asked for a long pause
+            self._hostBackoff.wait(origin)
+
+            # Wait for a free connection slot on the host
+            with self._hostSlot(origin):
+                try:
+                    # Send the request
+                    connection, response = self._sendRequest(origin, method, url, headers)
+                except (OSError, http.client.HTTPException):
+                    # Back off and retry
+                    attemptCount += 1
+                    self._hostBackoff.recordFailure(origin)
+                    if attemptCount >= self._maximumAttempts:
+                        raise
+                    continue
+
+                try:
+                    # Host is overloaded or briefly unavailable
+                    if response.status in self.RETRY_STATUSES:
+                        # Back off, as long as the host asks to if it does
+                        attemptCount += 1
+                        retryAfter: float = parseRetryAfter(response.getheader("Retry-After"))
+                        self._hostBackoff.recordFailure(origin, retryAfter)
+
+                        # Retry unless out of attempts or asked to pause for too long
+                        if attemptCount < self._maximumAttempts and (
+                            retryAfter is None or retryAfter <= BACKOFF_MAXIMUM_DELAY
+                        ):
+                            response.read()
+                            continue
+                    else:
+                        # Host answered
+                        self._hostBackoff.recordSuccess(origin)
+
+                    # Follow a redirect
+                    location: str = response.getheader("Location")
+                    if response.status in self.REDIRECT_STATUSES and location:
+                        # Redirect loop
+                        redirectCount += 1
+                        if redirectCount > self.MAXIMUM_REDIRECTS:
+                            raise HTTPError(url, 310, "Too many redirects", response.headers, None)
+
+                        # Request the new location
+                        response.read()
+                        url = parse.urljoin(url, location)
+                        continue
+
+                    # Raise failed requests
+                    if response.status >= 400:
+                        raise HTTPError(
+                            url,
+                            response.status,
+                            response.reason,
+                            response.headers,
+                            io.BytesIO(response.read()),
+                        )
+
+                    # Hand out the response
+                    yield response
+                    return
+                finally:
+                    # Return the connection to the pool
+                    self._releaseConnection(origin, connection, response)
+
+    def downloadFile(self, url: str, filePath: str, digest: any = None, maximumRanges: int = None) -> str:
+        """
+        Downloads a URL into a file, the pooled replacement of `urlretrieve`.
+        Large files of servers which accept ranges are fetched as concurrent
+        ranges. A dropped connection resumes where it stopped, and a download
+        which fails resumes on the next call from the progress kept next to
+        the file. The final size is checked against the size the server sent.
+
+        @param { str } url - The HTTP(S) URL
+        @param { str } filePath - The file to write
+        @param { any } digest - An object with an `update` method, e.g. `checksum.MultiDigest`, fed the file in order (Optional)
+        @param { int } maximumRanges - The most concurrent ranges (Optional)
+        @return str - The file path
+        """
+        # Resume a download which failed earlier, or start a new one
+        state: dict = _readDownloadState(url, filePath)
+        if state is None:
+            state = self._startDownload(url, filePath, maximumRanges or DOWNLOAD_RANGES)
+
+        # Feed the digest while streaming if the file arrives in one piece from its first byte
+        downloadRanges: Final[list[list[int]]] = state["ranges"]
+        streamedDigest: Final[any] = (
+            digest
+            if len(downloadRanges) == 1 and downloadRanges[0][2] == 0 and state["acceptsRanges"]
+            else None
+        )
+
+        # Fetch the missing ranges
+        fileDescriptor: Final[int] = os.open(filePath, os.O_RDWR | os.O_CREAT, 0o644)
+        stateLock: Final[threading.Lock] = threading.Lock()
+        stopEvent: Final[threading.Event] = threading.Event()
+        try:
+            pendingRanges: Final[list[list[int]]] = [
+                downloadRange
+                for downloadRange in downloadRanges
+                if downloadRange[1] is None or downloadRange[2] < downloadRange[1]
+            ]
+
+            # One range, in this thread
+            if len(pendingRanges) <= 1:
+                for downloadRange in pendingRanges:
+                    self._downloadRange(url, filePath, fileDescriptor, state, downloadRange, streamedDigest, stateLock, stopEvent)
+
+            # Several ranges, concurrently
+            else:
+                with ThreadPoolExecutor(max_workers=len(pendingRanges), thread_name_prefix="download") as executor:
+                    futures: list = [
+                        executor.submit(self._downloadRange, url, filePath, fileDescriptor, state, downloadRange, None, stateLock, stopEvent)
+                        for downloadRange in pendingRanges
+                    ]
+                    try:
+                        for future in futures:
+                            future.result()
+                    finally:
+                        # Stop the other ranges after a failure
+                        stopEvent.set()
+        finally:
+            # Keep the progress for the next call, unless the download was dropped
+            os.close(fileDescriptor)
+            with stateLock:
+                if os.path.exists(filePath):
+                    _writeDownloadState(filePath, state)
+
+        # Check the size
+        fileSize: Final[int] = os.path.getsize(filePath)
+        if state["size"] is not None and fileSize != state["size"]:
+            _removeDownload(filePath)
+            raise Exception(f'Downloaded {fileSize} of {state["size"]} bytes of "{url}"')
+
+        # Feed the digest the file, unless it was fed while streaming
+        if digest is not None and streamedDigest is None:
+            buffer: Final[bytearray] = bytearray(DOWNLOAD_CHUNK_SIZE)
+            bufferView: Final[memoryview] = memoryview(buffer)
+            with open(filePath, "rb", buffering=0) as file:
+                while readSize := file.readinto(buffer):
+                    digest.update(bufferView[:readSize])
+
+        # Download is complete, drop its progress
+        os.remove(f"{filePath}{DOWNLOAD_STATE_SUFFIX}")
+
+        # Return
+        return filePath
+
+    def getStatistics(self) -> dict[str, int]:
+        """
+        Returns how many requests were sent and how many connections they needed.
+
+        @return dict[str, int] - `requests` and `connections` counts
+        """
+        return {"requests": self._requestCount, "connections": self._openedConnectionCount}
+
+    def close(self) -> None:
+        """
+        Closes every idle connection.
+
+        @return None
+        """
+        # Take the idle connections
+        with self._lock:
+            idleConnections: Final[list] = [
+                connection
+                for connections in self._idleConnections.values()
+                for connection in connections
+            ]
+            self._idleConnections = {}
+
+        # Close them
+        for connection in idleConnections:
+            connection.close()
+
+    # Private Methods
+    def _startDownload(self, url: str, filePath: str, maximumRanges: int) -> dict:
+        """
+        Asks the server for the size of a file and whether it accepts ranges,
+        and splits the download into ranges if it is large enough.
+
+        @param { str } url - The HTTP(S) URL
+        @param { str } filePath - The file to write
+        @param { int } maximumRanges - The most concurrent ranges
+        @return dict - The download state, see `_readDownloadState`
+        """
+        # Get the size and validator of the file
+        fileSize: int = None
+        validator: str = None
+        acceptsRanges: bool = False
+        try:
+            with self.openURL(url, method="HEAD") as response:
+                contentLength: str = response.getheader("Content-Length")
+                fileSize = int(contentLength) if contentLength and contentLength.isdigit() else None
+                acceptsRanges = response.getheader("Accept-Ranges", "").strip().lower() == "bytes"
+
+                # Ranges may only be joined if the file did not change, weak ETags do not promise that
+                entityTag: str = response.getheader("ETag")
+                validator = (
+                    entityTag
+                    if entityTag and not entityTag.startswith("W/")
+                    else response.getheader("Last-Modified")
+                )
+        except HTTPError:
+            # E.g. HEAD is not allowed, download the file in one piece
+            pass
+
+        # Split a large file into ranges, only if they can be checked to belong to the same file
+        rangeCount: int = 1
+        if acceptsRanges and validator is not None and fileSize is not None:
+            rangeCount = max(1, min(maximumRanges, fileSize // DOWNLOAD_MINIMUM_RANGE_SIZE))
+
+        # Get the ranges, as `[start, end, position]`
+        rangeSize: Final[int] = -(-fileSize // rangeCount) if fileSize else 0
+        downloadRanges: Final[list[list[int]]] = (
+            [
+                [start, min(start + rangeSize, fileSize), start]
+                for start in range(0, fileSize, rangeSize)
+            ]
+            if fileSize
+            else [[0, fileSize, 0]]
+        )
+
+        # Create the file, at its full size so ranges can be written anywhere
+        with open(filePath, "wb") as file:
+            if fileSize is not None:
+                file.truncate(fileSize)
+
+        # Return
+        return {
+            "version": DOWNLOAD_STATE_VERSION,
+            "url": url,
+            "size": fileSize,
+            "validator": validator,
+            "acceptsRanges": acceptsRanges,
+            "ranges": downloadRanges,
+        }
+
+    def _downloadRange(self, url: str, filePath: str, fileDescriptor: int, state: dict, downloadRange: list[int], digest: any, stateLock: threading.Lock, stopEvent: threading.Event) -> None:
+        """
+        Fetches a range of a file from its position to its end. A dropped or
+        stalled connection is resumed from the last byte written, right away
+        if it made progress and after backing off otherwise, until it fails
+        MAXIMUM_ATTEMPTS times in a row without progress.
+
+        @param { str } url - The HTTP(S) URL
+        @param { str } filePath - The file written to
+        @param { int } fileDescriptor - The file, opened for writing
+        @param { dict } state - The download state, saved as the range progresses
+        @param { list[int] } downloadRange - The `[start, end, position]` of the range, updated in place
+        @param { any } digest - An object with an `update` method fed the bytes in order (Optional)
+        @param { threading.Lock } stateLock - Held while saving the state
+        @param { threading.Event } stopEvent - Set when another range failed
+        @return None
+        """
+        # Read buffer
+        buffer: Final[bytearray] = bytearray(DOWNLOAD_CHUNK_SIZE)
+        bufferView: Final[memoryview] = memoryview(buffer)
+
+        # Consecutive failures, the furthest the range got, and bytes written since the state was saved
+        failureCount: int = 0
+        furthestPosition: int = downloadRange[2]
+        unsavedSize: int = 0
+
+        # Fetch until the range is complete
+        while not stopEvent.is_set():
+            # Get the missing part of the range
+            position: int = downloadRange[2]
+            attemptPosition: int = position
+            rangeEnd: int = downloadRange[1]
+            if rangeEnd is not None and position >= rangeEnd:
+                return
+
+            # Ask for it, unless it is the whole file
+            headers: dict[str, str] = {}
+            if position > 0 or len(state["ranges"]) > 1:
+                headers["Range"] = f"bytes={position}-{rangeEnd - 1 if rangeEnd is not None else ''}"
+                if state["validator"] is not None:
+                    headers["If-Range"] = state["validator"]
+
+            try:
+                with self.openURL(url, headers) as response:
+                    # Whole file was sent, the server ignores ranges or the file changed
+                    if response.status != 206 and "Range" in headers:
+                        # Start over, unless other ranges or a digest already hold parts of the old file
+                        if len(state["ranges"]) > 1 or (digest is not None and position > 0):
+                            _removeDownload(filePath)
+                            raise Exception(f'"{url}" changed while it was downloaded')
+                        position = downloadRange[2] = 0
+                        os.ftruncate(fileDescriptor, 0)
+
+                    # Stream the range into the file
+                    while rangeEnd is None or position < rangeEnd:
+                        # Another range failed
+                        if stopEvent.is_set():
+                            return
+
+                        # Read the next chunk, a dropped connection raises `IncompleteRead`
+                        readSize: int = response.readinto(
+                            bufferView[:min(DOWNLOAD_CHUNK_SIZE, rangeEnd - position)]
+                            if rangeEnd is not None
+                            else buffer
+                        )
+                        if readSize == 0:
+                            break
+
+                        # Write it
+                        os.pwrite(fileDescriptor, bufferView[:readSize], position)
+                        if digest is not None:
+                            digest.update(bufferView[:readSize])
+                        position += readSize
+                        downloadRange[2] = position
+
+                        # Progress, a range started over only makes progress once it gets further than before
+                        if position > furthestPosition:
+                            furthestPosition = position
+                            failureCount = 0
+
+                        # Save the progress now and then, a crash loses at most this much
+                        unsavedSize += readSize
+                        if unsavedSize >= DOWNLOAD_STATE_INTERVAL:
+                            unsavedSize = 0
+                            with stateLock:
+                                _writeDownloadState(filePath, state)
+
+                    # File of unknown size ended
+                    if rangeEnd is None:
+                        downloadRange[1] = position
+                        return
+
+                    # Connection closed before the range ended
+                    if position < rangeEnd:
+                        raise http.client.IncompleteRead(b"", rangeEnd - position)
+            except HTTPError:
+                # Not worth retrying
+                raise
+            except (OSError, http.client.HTTPException):
+                # Give up after failing over and over without progress
+                failureCount += 1
+                if failureCount >= self._maximumAttempts:
+                    raise
+
+                # Back off from a host which sent nothing, resume right away otherwise
+                if downloadRange[2] <= attemptPosition:
+                    self._hostBackoff.recordFailure(_getOrigin(url))
+
+    @contextmanager
+    def _hostSlot(self, origin: tuple[str, str, int]) -> Iterator[None]:
+        """
+        Holds one of the connection slots of a host, which bounds both
+        the concurrent requests and the pooled connections per host.
+
+        @param { tuple[str, str, int] } origin - The scheme, host and port
+        @return None
+        """
+        # Get the semaphore of the host
+        with self._lock:
+            if origin not in self._hostSemaphores:
+                self._hostSemaphores[origin] = threading.BoundedSemaphore(
+                    self._maximumConnectionsPerHost
+                )
+            semaphore: threading.BoundedSemaphore = self._hostSemaphores[origin]
+
+        # Hold a slot
+        with semaphore:
+            yield
+
+    def _sendRequest(self, origin: tuple[str, str, int], method: str, url: str, headers: dict[str, str]) -> tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        """
+        Sends a request over an idle connection of the host, or a new one.
+        A kept alive connection the server closed meanwhile is replaced once.
+
+        @param { tuple[str, str, int] } origin - The scheme, host and port
+        @param { str } method - The request method
+        @param { str } url - The URL
+        @param { dict[str, str] } headers - Additional request headers
+        @return tuple - The connection and its response
+        """
+        # Get the request target and headers
+        splitURL: Final[parse.SplitResult] = parse.urlsplit(url)
+        target: Final[str] = (splitURL.path or "/") + (f"?{splitURL.query}" if splitURL.query else "")
+        requestHeaders: Final[dict[str, str]] = {"User-Agent": USER_AGENT, **(headers or {})}
+
+        # Reuse an idle connection
+        with self._lock:
+            idleConnections: list = self._idleConnections.get(origin, [])
+            connection: http.client.HTTPConnection = idleConnections.pop() if idleConnections else None
+            self._requestCount += 1
+
+        # Try the idle connection first
+        if connection is not None:
+            try:
+                connection.request(method, target, headers=requestHeaders)
+                return connection, connection.getresponse()
+            except self.STALE_CONNECTION_ERRORS:
+                # The server closed it, retry on a new connection
+                connection.close()
+            except BaseException:
+                connection.close()
+                raise
+
+        # Open a new connection
+        connection = self._openConnection(origin)
+        try:
+            connection.request(method, target, headers=requestHeaders)
+            return connection, connection.getresponse()
+        except BaseException:
+            connection.close()
+            raise
+
+    def _openConnection(self, origin: tuple[str, str, int]) -> http.client.HTTPConnection:
+        """
+        Opens a new connection to a host.
+
+        @param { tuple[str, str, int] } origin - The scheme, host and port
+        @return http.client.HTTPConnection - The connection
+        """
+        # Count the connection
+        with self._lock:
+            self._openedConnectionCount += 1
+
+        # HTTPS
+        scheme, host, port = origin
+        if scheme == "https":
+            return http.client.HTTPSConnection(
+                host, port, timeout=self._timeout, context=self._sslContext
+            )
+
+        # HTTP
+        return http.client.HTTPConnection(host, port, timeout=self._timeout)
+
+    def _releaseConnection(self, origin: tuple[str, str, int], connection: http.client.HTTPConnection, response: http.client.HTTPResponse) -> None:
+        """
+        Returns a connection to the pool if its response was read to the end,
+        draining a small unread rest first, and closes it otherwise.
+
+        @param { tuple[str, str, int] } origin - The scheme, host and port
+        @param { http.client.HTTPConnection } connection - The connection
+        @param { http.client.HTTPResponse } response - The response sent over it
+        @return None
+        """
+        try:
+            # Drain a small unread rest
+            if (
+                not response.isclosed()
+                and response.length is not None
+                and response.length <= self.MAXIMUM_DRAIN_SIZE
+            ):
+                response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            return
+
+        # Keep the connection if the server does
+        if response.isclosed() and not response.will_close:
+            with self._lock:
+                self._idleConnections.setdefault(origin, []).append(connection)
+            return
+
+        # Close it otherwise
+        connection.close()
+
+# Enums
+
+# Interfaces
+
+# Constants
+MAXIMUM_CONNECTIONS_PER_HOST: Final[int] = int(
+    os.environ.get("ALARM_HTTP_CONNECTIONS_PER_HOST", 8)
+)
+# Seconds a connection may stay silent before it is dropped, and resumed if it was downloading
+REQUEST_TIMEOUT: Final[float] = float(os.environ.get("ALARM_HTTP_TIMEOUT", 30.0))
+MAXIMUM_ATTEMPTS: Final[int] = 4
+BACKOFF_BASE_DELAY: Final[float] = 1.0
+BACKOFF_MAXIMUM_DELAY: Final[float] = 60.0
+DOWNLOAD_CHUNK_SIZE: Final[int] = 1024 * 1024
+# Concurrent ranges of a large download, and the smallest range worth its own connection
+DOWNLOAD_RANGES: Final[int] = int(os.environ.get("ALARM_DOWNLOAD_RANGES", 4))
+DOWNLOAD_MINIMUM_RANGE_SIZE: Final[int] = int(
+    os.environ.get("ALARM_DOWNLOAD_MINIMUM_RANGE_SIZE", 16 * 1024 * 1024)
+)
+# Progress of an unfinished download is kept next to the file, saved at least this often in bytes
+DOWNLOAD_STATE_SUFFIX: Final[str] = ".download"
+DOWNLOAD_STATE_VERSION: Final[int] = 1
+DOWNLOAD_STATE_INTERVAL: Final[int] = 8 * 1024 * 1024
+USER_AGENT: Final[str] = f"Python-urllib/{sys.version_info.major}.{sys.version_info.minor}"
+
+# Public Variables
+
+# Private Variables
+_sharedConnectionPool: ConnectionPool = None
+_sharedConnectionPoolLock: Final[threading.Lock] = threading.Lock()
+
+# Public Methods
+def getSharedConnectionPool() -> ConnectionPool:
+    """
+    Returns the connection pool shared by everything in the process.
+
+    @return ConnectionPool - The shared connection pool
+    """
+    # Declare the global
+    global _sharedConnectionPool
+
+    # Create the pool on first use
+    with _sharedConnectionPoolLock:
+        if _sharedConnectionPool is None:
+            _sharedConnectionPool = ConnectionPool()
+
+    # Return
+    return _sharedConnectionPool
+
+def getBackoffDelay(failureCount: int, baseDelay: float, maximumDelay: float) -> float:
+    """
+    Returns an exponential backoff delay with jitter, between half and all
+    of `baseDelay * 2 ** (failureCount - 1)`, capped at the maximum delay.
+
+    @param { int } failureCount - The number of consecutive failures, at least 1
+    @param { float } baseDelay - The delay after the first failure in seconds
+    @param { float } maximumDelay - The longest delay in seconds
+    @return float - The delay in seconds
+    """
+    return min(maximumDelay, baseDelay * 2 ** min(failureCount - 1, 32)) * random.uniform(0.5, 1.0)
+
+def parseRetryAfter(retryAfter: str) -> float:
+    """
+    Parses a `Retry-After` header, given either in seconds or as an HTTP date.
+
+    @param { str } retryAfter - The header value
+    @return float - The delay in seconds, None if missing or malformed
+    """
+    # Header is missing
+    if retryAfter is None:
+        return None
+
+    # Delay in seconds
+    if retryAfter.strip().isdigit():
+        return float(retryAfter.strip())
+
+    # HTTP date
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(retryAfter).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+# Private Methods
+def _readDownloadState(url: str, filePath: str) -> dict:
+    """
+    Reads the progress of an unfinished download of a URL into a file. Progress
+    of another URL, of a file which cannot be checked for changes, or without
+    its file is dropped.
+
+    @param { str } url - The URL
+    @param { str } filePath - The file written to
+    @return dict - The `url`, `size`, `validator`, `acceptsRanges` and `ranges` as `[start, end, position]`, None if there is nothing to resume
+    """
+    try:
+        # Read the state
+        with open(f"{filePath}{DOWNLOAD_STATE_SUFFIX}", "rb") as stateFile:
+            state: Final[dict] = json.load(stateFile)
+    except (OSError, ValueError):
+        # Nothing to resume
+        return None
+
+    # Resume only the same URL, if the server can tell whether the file changed since
+    if (
+        state.get("version") != DOWNLOAD_STATE_VERSION
+        or state.get("url") != url
+        or state.get("validator") is None
+        or not state.get("acceptsRanges")
+        or not os.path.exists(filePath)
+    ):
+        return None
+
+    # Return
+    return state
+
+def _writeDownloadState(filePath: str, state: dict) -> None:
+    """
+    Saves the progress of a download next to its file. The bytes of a range
+    are written before its position, so the saved progress never runs ahead.
+
+    @param { str } filePath - The file written to
+    @param { dict } state - The download state
+    @return None
+    """
+    # Write a temporary file and swap it in, a torn state is never read
+    stateFilePath: Final[str] = f"{filePath}{DOWNLOAD_STATE_SUFFIX}"
+    with open(f"{stateFilePath}.tmp", "w") as stateFile:
+        json.dump(state, stateFile)
+    os.replace(f"{stateFilePath}.tmp", stateFilePath)
+
+def _removeDownload(filePath: str) -> None:
+    """
+    Deletes an unfinished download and its progress, so the next call starts over.
+
+    @param { str } filePath - The file written to
+    @return None
+    """
+    for path in (filePath, f"{filePath}{DOWNLOAD_STATE_SUFFIX}"):
+        if os.path.exists(path):
+            os.remove(path)
+
+def _getOrigin(url: str) -> tuple[str, str, int]:
+    """
+    Returns the scheme, host and port a URL is served from.
+
+    @param { str } url - The HTTP(S) URL
+    @return tuple[str, str, int] - The scheme, host and port
+    """
+    # Split the URL
+    splitURL: Final[parse.SplitResult] = parse.urlsplit(url)
+    scheme: Final[str] = splitURL.scheme.lower()
+
+    # Only HTTP(S) is pooled
+    if scheme not in ("http", "https"):
+        raise ValueError(f'Unsupported URL scheme "{splitURL.scheme}"')
+
+    # Return
+    return (scheme, splitURL.hostname, splitURL.port or (443 if scheme == "https" else 80))
+
+# Run
+if __name__ == "__main__":
+    pass
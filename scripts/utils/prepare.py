@@ -5,7 +5,11 @@ from typing import Final
 
 # Second party
 import utils.db as db
+import utils.cache as cache
+import utils.archive as archive
+import utils.context as context
 import utils.logging as logging
+import utils.checksum as checksum
 
 # Third party
 
@@ -47,12 +51,22 @@ class PrepareBuildFunctions:
     # Public Variables
 
     # Private Variables
+    _workspace: context.Workspace
+    _sourceCache: cache.SourceCache
+    _sourceDigests: dict[str, dict[str, str]]
 
     # Constants
 
     # Constructor
-    def __init__(self) -> None:
-        return
+    def __init__(self, workspace: context.Workspace) -> None:
+        # Set the workspace packages are prepared in
+        self._workspace = workspace
+
+        # Keep downloaded sources between preparations
+        self._sourceCache = cache.SourceCache(workspace.getSourceCacheDirectory())
+
+        # Checksums of the downloaded sources by path, computed while downloading
+        self._sourceDigests = {}
 
     # Public Methods
     def prepare_pkg_example_package(self, package: db.PackageInfo) -> None:
@@ -91,7 +105,7 @@ class PrepareBuildFunctions:
         @return None
         """
         # Import Statements
-        import os, tarfile, subprocess
+        import subprocess
 
         # Setup logging
         maximumLogCount: Final[int] = 11
@@ -115,7 +129,7 @@ class PrepareBuildFunctions:
         )
 
         # Create temporary directory
-        directories: Final[tuple[str, str]] = self._createTemporaryDirectory()
+        temporaryDirectory: Final[str] = self._createTemporaryDirectory(package)
 
         # Retrieve Kernel version info
         kernelVersionNumber: str = package.getPackageVersion()
@@ -137,7 +151,7 @@ class PrepareBuildFunctions:
 
         # Download the Kernel tarfile
         sourceFilePath: Final[str] = self._downloadSourceFiles(
-            downloadURL, package.getPackageURLs().getSourceType()
+            downloadURL, package.getPackageURLs().getSourceType(), temporaryDirectory
         )
 
         # Log
@@ -157,10 +171,18 @@ class PrepareBuildFunctions:
             "Extracting Linux Kernel...",
         )
 
-        # Extract the Linux Kernel
-        kernelTarFile: tarfile.TarFile = tarfile.open(sourceFilePath)
-        kernelTarFile.extractall(".")
-        kernelTarFile.close()
+        # Extract the Linux Kernel, without the trees of other architectures
+        archive.extractArchive(
+            sourceFilePath,
+            temporaryDirectory,
+            tuple(
+                f"linux-{kernelVersionNumber}/arch/{architecture}"
+                for architecture in KERNEL_EXCLUDED_ARCHITECTURES
+            ),
+        )
+
+        # Get the extracted Kernel source directory
+        kernelSourceDirectory: Final[str] = f"{temporaryDirectory}/linux-{kernelVersionNumber}"
 
         # Log
         currentLogCount = logging.log(
@@ -179,11 +201,8 @@ class PrepareBuildFunctions:
             "Generating Kernel configuration file for AArch64...",
         )
 
-        # Switch directories
-        os.chdir(f"linux-{kernelVersionNumber}")
-
         # Generate a new Kernel configuration file
-        subprocess.call(["make", "ARCH=arm64", "defconfig"])
+        subprocess.call(["make", "ARCH=arm64", "defconfig"], cwd=kernelSourceDirectory)
 
         # Log
         currentLogCount = logging.log(
@@ -202,9 +221,6 @@ class PrepareBuildFunctions:
             "Modifying PKGBUILD...",
         )
 
-        # Switch directories
-        os.chdir(directories[0])
-
         # Copy the new configuration file to the Linux PKGBUILD directory
         subprocess.call(
             [
@@ -212,7 +228,7 @@ class PrepareBuildFunctions:
                 "--recursive",
                 "--update",
                 "--verbose",
-                f"{directories[1]}/linux-{kernelVersionNumber}/.config",
+                f"{kernelSourceDirectory}/.config",
                 f"{package.getPackagePaths().getPackageBuildPath()}/config",
             ]
         )
@@ -221,7 +237,7 @@ class PrepareBuildFunctions:
         newSHA256Checksums: Final[str] = self._generateSHA256Checksums(
             "{X} SKIP {X}",
             sourceFilePath,
-            f"{directories[1]}/linux-{kernelVersionNumber}/.config",
+            f"{kernelSourceDirectory}/.config",
         )
 
         # Modify the PKGBUILD version entry
@@ -245,7 +261,7 @@ class PrepareBuildFunctions:
         )
 
         # Delete the temporary directory
-        subprocess.call(["rm", "--recursive", "--force", directories[1]])
+        subprocess.call(["rm", "--recursive", "--force", temporaryDirectory])
 
         # Log
         currentLogCount = logging.log(
@@ -257,48 +273,51 @@ class PrepareBuildFunctions:
         )
 
     # Private Methods
-    def _createTemporaryDirectory(self) -> tuple[str, str]:
+    def _createTemporaryDirectory(self, package: db.PackageInfo) -> str:
         """
         Creates a new, temporary directory, for package preparation.
 
-        @return tuple(str, str) - Old directory path, Temporary directory path
+        @param { PackageInfo } package - The package
+        @return str - Temporary directory path
         """
-        # Get current directory
-        currentOldDirectory: Final[str] = os.getcwd()
-
-        # Temporary directory name
-        temporaryDirectory: Final[str] = "./temp"
-
-        # Create temporary directory
-        os.mkdir(temporaryDirectory)
+        return self._workspace.createTemporaryDirectory(package.getPackageName())
 
-        # Switch directories
-        os.chdir(temporaryDirectory)
-
-        # Return
-        return (currentOldDirectory, os.getcwd())
-
-    def _downloadSourceFiles(self, downloadURL: str, urlType: str) -> str:
+    def _downloadSourceFiles(self, downloadURL: str, urlType: str, directoryPath: str) -> str:
         """
         Downloads the given source file(s) via `https` or `git+https`.
 
         @param { str } downloadURL - The download URL
         @param { str } urlType - The type of the download URL
+        @param { str } directoryPath - The directory to download into
         @return str - Filepath to the source download
         """
         # Import Statements
         from subprocess import call
-        from urllib.request import urlretrieve
+        from urllib.parse import urlsplit
+
+        # Name the download after the last part of the URL
+        downloadName: Final[str] = os.path.basename(
+            urlsplit(downloadURL).path.rstrip("/")
+        ).removesuffix(".git")
+        downloadPath: Final[str] = f"{directoryPath}/{downloadName or 'source'}"
 
         # HTTP(S) download
         if urlType == "http":
-            # Download
-            return urlretrieve(downloadURL)[0]
+            # Link a cached download, or download over a pooled connection, and keep its checksums
+            self._sourceDigests[downloadPath] = self._sourceCache.fetchFile(
+                downloadURL, downloadPath, CHECKSUM_ALGORITHMS
+            )
+
+            # Return
+            return downloadPath
 
         # Git download
         elif urlType == "git+http":
             # Git clone
-            call(["git", "clone", downloadURL])
+            call(["git", "clone", downloadURL, downloadPath])
+
+            # Return
+            return downloadPath
 
         # Invalid params
         else:
@@ -306,25 +325,32 @@ class PrepareBuildFunctions:
 
     def _generateSHA256Checksums(self, format: str, *files: str) -> str:
         """
-        Generates SHA256 checksums based on the given files.
+        Generates SHA256 checksums based on the given files. Downloaded sources
+        reuse the checksum computed while downloading, other files are hashed
+        concurrently.
 
         @param { str } format - Format string
         @param { str } files - Filepaths to the given file(s)
         @return str - The new generated checksums
         """
-        # Import Statements
-        import hashlib
-
         # Template
         templateEntry: str = f"sha256sums=( {format} )"
 
-        # Iterate through each file and generate the checksum
+        # Use the checksums of the downloads
+        fileChecksums: Final[dict[str, str]] = {
+            file: self._sourceDigests[file]["sha256"]
+            for file in files
+            if "sha256" in self._sourceDigests.get(file, {})
+        }
+
+        # Hash the other files
+        unhashedFiles: Final[list[str]] = list(dict.fromkeys(file for file in files if file not in fileChecksums))
+        for file, fileDigests in zip(unhashedFiles, checksum.hashFiles(unhashedFiles, ("sha256",))):
+            fileChecksums[file] = fileDigests["sha256"]
+
+        # Fill in the checksums in the order of the files
         for file in files:
-            with open(file, "rb") as file:
-                templateEntry = templateEntry.replace(
-                    "{X}", hashlib.sha256(file.read()).hexdigest(), 1
-                )
-                file.close()
+            templateEntry = templateEntry.replace("{X}", fileChecksums[file], 1)
 
         # Return new checksums
         return templateEntry
@@ -371,12 +397,14 @@ class PrepareBuild:
     # Public Variables
 
     # Private Variables
+    _workspace: context.Workspace
 
     # Constants
 
     # Constructor
-    def __init__(self) -> None:
-        pass
+    def __init__(self, workspace: context.Workspace = None) -> None:
+        # Set the workspace packages are prepared in
+        self._workspace = workspace or context.Workspace()
 
     # Public Methods
     def preparePackage(self, package: db.PackageInfo) -> None:
@@ -396,7 +424,7 @@ class PrepareBuild:
 
         # Get prepare function
         prepareBuildFunction = getattr(
-            PrepareBuildFunctions(),
+            PrepareBuildFunctions(self._workspace),
             package.getPackageBuildInfo().getPackagePrepareFunctionName(),
         )
 
@@ -413,6 +441,29 @@ class PrepareBuild:
         """
         return hasattr(PrepareBuildFunctions, functionName)
 
+# Enums
+
+# Interfaces
+
+# Constants
+# Checksums computed while downloading sources, as a comma separated list of makepkg algorithm names
+CHECKSUM_ALGORITHMS: Final[tuple[str, ...]] = tuple(
+    os.environ.get("ALARM_CHECKSUM_ALGORITHMS", "sha256").split(",")
+)
+# Architecture trees of the kernel `make ARCH=arm64 defconfig` never reads, skipped while extracting
+KERNEL_EXCLUDED_ARCHITECTURES: Final[tuple[str, ...]] = (
+    "alpha", "arc", "arm", "csky", "hexagon", "ia64", "loongarch", "m68k", "microblaze", "mips",
+    "nios2", "openrisc", "parisc", "powerpc", "riscv", "s390", "sh", "sparc", "um", "x86", "xtensa",
+)
+
+# Public Variables
+
+# Private Variables
+
+# Public Methods
+
+# Private Methods
+
 # Run
 if __name__ == "__main__":
     pass
@@ -0,0 +1,2714 @@
+# Import Statements
+# First party
+import gc
+import os
+import re
+import sys
+import json
+import mmap
+import fcntl
+import hashlib
+import marshal
+import shutil
+import struct
+import sqlite3
+import tempfile
+from typing import Final, Iterator
+from contextlib import contextmanager
+
+# Second party
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || storage.py
+# ---------------------------------------
+# Storage engines backing the package database. Every
+# engine stores the same records as db.json, the Database
+# class only talks to them through StorageBackend.
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Class Definitions
+class ConcurrentModificationException(Exception):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+    requestedPackage: str
+
+    # Private Variables
+
+    # Constants
+
+    # Constructor
+    def __init__(self, message: str, package: str) -> None:
+        # Class base class constructor
+        super().__init__(message)
+
+        # Set the package which was modified concurrently
+        self.requestedPackage = package
+
+    # Public Methods
+
+    # Private Methods
+
+class StorageBackend:
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+
+    # Constants
+
+    # Constructor
+    def __init__(self) -> None:
+        return
+
+    # Public Methods
+    def getPackageNames(self) -> list[str]:
+        """
+        Returns the names of all stored packages in database order.
+
+        @return list[str] - The package names
+        """
+        raise NotImplementedError
+
+    def hasPackage(self, packageName: str) -> bool:
+        """
+        Checks if a package is stored.
+
+        @param { str } packageName - The name of the package
+        @return bool - Is the package stored
+        """
+        raise NotImplementedError
+
+    def readPackage(self, packageName: str) -> dict:
+        """
+        Returns the raw `package_info` entry of a stored package.
+
+        @param { str } packageName - The name of the package
+        @return dict - The raw package information
+        """
+        raise NotImplementedError
+
+    def addPackage(self, packageName: str, rawPackageInfo: dict) -> None:
+        """
+        Stores a new package at the end of the package list.
+
+        @param { str } packageName - The name of the package
+        @param { dict } rawPackageInfo - The raw package information
+        @return None
+        """
+        raise NotImplementedError
+
+    def modifyPackage(self, packageName: str, keyPath: str, newValue: any, expectedGeneration: int = None) -> None:
+        """
+        Sets a single value of a stored package and moves it to a new generation.
+        If an expected generation is given the value is only set while the
+        package is still at that generation, here and again at commit time.
+
+        @param { str } packageName - The name of the package
+        @param { str } keyPath - The key to modify, e.g. `buildInfo/markedForBuild`
+        @param { any } newValue - The new value of the key
+        @param { int } expectedGeneration - The generation the change was based on (Optional)
+        @return None
+        """
+        raise NotImplementedError
+
+    def deletePackage(self, packageName: str) -> None:
+        """
+        Removes a stored package and moves the database to a new generation.
+
+        @param { str } packageName - The name of the package
+        @return None
+        """
+        raise NotImplementedError
+
+    def findPackageNames(self, keyPath: str, value: any) -> list[str]:
+        """
+        Returns the names of the packages whose value at the key path equals
+        the given value. Only key paths listed in INDEXED_KEY_PATHS are supported.
+
+        @param { str } keyPath - The key to look up, e.g. `buildInfo/markedForBuild`
+        @param { any } value - The value to look for
+        @return list[str] - The matching package names
+        """
+        raise NotImplementedError
+
+    def getGeneration(self) -> int:
+        """
+        Returns the generation of the database. Every mutation moves it on,
+        including deletions and metadata writes, and added or modified
+        packages are stamped with the generation they moved it to.
+
+        @return int - The generation of the database
+        """
+        raise NotImplementedError
+
+    def findChangedPackageNames(self, generation: int) -> list[str]:
+        """
+        Returns the names of the packages added or modified after a
+        database generation, least recently changed first.
+
+        @param { int } generation - The database generation to compare against
+        @return list[str] - The changed package names
+        """
+        raise NotImplementedError
+
+    def readMetadata(self, key: str) -> any:
+        """
+        Returns a top level value of the database other than the packages.
+
+        @param { str } key - The top level key
+        @return any - The stored value, None if missing
+        """
+        raise NotImplementedError
+
+    def writeMetadata(self, key: str, value: any) -> None:
+        """
+        Sets a top level value of the database other than the packages and
+        moves the database to a new generation.
+
+        @param { str } key - The top level key, not `packages`, `package_info` or `sequence`
+        @param { any } value - The JSON serializable value
+        @return None
+        """
+        raise NotImplementedError
+
+    def commit(self) -> bool:
+        """
+        Makes every mutation since the last commit durable, merging in
+        the ones other processes committed in the meantime.
+
+        @return bool - Were mutations of other processes loaded
+        """
+        raise NotImplementedError
+
+    def rollback(self) -> None:
+        """
+        Discards every mutation since the last commit.
+
+        @return None
+        """
+        raise NotImplementedError
+
+    def compact(self) -> bool:
+        """
+        Folds every committed mutation into the database snapshot. The
+        snapshot is left untouched if there is nothing to fold in.
+
+        @return bool - Were mutations of other processes loaded
+        """
+        return False
+
+    def close(self) -> None:
+        """
+        Releases the resources held by the engine.
+
+        @return None
+        """
+        return
+
+    def exportDatabase(self) -> dict:
+        """
+        Returns the whole database in the db.json layout.
+
+        @return dict - The raw database
+        """
+        raise NotImplementedError
+
+    def importDatabase(self, rawDatabase: dict) -> None:
+        """
+        Replaces the whole database with one in the db.json layout.
+
+        @param { dict } rawDatabase - The raw database
+        @return None
+        """
+        raise NotImplementedError
+
+    # Private Methods
+
+class PackageIndex:
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+    _packageNamesByValue: dict[str, dict[any, dict[str, None]]]
+    _indexedValues: dict[str, dict[str, any]]
+
+    # Constants
+
+    # Constructor
+    def __init__(self) -> None:
+        # One ordered set of package names per key path and value
+        self._packageNamesByValue = {keyPath: {} for keyPath in INDEXED_KEY_PATHS}
+        self._indexedValues = {}
+
+    # Public Methods
+    def find(self, keyPath: str, value: any) -> list[str]:
+        """
+        Returns the names of the packages holding the value at the key path.
+
+        @param { str } keyPath - One of INDEXED_KEY_PATHS
+        @param { any } value - The value to look for
+        @return list[str] - The matching package names
+        """
+        return list(self._packageNamesByValue[keyPath].get(value, ()))
+
+    def addPackage(self, packageName: str, rawPackageInfo: dict) -> None:
+        """
+        Indexes a package.
+
+        @param { str } packageName - The name of the package
+        @param { dict } rawPackageInfo - The raw package information
+        @return None
+        """
+        # Remember the indexed values to unindex them later
+        indexedValues: dict[str, any] = {}
+        self._indexedValues[packageName] = indexedValues
+
+        # Iterate through each indexed key path
+        for keyPath in INDEXED_KEY_PATHS:
+            # Get the value, skipping ones which cannot be indexed
+            value: any = getKeyPathValue(rawPackageInfo, keyPath)
+            if value is None or isinstance(value, (dict, list)):
+                continue
+
+            # Index the value
+            indexedValues[keyPath] = value
+            self._packageNamesByValue[keyPath].setdefault(value, {})[packageName] = None
+
+    def removePackage(self, packageName: str) -> None:
+        """
+        Unindexes a package.
+
+        @param { str } packageName - The name of the package
+        @return None
+        """
+        # Iterate through each indexed value of the package
+        for keyPath, value in self._indexedValues.pop(packageName, {}).items():
+            # Unindex the value
+            packageNames: dict[str, None] = self._packageNamesByValue[keyPath][value]
+            packageNames.pop(packageName, None)
+
+            # Drop empty entries
+            if len(packageNames) == 0:
+                self._packageNamesByValue[keyPath].pop(value)
+
+    def updatePackage(self, packageName: str, rawPackageInfo: dict) -> None:
+        """
+        Reindexes a modified package.
+
+        @param { str } packageName - The name of the package
+        @param { dict } rawPackageInfo - The raw package information
+        @return None
+        """
+        self.removePackage(packageName)
+        self.addPackage(packageName, rawPackageInfo)
+
+    # Private Methods
+
+class GenerationIndex:
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+    _packageGenerations: dict[str, int]
+
+    # Constants
+
+    # Constructor
+    def __init__(self, packageGenerations: dict[str, int]) -> None:
+        # Keep the packages ordered by generation, newest change last
+        self._packageGenerations = dict(
+            sorted(packageGenerations.items(), key=lambda item: item[1])
+        )
+
+    # Public Methods
+    def find(self, generation: int) -> list[str]:
+        """
+        Returns the names of the packages changed after a generation.
+        Only the changed packages are visited.
+
+        @param { int } generation - The generation to compare against
+        @return list[str] - The changed package names, least recently changed first
+        """
+        # Output list
+        changedPackageNames: list[str] = []
+
+        # Walk back from the newest change
+        for packageName, packageGeneration in reversed(self._packageGenerations.items()):
+            if packageGeneration <= generation:
+                break
+            changedPackageNames.append(packageName)
+
+        # Return oldest change first
+        changedPackageNames.reverse()
+        return changedPackageNames
+
+    def updatePackage(self, packageName: str, generation: int) -> None:
+        """
+        Moves a changed package to the end. Generations only grow, so the
+        order holds without sorting again.
+
+        @param { str } packageName - The name of the package
+        @param { int } generation - The generation the package changed at
+        @return None
+        """
+        self._packageGenerations.pop(packageName, None)
+        self._packageGenerations[packageName] = generation
+
+    def removePackage(self, packageName: str) -> None:
+        """
+        Unindexes a package.
+
+        @param { str } packageName - The name of the package
+        @return None
+        """
+        self._packageGenerations.pop(packageName, None)
+
+    # Private Methods
+
+class DatabaseJournal:
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+    _journalFilePath: str
+    _archiveDirectory: str
+    _validLength: int
+
+    # Constants
+    # Directory next to the database the archived journals are kept in, committed along with it
+    ARCHIVE_DIRECTORY_NAME: Final[str] = "journal"
+
+    # Constructor
+    def __init__(self, journalFilePath: str) -> None:
+        # Set the journal file path and where it is archived
+        self._journalFilePath = journalFilePath
+        self._archiveDirectory = f"{os.path.dirname(os.path.abspath(journalFilePath))}/{self.ARCHIVE_DIRECTORY_NAME}"
+        self._validLength = 0
+
+    # Public Methods
+    def read(self) -> list[dict]:
+        """
+        Returns every complete entry of the journal in order. A torn
+        entry left behind by a crash ends the journal and is overwritten
+        by the next append.
+
+        @return list[dict] - The journal entries
+        """
+        try:
+            # Read the whole journal
+            with open(self._journalFilePath, "rb") as journalFile:
+                rawJournal: bytes = journalFile.read()
+        except FileNotFoundError:
+            # No journal yet
+            self._validLength = 0
+            return []
+
+        # Output entries
+        entries: list[dict] = []
+        position: int = 0
+
+        # Iterate through each newline terminated entry
+        while True:
+            # Find the end of the entry
+            entryEnd: int = rawJournal.find(b"\n", position)
+            if entryEnd == -1:
+                break
+
+            # Stop at the first damaged entry
+            try:
+                entries.append(json.loads(rawJournal[position:entryEnd]))
+            except ValueError:
+                break
+
+            # Move to the next entry
+            position = entryEnd + 1
+
+        # Remember where the valid entries end
+        self._validLength = position
+
+        # Return
+        return entries
+
+    def append(self, entries: list[dict]) -> None:
+        """
+        Durably appends entries to the journal.
+
+        @param { list[dict] } entries - The entries to append
+        @return None
+        """
+        # Open the journal in "append-binary" mode
+        with open(self._journalFilePath, "ab") as journalFile:
+            # Drop a torn entry left behind by a crash
+            if journalFile.tell() != self._validLength:
+                journalFile.truncate(self._validLength)
+
+            # Write the entries, one per line
+            journalFile.write(
+                b"".join(json.dumps(entry).encode("utf-8") + b"\n" for entry in entries)
+            )
+            journalFile.flush()
+            os.fsync(journalFile.fileno())
+
+            # Remember where the valid entries end
+            self._validLength = journalFile.tell()
+
+    def isCurrent(self) -> bool:
+        """
+        Checks that nobody else appended to the journal since it was last read or written.
+
+        @return bool - Is the journal unchanged on disk
+        """
+        try:
+            # Compare the size on disk with the entries seen
+            return os.stat(self._journalFilePath).st_size == self._validLength
+        except FileNotFoundError:
+            # No journal on disk
+            return self._validLength == 0
+
+    def getSize(self) -> int:
+        """
+        Returns the size of the valid part of the journal.
+
+        @return int - The size in bytes
+        """
+        return self._validLength
+
+    def archive(self) -> None:
+        """
+        Moves the journal aside once its entries are folded into the snapshot.
+        It is kept for auditing in the archive directory, named after the
+        first and last sequence it holds, e.g. `db.json.journal.41-57`. Only
+        the most recent archives are kept, see JOURNAL_ARCHIVE_COUNT.
+
+        @return None
+        """
+        # Get the entries of the journal
+        entries: Final[list[dict]] = self.read()
+
+        # Keep a journal with entries for auditing, drop an empty one
+        if len(entries) > 0:
+            os.makedirs(self._archiveDirectory, exist_ok=True)
+            os.replace(
+                self._journalFilePath,
+                f"{self._archiveDirectory}/{os.path.basename(self._journalFilePath)}.{entries[0]['sequence']}-{entries[-1]['sequence']}",
+            )
+            self._pruneArchives()
+        elif os.path.exists(self._journalFilePath):
+            os.remove(self._journalFilePath)
+
+        # Start an empty journal
+        self._validLength = 0
+
+    def getArchiveFilePaths(self) -> list[str]:
+        """
+        Returns the archived journals, oldest first.
+
+        @return list[str] - The paths to the archived journals
+        """
+        # Match the archives of this journal, `<journal name>.<first sequence>-<last sequence>`
+        archivePattern: Final[re.Pattern] = re.compile(
+            rf"{re.escape(os.path.basename(self._journalFilePath))}\.(\d+)-(\d+)"
+        )
+
+        try:
+            # List the archive directory
+            fileNames: Final[list[str]] = os.listdir(self._archiveDirectory)
+        except FileNotFoundError:
+            # Nothing archived yet
+            return []
+
+        # Order the archives by their last sequence
+        archives: Final[list[tuple[int, str]]] = sorted(
+            (int(match.group(2)), fileName)
+            for fileName in fileNames
+            if (match := archivePattern.fullmatch(fileName)) is not None
+        )
+
+        # Return
+        return [f"{self._archiveDirectory}/{fileName}" for _, fileName in archives]
+
+    # Private Methods
+    def _pruneArchives(self) -> None:
+        """
+        Removes the archived journals beyond the most recent ones.
+
+        @return None
+        """
+        archiveFilePaths: Final[list[str]] = self.getArchiveFilePaths()
+        for archiveFilePath in archiveFilePaths[: max(len(archiveFilePaths) - JOURNAL_ARCHIVE_COUNT, 0)]:
+            os.remove(archiveFilePath)
+
+class SnapshotCache:
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+    _cacheFilePath: str
+
+    # Constants
+    CACHE_FILE_SUFFIX: Final[str] = ".cache"
+    CACHE_MAGIC: Final[bytes] = b"ALARMSNP"
+    CACHE_FORMAT_VERSION: Final[int] = 1
+    # magic, version, marshal version, database size, database mtime, database sha256
+    CACHE_HEADER: Final[struct.Struct] = struct.Struct("<8sIIQQ32s")
+
+    # Constructor
+    def __init__(self, databaseFilePath: str) -> None:
+        # Set the cache file path
+        self._cacheFilePath = f"{databaseFilePath}{self.CACHE_FILE_SUFFIX}"
+
+    # Public Methods
+    def read(self, databaseFile: any) -> dict:
+        """
+        Returns the cached copy of an open database file, if the cache was
+        written for a file of the same size, mtime and content.
+
+        @param { file } databaseFile - The database file, opened in "read-binary" mode
+        @return dict - The raw database, None if the cache is missing or stale
+        """
+        try:
+            # Read the whole cache
+            with open(self._cacheFilePath, "rb") as cacheFile:
+                rawCache: bytes = cacheFile.read()
+
+            # Read the header
+            magic, version, marshalVersion, size, mtime, digest = self.CACHE_HEADER.unpack_from(
+                rawCache, 0
+            )
+        except (OSError, struct.error):
+            return None
+
+        # Get the database file status
+        databaseStatus: Final[os.stat_result] = os.fstat(databaseFile.fileno())
+
+        # Check the cache belongs to this database file, cheapest checks first
+        if (
+            magic != self.CACHE_MAGIC
+            or version != self.CACHE_FORMAT_VERSION
+            or marshalVersion != marshal.version
+            or size != databaseStatus.st_size
+            or mtime != databaseStatus.st_mtime_ns
+            or hashlib.file_digest(databaseFile, "sha256").digest() != digest
+        ):
+            databaseFile.seek(0)
+            return None
+
+        try:
+            # Decode the cached database
+            with _pausedGarbageCollection():
+                return marshal.loads(memoryview(rawCache)[self.CACHE_HEADER.size :])
+        except (EOFError, ValueError, TypeError):
+            databaseFile.seek(0)
+            return None
+
+    def write(self, databaseFile: str | int, rawContent: bytes, rawDatabase: dict) -> None:
+        """
+        Caches the decoded content of a database file.
+
+        @param { str | int } databaseFile - The path or descriptor of the database file
+        @param { bytes } rawContent - The content of the database file
+        @param { dict } rawDatabase - The decoded content
+        @return None
+        """
+        # Get the database file status
+        databaseStatus: Final[os.stat_result] = os.stat(databaseFile)
+
+        try:
+            # Write the header followed by the marshalled database
+            writeFileAtomically(
+                self._cacheFilePath,
+                self.CACHE_HEADER.pack(
+                    self.CACHE_MAGIC,
+                    self.CACHE_FORMAT_VERSION,
+                    marshal.version,
+                    databaseStatus.st_size,
+                    databaseStatus.st_mtime_ns,
+                    hashlib.sha256(rawContent).digest(),
+                )
+                + marshal.dumps(rawDatabase),
+            )
+        except OSError:
+            # The cache is optional, a read-only checkout still works
+            return
+
+    # Private Methods
+
+class DatabaseLock:
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+    _lockFilePath: str
+    _lockFile: any
+    _lockMode: int
+    _lockDepth: int
+
+    # Constants
+    LOCK_FILE_SUFFIX: Final[str] = ".lock"
+
+    # Constructor
+    def __init__(self, databaseFilePath: str) -> None:
+        # Set the lock file path
+        self._lockFilePath = f"{databaseFilePath}{self.LOCK_FILE_SUFFIX}"
+        self._lockFile = None
+        self._lockMode = None
+        self._lockDepth = 0
+
+    # Public Methods
+    @contextmanager
+    def shared(self) -> Iterator[None]:
+        """
+        Holds a shared lock, readers exclude writers but not each other.
+        Inside an exclusive lock this is a no-op.
+
+        @return None
+        """
+        # Lock
+        self._acquire(fcntl.LOCK_SH)
+
+        try:
+            # Run the locked body
+            yield
+        finally:
+            # Unlock
+            self._release()
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        """
+        Holds an exclusive lock, writers exclude everyone else.
+
+        @return None
+        """
+        # Lock
+        self._acquire(fcntl.LOCK_EX)
+
+        try:
+            # Run the locked body
+            yield
+        finally:
+            # Unlock
+            self._release()
+
+    def remove(self, wait: bool = True) -> bool:
+        """
+        Deletes the lock file, holding the lock exclusively while doing so.
+        Processes waiting for it notice and lock the file created after it.
+
+        @param { bool } wait - Wait for the lock, otherwise leave a held lock alone (Optional)
+        @return bool - Whether the lock file was deleted
+        """
+        # Take the lock, unless it is already held exclusively
+        isHeld: Final[bool] = self._lockDepth > 0 and self._lockMode == fcntl.LOCK_EX
+        if not isHeld:
+            try:
+                self._acquire(fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Someone else holds it
+                return False
+
+        try:
+            # A read-only checkout has no lock file
+            if self._lockFile is None:
+                return False
+
+            # Delete the lock file
+            os.remove(self._lockFilePath)
+            return True
+        finally:
+            # Unlock
+            if not isHeld:
+                self._release()
+
+    def close(self) -> None:
+        """
+        Closes the lock file.
+
+        @return None
+        """
+        # Close the lock file, which drops the lock with it
+        if self._lockFile is not None:
+            self._lockFile.close()
+            self._lockFile = None
+            self._lockMode = None
+            self._lockDepth = 0
+
+    # Private Methods
+    def _acquire(self, lockMode: int) -> None:
+        """
+        Takes the lock, or nests into the one already held.
+
+        @param { int } lockMode - fcntl.LOCK_SH or fcntl.LOCK_EX
+        @return None
+        """
+        # Nest into the lock already held
+        if self._lockDepth > 0:
+            # A shared lock cannot be upgraded without letting a writer in between
+            if lockMode == fcntl.LOCK_EX and self._lockMode == fcntl.LOCK_SH:
+                raise RuntimeError("Cannot upgrade a shared database lock")
+            self._lockDepth += 1
+            return
+
+        while True:
+            # Open the lock file
+            if self._lockFile is None:
+                try:
+                    self._lockFile = open(self._lockFilePath, "a+b")
+                except OSError:
+                    # A read-only checkout has no writers to wait for
+                    self._lockDepth += 1
+                    return
+
+            # Wait for the lock
+            fcntl.flock(self._lockFile.fileno(), lockMode)
+
+            # Lock file is still in place
+            fileIdentity: list[int] = getFileIdentity(self._lockFilePath)
+            if fileIdentity is not None and fileIdentity[:2] == getFileIdentity(self._lockFile.fileno())[:2]:
+                break
+
+            # Its holder deleted it meanwhile, lock the file which replaced it
+            self._lockFile.close()
+            self._lockFile = None
+
+        # Hold the lock
+        self._lockMode = lockMode & ~fcntl.LOCK_NB
+        self._lockDepth += 1
+
+    def _release(self) -> None:
+        """
+        Drops the lock once the outermost holder is done.
+
+        @return None
+        """
+        # Leave the nested lock
+        self._lockDepth -= 1
+
+        # Unlock the file
+        if self._lockDepth == 0 and self._lockFile is not None:
+            fcntl.flock(self._lockFile.fileno(), fcntl.LOCK_UN)
+            self._lockMode = None
+
+class JSONStorageBackend(StorageBackend):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+    _databaseFilePath: str
+    _storedJSONDatabase: dict
+    _packageNameSet: set[str]
+    _packageIndex: PackageIndex
+    _generationIndex: GenerationIndex
+    _journal: DatabaseJournal
+    _pendingJournalEntries: list[dict]
+    _sequence: int
+    _needsCompaction: bool
+    _lock: DatabaseLock
+    _snapshotIdentity: list[int]
+    _snapshotCache: SnapshotCache
+
+    # Constants
+
+    # Constructor
+    def __init__(self, databaseFilePath: str) -> None:
+        # Set the database file path
+        self._databaseFilePath = databaseFilePath
+        self._journal = DatabaseJournal(f"{databaseFilePath}{JOURNAL_FILE_SUFFIX}")
+        self._lock = DatabaseLock(databaseFilePath)
+        self._snapshotCache = SnapshotCache(databaseFilePath)
+
+        # Load the database into memory
+        with self._lock.shared():
+            self._loadDatabase()
+
+    # Public Methods
+    def getPackageNames(self) -> list[str]:
+        return list(self._storedJSONDatabase["packages"])
+
+    def hasPackage(self, packageName: str) -> bool:
+        return packageName in self._packageNameSet
+
+    def readPackage(self, packageName: str) -> dict:
+        return self._storedJSONDatabase["package_info"][packageName]
+
+    def addPackage(self, packageName: str, rawPackageInfo: dict) -> None:
+        self._recordJournalEntry(
+            {"op": "add", "package": packageName, "value": rawPackageInfo}
+        )
+
+    def modifyPackage(self, packageName: str, keyPath: str, newValue: any, expectedGeneration: int = None) -> None:
+        self._recordJournalEntry(
+            _createModifyJournalEntry(packageName, keyPath, newValue, expectedGeneration)
+        )
+
+    def deletePackage(self, packageName: str) -> None:
+        self._recordJournalEntry({"op": "delete", "package": packageName})
+
+    def findPackageNames(self, keyPath: str, value: any) -> list[str]:
+        # Build the index on the first query
+        if self._packageIndex is None:
+            self._packageIndex = PackageIndex()
+            for packageName in self._storedJSONDatabase["packages"]:
+                self._packageIndex.addPackage(
+                    packageName, self._storedJSONDatabase["package_info"][packageName]
+                )
+
+        # Return
+        return self._packageIndex.find(keyPath, value)
+
+    def getGeneration(self) -> int:
+        return self._sequence + len(self._pendingJournalEntries)
+
+    def findChangedPackageNames(self, generation: int) -> list[str]:
+        # Build the index on the first query
+        if self._generationIndex is None:
+            self._generationIndex = GenerationIndex(
+                {
+                    packageName: getPackageGeneration(
+                        self._storedJSONDatabase["package_info"][packageName]
+                    )
+                    for packageName in self._storedJSONDatabase["packages"]
+                }
+            )
+
+        # Return
+        return self._generationIndex.find(generation)
+
+    def readMetadata(self, key: str) -> any:
+        return self._storedJSONDatabase.get(key)
+
+    def writeMetadata(self, key: str, value: any) -> None:
+        self._recordJournalEntry({"op": "metadata", "key": key, "value": value})
+
+    def commit(self) -> bool:
+        # Nothing to write
+        if len(self._pendingJournalEntries) == 0 and not self._needsCompaction:
+            return False
+
+        # Writers take turns
+        with self._lock.exclusive():
+            # Merge in what other processes committed meanwhile
+            synchronized: bool = self._synchronize()
+
+            # Number the entries after the ones already on disk
+            for entry in self._pendingJournalEntries:
+                self._sequence += 1
+                entry["sequence"] = self._sequence
+
+            # Append the entries to the journal
+            if not self._needsCompaction:
+                self._journal.append(self._pendingJournalEntries)
+            self._pendingJournalEntries = []
+
+            # Fold the journal into the snapshot once it grows too large
+            if self._needsCompaction or self._journal.getSize() >= JOURNAL_COMPACTION_THRESHOLD:
+                self.compact()
+
+        # Return
+        return synchronized
+
+    def rollback(self) -> None:
+        # Nothing to discard or refresh
+        if len(self._pendingJournalEntries) == 0 and not self._needsCompaction and self._isCurrent():
+            return
+
+        # Reload the database from disk
+        with self._lock.shared():
+            self._loadDatabase()
+
+    def compact(self) -> bool:
+        # Writers take turns
+        with self._lock.exclusive():
+            # Merge in what other processes committed meanwhile
+            synchronized: bool = self._synchronize()
+
+            # Nothing to fold in, leave the snapshot untouched
+            if not self._needsCompaction and len(self._pendingJournalEntries) == 0 and self._journal.getSize() == 0:
+                return synchronized
+
+            # Tag the snapshot with the last entry it contains, a database never journaled has none
+            if self._sequence != 0 or "sequence" in self._storedJSONDatabase:
+                self._storedJSONDatabase["sequence"] = self._sequence
+
+            # Write the snapshot
+            rawContent: Final[bytes] = json.dumps(self._storedJSONDatabase).encode("utf-8")
+            writeFileAtomically(self._databaseFilePath, rawContent)
+            self._snapshotIdentity = getFileIdentity(self._databaseFilePath)
+
+            # Cache the new snapshot
+            self._snapshotCache.write(self._databaseFilePath, rawContent, self._storedJSONDatabase)
+
+            # The journal entries are now part of the snapshot
+            self._journal.archive()
+            self._needsCompaction = False
+
+        # Return
+        return synchronized
+
+    def close(self) -> None:
+        self._lock.close()
+
+    def exportDatabase(self) -> dict:
+        return self._storedJSONDatabase
+
+    def importDatabase(self, rawDatabase: dict) -> None:
+        # Replace the in-memory database
+        self._storedJSONDatabase = rawDatabase
+        self._indexDatabase()
+
+        # Continue from the imported database's last entry
+        self._sequence = rawDatabase.get("sequence", 0)
+
+        # Only a new snapshot can hold the imported database
+        self._pendingJournalEntries = []
+        self._needsCompaction = True
+
+    # Private Methods
+    def _loadDatabase(self) -> None:
+        """
+        Loads the database snapshot into memory and replays the journal on top.
+
+        @return None
+        """
+        # Open the database in "read-binary" mode
+        with open(self._databaseFilePath, "rb") as databaseFile:
+            # Remember which snapshot was loaded
+            self._snapshotIdentity = getFileIdentity(databaseFile.fileno())
+
+            # Load the database from its binary cache, skipping the JSON decoding
+            self._storedJSONDatabase = self._snapshotCache.read(databaseFile)
+
+            # Decode the database and cache it for the next load
+            if self._storedJSONDatabase is None:
+                rawContent: Final[bytes] = databaseFile.read()
+                with _pausedGarbageCollection():
+                    self._storedJSONDatabase = json.loads(rawContent)
+                self._snapshotCache.write(
+                    databaseFile.fileno(), rawContent, self._storedJSONDatabase
+                )
+
+        # Index the loaded database
+        self._indexDatabase()
+
+        # Replay the journal entries newer than the snapshot
+        self._sequence = self._storedJSONDatabase.get("sequence", 0)
+        for entry in self._journal.read():
+            if entry["sequence"] > self._sequence:
+                self._applyJournalEntry(entry, entry["sequence"])
+                self._sequence = entry["sequence"]
+
+        # Nothing is pending
+        self._pendingJournalEntries = []
+        self._needsCompaction = False
+
+    def _isCurrent(self) -> bool:
+        """
+        Checks that no other process committed since the database was loaded.
+
+        @return bool - Is the database unchanged on disk
+        """
+        return (
+            getFileIdentity(self._databaseFilePath) == self._snapshotIdentity
+            and self._journal.isCurrent()
+        )
+
+    def _synchronize(self) -> bool:
+        """
+        Reloads the database if another process committed to it since it
+        was loaded and replays the pending mutations on top. Needs the
+        exclusive lock.
+
+        @return bool - Was the database reloaded
+        """
+        # An imported database replaces whatever is on disk, and an unchanged one needs no reload
+        if self._needsCompaction or self._isCurrent():
+            return False
+
+        # Reload the database
+        pendingJournalEntries: Final[list[dict]] = self._pendingJournalEntries
+        self._loadDatabase()
+
+        # Replay the pending mutations, checking them against the new state
+        for entry in pendingJournalEntries:
+            self._recordJournalEntry(entry)
+
+        # Return
+        return True
+
+    def _recordJournalEntry(self, entry: dict) -> None:
+        """
+        Applies a mutation in memory and queues it for the journal, at
+        the generation it will be numbered with when committed.
+
+        @param { dict } entry - The journal entry
+        @return None
+        """
+        _checkJournalEntry(self, entry)
+        self._applyJournalEntry(entry, self._sequence + len(self._pendingJournalEntries) + 1)
+        self._pendingJournalEntries.append(entry)
+
+    def _applyJournalEntry(self, entry: dict, generation: int) -> None:
+        """
+        Applies a journal entry to the in-memory database.
+
+        @param { dict } entry - The journal entry
+        @param { int } generation - The sequence number of the entry
+        @return None
+        """
+        # Set a top level value
+        if entry["op"] == "metadata":
+            self._storedJSONDatabase[entry["key"]] = entry["value"]
+            return
+
+        # Get the package name
+        packageName: Final[str] = entry["package"]
+
+        # Add package
+        if entry["op"] == "add":
+            # Add new entry to packages array
+            self._storedJSONDatabase["packages"].append(packageName)
+            self._packageNameSet.add(packageName)
+
+            # Populate package_info dict
+            entry["value"][GENERATION_KEY_PATH] = generation
+            self._storedJSONDatabase["package_info"][packageName] = entry["value"]
+            if self._packageIndex is not None:
+                self._packageIndex.addPackage(packageName, entry["value"])
+            if self._generationIndex is not None:
+                self._generationIndex.updatePackage(packageName, generation)
+
+        # Modify package
+        elif entry["op"] == "modify":
+            # Get the package info
+            rawPackageInfo: dict = self._storedJSONDatabase["package_info"][packageName]
+
+            # Set the value in place and stamp the entry's generation
+            setKeyPathValue(rawPackageInfo, entry["keyPath"], entry["value"])
+            rawPackageInfo[GENERATION_KEY_PATH] = generation
+            if self._packageIndex is not None:
+                self._packageIndex.updatePackage(packageName, rawPackageInfo)
+            if self._generationIndex is not None:
+                self._generationIndex.updatePackage(packageName, generation)
+
+        # Delete package
+        elif entry["op"] == "delete":
+            # Remove from package array
+            self._storedJSONDatabase["packages"].remove(packageName)
+            self._packageNameSet.discard(packageName)
+
+            # Remove from package_info dict
+            self._storedJSONDatabase["package_info"].pop(packageName)
+            if self._packageIndex is not None:
+                self._packageIndex.removePackage(packageName)
+            if self._generationIndex is not None:
+                self._generationIndex.removePackage(packageName)
+
+    def _indexDatabase(self) -> None:
+        """
+        Indexes the package names. The values of INDEXED_KEY_PATHS
+        are indexed on the first query.
+
+        @return None
+        """
+        # Index the package names for membership tests
+        self._packageNameSet = set(self._storedJSONDatabase["packages"])
+
+        # Index the package values and generations on the first query
+        self._packageIndex = None
+        self._generationIndex = None
+
+class LazyJSONStorageBackend(StorageBackend):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+    _databaseFilePath: str
+    _indexFilePath: str
+    _databaseFile: any
+    _databaseMap: mmap.mmap
+    _indexFile: any
+    _indexMap: mmap.mmap
+    _indexEntryCount: int
+    _indexTableOffset: int
+    _packageNames: list[str]
+    _packageNameSet: set[str]
+    _topLevelSpans: dict[str, tuple[int, int]]
+    _topLevelValues: dict[str, any]
+    _packageSpans: dict[str, tuple[int, int]]
+    _parsedPackages: dict[str, dict]
+    _packageIndex: PackageIndex
+    _generationIndex: GenerationIndex
+    _journal: DatabaseJournal
+    _pendingJournalEntries: list[dict]
+    _sequence: int
+    _needsCompaction: bool
+    _lock: DatabaseLock
+    _snapshotIdentity: list[int]
+
+    # Constants
+    INDEX_FILE_SUFFIX: Final[str] = ".idx"
+    INDEX_MAGIC: Final[bytes] = b"ALARMIDX"
+    INDEX_FORMAT_VERSION: Final[int] = 1
+    # magic, version, database size, database mtime, entry count, top level spans length
+    INDEX_HEADER: Final[struct.Struct] = struct.Struct("<8sIQQQI")
+    # name offset, name length, value start, value end, listed in the packages array
+    INDEX_ENTRY: Final[struct.Struct] = struct.Struct("<QIQQB")
+
+    # Constructor
+    def __init__(self, databaseFilePath: str) -> None:
+        # Set the database file paths
+        self._databaseFilePath = databaseFilePath
+        self._indexFilePath = f"{databaseFilePath}{self.INDEX_FILE_SUFFIX}"
+        self._databaseFile = None
+        self._databaseMap = None
+        self._indexFile = None
+        self._indexMap = None
+        self._journal = DatabaseJournal(f"{databaseFilePath}{JOURNAL_FILE_SUFFIX}")
+        self._lock = DatabaseLock(databaseFilePath)
+
+        # Map and index the database
+        with self._lock.shared():
+            self._openDatabase()
+
+    # Public Methods
+    def getPackageNames(self) -> list[str]:
+        return list(self._loadPackageNames())
+
+    def hasPackage(self, packageName: str) -> bool:
+        # Package list is loaded
+        if self._packageNameSet is not None:
+            return packageName in self._packageNameSet
+
+        # Look the package up in the index
+        indexEntry: tuple = self._findIndexEntry(packageName)
+        return indexEntry is not None and indexEntry[2] == 1
+
+    def readPackage(self, packageName: str) -> dict:
+        # Parse the package entry on first access
+        if packageName not in self._parsedPackages:
+            start, end = self._findPackageSpan(packageName)
+            self._parsedPackages[packageName] = json.loads(self._databaseMap[start:end])
+
+        # Return
+        return self._parsedPackages[packageName]
+
+    def addPackage(self, packageName: str, rawPackageInfo: dict) -> None:
+        self._recordJournalEntry(
+            {"op": "add", "package": packageName, "value": rawPackageInfo}
+        )
+
+    def modifyPackage(self, packageName: str, keyPath: str, newValue: any, expectedGeneration: int = None) -> None:
+        self._recordJournalEntry(
+            _createModifyJournalEntry(packageName, keyPath, newValue, expectedGeneration)
+        )
+
+    def deletePackage(self, packageName: str) -> None:
+        self._recordJournalEntry({"op": "delete", "package": packageName})
+
+    def findPackageNames(self, keyPath: str, value: any) -> list[str]:
+        # Parse every package once to build the index
+        if self._packageIndex is None:
+            self._packageIndex = PackageIndex()
+            for packageName in self._loadPackageNames():
+                self._packageIndex.addPackage(packageName, self.readPackage(packageName))
+
+        # Return
+        return self._packageIndex.find(keyPath, value)
+
+    def getGeneration(self) -> int:
+        return self._sequence + len(self._pendingJournalEntries)
+
+    def findChangedPackageNames(self, generation: int) -> list[str]:
+        # Parse every package once to build the index
+        if self._generationIndex is None:
+            self._generationIndex = GenerationIndex(
+                {
+                    packageName: getPackageGeneration(self.readPackage(packageName))
+                    for packageName in self._loadPackageNames()
+                }
+            )
+
+        # Return
+        return self._generationIndex.find(generation)
+
+    def readMetadata(self, key: str) -> any:
+        # Value set since the last compaction
+        if key in self._topLevelValues:
+            return self._topLevelValues[key]
+
+        # Missing value
+        if key not in self._topLevelSpans:
+            return None
+
+        # Parse the value from the mapped database
+        start, end = self._topLevelSpans[key]
+        return json.loads(self._databaseMap[start:end])
+
+    def writeMetadata(self, key: str, value: any) -> None:
+        self._recordJournalEntry({"op": "metadata", "key": key, "value": value})
+
+    def commit(self) -> bool:
+        # Nothing to write
+        if len(self._pendingJournalEntries) == 0 and not self._needsCompaction:
+            return False
+
+        # Writers take turns
+        with self._lock.exclusive():
+            # Merge in what other processes committed meanwhile
+            synchronized: bool = self._synchronize()
+
+            # Number the entries after the ones already on disk
+            for entry in self._pendingJournalEntries:
+                self._sequence += 1
+                entry["sequence"] = self._sequence
+
+            # Append the entries to the journal
+            if not self._needsCompaction:
+                self._journal.append(self._pendingJournalEntries)
+            self._pendingJournalEntries = []
+
+            # Fold the journal into the snapshot once it grows too large
+            if self._needsCompaction or self._journal.getSize() >= JOURNAL_COMPACTION_THRESHOLD:
+                self.compact()
+
+        # Return
+        return synchronized
+
+    def compact(self) -> bool:
+        # Writers take turns
+        with self._lock.exclusive():
+            # Merge in what other processes committed meanwhile
+            synchronized: bool = self._synchronize()
+
+            # Nothing to fold in, leave the snapshot untouched
+            if not self._needsCompaction and len(self._pendingJournalEntries) == 0 and self._journal.getSize() == 0:
+                return synchronized
+
+            # Rewrite the snapshot
+            self._writeSnapshot()
+
+        # Return
+        return synchronized
+
+    def rollback(self) -> None:
+        # Nothing to discard or refresh
+        if len(self._pendingJournalEntries) == 0 and not self._needsCompaction and self._isCurrent():
+            return
+
+        # Reopen the database from disk
+        with self._lock.shared():
+            self._closeDatabase()
+            self._openDatabase()
+
+    def close(self) -> None:
+        self._closeDatabase()
+        self._lock.close()
+
+    def exportDatabase(self) -> dict:
+        # Output database
+        rawDatabase: dict = {}
+
+        # Iterate through the top level keys in file order
+        for key, (start, end) in self._topLevelSpans.items():
+            if key in self._topLevelValues:
+                rawDatabase[key] = self._topLevelValues[key]
+            else:
+                rawDatabase[key] = json.loads(self._databaseMap[start:end])
+
+        # Overlay the current package state
+        rawDatabase["packages"] = list(self._loadPackageNames())
+        rawDatabase["package_info"] = {
+            packageName: self.readPackage(packageName)
+            for packageName in self._packageNames
+        }
+
+        # Return
+        return rawDatabase
+
+    def importDatabase(self, rawDatabase: dict) -> None:
+        # Replace the package state
+        self._packageNames = list(rawDatabase["packages"])
+        self._packageNameSet = set(self._packageNames)
+        self._parsedPackages = dict(rawDatabase["package_info"])
+        self._packageIndex = None
+        self._generationIndex = None
+
+        # Replace the remaining top level keys
+        self._topLevelSpans = {key: (0, 0) for key in rawDatabase}
+        self._topLevelValues = {
+            key: value
+            for key, value in rawDatabase.items()
+            if key not in ("packages", "package_info")
+        }
+
+        # Continue from the imported database's last entry
+        self._sequence = rawDatabase.get("sequence", 0)
+
+        # Only a new snapshot can hold the imported database
+        self._pendingJournalEntries = []
+        self._needsCompaction = True
+
+    # Private Methods
+    def _openDatabase(self) -> None:
+        """
+        Maps the database file and its index, scanning the database
+        if the index is missing or stale, then replays the journal.
+
+        @return None
+        """
+        # Map the database
+        self._mapDatabase()
+        self._parsedPackages = {}
+        self._packageIndex = None
+        self._generationIndex = None
+        self._topLevelValues = {}
+        self._packageNames = None
+        self._packageNameSet = None
+        self._packageSpans = None
+
+        # Reuse the index of an unchanged database file, or scan the database and save its index
+        if not self._mapIndex():
+            self._topLevelSpans = _scanJSONObject(self._databaseMap, 0)
+            self._packageSpans = _scanJSONObject(
+                self._databaseMap, self._topLevelSpans["package_info"][0]
+            )
+            self._writeIndex()
+
+        # Get the last journal entry contained in the snapshot
+        self._sequence = 0
+        if "sequence" in self._topLevelSpans:
+            start, end = self._topLevelSpans["sequence"]
+            self._sequence = json.loads(self._databaseMap[start:end])
+
+        # Replay the journal entries newer than the snapshot
+        for entry in self._journal.read():
+            if entry["sequence"] > self._sequence:
+                self._applyJournalEntry(entry, entry["sequence"])
+                self._sequence = entry["sequence"]
+
+        # Nothing is pending
+        self._pendingJournalEntries = []
+        self._needsCompaction = False
+
+    def _writeSnapshot(self) -> None:
+        """
+        Writes the current state as a new snapshot and index, copying
+        untouched package entries verbatim, then archives the journal.
+
+        @return None
+        """
+        # Tag the snapshot with the last entry it contains, a database never journaled has none
+        if self._sequence != 0 or "sequence" in self._topLevelSpans:
+            self._topLevelValues["sequence"] = self._sequence
+            self._topLevelSpans.setdefault("sequence", (0, 0))
+
+        # Output chunks and the spans they will end up at
+        chunks: list[bytes] = []
+        newTopLevelSpans: dict[str, tuple[int, int]] = {}
+        newPackageSpans: dict[str, tuple[int, int]] = {}
+        position: int = 0
+
+        # Appends a chunk and returns its span
+        def appendChunk(chunk: bytes) -> tuple[int, int]:
+            nonlocal position
+            chunks.append(chunk)
+            position += len(chunk)
+            return (position - len(chunk), position)
+
+        # Make sure both package keys are written
+        topLevelKeys: list[str] = list(self._topLevelSpans)
+        for key in ("packages", "package_info"):
+            if key not in topLevelKeys:
+                topLevelKeys.append(key)
+
+        # Iterate through the top level keys in file order
+        appendChunk(b"{")
+        for keyIndex, key in enumerate(topLevelKeys):
+            # Separator and key
+            appendChunk(
+                (", " if keyIndex > 0 else "").encode("utf-8")
+                + json.dumps(key).encode("utf-8")
+                + b": "
+            )
+
+            # Package list
+            if key == "packages":
+                newTopLevelSpans[key] = appendChunk(
+                    json.dumps(self._loadPackageNames()).encode("utf-8")
+                )
+
+            # Package entries, untouched ones are copied verbatim
+            elif key == "package_info":
+                start: int = appendChunk(b"{")[0]
+                for packageIndex, packageName in enumerate(self._packageNames):
+                    appendChunk(
+                        (", " if packageIndex > 0 else "").encode("utf-8")
+                        + json.dumps(packageName).encode("utf-8")
+                        + b": "
+                    )
+                    if packageName in self._parsedPackages:
+                        newPackageSpans[packageName] = appendChunk(
+                            json.dumps(self._parsedPackages[packageName]).encode("utf-8")
+                        )
+                    else:
+                        packageStart, packageEnd = self._findPackageSpan(packageName)
+                        newPackageSpans[packageName] = appendChunk(
+                            self._databaseMap[packageStart:packageEnd]
+                        )
+                newTopLevelSpans[key] = (start, appendChunk(b"}")[1])
+
+            # Any other top level value held in memory
+            elif key in self._topLevelValues:
+                newTopLevelSpans[key] = appendChunk(
+                    json.dumps(self._topLevelValues[key]).encode("utf-8")
+                )
+
+            # Any other top level value
+            else:
+                valueStart, valueEnd = self._topLevelSpans[key]
+                newTopLevelSpans[key] = appendChunk(
+                    self._databaseMap[valueStart:valueEnd]
+                )
+        appendChunk(b"}")
+
+        # Write to database
+        writeFileAtomically(self._databaseFilePath, b"".join(chunks))
+        self._needsCompaction = False
+
+        # Map the new file and keep its index
+        self._closeDatabase()
+        self._mapDatabase()
+        self._topLevelValues = {}
+        self._topLevelSpans = newTopLevelSpans
+        self._packageSpans = newPackageSpans
+        self._writeIndex()
+
+        # The journal entries are now part of the snapshot
+        self._journal.archive()
+
+    def _isCurrent(self) -> bool:
+        """
+        Checks that no other process committed since the database was opened.
+
+        @return bool - Is the database unchanged on disk
+        """
+        return (
+            getFileIdentity(self._databaseFilePath) == self._snapshotIdentity
+            and self._journal.isCurrent()
+        )
+
+    def _synchronize(self) -> bool:
+        """
+        Reopens the database if another process committed to it since it
+        was opened and replays the pending mutations on top. Needs the
+        exclusive lock.
+
+        @return bool - Was the database reopened
+        """
+        # An imported database replaces whatever is on disk, and an unchanged one needs no reopen
+        if self._needsCompaction or self._isCurrent():
+            return False
+
+        # Reopen the database
+        pendingJournalEntries: Final[list[dict]] = self._pendingJournalEntries
+        self._closeDatabase()
+        self._openDatabase()
+
+        # Replay the pending mutations, checking them against the new state
+        for entry in pendingJournalEntries:
+            self._recordJournalEntry(entry)
+
+        # Return
+        return True
+
+    def _recordJournalEntry(self, entry: dict) -> None:
+        """
+        Applies a mutation in memory and queues it for the journal, at
+        the generation it will be numbered with when committed.
+
+        @param { dict } entry - The journal entry
+        @return None
+        """
+        _checkJournalEntry(self, entry)
+        self._applyJournalEntry(entry, self._sequence + len(self._pendingJournalEntries) + 1)
+        self._pendingJournalEntries.append(entry)
+
+    def _applyJournalEntry(self, entry: dict, generation: int) -> None:
+        """
+        Applies a journal entry to the parsed packages.
+
+        @param { dict } entry - The journal entry
+        @param { int } generation - The sequence number of the entry
+        @return None
+        """
+        # Set a top level value, kept in memory until the next compaction
+        if entry["op"] == "metadata":
+            self._topLevelValues[entry["key"]] = entry["value"]
+            self._topLevelSpans.setdefault(entry["key"], (0, 0))
+            return
+
+        # Get the package name
+        packageName: Final[str] = entry["package"]
+
+        # Add package
+        if entry["op"] == "add":
+            # Add new entry to packages array
+            self._loadPackageNames().append(packageName)
+            self._packageNameSet.add(packageName)
+
+            # Keep the entry in memory until the next compaction
+            entry["value"][GENERATION_KEY_PATH] = generation
+            self._parsedPackages[packageName] = entry["value"]
+            if self._packageIndex is not None:
+                self._packageIndex.addPackage(packageName, entry["value"])
+            if self._generationIndex is not None:
+                self._generationIndex.updatePackage(packageName, generation)
+
+        # Modify package
+        elif entry["op"] == "modify":
+            # Get the package info
+            rawPackageInfo: dict = self.readPackage(packageName)
+
+            # Set the value in place and stamp the entry's generation
+            setKeyPathValue(rawPackageInfo, entry["keyPath"], entry["value"])
+            rawPackageInfo[GENERATION_KEY_PATH] = generation
+            if self._packageIndex is not None:
+                self._packageIndex.updatePackage(packageName, rawPackageInfo)
+            if self._generationIndex is not None:
+                self._generationIndex.updatePackage(packageName, generation)
+
+        # Delete package
+        elif entry["op"] == "delete":
+            # Remove from package array
+            self._loadPackageNames().remove(packageName)
+            self._packageNameSet.discard(packageName)
+
+            # Forget the parsed entry
+            self._parsedPackages.pop(packageName, None)
+            if self._packageIndex is not None:
+                self._packageIndex.removePackage(packageName)
+            if self._generationIndex is not None:
+                self._generationIndex.removePackage(packageName)
+
+    def _loadPackageNames(self) -> list[str]:
+        """
+        Parses the packages array on first use.
+
+        @return list[str] - The package names
+        """
+        # Parse the package list
+        if self._packageNames is None:
+            start, end = self._topLevelSpans["packages"]
+            self._packageNames = json.loads(self._databaseMap[start:end])
+            self._packageNameSet = set(self._packageNames)
+
+        # Return
+        return self._packageNames
+
+    def _findPackageSpan(self, packageName: str) -> tuple[int, int]:
+        """
+        Returns the byte span of a package entry in the mapped database.
+
+        @param { str } packageName - The name of the package
+        @return tuple[int, int] - Start and end offsets of the entry
+        """
+        # Spans are held in memory after a scan or a commit
+        if self._packageSpans is not None:
+            return self._packageSpans[packageName]
+
+        # Look the package up in the index
+        indexEntry: tuple = self._findIndexEntry(packageName)
+        if indexEntry is None:
+            raise KeyError(packageName)
+
+        # Return
+        return (indexEntry[0], indexEntry[1])
+
+    def _findIndexEntry(self, packageName: str) -> tuple[int, int, int]:
+        """
+        Binary searches the mapped index for a package.
+
+        @param { str } packageName - The name of the package
+        @return tuple[int, int, int] - Value start, value end and listed flag, None if missing
+        """
+        # Spans are held in memory after a scan or a commit
+        if self._packageSpans is not None:
+            if packageName not in self._packageSpans:
+                return None
+            return (*self._packageSpans[packageName], 1)
+
+        # Encode the name as it is sorted in the index
+        encodedPackageName: Final[bytes] = packageName.encode("utf-8")
+
+        # Binary search the sorted entries
+        low: int = 0
+        high: int = self._indexEntryCount
+        while low < high:
+            middle: int = (low + high) // 2
+            nameOffset, nameLength, valueStart, valueEnd, listed = self.INDEX_ENTRY.unpack_from(
+                self._indexMap, self._indexTableOffset + middle * self.INDEX_ENTRY.size
+            )
+            entryName: bytes = self._indexMap[nameOffset : nameOffset + nameLength]
+            if entryName == encodedPackageName:
+                return (valueStart, valueEnd, listed)
+            if entryName < encodedPackageName:
+                low = middle + 1
+            else:
+                high = middle
+
+        # Not found
+        return None
+
+    def _mapDatabase(self) -> None:
+        """
+        Memory-maps the database file.
+
+        @return None
+        """
+        # Open the database in "read-binary" mode
+        self._databaseFile = open(self._databaseFilePath, "rb")
+
+        # Map the whole file read-only
+        self._databaseMap = mmap.mmap(
+            self._databaseFile.fileno(), 0, access=mmap.ACCESS_READ
+        )
+
+        # Remember which snapshot was mapped
+        self._snapshotIdentity = getFileIdentity(self._databaseFile.fileno())
+
+    def _mapIndex(self) -> bool:
+        """
+        Memory-maps the index file if it belongs to the mapped database file.
+
+        @return bool - Was the index mapped
+        """
+        # Get the database file status
+        databaseStatus: Final[os.stat_result] = os.fstat(self._databaseFile.fileno())
+
+        try:
+            # Map the index
+            self._indexFile = open(self._indexFilePath, "rb")
+            self._indexMap = mmap.mmap(self._indexFile.fileno(), 0, access=mmap.ACCESS_READ)
+
+            # Read the header
+            magic, version, size, mtime, entryCount, topLevelLength = self.INDEX_HEADER.unpack_from(
+                self._indexMap, 0
+            )
+        except (OSError, ValueError, struct.error):
+            self._closeIndex()
+            return False
+
+        # Check the index belongs to this database file
+        if (
+            magic != self.INDEX_MAGIC
+            or version != self.INDEX_FORMAT_VERSION
+            or size != databaseStatus.st_size
+            or mtime != databaseStatus.st_mtime_ns
+        ):
+            self._closeIndex()
+            return False
+
+        # Use the index
+        self._indexEntryCount = entryCount
+        self._indexTableOffset = self.INDEX_HEADER.size + topLevelLength
+        self._topLevelSpans = {
+            key: tuple(span)
+            for key, span in json.loads(
+                self._indexMap[self.INDEX_HEADER.size : self._indexTableOffset]
+            ).items()
+        }
+        return True
+
+    def _writeIndex(self) -> None:
+        """
+        Saves the in-memory spans as a sorted index next to the database file.
+
+        @return None
+        """
+        # Get the database file status
+        databaseStatus: Final[os.stat_result] = os.fstat(self._databaseFile.fileno())
+
+        # Get the listed packages
+        listedPackageNames: Final[set[str]] = set(self._loadPackageNames())
+
+        # Encode the top level spans
+        encodedTopLevelSpans: Final[bytes] = json.dumps(self._topLevelSpans).encode("utf-8")
+
+        # Sort the entries by their encoded name
+        sortedEntries: Final[list[tuple[bytes, tuple[int, int], int]]] = sorted(
+            (packageName.encode("utf-8"), span, int(packageName in listedPackageNames))
+            for packageName, span in self._packageSpans.items()
+        )
+
+        # Place the names after the entry table
+        nameOffset: int = (
+            self.INDEX_HEADER.size
+            + len(encodedTopLevelSpans)
+            + len(sortedEntries) * self.INDEX_ENTRY.size
+        )
+
+        # Output chunks
+        chunks: list[bytes] = [
+            self.INDEX_HEADER.pack(
+                self.INDEX_MAGIC,
+                self.INDEX_FORMAT_VERSION,
+                databaseStatus.st_size,
+                databaseStatus.st_mtime_ns,
+                len(sortedEntries),
+                len(encodedTopLevelSpans),
+            ),
+            encodedTopLevelSpans,
+        ]
+
+        # Build the entry table
+        for encodedPackageName, (valueStart, valueEnd), listed in sortedEntries:
+            chunks.append(
+                self.INDEX_ENTRY.pack(
+                    nameOffset, len(encodedPackageName), valueStart, valueEnd, listed
+                )
+            )
+            nameOffset += len(encodedPackageName)
+
+        # Append the names
+        chunks.extend(encodedPackageName for encodedPackageName, _, _ in sortedEntries)
+
+        try:
+            # Write the index
+            writeFileAtomically(self._indexFilePath, b"".join(chunks))
+        except OSError:
+            # The index is only a cache, a read-only checkout still works
+            return
+
+    def _closeIndex(self) -> None:
+        """
+        Unmaps and closes the index file.
+
+        @return None
+        """
+        # Unmap the index
+        if self._indexMap is not None:
+            self._indexMap.close()
+            self._indexMap = None
+
+        # Close the index file
+        if self._indexFile is not None:
+            self._indexFile.close()
+            self._indexFile = None
+
+    def _closeDatabase(self) -> None:
+        """
+        Unmaps and closes the database file and its index.
+
+        @return None
+        """
+        # Unmap the index
+        self._closeIndex()
+
+        # Unmap the database
+        if self._databaseMap is not None:
+            self._databaseMap.close()
+            self._databaseMap = None
+
+        # Close the database file
+        if self._databaseFile is not None:
+            self._databaseFile.close()
+            self._databaseFile = None
+
+class SQLiteStorageBackend(StorageBackend):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+    _databaseFilePath: str
+    _connection: sqlite3.Connection
+
+    # Constants
+    # (column, key path, value type) of every package field stored in its own column
+    COLUMN_KEY_PATHS: Final[tuple[tuple[str, str, type], ...]] = (
+        ("version", "version", str),
+        ("source_type", "urls/type", str),
+        ("source_url", "urls/source_url", str),
+        ("upstream_url", "urls/upstream_url", str),
+        ("repo_path", "paths/repo", str),
+        ("pkgbuild_path", "paths/pkgbuild", str),
+        ("marked_for_build", "buildInfo/markedForBuild", bool),
+        ("build_function_name", "buildInfo/buildFunctionName", str),
+        ("prepare_function_name", "buildInfo/prepareFunctionName", str),
+        ("generation", "generation", int),
+    )
+    SCHEMA: Final[str] = """
+        CREATE TABLE IF NOT EXISTS packages (
+            name TEXT PRIMARY KEY,
+            position INTEGER,
+            version TEXT,
+            source_type TEXT,
+            source_url TEXT,
+            upstream_url TEXT,
+            repo_path TEXT,
+            pkgbuild_path TEXT,
+            marked_for_build INTEGER,
+            build_function_name TEXT,
+            prepare_function_name TEXT,
+            generation INTEGER,
+            extra TEXT NOT NULL DEFAULT '{}'
+        );
+        CREATE INDEX IF NOT EXISTS packages_position ON packages (position);
+        CREATE INDEX IF NOT EXISTS packages_marked_for_build ON packages (marked_for_build);
+        CREATE INDEX IF NOT EXISTS packages_repo_path ON packages (repo_path);
+        CREATE INDEX IF NOT EXISTS packages_source_type ON packages (source_type);
+        CREATE INDEX IF NOT EXISTS packages_build_function_name ON packages (build_function_name);
+        CREATE INDEX IF NOT EXISTS packages_prepare_function_name ON packages (prepare_function_name);
+        CREATE TABLE IF NOT EXISTS metadata (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+    BUSY_TIMEOUT: Final[float] = 60.0
+
+    # Constructor
+    def __init__(self, databaseFilePath: str) -> None:
+        # Set the database file path
+        self._databaseFilePath = databaseFilePath
+
+        # Open the database, waiting for other writers instead of failing, and create the schema
+        self._connection = sqlite3.connect(databaseFilePath, timeout=self.BUSY_TIMEOUT)
+        self._connection.executescript(self.SCHEMA)
+
+        # Add the generation column to databases created before it existed
+        if "generation" not in [
+            row[1] for row in self._connection.execute("PRAGMA table_info(packages)")
+        ]:
+            self._connection.execute("ALTER TABLE packages ADD COLUMN generation INTEGER")
+            self._connection.commit()
+
+        # Index the generation column once it exists
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS packages_generation ON packages (generation)"
+        )
+
+    # Public Methods
+    def getPackageNames(self) -> list[str]:
+        return [
+            row[0]
+            for row in self._connection.execute(
+                "SELECT name FROM packages WHERE position IS NOT NULL ORDER BY position"
+            )
+        ]
+
+    def hasPackage(self, packageName: str) -> bool:
+        return (
+            self._connection.execute(
+                "SELECT 1 FROM packages WHERE name = ? AND position IS NOT NULL",
+                (packageName,),
+            ).fetchone()
+            is not None
+        )
+
+    def readPackage(self, packageName: str) -> dict:
+        # Fetch the package row
+        row: tuple = self._connection.execute(
+            f"SELECT {self._selectColumns()} FROM packages WHERE name = ?",
+            (packageName,),
+        ).fetchone()
+
+        # Rebuild the raw package information
+        return self._rowToPackageInfo(row)
+
+    def addPackage(self, packageName: str, rawPackageInfo: dict) -> None:
+        # Place the package at the end of the package list
+        nextPosition: int = self._connection.execute(
+            "SELECT COALESCE(MAX(position) + 1, 0) FROM packages"
+        ).fetchone()[0]
+
+        # Insert the package row at a new generation
+        self._insertPackage(
+            packageName,
+            nextPosition,
+            {**rawPackageInfo, GENERATION_KEY_PATH: self._nextGeneration()},
+        )
+
+    def modifyPackage(self, packageName: str, keyPath: str, newValue: any, expectedGeneration: int = None) -> None:
+        # Get the generation the package moves to
+        newGeneration: Final[int] = self._nextGeneration()
+
+        # Only touch the row while it is at the expected generation
+        generationCondition: str = ""
+        generationParameters: tuple = ()
+        if expectedGeneration is not None:
+            generationCondition = " AND COALESCE(generation, 0) = ?"
+            generationParameters = (expectedGeneration,)
+
+        # Look for a dedicated column
+        for column, columnKeyPath, valueType in self.COLUMN_KEY_PATHS:
+            if columnKeyPath != keyPath or type(newValue) is not valueType:
+                continue
+
+            # Update the column in place when it already holds the value
+            if (
+                self._connection.execute(
+                    f"UPDATE packages SET {column} = ?, generation = ? WHERE name = ? AND {column} IS NOT NULL{generationCondition}",
+                    (newValue, newGeneration, packageName, *generationParameters),
+                ).rowcount
+                == 1
+            ):
+                return
+
+        # Rewrite the whole row otherwise
+        rawPackageInfo: dict = self.readPackage(packageName)
+        generation: Final[int] = getPackageGeneration(rawPackageInfo)
+        setKeyPathValue(rawPackageInfo, keyPath, newValue)
+        rawPackageInfo[GENERATION_KEY_PATH] = newGeneration
+
+        # Write the row back unless it changed since it was read
+        if (
+            expectedGeneration not in (None, generation)
+            or self._connection.execute(
+                f"UPDATE packages SET {self._assignColumns()} WHERE name = ? AND COALESCE(generation, 0) = ?",
+                (*self._packageInfoToRow(rawPackageInfo), packageName, generation),
+            ).rowcount
+            == 0
+        ):
+            raise ConcurrentModificationException(
+                f'Package "{packageName}" was modified concurrently', packageName
+            )
+
+    def deletePackage(self, packageName: str) -> None:
+        # Move the database to a new generation, like the journal entry of the JSON engines
+        self._nextGeneration()
+
+        # Delete the package row
+        self._connection.execute("DELETE FROM packages WHERE name = ?", (packageName,))
+
+    def findPackageNames(self, keyPath: str, value: any) -> list[str]:
+        # Find the column holding the key path
+        column: str = next(
+            column for column, columnKeyPath, _ in self.COLUMN_KEY_PATHS if columnKeyPath == keyPath
+        )
+
+        # Query the indexed column
+        return [
+            row[0]
+            for row in self._connection.execute(
+                f"SELECT name FROM packages WHERE {column} = ? AND position IS NOT NULL ORDER BY position",
+                (value,),
+            )
+        ]
+
+    def getGeneration(self) -> int:
+        # Read the counter, missing until the first mutation
+        return self.readMetadata("sequence") or 0
+
+    def findChangedPackageNames(self, generation: int) -> list[str]:
+        # Query the indexed generation column
+        return [
+            row[0]
+            for row in self._connection.execute(
+                "SELECT name FROM packages WHERE generation > ? AND position IS NOT NULL ORDER BY generation, position",
+                (generation,),
+            )
+        ]
+
+    def readMetadata(self, key: str) -> any:
+        # Fetch the metadata row
+        row: tuple = self._connection.execute(
+            "SELECT value FROM metadata WHERE key = ?", (key,)
+        ).fetchone()
+
+        # Return
+        return None if row is None else json.loads(row[0])
+
+    def writeMetadata(self, key: str, value: any) -> None:
+        # Move the database to a new generation, like the journal entry of the JSON engines
+        self._nextGeneration()
+
+        # Insert or replace the metadata row
+        self._connection.execute(
+            "INSERT INTO metadata (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, json.dumps(value)),
+        )
+
+    def commit(self) -> bool:
+        # SQLite serializes writers itself and keeps no state to refresh
+        self._connection.commit()
+        return False
+
+    def rollback(self) -> None:
+        self._connection.rollback()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def exportDatabase(self) -> dict:
+        # Output database
+        rawDatabase: dict = {"packages": [], "package_info": {}}
+
+        # Iterate through every package, listed ones first
+        for row in self._connection.execute(
+            f"SELECT name, position, {self._selectColumns()} FROM packages ORDER BY position IS NULL, position, name"
+        ):
+            # List the package
+            if row[1] is not None:
+                rawDatabase["packages"].append(row[0])
+
+            # Rebuild the raw package information
+            rawDatabase["package_info"][row[0]] = self._rowToPackageInfo(row[2:])
+
+        # Restore the remaining top level keys
+        for key, value in self._connection.execute(
+            "SELECT key, value FROM metadata ORDER BY rowid"
+        ):
+            rawDatabase[key] = json.loads(value)
+
+        # Return
+        return rawDatabase
+
+    def importDatabase(self, rawDatabase: dict) -> None:
+        # Clear the database
+        self._connection.execute("DELETE FROM packages")
+        self._connection.execute("DELETE FROM metadata")
+
+        # Insert the listed packages in order
+        for position, packageName in enumerate(rawDatabase["packages"]):
+            self._insertPackage(
+                packageName, position, rawDatabase["package_info"][packageName]
+            )
+
+        # Keep entries which are not listed in the packages array
+        listedPackageNames: Final[set[str]] = set(rawDatabase["packages"])
+        for packageName, rawPackageInfo in rawDatabase["package_info"].items():
+            if packageName not in listedPackageNames:
+                self._insertPackage(packageName, None, rawPackageInfo)
+
+        # Keep the remaining top level keys
+        for key, value in rawDatabase.items():
+            if key not in ("packages", "package_info"):
+                self._connection.execute(
+                    "INSERT INTO metadata (key, value) VALUES (?, ?)",
+                    (key, json.dumps(value)),
+                )
+
+    # Private Methods
+    def _nextGeneration(self) -> int:
+        """
+        Allocates the next database generation. The counter is kept as the
+        `sequence` metadata value, matching the top level key of db.json.
+
+        @return int - The new generation
+        """
+        # Bump the counter, which also takes the write lock
+        self._connection.execute(
+            "INSERT INTO metadata (key, value) VALUES ('sequence', '1') ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        )
+
+        # Return
+        return self.readMetadata("sequence")
+
+    def _selectColumns(self) -> str:
+        """
+        Returns the column list used to rebuild a package.
+
+        @return str - Comma separated column names
+        """
+        return ", ".join(
+            [column for column, _, _ in self.COLUMN_KEY_PATHS] + ["extra"]
+        )
+
+    def _assignColumns(self) -> str:
+        """
+        Returns the assignment list used to rewrite a package.
+
+        @return str - Comma separated column assignments
+        """
+        return ", ".join(
+            [f"{column} = ?" for column, _, _ in self.COLUMN_KEY_PATHS] + ["extra = ?"]
+        )
+
+    def _insertPackage(self, packageName: str, position: int, rawPackageInfo: dict) -> None:
+        """
+        Inserts a package row.
+
+        @param { str } packageName - The name of the package
+        @param { int } position - The position in the package list, None if unlisted
+        @param { dict } rawPackageInfo - The raw package information
+        @return None
+        """
+        self._connection.execute(
+            f"INSERT INTO packages (name, position, {self._selectColumns()}) VALUES (?, ?, {', '.join(['?'] * (len(self.COLUMN_KEY_PATHS) + 1))})",
+            (packageName, position, *self._packageInfoToRow(rawPackageInfo)),
+        )
+
+    def _packageInfoToRow(self, rawPackageInfo: dict) -> tuple:
+        """
+        Splits raw package information into column values. Values without
+        a dedicated column, or of an unexpected type, are kept in `extra`.
+
+        @param { dict } rawPackageInfo - The raw package information
+        @return tuple - The column values, `extra` last
+        """
+        # Work on a copy of the package information
+        remainingPackageInfo: dict = json.loads(json.dumps(rawPackageInfo))
+
+        # Sections which had values moved into columns
+        emptiedSections: set[str] = set()
+
+        # Output row
+        row: list = []
+
+        # Iterate through each dedicated column
+        for _, keyPath, valueType in self.COLUMN_KEY_PATHS:
+            # Split the key path
+            splitKeyPath: list[str] = keyPath.split("/")
+
+            # Find the dict holding the value
+            parent: any = remainingPackageInfo
+            if len(splitKeyPath) == 2:
+                parent = remainingPackageInfo.get(splitKeyPath[0])
+
+            # Keep the value in extra if it does not fit the column
+            if (
+                not isinstance(parent, dict)
+                or type(parent.get(splitKeyPath[-1])) is not valueType
+            ):
+                row.append(None)
+                continue
+
+            # Move the value into the column
+            row.append(parent.pop(splitKeyPath[-1]))
+
+            # Remember the section the value came from
+            if len(splitKeyPath) == 2:
+                emptiedSections.add(splitKeyPath[0])
+
+        # Drop sections which only held column values, they are recreated on read
+        for section in emptiedSections:
+            if len(remainingPackageInfo[section]) == 0:
+                remainingPackageInfo.pop(section)
+
+        # Append the remaining values
+        row.append(json.dumps(remainingPackageInfo))
+
+        # Return
+        return tuple(row)
+
+    def _rowToPackageInfo(self, row: tuple) -> dict:
+        """
+        Rebuilds raw package information from column values.
+
+        @param { tuple } row - The column values, `extra` last
+        @return dict - The raw package information
+        """
+        # Get the values without a dedicated column
+        remainingPackageInfo: dict = json.loads(row[-1])
+
+        # Output package information
+        rawPackageInfo: dict = {}
+
+        # Iterate through each dedicated column
+        for (_, keyPath, valueType), value in zip(self.COLUMN_KEY_PATHS, row):
+            # Column is empty
+            if value is None:
+                continue
+
+            # Restore booleans
+            if valueType is bool:
+                value = bool(value)
+
+            # Set the value
+            splitKeyPath: list[str] = keyPath.split("/")
+            if len(splitKeyPath) == 1:
+                rawPackageInfo[splitKeyPath[0]] = value
+            else:
+                rawPackageInfo.setdefault(splitKeyPath[0], {})[splitKeyPath[1]] = value
+
+        # Merge back the remaining values
+        for key, value in remainingPackageInfo.items():
+            if isinstance(value, dict) and isinstance(rawPackageInfo.get(key), dict):
+                rawPackageInfo[key].update(value)
+            else:
+                rawPackageInfo[key] = value
+
+        # Return
+        return rawPackageInfo
+
+# Enums
+
+# Interfaces
+
+# Constants
+SQLITE_FILE_EXTENSIONS: Final[tuple[str, ...]] = (".sqlite", ".sqlite3", ".db")
+JOURNAL_FILE_SUFFIX: Final[str] = ".journal"
+JOURNAL_COMPACTION_THRESHOLD: Final[int] = int(
+    os.environ.get("ALARM_JOURNAL_COMPACTION_BYTES", 1024 * 1024)
+)
+# Archived journals kept for auditing, one per compaction
+JOURNAL_ARCHIVE_COUNT: Final[int] = int(os.environ.get("ALARM_JOURNAL_ARCHIVE_COUNT", 16))
+COPY_CHUNK_SIZE: Final[int] = 1024 * 1024
+# ioctl cloning a file's extents on copy-on-write file systems, e.g. Btrfs and XFS
+FICLONE: Final[int] = 0x40049409
+GENERATION_KEY_PATH: Final[str] = "generation"
+INDEXED_KEY_PATHS: Final[tuple[str, ...]] = (
+    "buildInfo/markedForBuild",
+    "paths/repo",
+    "urls/type",
+    "buildInfo/buildFunctionName",
+    "buildInfo/prepareFunctionName",
+)
+JSON_WHITESPACE_PATTERN: Final[re.Pattern] = re.compile(rb"[ \t\n\r]*+")
+JSON_STRING_PATTERN: Final[re.Pattern] = re.compile(rb'"(?:[^"\\]++|\\.)*+"')
+JSON_SCALAR_PATTERN: Final[re.Pattern] = re.compile(rb'[^,}\]\s]*+')
+JSON_NESTED_CONTENT_PATTERN: Final[re.Pattern] = re.compile(
+    rb'(?:[^"{}\[\]]++|"(?:[^"\\]++|\\.)*+")*+'
+)
+# Objects nested at most one level deep, the shape of a `package_info` entry
+JSON_SHALLOW_OBJECT_PATTERN: Final[re.Pattern] = re.compile(
+    rb'\{(?:[^"{}\[\]]++|"(?:[^"\\]++|\\.)*+"|\{(?:[^"{}\[\]]++|"(?:[^"\\]++|\\.)*+")*+\})*+\}'
+)
+
+# Public Variables
+
+# Private Variables
+
+# Public Methods
+def openStorageBackend(databaseFilePath: str, lazy: bool = False) -> StorageBackend:
+    """
+    Opens the storage engine matching the database file's extension.
+
+    @param { str } databaseFilePath - The path to the database file
+    @param { bool } lazy - Only parse the JSON packages which are accessed (Optional)
+    @return StorageBackend - See StorageBackend
+    """
+    # SQLite database
+    if databaseFilePath.endswith(SQLITE_FILE_EXTENSIONS):
+        return SQLiteStorageBackend(databaseFilePath)
+
+    # Lazily loaded JSON database
+    if lazy:
+        return LazyJSONStorageBackend(databaseFilePath)
+
+    # JSON database
+    return JSONStorageBackend(databaseFilePath)
+
+def migrateDatabase(sourceFilePath: str, destinationFilePath: str) -> None:
+    """
+    Copies every record from one database file into another, converting
+    between the JSON and SQLite layouts as needed. The destination is
+    overwritten, so it may not be the source itself.
+
+    @param { str } sourceFilePath - The path to the database to read
+    @param { str } destinationFilePath - The path to the database to write
+    @return None
+    """
+    # Refuse to overwrite the source, however its path is spelled
+    if os.path.realpath(sourceFilePath) == os.path.realpath(destinationFilePath):
+        raise Exception(f"Cannot migrate {sourceFilePath} onto itself")
+
+    # Read the whole source before the destination is touched
+    sourceBackend: Final[StorageBackend] = openStorageBackend(sourceFilePath)
+    try:
+        rawDatabase: Final[dict] = sourceBackend.exportDatabase()
+    finally:
+        sourceBackend.close()
+
+    # Start from an empty destination
+    for filePath in (destinationFilePath, f"{destinationFilePath}{JOURNAL_FILE_SUFFIX}"):
+        if os.path.exists(filePath):
+            os.remove(filePath)
+
+    # Create an empty JSON destination for the engine to load
+    if not destinationFilePath.endswith(SQLITE_FILE_EXTENSIONS):
+        writeFileAtomically(
+            destinationFilePath, b'{"packages": [], "package_info": {}}'
+        )
+
+    # Open the destination
+    destinationBackend: Final[StorageBackend] = openStorageBackend(destinationFilePath)
+
+    try:
+        # Copy the records
+        destinationBackend.importDatabase(rawDatabase)
+        destinationBackend.commit()
+    finally:
+        # Close the destination
+        destinationBackend.close()
+
+def getKeyPathValue(rawPackageInfo: dict, keyPath: str) -> any:
+    """
+    Returns a value of raw package information by its key path.
+
+    @param { dict } rawPackageInfo - The raw package information
+    @param { str } keyPath - The key to read, e.g. `buildInfo/markedForBuild`
+    @return any - The value, None if it is missing
+    """
+    # Walk down the key path
+    value: any = rawPackageInfo
+    for key in keyPath.split("/"):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+
+    # Return
+    return value
+
+def setKeyPathValue(rawPackageInfo: dict, keyPath: str, newValue: any) -> None:
+    """
+    Sets a value of raw package information by its key path.
+
+    @param { dict } rawPackageInfo - The raw package information
+    @param { str } keyPath - The key to modify, e.g. `buildInfo/markedForBuild`
+    @param { any } newValue - The new value of the key
+    @return None
+    """
+    # Split the key value
+    splitKeyPath: list[str] = keyPath.split("/")
+
+    # Check the depth
+    if len(splitKeyPath) == 1:
+        rawPackageInfo[splitKeyPath[0]] = newValue
+    else:
+        rawPackageInfo[splitKeyPath[0]][splitKeyPath[1]] = newValue
+
+def getPackageGeneration(rawPackageInfo: dict) -> int:
+    """
+    Returns the generation of raw package information, the number
+    of modifications it went through.
+
+    @param { dict } rawPackageInfo - The raw package information
+    @return int - The generation, 0 for a package never modified
+    """
+    return rawPackageInfo.get(GENERATION_KEY_PATH, 0)
+
+def writeFileAtomically(filePath: str, content: bytes) -> None:
+    """
+    Replaces a file with the given content using a temporary file,
+    fsync and rename so readers never see a partial write.
+
+    @param { str } filePath - The path to the file
+    @param { bytes } content - The new content of the file
+    @return None
+    """
+    # Get the file directory
+    fileDirectory: Final[str] = os.path.dirname(os.path.abspath(filePath))
+
+    # Create a temporary file next to the file
+    fileDescriptor, temporaryFilePath = tempfile.mkstemp(
+        prefix=f".{os.path.basename(filePath)}.", suffix=".tmp", dir=fileDirectory
+    )
+
+    try:
+        # Write the content to the temporary file
+        with os.fdopen(fileDescriptor, "wb") as temporaryFile:
+            temporaryFile.write(content)
+            temporaryFile.flush()
+            os.fsync(temporaryFile.fileno())
+
+        # Keep the permissions of the file
+        if os.path.exists(filePath):
+            os.chmod(temporaryFilePath, os.stat(filePath).st_mode)
+        else:
+            os.chmod(temporaryFilePath, 0o644)
+
+        # Swap the temporary file in place of the file
+        os.replace(temporaryFilePath, filePath)
+    except BaseException:
+        # Remove the temporary file
+        os.unlink(temporaryFilePath)
+        raise
+
+    # Persist the rename
+    directoryDescriptor: Final[int] = os.open(fileDirectory, os.O_RDONLY)
+    try:
+        os.fsync(directoryDescriptor)
+    finally:
+        os.close(directoryDescriptor)
+
+def getFileIdentity(file: str | int) -> list[int]:
+    """
+    Returns what tells two versions of a file apart without reading it. A file
+    replaced by a rename gets a new inode even if its size and mtime match, an
+    in-place write changes its size or mtime. It is a list so it can be stored
+    in JSON and compared with what is read back.
+
+    @param { str | int } file - The path or descriptor of the file
+    @return list[int] - Device, inode, size and mtime, None if missing
+    """
+    try:
+        # Get the file status
+        fileStatus: Final[os.stat_result] = os.stat(file)
+    except FileNotFoundError:
+        # No file
+        return None
+
+    # Return
+    return [fileStatus.st_dev, fileStatus.st_ino, fileStatus.st_size, fileStatus.st_mtime_ns]
+
+def cloneFile(sourceFilePath: str, destinationFilePath: str, allowHardLink: bool = True) -> None:
+    """
+    Atomically replaces a file with a copy of another. Files which are never
+    written in place are hard linked, others are reflinked where the file
+    system supports it and copied otherwise.
+
+    @param { str } sourceFilePath - The path to the file to copy
+    @param { str } destinationFilePath - The path to the copy
+    @param { bool } allowHardLink - May both paths share an inode (Optional)
+    @return None
+    """
+    # Get a temporary path next to the copy
+    temporaryFilePath: Final[str] = f"{os.path.dirname(os.path.abspath(destinationFilePath))}/.{os.path.basename(destinationFilePath)}.{os.getpid()}.tmp"
+
+    try:
+        # Hard link
+        if allowHardLink:
+            try:
+                os.link(sourceFilePath, temporaryFilePath)
+                os.replace(temporaryFilePath, destinationFilePath)
+                return
+            except OSError:
+                # E.g. another file system, fall back to a copy
+                pass
+
+        # Reflink, or copy
+        with open(sourceFilePath, "rb") as sourceFile, open(temporaryFilePath, "wb") as temporaryFile:
+            try:
+                fcntl.ioctl(temporaryFile.fileno(), FICLONE, sourceFile.fileno())
+            except OSError:
+                shutil.copyfileobj(sourceFile, temporaryFile, COPY_CHUNK_SIZE)
+            temporaryFile.flush()
+            os.fsync(temporaryFile.fileno())
+
+        # Replace the destination
+        os.replace(temporaryFilePath, destinationFilePath)
+    finally:
+        # Clean up a failed copy
+        if os.path.exists(temporaryFilePath):
+            os.remove(temporaryFilePath)
+
+# Private Methods
+def _createModifyJournalEntry(packageName: str, keyPath: str, newValue: any, expectedGeneration: int) -> dict:
+    """
+    Returns the journal entry of a package modification.
+
+    @param { str } packageName - The name of the package
+    @param { str } keyPath - The key to modify
+    @param { any } newValue - The new value of the key
+    @param { int } expectedGeneration - The generation the change was based on, None for any
+    @return dict - The journal entry
+    """
+    # Build the entry
+    entry: dict = {"op": "modify", "package": packageName, "keyPath": keyPath, "value": newValue}
+
+    # Keep the compare-and-swap condition to check it again at commit time
+    if expectedGeneration is not None:
+        entry["expectedGeneration"] = expectedGeneration
+
+    # Return
+    return entry
+
+def _checkJournalEntry(backend: StorageBackend, entry: dict) -> None:
+    """
+    Checks a mutation still applies to the current state of a JSON engine,
+    which may have changed under it when another process committed first.
+
+    @param { StorageBackend } backend - The engine the entry is recorded in
+    @param { dict } entry - The journal entry
+    @return None
+    """
+    # Top level values are simply overwritten
+    if entry["op"] == "metadata":
+        return
+
+    # Get the package name
+    packageName: Final[str] = entry["package"]
+
+    # Package was added by someone else
+    if entry["op"] == "add" and backend.hasPackage(packageName):
+        raise ConcurrentModificationException(
+            f'Package "{packageName}" was added concurrently', packageName
+        )
+
+    # Package was deleted by someone else
+    if entry["op"] != "add" and not backend.hasPackage(packageName):
+        raise ConcurrentModificationException(
+            f'Package "{packageName}" was deleted concurrently', packageName
+        )
+
+    # Package moved past the generation the change was based on
+    if "expectedGeneration" in entry and getPackageGeneration(
+        backend.readPackage(packageName)
+    ) != entry["expectedGeneration"]:
+        raise ConcurrentModificationException(
+            f'Package "{packageName}" was modified concurrently', packageName
+        )
+
+@contextmanager
+def _pausedGarbageCollection() -> Iterator[None]:
+    """
+    Pauses the cyclic garbage collector. Decoding a large database allocates
+    millions of containers, each allocation burst would trigger a collection
+    pass over all of them although none can be garbage yet.
+
+    @return None
+    """
+    # Remember if the collector was running
+    wasEnabled: Final[bool] = gc.isenabled()
+
+    # Pause the collector
+    gc.disable()
+
+    try:
+        # Run the body
+        yield
+    finally:
+        # Resume the collector
+        if wasEnabled:
+            gc.enable()
+
+def _scanJSONObject(buffer: bytes, position: int) -> dict[str, tuple[int, int]]:
+    """
+    Returns the byte span of every member value of a JSON object without
+    decoding the values themselves.
+
+    @param { bytes } buffer - The JSON document
+    @param { int } position - The offset of the object's opening brace
+    @return dict[str, tuple[int, int]] - The member names and their value spans
+    """
+    # Output spans
+    spans: dict[str, tuple[int, int]] = {}
+
+    # Enter the object
+    position = _skipJSONWhitespace(buffer, position)
+    if buffer[position : position + 1] != b"{":
+        raise ValueError(f"Expected a JSON object at byte {position}")
+    position = _skipJSONWhitespace(buffer, position + 1)
+
+    # Empty object
+    if buffer[position : position + 1] == b"}":
+        return spans
+
+    # Iterate through each member
+    while True:
+        # Read the member name
+        keyMatch: re.Match = JSON_STRING_PATTERN.match(buffer, position)
+        if keyMatch is None:
+            raise ValueError(f"Expected a JSON string at byte {position}")
+        encodedKey: bytes = keyMatch.group()
+        key: str = (
+            json.loads(encodedKey)
+            if b"\\" in encodedKey
+            else encodedKey[1:-1].decode("utf-8")
+        )
+
+        # Skip the colon
+        position = _skipJSONWhitespace(buffer, keyMatch.end())
+        if buffer[position : position + 1] != b":":
+            raise ValueError(f"Expected a colon at byte {position}")
+
+        # Record the value span
+        valueStart: int = _skipJSONWhitespace(buffer, position + 1)
+        valueEnd: int = _skipJSONValue(buffer, valueStart)
+        spans[key] = (valueStart, valueEnd)
+
+        # Move to the next member
+        position = _skipJSONWhitespace(buffer, valueEnd)
+        separator: bytes = buffer[position : position + 1]
+        if separator == b"}":
+            return spans
+        if separator != b",":
+            raise ValueError(f"Expected a comma at byte {position}")
+        position = _skipJSONWhitespace(buffer, position + 1)
+
+def _skipJSONValue(buffer: bytes, position: int) -> int:
+    """
+    Returns the offset right after the JSON value starting at the given offset.
+
+    @param { bytes } buffer - The JSON document
+    @param { int } position - The offset of the value
+    @return int - The offset after the value
+    """
+    # Get the first character of the value
+    firstCharacter: bytes = buffer[position : position + 1]
+
+    # String
+    if firstCharacter == b'"':
+        return JSON_STRING_PATTERN.match(buffer, position).end()
+
+    # Number, boolean or null
+    if firstCharacter not in (b"{", b"["):
+        return JSON_SCALAR_PATTERN.match(buffer, position).end()
+
+    # Shallow object, matched in one go
+    shallowObjectMatch: re.Match = JSON_SHALLOW_OBJECT_PATTERN.match(buffer, position)
+    if shallowObjectMatch is not None:
+        return shallowObjectMatch.end()
+
+    # Object or array, jump from bracket to bracket
+    depth: int = 0
+    while True:
+        bracket: bytes = buffer[position : position + 1]
+        if bracket in (b"{", b"["):
+            depth += 1
+        elif bracket in (b"}", b"]"):
+            depth -= 1
+        else:
+            raise ValueError(f"Unterminated JSON value at byte {position}")
+
+        # Value closed
+        if depth == 0:
+            return position + 1
+
+        # Skip to the next bracket
+        position = JSON_NESTED_CONTENT_PATTERN.match(buffer, position + 1).end()
+
+def _skipJSONWhitespace(buffer: bytes, position: int) -> int:
+    """
+    Returns the offset of the next non-whitespace character.
+
+    @param { bytes } buffer - The JSON document
+    @param { int } position - The offset to start at
+    @return int - The offset of the next non-whitespace character
+    """
+    return JSON_WHITESPACE_PATTERN.match(buffer, position).end()
+
+# Run
+if __name__ == "__main__":
+    # Check the arguments
+    if len(sys.argv) != 3:
+        print("Usage: python3 -m utils.storage <source database> <destination database>")
+        sys.exit(1)
+
+    # Migrate the database
+    migrateDatabase(sys.argv[1], sys.argv[2])
@@ -0,0 +1,1258 @@
+# Import Statements
+# First party
+import os
+import re
+import json
+import time
+import hashlib
+import heapq
+import codecs
+import tarfile
+import statistics
+import threading
+from typing import Final, Iterator
+from html.parser import HTMLParser
+from urllib import parse
+from urllib.error import HTTPError
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Second party
+import utils.db as db
+import utils.network as network
+import utils.storage as storage
+import utils.version as version
+
+# Third party
+from bs4 import BeautifulSoup
+
+# File Docstring
+# @LinuxOnARM || sync.py
+# ---------------------------------------
+# Looks up the upstream versions of packages. Lookups run
+# side by side over pooled connections, bounded overall and per
+# host so a single upstream server never sees more than a few
+# requests at once. Pages which did not change since the last
+# sync are answered from the upstream cache, changed ones are
+# only read up to the version they list. Packages can instead be
+# looked up in a pacman sync database, downloaded once per sync.
+# Recently checked packages are not looked up again, failed ones
+# are retried later instead of aborting the sync. The check can
+# be split into shards by a stable hash of the package names,
+# each writing a result file merged back into the database.
+# Packages are only checked when the sync schedule says they
+# are due, often changing ones more often than stale ones.
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Class Definitions
+class UpstreamPackageNotFoundException(Exception):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+    requestedPackage: str
+
+    # Private Variables
+
+    # Constants
+
+    # Constructor
+    def __init__(self, message: str, package: str) -> None:
+        # Class base class constructor
+        super().__init__(message)
+
+        # Set the package missing upstream
+        self.requestedPackage = package
+
+    # Public Methods
+
+    # Private Methods
+
+class ShardConflictException(Exception):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+    requestedPackage: str
+
+    # Private Variables
+
+    # Constants
+
+    # Constructor
+    def __init__(self, message: str, package: str) -> None:
+        # Class base class constructor
+        super().__init__(message)
+
+        # Set the package the shards disagree on
+        self.requestedPackage = package
+
+    # Public Methods
+
+    # Private Methods
+
+class UpstreamCache:
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+    _cacheFilePath: str
+    _maximumSize: int
+    _timeToLive: float
+    _entries: dict[str, dict]
+    _lock: threading.Lock
+    _hitCount: int
+    _freshCount: int
+    _missCount: int
+    _failureCount: int
+    _deferredCount: int
+    _evictionCount: int
+
+    # Constants
+    CACHE_FORMAT_VERSION: Final[int] = 2
+
+    # Constructor
+    def __init__(self, cacheFilePath: str, maximumSize: int = None, timeToLive: float = None) -> None:
+        # Set the cache file path, size budget and how long versions stay fresh
+        self._cacheFilePath = cacheFilePath
+        self._maximumSize = maximumSize or UPSTREAM_CACHE_MAXIMUM_SIZE
+        self._timeToLive = timeToLive if timeToLive is not None else UPSTREAM_CACHE_TIME_TO_LIVE
+        self._lock = threading.Lock()
+
+        # Nothing counted yet
+        self._hitCount = 0
+        self._freshCount = 0
+        self._missCount = 0
+        self._failureCount = 0
+        self._deferredCount = 0
+        self._evictionCount = 0
+
+        # Load the cached entries
+        self._entries = self._load(self._cacheFilePath)
+
+    # Public Methods
+    def getFreshVersion(self, key: str) -> str:
+        """
+        Returns the cached version of an entry checked less than the
+        time to live ago, which is used without asking upstream.
+
+        @param { str } key - The upstream URL, or sync database URL and package name
+        @return str - The cached version, None if stale, failed or not cached
+        """
+        with self._lock:
+            # Get the cached entry
+            entry: dict = self._entries.get(key)
+            if entry is None or entry.get("version") is None or entry.get("failureCount"):
+                return None
+
+            # Entry is stale
+            if time.time() - entry.get("checkedAt", 0.0) >= self._timeToLive:
+                return None
+
+            # Count the fresh entry and mark it as recently used
+            self._freshCount += 1
+            entry["lastUsed"] = time.time()
+
+            # Return
+            return entry["version"]
+
+    def getPendingFailure(self, key: str) -> str:
+        """
+        Returns the error of an entry which failed recently and is not due
+        to be retried yet.
+
+        @param { str } key - The upstream URL, or sync database URL and package name
+        @return str - The error of the last attempt, None if due or not failed
+        """
+        with self._lock:
+            # Get the cached entry
+            entry: dict = self._entries.get(key)
+            if entry is None or entry.get("retryAt", 0.0) <= time.time():
+                return None
+
+            # Count the deferred lookup
+            self._deferredCount += 1
+
+            # Return
+            return entry["error"]
+
+    def getRequestHeaders(self, url: str) -> dict[str, str]:
+        """
+        Returns the conditional request headers revalidating the cached copy of a URL.
+
+        @param { str } url - The upstream URL
+        @return dict[str, str] - `If-None-Match` and `If-Modified-Since`, if known
+        """
+        # Get the cached entry
+        with self._lock:
+            entry: dict = self._entries.get(url)
+
+        # Nothing to revalidate
+        if entry is None:
+            return {}
+
+        # Output headers
+        headers: dict[str, str] = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("lastModified"):
+            headers["If-Modified-Since"] = entry["lastModified"]
+
+        # Return
+        return headers
+
+    def recordHit(self, url: str) -> str:
+        """
+        Records that the upstream page did not change and returns its cached version.
+
+        @param { str } url - The upstream URL
+        @return str - The cached version, None if the URL is not cached
+        """
+        with self._lock:
+            # Get the cached entry
+            entry: dict = self._entries.get(url)
+            if entry is None:
+                return None
+
+            # Count the hit, the entry is fresh again
+            self._hitCount += 1
+            self._entries[url] = {
+                "etag": entry.get("etag"),
+                "lastModified": entry.get("lastModified"),
+                "version": entry["version"],
+                "checkedAt": time.time(),
+                "lastUsed": time.time(),
+            }
+
+            # Return
+            return entry["version"]
+
+    def recordMiss(self, key: str, version: str, responseHeaders: any = None) -> None:
+        """
+        Records a looked up version, along with the validators the server
+        sent to revalidate the page with, if any.
+
+        @param { str } key - The upstream URL, or sync database URL and package name
+        @param { str } version - The version looked up
+        @param { http.client.HTTPMessage } responseHeaders - The response headers (Optional)
+        @return None
+        """
+        with self._lock:
+            # Count the miss
+            self._missCount += 1
+
+            # Cache the version with its validators, forgetting earlier failures
+            self._entries[key] = {
+                "etag": responseHeaders.get("ETag") if responseHeaders is not None else None,
+                "lastModified": responseHeaders.get("Last-Modified") if responseHeaders is not None else None,
+                "version": version,
+                "checkedAt": time.time(),
+                "lastUsed": time.time(),
+            }
+
+    def recordFailure(self, key: str, error: str, retryAfter: float = None) -> float:
+        """
+        Records a failed lookup so it is not retried before an exponentially
+        growing, jittered delay passes, or the delay upstream asked for.
+
+        @param { str } key - The upstream URL, or sync database URL and package name
+        @param { str } error - The error of the lookup
+        @param { float } retryAfter - The delay upstream asked for in seconds (Optional)
+        @return float - The delay before the lookup is retried in seconds
+        """
+        with self._lock:
+            # Count the failure
+            self._failureCount += 1
+
+            # Keep the cached version and validators, if any
+            entry: dict = self._entries.setdefault(key, {"version": None})
+            entry["failureCount"] = entry.get("failureCount", 0) + 1
+
+            # Get the delay
+            delay: float = network.getBackoffDelay(
+                entry["failureCount"], FAILURE_RETRY_BASE_DELAY, FAILURE_RETRY_MAXIMUM_DELAY
+            )
+            if retryAfter is not None:
+                delay = max(delay, retryAfter)
+
+            # Defer the lookup until then
+            entry["error"] = error
+            entry["retryAt"] = time.time() + delay
+            entry["lastUsed"] = time.time()
+
+            # Return
+            return delay
+
+    def merge(self, cacheFilePath: str) -> None:
+        """
+        Merges the entries of another cache file, e.g. the one a shard saved,
+        keeping the most recently used entry of each key.
+
+        @param { str } cacheFilePath - The path to the other cache
+        @return None
+        """
+        # Read the other cache
+        otherEntries: Final[dict[str, dict]] = self._load(cacheFilePath)
+
+        with self._lock:
+            # Keep the most recently used entry of each key
+            for key, entry in otherEntries.items():
+                if key not in self._entries or entry["lastUsed"] > self._entries[key]["lastUsed"]:
+                    self._entries[key] = entry
+
+    def save(self, cacheFilePath: str = None) -> None:
+        """
+        Writes the cache to disk, evicting the least recently used entries
+        until it fits its size budget.
+
+        @param { str } cacheFilePath - The path to write to instead of the cache's own (Optional)
+        @return None
+        """
+        with self._lock:
+            # Get the serialized size of each entry, separators included
+            entrySizes: dict[str, int] = {
+                url: len(json.dumps(url)) + len(json.dumps(entry, sort_keys=True)) + 4
+                for url, entry in self._entries.items()
+            }
+
+            # Evict the least recently used entries first
+            totalSize: int = sum(entrySizes.values())
+            for url in sorted(self._entries, key=lambda url: self._entries[url]["lastUsed"]):
+                if totalSize <= self._maximumSize:
+                    break
+                totalSize -= entrySizes[url]
+                self._entries.pop(url)
+                self._evictionCount += 1
+
+            # Serialize the cache, sorted so unchanged entries diff cleanly
+            rawContent: Final[bytes] = json.dumps(
+                {"version": self.CACHE_FORMAT_VERSION, "entries": self._entries},
+                sort_keys=True,
+            ).encode("utf-8")
+
+        # Write to disk
+        storage.writeFileAtomically(cacheFilePath or self._cacheFilePath, rawContent)
+
+    def getStatistics(self) -> dict[str, int]:
+        """
+        Returns the cache hits, misses, failures and evictions since the cache was loaded.
+
+        @return dict[str, int] - `hits`, `fresh`, `misses`, `failures`, `deferred`, `evictions` and `entries` counts
+        """
+        with self._lock:
+            return {
+                "hits": self._hitCount,
+                "fresh": self._freshCount,
+                "misses": self._missCount,
+                "failures": self._failureCount,
+                "deferred": self._deferredCount,
+                "evictions": self._evictionCount,
+                "entries": len(self._entries),
+            }
+
+    # Private Methods
+    def _load(self, cacheFilePath: str) -> dict[str, dict]:
+        """
+        Reads the cached entries, starting empty if the cache is missing or unreadable.
+
+        @param { str } cacheFilePath - The path to the cache
+        @return dict[str, dict] - The cached entries by URL
+        """
+        try:
+            # Read the cache
+            with open(cacheFilePath, "rb") as cacheFile:
+                rawCache: Final[dict] = json.load(cacheFile)
+        except (OSError, ValueError):
+            return {}
+
+        # Drop caches of another format
+        if not isinstance(rawCache, dict) or rawCache.get("version") != self.CACHE_FORMAT_VERSION:
+            return {}
+
+        # Return
+        return rawCache.get("entries", {})
+
+class SyncSchedule:
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+    _scheduleFilePath: str
+    _minimumInterval: float
+    _maximumInterval: float
+    _entries: dict[str, dict]
+    _lock: threading.Lock
+
+    # Constants
+    SCHEDULE_FORMAT_VERSION: Final[int] = 1
+    # Number of change times kept per package
+    HISTORY_LENGTH: Final[int] = 8
+    # Factor the interval grows by while a package does not change, and shrinks by when it does
+    BACKOFF_FACTOR: Final[float] = 2.0
+    # Share of the interval a package may be checked early, so runs starting a bit early still check it
+    EARLY_CHECK_TOLERANCE: Final[float] = 0.1
+
+    # Constructor
+    def __init__(self, scheduleFilePath: str, minimumInterval: float = None, maximumInterval: float = None) -> None:
+        # Set the schedule file path and the interval bounds
+        self._scheduleFilePath = scheduleFilePath
+        self._minimumInterval = minimumInterval if minimumInterval is not None else SCHEDULE_MINIMUM_INTERVAL
+        self._maximumInterval = maximumInterval if maximumInterval is not None else SCHEDULE_MAXIMUM_INTERVAL
+        self._lock = threading.Lock()
+
+        # Load the scheduled packages
+        self._entries = self._load(self._scheduleFilePath)
+
+    # Public Methods
+    def getDuePackages(self, packages: list[db.PackageInfo], forceAll: bool = False, maximumCount: int = None, now: float = None) -> list[db.PackageInfo]:
+        """
+        Returns the packages due to be checked, most overdue first if there are
+        more than `maximumCount`. Packages never checked are always due.
+
+        @param { list[db.PackageInfo] } packages - The packages to schedule
+        @param { bool } forceAll - Check every package (Optional)
+        @param { int } maximumCount - The most packages to check, None for no limit (Optional)
+        @param { float } now - The time of the sync (Optional)
+        @return list[db.PackageInfo] - The due packages, in the order they were given
+        """
+        # Get the time of the sync
+        now = now if now is not None else time.time()
+
+        # Queue the packages by the time they are due
+        with self._lock:
+            dueQueue: list[tuple[float, int]] = [
+                (self._getDueTime(package.getPackageName()) if not forceAll else 0.0, packageIndex)
+                for packageIndex, package in enumerate(packages)
+            ]
+        heapq.heapify(dueQueue)
+
+        # Take the due packages, most overdue first
+        duePackageIndices: list[int] = []
+        while len(dueQueue) > 0 and dueQueue[0][0] <= now:
+            if maximumCount is not None and len(duePackageIndices) >= maximumCount:
+                break
+            duePackageIndices.append(heapq.heappop(dueQueue)[1])
+
+        # Return
+        return [packages[packageIndex] for packageIndex in sorted(duePackageIndices)]
+
+    def recordCheck(self, packageName: str, upstreamVersion: str, now: float = None) -> float:
+        """
+        Records the upstream version a package was checked at and schedules its
+        next check. The interval shrinks when the version changed, to at most
+        half the typical time between its recent changes, and grows while it
+        does not, between the minimum and maximum interval.
+
+        @param { str } packageName - The name of the package
+        @param { str } upstreamVersion - The upstream version
+        @param { float } now - The time of the sync (Optional)
+        @return float - The interval until the next check in seconds
+        """
+        # Get the time of the sync
+        now = now if now is not None else time.time()
+
+        with self._lock:
+            # Get the scheduled package
+            entry: dict = self._entries.get(packageName)
+
+            # First check, start at the shortest interval
+            if entry is None:
+                self._entries[packageName] = {
+                    "version": upstreamVersion,
+                    "checkedAt": now,
+                    "interval": self._minimumInterval,
+                    "changes": [],
+                }
+                return self._minimumInterval
+
+            # Version changed
+            interval: float
+            if upstreamVersion != entry["version"]:
+                # Remember when
+                entry["version"] = upstreamVersion
+                entry["changes"] = (entry["changes"] + [now])[-self.HISTORY_LENGTH:]
+
+                # Check more often, at least twice per typical time between changes
+                interval = entry["interval"] / self.BACKOFF_FACTOR
+                changeGaps: list[float] = [
+                    laterChange - earlierChange
+                    for earlierChange, laterChange in zip(entry["changes"], entry["changes"][1:])
+                ]
+                if len(changeGaps) > 0:
+                    interval = min(interval, statistics.median(changeGaps) / 2)
+
+            # Version did not change, check less often
+            else:
+                interval = entry["interval"] * self.BACKOFF_FACTOR
+
+            # Schedule the next check
+            entry["interval"] = min(self._maximumInterval, max(self._minimumInterval, interval))
+            entry["checkedAt"] = now
+
+            # Return
+            return entry["interval"]
+
+    def merge(self, scheduleFilePath: str) -> None:
+        """
+        Merges the entries of another schedule file, e.g. the one a shard saved,
+        keeping the most recently checked entry of each package.
+
+        @param { str } scheduleFilePath - The path to the other schedule
+        @return None
+        """
+        # Read the other schedule
+        otherEntries: Final[dict[str, dict]] = self._load(scheduleFilePath)
+
+        with self._lock:
+            # Keep the most recently checked entry of each package
+            for packageName, entry in otherEntries.items():
+                if packageName not in self._entries or entry["checkedAt"] > self._entries[packageName]["checkedAt"]:
+                    self._entries[packageName] = entry
+
+    def save(self, scheduleFilePath: str = None) -> None:
+        """
+        Writes the schedule to disk.
+
+        @param { str } scheduleFilePath - The path to write to instead of the schedule's own (Optional)
+        @return None
+        """
+        # Serialize the schedule, sorted so unchanged entries diff cleanly
+        with self._lock:
+            rawContent: Final[bytes] = json.dumps(
+                {"version": self.SCHEDULE_FORMAT_VERSION, "entries": self._entries},
+                sort_keys=True,
+            ).encode("utf-8")
+
+        # Write to disk
+        storage.writeFileAtomically(scheduleFilePath or self._scheduleFilePath, rawContent)
+
+    # Private Methods
+    def _getDueTime(self, packageName: str) -> float:
+        """
+        Returns the time a package is due to be checked again.
+
+        @param { str } packageName - The name of the package
+        @return float - The time it is due, 0 if never checked
+        """
+        # Get the scheduled package
+        entry: Final[dict] = self._entries.get(packageName)
+        if entry is None:
+            return 0.0
+
+        # Return
+        return entry["checkedAt"] + entry["interval"] * (1 - self.EARLY_CHECK_TOLERANCE)
+
+    def _load(self, scheduleFilePath: str) -> dict[str, dict]:
+        """
+        Reads the scheduled packages, starting empty if the schedule is missing or unreadable.
+
+        @param { str } scheduleFilePath - The path to the schedule
+        @return dict[str, dict] - The scheduled packages by name
+        """
+        try:
+            # Read the schedule
+            with open(scheduleFilePath, "rb") as scheduleFile:
+                rawSchedule: Final[dict] = json.load(scheduleFile)
+        except (OSError, ValueError):
+            return {}
+
+        # Drop schedules of another format
+        if not isinstance(rawSchedule, dict) or rawSchedule.get("version") != self.SCHEDULE_FORMAT_VERSION:
+            return {}
+
+        # Return
+        return rawSchedule.get("entries", {})
+
+class UpstreamVersionParser(HTMLParser):
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+    _detailsTagName: str
+    _detailsDepth: int
+    _isDone: bool
+    _version: str
+
+    # Constants
+
+    # Constructor
+    def __init__(self) -> None:
+        # Class base class constructor
+        super().__init__(convert_charrefs=True)
+
+        # Nothing seen yet
+        self._detailsTagName = None
+        self._detailsDepth = 0
+        self._isDone = False
+        self._version = None
+
+    # Public Methods
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str]]) -> None:
+        # Nothing left to look for
+        if self._isDone:
+            return
+
+        # Get the attributes
+        attributes: Final[dict[str, str]] = dict(attrs)
+
+        # Outside of the package details
+        if self._detailsTagName is None:
+            if attributes.get("id") == "pkgdetails":
+                self._detailsTagName = tag
+                self._detailsDepth = 1
+            return
+
+        # Track nested tags of the same name to find the end of the details
+        if tag == self._detailsTagName:
+            self._detailsDepth += 1
+
+        # The first version entry of the details
+        if attributes.get("itemprop") == "version":
+            self._version = attributes.get("content")
+            self._isDone = True
+
+    def handle_endtag(self, tag: str) -> None:
+        # Leave the package details
+        if not self._isDone and self._detailsTagName is not None and tag == self._detailsTagName:
+            self._detailsDepth -= 1
+            self._isDone = self._detailsDepth == 0
+
+    def isDone(self) -> bool:
+        """
+        Checks if the version entry, or the end of the package details, was seen.
+
+        @return bool - Can parsing stop
+        """
+        return self._isDone
+
+    def getVersion(self) -> str:
+        """
+        Returns the raw version listed in the package details.
+
+        @return str - The raw version, None if not found
+        """
+        return self._version
+
+    # Private Methods
+
+class SyncDatabaseVersionProvider:
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+    _connectionPool: network.ConnectionPool
+    _versionsByURL: dict[str, dict[str, str]]
+    _failuresByURL: dict[str, Exception]
+    _downloadLocks: dict[str, threading.Lock]
+    _lock: threading.Lock
+
+    # Constants
+
+    # Constructor
+    def __init__(self, connectionPool: network.ConnectionPool = None) -> None:
+        # Set the connection pool sync databases are downloaded over
+        self._connectionPool = connectionPool or network.getSharedConnectionPool()
+
+        # Nothing downloaded yet
+        self._versionsByURL = {}
+        self._failuresByURL = {}
+        self._downloadLocks = {}
+        self._lock = threading.Lock()
+
+    # Public Methods
+    def getVersion(self, syncDatabaseURL: str, packageName: str) -> str:
+        """
+        Returns the version a sync database lists for a package.
+
+        @param { str } syncDatabaseURL - The URL of the sync database, e.g. `.../core/os/x86_64/core.db`
+        @param { str } packageName - The name of the package in the sync database
+        @return str - The raw version, e.g. `6.6.7.arch1-1`
+        """
+        # Get the versions of the sync database
+        versions: Final[dict[str, str]] = self.getVersions(syncDatabaseURL)
+
+        # Package is not in the sync database
+        if packageName not in versions:
+            raise UpstreamPackageNotFoundException(
+                f'Package "{packageName}" was not found in {syncDatabaseURL}', packageName
+            )
+
+        # Return
+        return versions[packageName]
+
+    def getVersions(self, syncDatabaseURL: str) -> dict[str, str]:
+        """
+        Returns the version of every package of a sync database, downloading
+        it on first use. Concurrent callers wait for the same download, and
+        a failed download is not retried for every package it lists.
+
+        @param { str } syncDatabaseURL - The URL of the sync database
+        @return dict[str, str] - The raw versions by package name
+        """
+        # Get the lock of the download
+        with self._lock:
+            downloadLock: threading.Lock = self._downloadLocks.setdefault(
+                syncDatabaseURL, threading.Lock()
+            )
+
+        # Download the sync database once
+        with downloadLock:
+            # Download failed before
+            if syncDatabaseURL in self._failuresByURL:
+                raise self._failuresByURL[syncDatabaseURL]
+
+            if syncDatabaseURL not in self._versionsByURL:
+                try:
+                    with self._connectionPool.openURL(syncDatabaseURL) as response:
+                        self._versionsByURL[syncDatabaseURL] = readSyncDatabaseVersions(response)
+                except Exception as exception:
+                    # Remember the failure
+                    self._failuresByURL[syncDatabaseURL] = exception
+                    raise
+
+        # Return
+        return self._versionsByURL[syncDatabaseURL]
+
+    # Private Methods
+
+class UpstreamVersionChecker:
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+    _maximumConcurrency: int
+    _connectionPool: network.ConnectionPool
+    _upstreamCache: UpstreamCache
+    _syncDatabaseVersionProvider: SyncDatabaseVersionProvider
+
+    # Constants
+
+    # Constructor
+    def __init__(self, maximumConcurrency: int = None, connectionPool: network.ConnectionPool = None, upstreamCache: UpstreamCache = None) -> None:
+        # Set the concurrency limit, the connection pool limits each host
+        self._maximumConcurrency = maximumConcurrency or MAXIMUM_CONCURRENCY
+        self._connectionPool = connectionPool or network.getSharedConnectionPool()
+
+        # Set the cache pages are revalidated against
+        self._upstreamCache = upstreamCache
+
+        # Sync databases are downloaded once per checker
+        self._syncDatabaseVersionProvider = SyncDatabaseVersionProvider(self._connectionPool)
+
+    # Public Methods
+    def checkPackages(self, packages: list[db.PackageInfo]) -> Iterator[tuple[db.PackageInfo, str, str]]:
+        """
+        Looks up the upstream version of every package concurrently. Results are
+        yielded as they arrive, a failed lookup yields its error instead of a version.
+
+        @param { list[db.PackageInfo] } packages - The packages to look up
+        @return Iterator[tuple[db.PackageInfo, str, str]] - Each package with its upstream version, or error
+        """
+        # Start the worker threads
+        executor: Final[ThreadPoolExecutor] = ThreadPoolExecutor(
+            max_workers=self._maximumConcurrency, thread_name_prefix="upstream"
+        )
+
+        try:
+            # Queue the lookups, alternating between hosts so workers are not stuck behind one host's limit
+            futures: Final[dict] = {
+                executor.submit(self.checkPackage, package): package
+                for package in _interleaveByHost(packages)
+            }
+
+            # Hand out the results as they arrive
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as exception:
+                    yield futures[future], None, str(exception) or type(exception).__name__
+        finally:
+            # Drop the lookups which did not start yet
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def checkPackage(self, package: db.PackageInfo) -> str:
+        """
+        Looks up the upstream version of a package the way its `upstream_type` says.
+        Versions checked within the cache's time to live are reused, and packages
+        which failed recently raise their last error until they are due again.
+
+        @param { db.PackageInfo } package - The package
+        @return str - A clean version string
+        """
+        # Get the package URLs
+        packageURLs: Final[db.PackageURLInfo] = package.getPackageURLs()
+
+        # Not cached
+        if self._upstreamCache is None:
+            return self._lookUpVersion(package)
+
+        # Get the cache key, a sync database lists many packages
+        cacheKey: Final[str] = (
+            f"{packageURLs.getUpstreamURL()}#{packageURLs.getUpstreamName() or package.getPackageName()}"
+            if packageURLs.getUpstreamType() == UPSTREAM_TYPE_SYNC_DATABASE
+            else packageURLs.getUpstreamURL()
+        )
+
+        # Checked recently
+        freshVersion: Final[str] = self._upstreamCache.getFreshVersion(cacheKey)
+        if freshVersion is not None:
+            return freshVersion
+
+        # Failed recently
+        pendingFailure: Final[str] = self._upstreamCache.getPendingFailure(cacheKey)
+        if pendingFailure is not None:
+            raise Exception(f"{pendingFailure} (retry deferred)")
+
+        try:
+            # Look the version up
+            upstreamVersion: Final[str] = self._lookUpVersion(package)
+        except Exception as exception:
+            # Remember the failure, waiting as long as upstream asked to
+            self._upstreamCache.recordFailure(
+                cacheKey, str(exception) or type(exception).__name__, _getRetryAfter(exception)
+            )
+            raise
+
+        # Cache sync database versions, pages are cached along with their validators
+        if packageURLs.getUpstreamType() == UPSTREAM_TYPE_SYNC_DATABASE:
+            self._upstreamCache.recordMiss(cacheKey, upstreamVersion)
+
+        # Return
+        return upstreamVersion
+
+    def fetchUpstreamVersion(self, upstreamURL: str) -> str:
+        """
+        Downloads an upstream package page and returns the version it lists.
+        A page unchanged since it was cached is neither downloaded nor parsed.
+
+        @param { str } upstreamURL - The upstream URL of the package
+        @return str - A clean version string
+        """
+        # Revalidate the cached page, if any
+        requestHeaders: Final[dict[str, str]] = (
+            self._upstreamCache.getRequestHeaders(upstreamURL)
+            if self._upstreamCache is not None
+            else {}
+        )
+
+        # Download the HTML, waiting for a free connection to the host
+        with self._connectionPool.openURL(upstreamURL, requestHeaders) as response:
+            # Page did not change
+            if response.status == 304 and len(requestHeaders) > 0:
+                cachedVersion: str = self._upstreamCache.recordHit(upstreamURL)
+                if cachedVersion is not None:
+                    return cachedVersion
+
+            # Read the page up to its version
+            upstreamVersion: Final[str] = extractUpstreamVersionFromStream(response)
+
+        # Cache the version with the page's validators
+        if self._upstreamCache is not None:
+            self._upstreamCache.recordMiss(upstreamURL, upstreamVersion, response.headers)
+
+        # Return
+        return upstreamVersion
+
+    # Private Methods
+    def _lookUpVersion(self, package: db.PackageInfo) -> str:
+        """
+        Looks up the upstream version of a package the way its `upstream_type` says.
+
+        @param { db.PackageInfo } package - The package
+        @return str - A clean version string
+        """
+        # Get the package URLs
+        packageURLs: Final[db.PackageURLInfo] = package.getPackageURLs()
+
+        # Arch Linux package page
+        if packageURLs.getUpstreamType() == UPSTREAM_TYPE_HTML:
+            return self.fetchUpstreamVersion(packageURLs.getUpstreamURL())
+
+        # Pacman sync database
+        elif packageURLs.getUpstreamType() == UPSTREAM_TYPE_SYNC_DATABASE:
+            return _filterVersionString(
+                self._syncDatabaseVersionProvider.getVersion(
+                    packageURLs.getUpstreamURL(),
+                    packageURLs.getUpstreamName() or package.getPackageName(),
+                )
+            )
+
+        # Invalid type
+        else:
+            raise Exception(f'Invalid upstream type "{packageURLs.getUpstreamType()}"')
+
+# Enums
+
+# Interfaces
+
+# Constants
+MAXIMUM_CONCURRENCY: Final[int] = int(os.environ.get("ALARM_SYNC_CONCURRENCY", 16))
+UPSTREAM_CACHE_MAXIMUM_SIZE: Final[int] = int(
+    os.environ.get("ALARM_UPSTREAM_CACHE_BYTES", 1024 * 1024)
+)
+UPSTREAM_CACHE_TIME_TO_LIVE: Final[float] = float(
+    os.environ.get("ALARM_UPSTREAM_CACHE_TTL", 6 * 60 * 60)
+)
+FAILURE_RETRY_BASE_DELAY: Final[float] = 15 * 60
+FAILURE_RETRY_MAXIMUM_DELAY: Final[float] = 24 * 60 * 60
+SCHEDULE_MINIMUM_INTERVAL: Final[float] = float(
+    os.environ.get("ALARM_SYNC_MINIMUM_INTERVAL", 60 * 60)
+)
+SCHEDULE_MAXIMUM_INTERVAL: Final[float] = float(
+    os.environ.get("ALARM_SYNC_MAXIMUM_INTERVAL", 7 * 24 * 60 * 60)
+)
+UPSTREAM_TYPE_HTML: Final[str] = "html"
+UPSTREAM_TYPE_SYNC_DATABASE: Final[str] = "syncdb"
+STREAM_CHUNK_SIZE: Final[int] = 8 * 1024
+SHARD_FORMAT_VERSION: Final[int] = 1
+FIND_VERSION_ENTRY_REGEX_PATTERN: Final[str] = r'content="[^"]*"'
+
+# Public Variables
+
+# Private Variables
+_versionNormalizer: Final[version.VersionNormalizer] = version.VersionNormalizer()
+
+# Public Methods
+def getShardIndex(packageName: str, shardCount: int) -> int:
+    """
+    Returns the shard a package belongs to. The hash of its name does not
+    depend on the package order or the Python process, so every runner
+    agrees on the partition.
+
+    @param { str } packageName - The name of the package
+    @param { int } shardCount - The number of shards
+    @return int - The index of the shard, from 0 to shardCount - 1
+    """
+    return int.from_bytes(hashlib.sha256(packageName.encode("utf-8")).digest()[:8], "big") % shardCount
+
+def compareUpstreamVersions(packages: list[db.PackageInfo], upstreamVersions: dict[str, str]) -> list[dict]:
+    """
+    Compares the upstream versions looked up to the current ones, in one batch.
+    Packages without an upstream version (failed lookups) are left out.
+
+    @param { list[db.PackageInfo] } packages - The packages looked up
+    @param { dict[str, str] } upstreamVersions - The upstream versions by package name
+    @return list[dict] - A result per package, see `writeShardResults`
+    """
+    # Get the looked up packages, skipping failed lookups
+    comparedPackages: Final[list[db.PackageInfo]] = [
+        package for package in packages if package.getPackageName() in upstreamVersions
+    ]
+
+    # Compare every upstream version to the current one
+    versionComparisons: Final[list[int]] = version.compareVersionsBatch(
+        [
+            (upstreamVersions[package.getPackageName()], package.getPackageVersion())
+            for package in comparedPackages
+        ]
+    )
+
+    # Output results, upgrades are built, equal versions are not, downgrades are left as they are
+    return [
+        {
+            "name": package.getPackageName(),
+            "oldVersion": package.getPackageVersion(),
+            "newVersion": upstreamVersions[package.getPackageName()],
+            "markedForBuild": None if versionComparison < 0 else versionComparison > 0,
+        }
+        for package, versionComparison in zip(comparedPackages, versionComparisons)
+    ]
+
+def writeShardResults(shardFilePath: str, shardIndex: int, shardCount: int, results: list[dict]) -> None:
+    """
+    Writes the results of a shard. Each result holds the package `name`, its
+    `oldVersion`, the `newVersion` upstream lists, and `markedForBuild`, which
+    is None if the package is left as it is.
+
+    @param { str } shardFilePath - The path to the shard result file
+    @param { int } shardIndex - The index of the shard
+    @param { int } shardCount - The number of shards
+    @param { list[dict] } results - The results of the shard's packages
+    @return None
+    """
+    storage.writeFileAtomically(
+        shardFilePath,
+        json.dumps(
+            {
+                "version": SHARD_FORMAT_VERSION,
+                "shardIndex": shardIndex,
+                "shardCount": shardCount,
+                "results": sorted(results, key=lambda result: result["name"]),
+            },
+            sort_keys=True,
+            indent=4,
+        ).encode("utf-8"),
+    )
+
+def readShardResults(shardFilePaths: list[str]) -> dict[str, dict]:
+    """
+    Reads and merges the results of every shard of a sync. Raises
+    `ShardConflictException` if shards are missing or repeated, were split
+    differently, or disagree on a package.
+
+    @param { list[str] } shardFilePaths - The paths to the shard result files
+    @return dict[str, dict] - The results by package name
+    """
+    # Output results
+    mergedResults: dict[str, dict] = {}
+
+    # Shards read so far
+    shardIndices: set[int] = set()
+    shardCount: int = None
+
+    # Iterate through each shard
+    for shardFilePath in shardFilePaths:
+        # Read the shard
+        with open(shardFilePath, "rb") as shardFile:
+            rawShard: dict = json.load(shardFile)
+
+        # Check the format
+        if rawShard.get("version") != SHARD_FORMAT_VERSION:
+            raise Exception(f'Unsupported shard format in "{shardFilePath}"')
+
+        # Shards were split differently
+        if shardCount is not None and rawShard["shardCount"] != shardCount:
+            raise ShardConflictException(
+                f'Shard "{shardFilePath}" is one of {rawShard["shardCount"]} shards, expected {shardCount}', None
+            )
+        shardCount = rawShard["shardCount"]
+
+        # Shard was read before
+        if rawShard["shardIndex"] in shardIndices:
+            raise ShardConflictException(
+                f'Shard {rawShard["shardIndex"]} is given more than once', None
+            )
+        shardIndices.add(rawShard["shardIndex"])
+
+        # Iterate through each result
+        for result in rawShard["results"]:
+            # Package belongs to another shard
+            if getShardIndex(result["name"], shardCount) != rawShard["shardIndex"]:
+                raise ShardConflictException(
+                    f'Package "{result["name"]}" does not belong to shard {rawShard["shardIndex"]}', result["name"]
+                )
+
+            # Another shard has a different result
+            if result["name"] in mergedResults and mergedResults[result["name"]] != result:
+                raise ShardConflictException(
+                    f'Shards disagree on package "{result["name"]}"', result["name"]
+                )
+
+            # Merge the result
+            mergedResults[result["name"]] = result
+
+    # Shards are missing
+    missingShardIndices: Final[list[int]] = sorted(set(range(shardCount or 0)) - shardIndices)
+    if len(missingShardIndices) > 0:
+        raise ShardConflictException(f"Shards {missingShardIndices} are missing", None)
+
+    # Return
+    return mergedResults
+
+def extractUpstreamVersionFromStream(stream: any) -> str:
+    """
+    Returns the version listed on an Arch Linux package page, reading the page
+    only up to the version entry. Falls back to `extractUpstreamVersion` if
+    the page does not list the version as expected.
+
+    @param { BinaryIO } stream - The page, e.g. an HTTP response
+    @return str - A clean version string
+    """
+    # Output parser
+    parser: Final[UpstreamVersionParser] = UpstreamVersionParser()
+    decoder: Final[codecs.IncrementalDecoder] = codecs.getincrementaldecoder("utf-8")()
+
+    # Chunks read so far, kept for the fallback
+    rawChunks: list[bytes] = []
+
+    # Feed the page until the version is found
+    while not parser.isDone():
+        # Read the next chunk
+        rawChunk: bytes = stream.read(STREAM_CHUNK_SIZE)
+        if not rawChunk:
+            break
+
+        # Parse it
+        rawChunks.append(rawChunk)
+        parser.feed(decoder.decode(rawChunk))
+
+    # Found
+    if parser.getVersion() is not None:
+        return _filterVersionString(parser.getVersion())
+
+    # Parse the whole page the slow way
+    rawChunks.append(stream.read())
+    return extractUpstreamVersion(b"".join(rawChunks).decode("utf-8"))
+
+def readSyncDatabaseVersions(stream: any) -> dict[str, str]:
+    """
+    Reads the version of every package of a pacman sync database, streaming
+    through the (compressed) tarball and only keeping each `desc` entry's
+    name and version.
+
+    @param { BinaryIO } stream - The sync database, e.g. an HTTP response
+    @return dict[str, str] - The raw versions by package name
+    """
+    # Output versions
+    versions: dict[str, str] = {}
+
+    # Iterate through the archive members in order
+    with tarfile.open(fileobj=stream, mode="r|*") as syncDatabase:
+        for member in syncDatabase:
+            # Only `<name>-<version>/desc` entries list versions
+            if not member.isfile() or os.path.basename(member.name) != "desc":
+                continue
+
+            # Parse the entry
+            packageName, packageVersion = _parseSyncDatabaseEntry(
+                syncDatabase.extractfile(member).read()
+            )
+            if packageName is not None and packageVersion is not None:
+                versions[packageName] = packageVersion
+
+    # Return
+    return versions
+
+def extractUpstreamVersion(rawHTML: str) -> str:
+    """
+    Returns the version listed on an Arch Linux package page.
+
+    @param { str } rawHTML - The HTML of the package page
+    @return str - A clean version string
+    """
+    # Parse the HTML
+    pkgDataClean = BeautifulSoup(rawHTML, "html.parser")
+
+    # Find the package version
+    pkgVersionRaw = (
+        pkgDataClean.find(id="pkgdetails")
+        .find(itemprop="version")
+        .decode(None, "utf-8")
+    )
+
+    # Clean the version data
+    return _cleanVersionString(pkgVersionRaw)
+
+# Private Methods
+def _cleanVersionString(rawVersionString: str) -> str:
+    """
+    Returns a clean version string.
+
+    @param { str } rawVersionString - The raw version string
+    @return str - A clean version string
+    """
+    # Output
+    outCleanVersionString: str = ""
+
+    # Parse with RegEx
+    compiledPattern: re.Pattern = re.compile(
+        FIND_VERSION_ENTRY_REGEX_PATTERN, re.IGNORECASE
+    )
+    outCleanVersionString = (
+        compiledPattern.findall(rawVersionString)[0]
+        .replace('content="', "")
+        .replace('"', "")
+    )
+
+    # Return
+    return _filterVersionString(outCleanVersionString)
+
+def _filterVersionString(versionString: str) -> str:
+    """
+    Normalizes an upstream version string, dropping its pkgrel and Arch Linux
+    suffixes by default. See `version.NORMALIZATION_RULES`.
+
+    @param { str } versionString - The version string, e.g. `6.6.10.arch1-1`
+    @return str - The filtered version string, e.g. `6.6.10`
+    """
+    return _versionNormalizer.normalize(versionString)
+
+def _parseSyncDatabaseEntry(rawEntry: bytes) -> tuple[str, str]:
+    """
+    Returns the name and version of a sync database `desc` entry. Entries are
+    `%FIELD%` lines, each followed by its values and a blank line.
+
+    @param { bytes } rawEntry - The `desc` entry
+    @return tuple[str, str] - The package name and raw version, None if missing
+    """
+    # Output fields
+    packageName: str = None
+    packageVersion: str = None
+
+    # Iterate through each field
+    lines: Final[list[str]] = rawEntry.decode("utf-8").split("\n")
+    for lineIndex, line in enumerate(lines[:-1]):
+        if line == "%NAME%":
+            packageName = lines[lineIndex + 1]
+        elif line == "%VERSION%":
+            packageVersion = lines[lineIndex + 1]
+
+    # Return
+    return packageName, packageVersion
+
+def _getRetryAfter(exception: Exception) -> float:
+    """
+    Returns the delay upstream asked for before a failed lookup is retried.
+
+    @param { Exception } exception - The error of the lookup
+    @return float - The delay in seconds, None if upstream did not ask for one
+    """
+    # Host asked to be left alone
+    if isinstance(exception, network.HostUnavailableException):
+        return exception.retryAfter
+
+    # Response with a `Retry-After` header
+    if isinstance(exception, HTTPError) and exception.headers is not None:
+        return network.parseRetryAfter(exception.headers.get("Retry-After"))
+
+    # Return
+    return None
+
+def _interleaveByHost(packages: list[db.PackageInfo]) -> list[db.PackageInfo]:
+    """
+    Reorders packages so consecutive ones are on different upstream hosts
+    where possible, keeping the order among packages of the same host.
+
+    @param { list[db.PackageInfo] } packages - The packages to reorder
+    @return list[db.PackageInfo] - The reordered packages
+    """
+    # Group the packages by host
+    packagesByHost: dict[str, list[db.PackageInfo]] = {}
+    for package in packages:
+        packagesByHost.setdefault(
+            parse.urlsplit(package.getPackageURLs().getUpstreamURL()).netloc, []
+        ).append(package)
+
+    # Take one package of each host in turn
+    interleavedPackages: list[db.PackageInfo] = []
+    hostQueues: list[list[db.PackageInfo]] = list(packagesByHost.values())
+    for queueIndex in range(max((len(queue) for queue in hostQueues), default=0)):
+        for queue in hostQueues:
+            if queueIndex < len(queue):
+                interleavedPackages.append(queue[queueIndex])
+
+    # Return
+    return interleavedPackages
+
+# Run
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,271 @@
+# Import Statements
+# First party
+import os
+import re
+import json
+from typing import Final
+
+# Second party
+
+# Third party
+
+# File Docstring
+# @LinuxOnARM || version.py
+# ---------------------------------------
+# Compares package versions the way pacman does. This is a
+# port of libalpm's `vercmp`, so epochs, pkgrels and version
+# strings formatted differently are ordered like pacman orders
+# them, and upstream versions are normalized before they are
+# compared to or stored as the version of a package.
+#
+# Authors: @MaxineToTheStars <https://github.com/MaxineToTheStars>
+#          @LinuxOnARM       <https://github.com/LinuxOnARM>
+# ----------------------------------------------------------------
+
+# Class Definitions
+class VersionNormalizer:
+    # Enums
+
+    # Interfaces
+
+    # Public Variables
+
+    # Private Variables
+    _rules: list[tuple[re.Pattern, str]]
+
+    # Constants
+
+    # Constructor
+    def __init__(self, rules: list[tuple[str, str]] = None) -> None:
+        # Compile the rules
+        self._rules = [
+            (re.compile(pattern), replacement)
+            for pattern, replacement in (rules if rules is not None else NORMALIZATION_RULES)
+        ]
+
+    # Public Methods
+    def normalize(self, rawVersion: str) -> str:
+        """
+        Applies every rule to an upstream version, in order.
+
+        @param { str } rawVersion - The upstream version, e.g. `6.6.10.arch1-1`
+        @return str - The normalized version, e.g. `6.6.10`
+        """
+        # Apply the rules
+        for pattern, replacement in self._rules:
+            rawVersion = pattern.sub(replacement, rawVersion)
+
+        # Return
+        return rawVersion
+
+    # Private Methods
+
+# Enums
+
+# Interfaces
+
+# Constants
+# Characters of version segments, ASCII only like the C locale
+DIGITS: Final[frozenset[str]] = frozenset("0123456789")
+LETTERS: Final[frozenset[str]] = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ")
+ALPHANUMERICS: Final[frozenset[str]] = DIGITS | LETTERS
+# Regular expression substitutions applied to upstream versions, as a JSON list of `[pattern, replacement]`
+NORMALIZATION_RULES: Final[list[tuple[str, str]]] = [
+    tuple(rule)
+    for rule in json.loads(
+        os.environ.get(
+            "ALARM_VERSION_NORMALIZATION",
+            json.dumps(
+                [
+                    # The pkgrel, e.g. `-1`
+                    [r"-[0-9]+(\.[0-9]+)?$", ""],
+                    # Arch Linux's own kernel suffix, e.g. `.arch1`
+                    [r"\.arch[0-9]+$", ""],
+                ]
+            ),
+        )
+    )
+]
+
+# Public Variables
+
+# Private Variables
+
+# Public Methods
+def compareVersions(versionA: str, versionB: str) -> int:
+    """
+    Compares two versions like `vercmp`. The epochs are compared first, then
+    the versions, then the pkgrels if both versions have one.
+
+    @param { str } versionA - The first version, e.g. `1:6.6.10-1`
+    @param { str } versionB - The second version
+    @return int - -1 if versionA is older, 0 if they are equal and 1 if it is newer
+    """
+    # Identical strings
+    if versionA == versionB:
+        return 0
+
+    # Compare the parts
+    return _compareParsedVersions(_parseVersion(versionA), _parseVersion(versionB))
+
+def compareVersionsBatch(versionPairs: list[tuple[str, str]]) -> list[int]:
+    """
+    Compares many pairs of versions like `compareVersions`, splitting every
+    distinct version only once.
+
+    @param { list[tuple[str, str]] } versionPairs - The pairs of versions to compare
+    @return list[int] - The result of each comparison, in order
+    """
+    # Versions split so far
+    parsedVersions: dict[str, tuple[str, str, str]] = {}
+
+    # Output results
+    results: list[int] = []
+
+    # Iterate through each pair
+    for versionA, versionB in versionPairs:
+        # Identical strings
+        if versionA == versionB:
+            results.append(0)
+            continue
+
+        # Split each version once
+        if versionA not in parsedVersions:
+            parsedVersions[versionA] = _parseVersion(versionA)
+        if versionB not in parsedVersions:
+            parsedVersions[versionB] = _parseVersion(versionB)
+
+        # Compare the parts
+        results.append(_compareParsedVersions(parsedVersions[versionA], parsedVersions[versionB]))
+
+    # Return
+    return results
+
+# Private Methods
+def _parseVersion(rawVersion: str) -> tuple[str, str, str]:
+    """
+    Splits a version into its epoch, version and pkgrel like libalpm's `parseEVR`.
+
+    @param { str } rawVersion - The version, e.g. `1:6.6.10-1`
+    @return tuple[str, str, str] - The epoch (`0` if missing), version and pkgrel (None if missing)
+    """
+    # Skip the leading digits, an epoch if followed by `:`
+    digitsEnd: int = 0
+    while digitsEnd < len(rawVersion) and rawVersion[digitsEnd] in DIGITS:
+        digitsEnd += 1
+
+    # Split the pkgrel off at the last `-` after the epoch
+    releaseStart: Final[int] = rawVersion.rfind("-", digitsEnd)
+    release: Final[str] = rawVersion[releaseStart + 1:] if releaseStart != -1 else None
+    versionEnd: Final[int] = releaseStart if releaseStart != -1 else len(rawVersion)
+
+    # Split the epoch off
+    if digitsEnd < len(rawVersion) and rawVersion[digitsEnd] == ":":
+        return rawVersion[:digitsEnd] or "0", rawVersion[digitsEnd + 1:versionEnd], release
+
+    # Return
+    return "0", rawVersion[:versionEnd], release
+
+def _compareParsedVersions(partsA: tuple[str, str, str], partsB: tuple[str, str, str]) -> int:
+    """
+    Compares two split versions like libalpm's `alpm_pkg_vercmp`.
+
+    @param { tuple[str, str, str] } partsA - The epoch, version and pkgrel of the first version
+    @param { tuple[str, str, str] } partsB - The epoch, version and pkgrel of the second version
+    @return int - -1 if the first version is older, 0 if they are equal and 1 if it is newer
+    """
+    # Compare the epochs, then the versions
+    result: int = _compareSegments(partsA[0], partsB[0]) or _compareSegments(partsA[1], partsB[1])
+
+    # Compare the pkgrels, only if both versions have one
+    if result == 0 and partsA[2] is not None and partsB[2] is not None:
+        result = _compareSegments(partsA[2], partsB[2])
+
+    # Return
+    return result
+
+def _compareSegments(versionA: str, versionB: str) -> int:
+    """
+    Compares two version strings segment by segment like libalpm's `rpmvercmp`.
+    Runs of digits compare numerically and win over runs of letters, runs of
+    letters compare lexically, longer separators between them sort later.
+
+    @param { str } versionA - The first version string
+    @param { str } versionB - The second version string
+    @return int - -1 if versionA is older, 0 if they are equal and 1 if it is newer
+    """
+    # Identical strings
+    if versionA == versionB:
+        return 0
+
+    # Positions in both strings
+    indexA: int = 0
+    indexB: int = 0
+    lengthA: Final[int] = len(versionA)
+    lengthB: Final[int] = len(versionB)
+
+    # Iterate through each segment
+    while indexA < lengthA and indexB < lengthB:
+        # Skip the separators
+        separatorStartA: int = indexA
+        separatorStartB: int = indexB
+        while indexA < lengthA and versionA[indexA] not in ALPHANUMERICS:
+            indexA += 1
+        while indexB < lengthB and versionB[indexB] not in ALPHANUMERICS:
+            indexB += 1
+
+        # Ran out of segments
+        if indexA == lengthA or indexB == lengthB:
+            break
+
+        # Longer separator is newer
+        if indexA - separatorStartA != indexB - separatorStartB:
+            return -1 if indexA - separatorStartA < indexB - separatorStartB else 1
+
+        # Get the segment of the first string, and the same kind of segment of the second
+        isNumeric: Final[bool] = versionA[indexA] in DIGITS
+        segmentCharacters: Final[str] = DIGITS if isNumeric else LETTERS
+        segmentEndA: int = indexA
+        segmentEndB: int = indexB
+        while segmentEndA < lengthA and versionA[segmentEndA] in segmentCharacters:
+            segmentEndA += 1
+        while segmentEndB < lengthB and versionB[segmentEndB] in segmentCharacters:
+            segmentEndB += 1
+        segmentA: str = versionA[indexA:segmentEndA]
+        segmentB: str = versionB[indexB:segmentEndB]
+
+        # Segments of different kinds, numbers are newer
+        if segmentB == "":
+            return 1 if isNumeric else -1
+
+        # Compare numbers by value, without leading zeros
+        if isNumeric:
+            segmentA = segmentA.lstrip("0")
+            segmentB = segmentB.lstrip("0")
+            if len(segmentA) != len(segmentB):
+                return 1 if len(segmentA) > len(segmentB) else -1
+
+        # Compare the segments
+        if segmentA != segmentB:
+            return 1 if segmentA > segmentB else -1
+
+        # Move to the next segment
+        indexA = segmentEndA
+        indexB = segmentEndB
+
+    # Both strings ended together
+    if indexA == lengthA and indexB == lengthB:
+        return 0
+
+    # Remaining letters are older (`1.0a` < `1.0`), remaining numbers newer (`1.0.1` > `1.0`)
+    if (indexA == lengthA and versionB[indexB] not in LETTERS) or (
+        indexA < lengthA and versionA[indexA] in LETTERS
+    ):
+        return -1
+
+    # Return
+    return 1
+
+# Run
+if __name__ == "__main__":
+    pass